@@ -1,10 +1,12 @@
 import streamlit as st
+from session_memory import track_session
 
 st.set_page_config(
     page_title="Hopper Design Fundamentals",
     page_icon="🏗️",
     layout="wide"
 )
+track_session("1_Hopper_Design")
 
 st.title("Hopper Design Fundamentals 🏗️")
 st.markdown("This app provides an overview and calculation tool for silo hopper design based on the methods described by A. W. Jenike and D. Schulze.")
@@ -0,0 +1,196 @@
+import numpy as np
+import pandas as pd
+from scipy.spatial import cKDTree
+from scipy.stats import qmc
+
+from design_calcs import (
+    validate_design_inputs,
+    build_flow_functions,
+    mass_flow_limit_angle,
+    flow_factor_approx,
+    critical_strength,
+    outlet_size,
+)
+
+# --- Adaptive Design-Space Sampling ---
+# Explores the mass-flow design over a box of inputs (φe, φx, Θ, ff and the
+# linear time flow function σc = m·σ1 + c) with far fewer evaluations than a full
+# grid. A scrambled Sobol set (seeded, so runs are reproducible) is refined in rounds:
+# every pair of neighbouring samples (k nearest, in coordinates scaled to the unit
+# box) that lies across a region boundary, or whose outlet B_min differs by more
+# than `value_tol`, gets a sample near its midpoint. Refinement stops when every
+# such pair is shorter than `resolution` or already split (error control), or at
+# the evaluation budget.
+# Regions: mass flow, mass flow without an arching-free outlet (the flow function
+# never drops below σ1/ff), and funnel flow (Θ at or beyond the mass-flow limit).
+# σ1,crit is the closed-form intersection of the linear time flow function with
+# σ1/ff, the same point find_positive_intersection finds on the Results page.
+
+SAMPLING_PARAMETERS = {
+    "delta": "Effective Angle of Internal Friction (phi_e) [°]",
+    "phi_prime_calc": "Wall Friction Angle (phi_x) [°]",
+    "theta_prime_manual": "Hopper Angle (Θ) [°]",
+    "ff_manual": "Flow Factor (ff)",
+    "m_time": "Time Flow Function Slope (m) [-]",
+    "c_time": "Time Flow Function Intercept (c) [kPa]",
+}
+MASS_FLOW, NO_OUTLET, FUNNEL_FLOW = 0, 1, 2
+REGION_LABELS = {MASS_FLOW: "Mass flow", NO_OUTLET: "Mass flow, arches at any outlet", FUNNEL_FLOW: "Funnel flow"}
+INITIAL_SAMPLES = 64
+NEIGHBOURS = 8
+RESOLUTION = 1 / 128 # Of each parameter range
+VALUE_TOL = 0.01 # m
+MAX_EVALUATIONS = 20000
+JITTER = 0.05 # Of the pair length, keeps midpoints off the lines between earlier samples
+
+
+def evaluate_samples(inputs, samples):
+    """
+    Mass-flow results for arrays of sampled inputs ({key in SAMPLING_PARAMETERS: array});
+    other inputs come from `inputs`. Without a sampled ff, ff(Θ) is the chart approximation.
+    """
+    _, _, _, (m_time, c_time), _ = build_flow_functions(inputs)
+    fitted = {"m_time": m_time, "c_time": c_time}
+    value = lambda key: np.asarray(samples[key] if key in samples else fitted.get(key, inputs.get(key)), dtype=float)
+    delta, phi_x, theta = value("delta"), value("phi_prime_calc"), value("theta_prime_manual")
+    m_ff, c_ff = value("m_time"), value("c_time")
+    delta, phi_x, theta, m_ff, c_ff = np.broadcast_arrays(delta, phi_x, theta, m_ff, c_ff)
+    hopper_shape = inputs["hopper_shape"]
+
+    theta_limit = np.nan_to_num(mass_flow_limit_angle(delta, phi_x, hopper_shape), nan=0.0)
+    mass_flow = theta < theta_limit
+    if "ff_manual" in samples:
+        ff = value("ff_manual") * np.ones_like(theta)
+    else:
+        ff = flow_factor_approx(np.where(mass_flow, theta, np.nan), delta, phi_x, hopper_shape)
+    with np.errstate(invalid="ignore"):
+        sigma_c_crit_kpa = np.where(mass_flow, critical_strength(m_ff, c_ff, ff), np.nan)
+        B_min = outlet_size(sigma_c_crit_kpa, inputs["gamma"], theta, hopper_shape)
+    region = np.where(mass_flow, np.where(np.isfinite(B_min), MASS_FLOW, NO_OUTLET), FUNNEL_FLOW)
+    return {
+        "theta_limit": theta_limit,
+        "ff": ff,
+        "sigma_1_crit_kpa": sigma_c_crit_kpa * ff,
+        "sigma_c_crit_kpa": sigma_c_crit_kpa,
+        "B_min": np.where(region == MASS_FLOW, B_min, np.nan),
+        "region": region,
+    }
+
+
+class SampleInterpolant:
+    """
+    Fast lookup over scattered samples: the region of the nearest sample, and the
+    inverse-distance weighted B_min of the nearest samples in that region.
+    """
+
+    def __init__(self, names, low, high, unit_points, region, values, k=NEIGHBOURS):
+        self.names = list(names)
+        self.low, self.high = np.asarray(low, dtype=float), np.asarray(high, dtype=float)
+        self.region = np.asarray(region)
+        self.values = np.asarray(values, dtype=float)
+        self.k = min(k, len(self.region))
+        self.tree = cKDTree(unit_points)
+
+    def __call__(self, points):
+        """Region codes and B_min (m) at points, an (n, parameters) array in parameter units."""
+        unit = (np.atleast_2d(np.asarray(points, dtype=float)) - self.low) / (self.high - self.low)
+        distance, index = self.tree.query(unit, self.k)
+        distance, index = distance.reshape(len(unit), -1), index.reshape(len(unit), -1)
+        region = self.region[index[:, 0]]
+        same = self.region[index] == region[:, None]
+        weights = same / np.maximum(distance, 1e-12)**2
+        values = np.where(same, np.nan_to_num(self.values[index]), 0.0)
+        value = (weights * values).sum(axis=1) / weights.sum(axis=1)
+        return region, np.where(region == MASS_FLOW, value, np.nan)
+
+
+def refinement_pairs(unit, region, values, resolution, value_tol, k=NEIGHBOURS):
+    """
+    Neighbouring sample pairs (i < j) that need a sample between them: pairs across
+    a region boundary or with a B_min step above value_tol, longer than resolution
+    and without a sample near their midpoint yet. Returns the pair indices, their
+    lengths, and the longest such pair across a boundary (the boundary error).
+    """
+    n = len(unit)
+    k = min(k + 1, n)
+    tree = cKDTree(unit)
+    distance, index = tree.query(unit, k)
+    i = np.repeat(np.arange(n), k - 1)
+    j, length = index[:, 1:].ravel(), distance[:, 1:].ravel()
+    a, b = np.minimum(i, j), np.maximum(i, j)
+    _, first = np.unique(a * n + b, return_index=True)
+    a, b, length = a[first], b[first], length[first]
+
+    across = region[a] != region[b]
+    with np.errstate(invalid="ignore"):
+        steep = np.abs(values[a] - values[b]) > value_tol
+    candidate = (across | steep) & (length > resolution)
+    # A pair with a sample near its midpoint is already split into shorter pairs
+    split = np.zeros_like(candidate)
+    split[candidate] = tree.query((unit[a[candidate]] + unit[b[candidate]]) / 2, 1)[0] < length[candidate] / 4
+    active = candidate & ~split
+    boundary_error = float(length[across & ~split].max()) if (across & ~split).any() else 0.0
+    return a[active], b[active], length[active], boundary_error
+
+def adaptive_sample(inputs, bounds, seed=0, initial=INITIAL_SAMPLES, resolution=RESOLUTION,
+                    value_tol=VALUE_TOL, max_evaluations=MAX_EVALUATIONS):
+    """
+    Adaptively samples the mass-flow design over `bounds` ({key in SAMPLING_PARAMETERS:
+    (low, high)}). Returns the sample table, a SampleInterpolant, and the run statistics.
+    """
+    validate_design_inputs(dict(inputs, flow_pattern="Funnel-Flow"))
+    if "theta_prime_manual" not in bounds and "theta_prime_manual" not in inputs:
+        raise ValueError("Sample the hopper angle or set 'theta_prime_manual' in the inputs.")
+    unknown = set(bounds) - set(SAMPLING_PARAMETERS)
+    if unknown or not bounds:
+        raise ValueError(f"Sample one or more of {list(SAMPLING_PARAMETERS)}; unknown: {sorted(unknown)}.")
+    names = list(bounds)
+    low = np.array([bounds[name][0] for name in names], dtype=float)
+    high = np.array([bounds[name][1] for name in names], dtype=float)
+    if np.any(high <= low):
+        raise ValueError("Each sampling range needs high > low.")
+    rng = np.random.default_rng(seed)
+
+    def evaluate(unit):
+        points = low + unit * (high - low)
+        return evaluate_samples(inputs, {name: points[:, column] for column, name in enumerate(names)})
+
+    unit = qmc.Sobol(len(names), scramble=True, seed=rng).random(min(initial, max_evaluations))
+    results = evaluate(unit)
+    rounds = np.zeros(len(unit), dtype=int)
+    converged = False
+    n_round = 0
+    while True:
+        a, b, length, boundary_error = refinement_pairs(unit, results["region"], results["B_min"], resolution, value_tol)
+        if len(a) == 0:
+            converged = True
+            break
+        budget = max_evaluations - len(unit)
+        if budget <= 0:
+            break
+        order = np.argsort(-length, kind="stable")[:budget] # Longest pairs first
+        a, b, length = a[order], b[order], length[order]
+        new = (unit[a] + unit[b]) / 2 + rng.normal(scale=JITTER / np.sqrt(len(names)), size=(len(a), len(names))) * length[:, None]
+        new = np.clip(new, 0.0, 1.0)
+        _, keep = np.unique(np.floor(new / (resolution / 2)), axis=0, return_index=True) # Pairs sharing a midpoint
+        new = new[np.sort(keep)]
+        n_round += 1
+        new_results = evaluate(new)
+        unit = np.vstack([unit, new])
+        results = {key: np.concatenate([results[key], new_results[key]]) for key in results}
+        rounds = np.concatenate([rounds, np.full(len(new), n_round)])
+
+    points = low + unit * (high - low)
+    table = pd.DataFrame({name: points[:, column] for column, name in enumerate(names)})
+    for key in ("theta_limit", "ff", "sigma_1_crit_kpa", "sigma_c_crit_kpa", "B_min", "region"):
+        table[key] = results[key]
+    table["round"] = rounds
+    return {
+        "table": table,
+        "interpolant": SampleInterpolant(names, low, high, unit, results["region"], results["B_min"]),
+        "evaluations": len(unit),
+        "rounds": n_round,
+        "converged": converged,
+        "boundary_error": boundary_error,
+        "grid_evaluations": int(round(1 / resolution + 1))**len(names),
+    }
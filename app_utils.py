@@ -2,6 +2,7 @@ import streamlit as st
 import numpy as np
 from scipy.interpolate import interp1d
 from scipy.optimize import brentq
+from perf_spans import timed
 
 # --- Ratholing Functions (Funnel Flow) ---
 
@@ -12,6 +13,7 @@ f_phi_i_data = {
 }
 f_phi_i_func = interp1d(f_phi_i_data["phi_i"], f_phi_i_data["f"], fill_value="extrapolate")
 
+@timed("chart lookup")
 def get_f_phi_i(phi_lin, show_message=True):
     """
     Interpolates f(phi_i) from digitized data of Schulze, Fig. 10.19.
@@ -58,7 +60,47 @@ def get_flow_factor_ffp(phi_e, phi_lin, f_phi_i, show_message=True):
     else:
         return ff_p
 
+# --- Mass-Flow Chart Lookup ---
+def get_design_chart(phi_e, shape, show_message=True):
+    """
+    Selects the correct chart filename based on user input.
+    Returns the filename and a caption.
+    """
+    # Round phi_e to the nearest 5 degrees to match the charts
+    phi_e_rounded = int(5 * round(phi_e / 5))
+    
+    if shape == "Conical":
+        phi_e_clamped = int(np.clip(phi_e_rounded, 25, 60))
+        if phi_e_clamped != phi_e_rounded and show_message:
+            st.warning(f"$\\phi_e$ of {phi_e:.1f}° is outside the chart range [25°, 60°]. Using chart for {phi_e_clamped}°.")
+        
+        chart_map = {
+            25: "fig_10_30.png", 30: "fig_10_31.png", 35: "fig_10_32.png",
+            40: "fig_10_33.png", 45: "fig_10_34.png", 50: "fig_10_35.png",
+            55: "fig_10_36.png", 60: "fig_10_37.png"
+        }
+        filename = chart_map.get(phi_e_clamped, "fig_10_33.png") # Default to 40
+        caption = f"Fig. {filename.split('_')[1].split('.')[0]}: Mass flow chart for CONICAL hopper with $\\phi_e = {phi_e_clamped}^\\circ$."
+        return filename, caption
+
+    elif shape == "Plane-Flow (Slot)":
+        phi_e_clamped = int(np.clip(phi_e_rounded, 25, 60))
+        if phi_e_clamped != phi_e_rounded and show_message:
+            st.warning(f"$\\phi_e$ of {phi_e:.1f}° is outside the chart range [25°, 60°]. Using chart for {phi_e_clamped}°.")
+
+        chart_map = {
+            25: "fig_10_38.png", 30: "fig_10_39.png", 35: "fig_10_40.png",
+            40: "fig_10_41.png", 45: "fig_10_42.png", 50: "fig_10_43.png",
+            55: "fig_10_44.png", 60: "fig_10_45.png"
+        }
+        filename = chart_map.get(phi_e_clamped, "fig_10_41.png") # Default to 40
+        caption = f"Fig. {filename.split('_')[1].split('.')[0]}: Mass flow chart for PLANE-FLOW hopper with $\\phi_e = {phi_e_clamped}^\\circ$."
+        return filename, caption
+    
+    return None, None
+
 # --- Other Helpers ---
+@timed("fitting")
 def create_line_func(x_vals, y_vals):
     """
     Creates a linear function y = mx + c from lists of x and y values.
@@ -79,6 +121,7 @@ def create_line_func(x_vals, y_vals):
     m, c = np.polyfit(x_vals_np, y_vals_np, 1)
     return (lambda x: m * x + c), (m, c)
 
+@timed("root-finding")
 def find_positive_intersection(func_a, func_b, upper_hint=30.0, max_expansions=20):
     """
     Finds the first non-negative intersection of two continuous functions.
@@ -0,0 +1,287 @@
+import argparse
+import copy
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+from app_utils import (
+    create_line_func,
+    get_f_phi_i,
+    get_flow_factor_ffp,
+    find_positive_intersection,
+)
+from design_calcs import run_design, FF_X_COL, FF_Y_COL
+from case_store import empty_library, add_solid, attach_wall_yield_locus, WYL_X_COL, WYL_Y_COL
+from comparison_matrix import comparison_matrix, ranked_table
+from design_graph import DesignGraph
+from similar_designs import FEATURES, RESULTS, SimilarityIndex
+
+BASELINE_FILE = "bench_baseline.json"
+EXAMPLE_FILE = "last_inputs.json"
+DEFAULT_SIZES = [1, 1000]
+FULL_SIZES = [1, 1000, 1000000]
+DEFAULT_THRESHOLD = 0.25 # Flag anything more than 25% slower than the baseline
+
+
+def time_call(func, repeat=3, min_time=0.2):
+    """
+    Returns the best time per call (s) for func().
+    The loop count is scaled so one repeat lasts at least min_time.
+    """
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1_000_000:
+            break
+        loops *= 10
+
+    best = elapsed / loops
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter() - start) / loops)
+    return best
+
+
+# --- Micro-benchmarks (app_utils) ---
+def bench_create_line_func():
+    x_vals, y_vals = [3.1, 18.9], [1.5, 5.0]
+    return time_call(lambda: create_line_func(x_vals, y_vals))
+
+def bench_create_line_func_1000_points():
+    rng = np.random.default_rng(0)
+    x_vals = list(rng.uniform(1, 30, 1000))
+    y_vals = [0.22 * x + 0.8 for x in x_vals]
+    return time_call(lambda: create_line_func(x_vals, y_vals))
+
+def bench_find_positive_intersection():
+    # Example time flow function against ff = 1.3, bracketed without expansion
+    return time_call(lambda: find_positive_intersection(lambda x: 0.22 * x + 0.8, lambda x: x / 1.3, upper_hint=18.9))
+
+def bench_find_positive_intersection_worst_case():
+    # Root just below the last bracket (upper_hint * 2**19), so all 20 expansions run
+    root = 0.9 * 2.0**19
+    return time_call(lambda: find_positive_intersection(lambda x: 0.5 * x + root / 2, lambda x: x, upper_hint=1.0))
+
+def bench_get_f_phi_i():
+    return time_call(lambda: get_f_phi_i(47.5, show_message=False))
+
+def bench_get_flow_factor_ffp():
+    f_phi_i = get_f_phi_i(50, show_message=False)
+    return time_call(lambda: get_flow_factor_ffp(50, 50, f_phi_i, show_message=False))
+
+def make_library(n_solids=30, n_walls=12, time_levels=("Instantaneous", "12 h", "72 h"), seed=0):
+    """Synthetic case library with a wall yield locus for every solid/wall pair."""
+    rng = np.random.default_rng(seed)
+    library = empty_library()
+    for i in range(n_solids):
+        c = rng.uniform(0.3, 1.2)
+        flow_functions = {
+            label: [{FF_X_COL: s1, FF_Y_COL: (0.2 + 0.05 * k) * s1 + c} for s1 in (3.0, 10.0, 19.0)]
+            for k, label in enumerate(time_levels)
+        }
+        add_solid(library, f"Solid {i}", rng.uniform(800, 2500), rng.uniform(35, 60), flow_functions)
+        for j in range(n_walls):
+            tan_phi_x = np.tan(np.radians(rng.uniform(10, 35)))
+            attach_wall_yield_locus(library, f"Solid {i}", f"Wall {j}", [
+                {WYL_X_COL: sigma, WYL_Y_COL: tan_phi_x * sigma} for sigma in (3.0, 8.0, 12.0)
+            ])
+    return library
+
+def bench_comparison_matrix():
+    # Typical liner study, matrix plus ranked table
+    library = make_library()
+    return time_call(lambda: ranked_table(comparison_matrix(library, "Conical")))
+
+def bench_similar_designs_query():
+    # Five closest of 10^6 synthetic cases (index built outside the timed region)
+    rng = np.random.default_rng(0)
+    n = 1000000
+    features = rng.uniform(0.5, 1.5, size=(n, len(FEATURES))) * [1500.0, 45.0, 25.0, 0.2, 0.3, 1.0]
+    index = SimilarityIndex(features, {key: np.zeros(n) for key in RESULTS}, {}, {})
+    point = features[n // 2] * 1.01
+    return time_call(lambda: index.query_indices(point))
+
+def make_k_sweep(n=100):
+    with open(EXAMPLE_FILE, "r") as f:
+        base = dict(json.load(f), flow_pattern="Funnel-Flow")
+    return [dict(base, K_janssen=0.3 + 0.4 * i / n) for i in range(n)]
+
+def bench_k_sweep_run_design():
+    # Funnel-flow K_janssen sweep, every case from scratch (per case)
+    cases = make_k_sweep()
+    return time_call(lambda: [run_design(case) for case in cases]) / len(cases)
+
+def bench_k_sweep_design_graph():
+    # Same sweep through one DesignGraph: only the Janssen bound is recomputed (per case)
+    cases = make_k_sweep()
+
+    def sweep():
+        graph = DesignGraph()
+        for case in cases:
+            graph.evaluate(case)
+    return time_call(sweep) / len(cases)
+
+
+# --- End-to-end benchmarks (design_calcs.run_design) ---
+def make_cases(n, flow_pattern, seed=0):
+    """
+    Returns n input dicts built from the last_inputs.json example, with the
+    bulk density, friction angles and time flow function perturbed by up to +/-10%.
+    """
+    with open(EXAMPLE_FILE, "r") as f:
+        base = json.load(f)
+    base["flow_pattern"] = flow_pattern
+
+    rng = np.random.default_rng(seed)
+    scale = rng.uniform(0.9, 1.1, size=(n, 4))
+    cases = []
+    for gamma_s, delta_s, phi_x_s, sigma_c_s in scale:
+        case = copy.deepcopy(base)
+        case["gamma"] = base["gamma"] * gamma_s
+        case["delta"] = base["delta"] * delta_s
+        case["phi_prime_calc"] = base["phi_prime_calc"] * phi_x_s
+        for row in case["ff_time_data"]:
+            row["Strength σc (kPa)"] *= sigma_c_s
+        cases.append(case)
+    return cases
+
+def bench_run_design(n, flow_pattern, chunk_size=10000, repeat=3):
+    """
+    Returns the wall time (s) to run the full design for n cases. Cases are built
+    in chunks outside the timed region so 10^6 cases fit in memory; runs of up
+    to chunk_size cases are repeated and the best time is kept.
+    """
+    if n > chunk_size:
+        repeat = 1
+
+    best = None
+    for _ in range(repeat):
+        total = 0.0
+        for chunk_start in range(0, n, chunk_size):
+            cases = make_cases(min(chunk_size, n - chunk_start), flow_pattern, seed=chunk_start)
+            start = time.perf_counter()
+            for case in cases:
+                run_design(case)
+            total += time.perf_counter() - start
+        best = total if best is None else min(best, total)
+    return best
+
+
+MICRO_BENCHMARKS = {
+    "create_line_func": bench_create_line_func,
+    "create_line_func[1000 points]": bench_create_line_func_1000_points,
+    "find_positive_intersection": bench_find_positive_intersection,
+    "find_positive_intersection[worst-case expansion]": bench_find_positive_intersection_worst_case,
+    "get_f_phi_i": bench_get_f_phi_i,
+    "get_flow_factor_ffp": bench_get_flow_factor_ffp,
+    "comparison_matrix[30 solids x 12 walls x 3 time levels]": bench_comparison_matrix,
+    "similar_designs query[10^6 cases]": bench_similar_designs_query,
+    "K_janssen sweep[run_design]": bench_k_sweep_run_design,
+    "K_janssen sweep[design graph]": bench_k_sweep_design_graph,
+}
+
+
+def run_benchmarks(sizes=DEFAULT_SIZES, name_filter=None):
+    """Runs all benchmarks and returns {name: seconds}. End-to-end timings are totals for n cases."""
+    results = {}
+    for name, bench in MICRO_BENCHMARKS.items():
+        if name_filter and name_filter not in name:
+            continue
+        results[name] = bench()
+        print(f"{name:<55} {results[name] * 1e6:12.2f} us/call")
+
+    for flow_pattern in ["Mass-Flow", "Funnel-Flow"]:
+        for n in sizes:
+            name = f"run_design[{flow_pattern}, n={n}]"
+            if name_filter and name_filter not in name:
+                continue
+            results[name] = bench_run_design(n, flow_pattern)
+            print(f"{name:<55} {results[name]:12.4f} s total ({results[name] / n * 1e6:.1f} us/case)")
+    return results
+
+
+def compare_results(baseline, current, threshold=DEFAULT_THRESHOLD):
+    """Returns a list of (name, baseline_s, current_s, ratio) for benchmarks slower than baseline * (1 + threshold)."""
+    regressions = []
+    for name, current_s in current.items():
+        baseline_s = baseline.get(name)
+        if baseline_s is None or baseline_s <= 0:
+            continue
+        ratio = current_s / baseline_s
+        if ratio > 1 + threshold:
+            regressions.append((name, baseline_s, current_s, ratio))
+    return regressions
+
+
+def environment_info():
+    return {
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+    }
+
+
+def parse_sizes(text):
+    return [int(float(size)) for size in text.split(",") if size.strip()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Timing benchmarks for app_utils and the Results-page calculations.")
+    parser.add_argument("command", choices=["run", "save", "compare"], help="run: print timings, save: write the baseline, compare: flag regressions against the baseline")
+    parser.add_argument("--sizes", default=None, help="Comma-separated end-to-end case counts (default 1,1000; 'full' for 1,1000,1e6)")
+    parser.add_argument("--baseline", default=BASELINE_FILE, help=f"Baseline JSON file (default {BASELINE_FILE})")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD, help="Allowed slowdown before a benchmark is flagged (0.25 = 25%%)")
+    parser.add_argument("-k", dest="name_filter", default=None, help="Only run benchmarks whose name contains this text")
+    args = parser.parse_args(argv)
+
+    if args.sizes == "full":
+        sizes = FULL_SIZES
+    elif args.sizes:
+        sizes = parse_sizes(args.sizes)
+    else:
+        sizes = DEFAULT_SIZES
+
+    results = run_benchmarks(sizes, args.name_filter)
+
+    if args.command == "save":
+        with open(args.baseline, "w") as f:
+            json.dump({"environment": environment_info(), "results": results}, f, indent=4)
+            f.write("\n")
+        print(f"Baseline saved to '{args.baseline}'.")
+
+    elif args.command == "compare":
+        try:
+            with open(args.baseline, "r") as f:
+                baseline = json.load(f)
+        except FileNotFoundError:
+            print(f"No baseline file found ('{args.baseline}'). Run 'save' first.")
+            return 2
+
+        changed = {
+            key: (value, baseline.get("environment", {}).get(key))
+            for key, value in environment_info().items()
+            if key in ("python", "numpy") and baseline.get("environment", {}).get(key) != value
+        }
+        for key, (current, recorded) in changed.items():
+            print(f"WARNING: the baseline was recorded with {key} {recorded}, this run uses {key} {current}; timings may differ for that reason alone.")
+        regressions = compare_results(baseline["results"], results, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) beyond {args.threshold:.0%}:")
+            for name, baseline_s, current_s, ratio in regressions:
+                print(f"REGRESSION: {name}: {baseline_s:.3g} s -> {current_s:.3g} s ({ratio:.2f}x)")
+            return 1
+        print(f"\nNo regressions beyond {args.threshold:.0%} against '{args.baseline}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,247 @@
+import math
+
+import numpy as np
+import pandas as pd
+
+import disk_cache
+from case_store import library_cases, time_levels
+from design_calcs import build_flow_functions, run_design
+from report_builder import figure_spec, line, points
+from study_jobs import STUDIES_DIR, list_jobs, load_cases, summarize_design
+
+# --- Multi-Case Comparison ---
+# Evaluates several saved cases side by side: the submitted inputs, every solid/wall
+# pair and time level of the case library designed with the submitted geometry,
+# and the cases of batch studies. Each case is looked up in the shared disk cache
+# (SILO_CACHE_DIR) by the hash of its inputs; the missing ones are designed
+# concurrently in a process pool and written back, so the next comparison that
+# contains them, in any process, reads them instead. The results are returned as
+# aligned tables (one column per case) and as figure specs in the report_builder
+# format with one colour per case, rendered by report_builder.render_figure.
+
+DESIGN_NAMESPACE = "design"
+SUBMITTED = "Submitted"
+
+# Result rows: summarize_design() key -> label
+RESULT_ROWS = {
+    "governing": "Required outlet / top opening [m]",
+    "B_min": "Mass-flow outlet B_min [m]",
+    "D_top": "Hopper top opening D_top [m]",
+    "h_hopper": "Mass-flow hopper height [m]",
+    "D_crit_lower": "Rathole D_crit, lower bound [m]",
+    "D_crit_upper": "Rathole D_crit, upper bound [m]",
+    "B_crit": "No-doming slot width b_crit [m]",
+    "final_crit_dim": "Controlling funnel-flow dimension [m]",
+    "sigma_1_crit_kpa": "σ1,crit [kPa]",
+    "sigma_c_crit_kpa": "σc,crit [kPa]",
+}
+
+
+# --- Saved Cases ---
+def case_label(inputs):
+    label = f"{inputs.get('solid_name', 'Case')} on {inputs.get('wall_material', '')}".strip()
+    return f"{label} ({inputs['time_level']})" if inputs.get("time_level") else label
+
+def _add(cases, label, inputs):
+    unique, count = label, 2
+    while unique in cases:
+        unique = f"{label} [{count}]"
+        count += 1
+    cases[unique] = inputs
+
+def saved_cases(base_inputs=None, library=None, studies_dir=STUDIES_DIR):
+    """
+    Cases that can be compared, {label: inputs dict} in the last_inputs.json format:
+    the submitted base_inputs, each library solid/wall pair at each time level (with
+    the geometry and flow pattern of base_inputs, see case_store.library_cases) and
+    the cases of the batch studies in studies_dir.
+    """
+    cases = {}
+    if base_inputs is not None:
+        _add(cases, f"{SUBMITTED}: {case_label(base_inputs)}", base_inputs)
+        if library is not None:
+            for level in time_levels(library):
+                for inputs in library_cases(library, base_inputs, time_level=level):
+                    if inputs["time_level"] == level: # Solids without this level fall back to their last one
+                        _add(cases, f"Library: {case_label(inputs)}", inputs)
+    for job in list_jobs(studies_dir):
+        if job.get("kind") != "batch":
+            continue
+        try:
+            job_cases = load_cases(job["id"], studies_dir)
+        except (OSError, ValueError):
+            continue
+        for index, inputs in enumerate(job_cases):
+            _add(cases, f"Study {job['title']} #{index + 1}: {case_label(inputs)}", inputs)
+    return cases
+
+
+# --- Evaluation ---
+def design_case(inputs):
+    """Designs one case (runs in the worker processes). Returns {"results", "error"}."""
+    try:
+        return {"results": run_design(inputs), "error": None}
+    except (KeyError, ValueError, TypeError, ZeroDivisionError) as e:
+        return {"results": None, "error": str(e) or type(e).__name__}
+
+def design_cases(cases, pool=None):
+    """
+    Designs a list of cases: each is read from the shared disk cache when it holds
+    the case, the others are evaluated in `pool` (a concurrent.futures executor, or
+    in this process when None) and written to the cache. Returns one evaluation per
+    case ({"results", "error", "cached"}), in order.
+    """
+    shared = disk_cache.default_cache()
+    keys = [shared.key(DESIGN_NAMESPACE, inputs) for inputs in cases] if shared is not None else [None] * len(cases)
+    evaluations = [shared.get(key) if shared is not None else None for key in keys]
+    missing = [i for i, evaluation in enumerate(evaluations) if evaluation is None]
+    evaluations = [dict(evaluation, cached=True) if evaluation is not None else None for evaluation in evaluations]
+
+    if pool is not None and len(missing) > 1:
+        computed = list(pool.map(design_case, [cases[i] for i in missing]))
+    else:
+        computed = [design_case(cases[i]) for i in missing]
+    for i, evaluation in zip(missing, computed):
+        if shared is not None and evaluation["error"] is None:
+            shared.put(keys[i], evaluation)
+        evaluations[i] = dict(evaluation, cached=False)
+    return evaluations
+
+
+# --- Tables ---
+def _required_outlet(inputs, results):
+    if inputs["flow_pattern"] == "Expanded-Flow":
+        return results["expanded"]["D_top"]
+    if inputs["flow_pattern"] == "Mass-Flow":
+        return results["mass_flow"]["B_min"]
+    return results["final_crit_dim"]
+
+def smallest_per_flow_pattern(cases, governing):
+    """
+    Marks the smallest required outlet among the cases of each flow pattern: the
+    governing row compares B_min, the controlling funnel-flow dimension and D_top,
+    which are only comparable within one flow pattern. Patterns with a single case
+    (or a single designed case) are not marked.
+    """
+    marked = [False] * len(cases)
+    for flow_pattern in {inputs.get("flow_pattern") for inputs in cases}:
+        indices = [i for i, inputs in enumerate(cases) if inputs.get("flow_pattern") == flow_pattern and not np.isnan(governing[i])]
+        if len(indices) > 1:
+            marked[min(indices, key=lambda i: governing[i])] = True
+    return marked
+
+def result_table(labels, cases, evaluations):
+    """Results aligned by row (RESULT_ROWS labels) with one column per case; NaN where a row does not apply."""
+    columns = {}
+    for label, inputs, evaluation in zip(labels, cases, evaluations):
+        row = {}
+        if evaluation["error"] is None:
+            row = {key: float(value) for key, value in summarize_design(evaluation["results"]).items()}
+            row["governing"] = float(_required_outlet(inputs, evaluation["results"]))
+            if "doming" not in evaluation["results"]:
+                row.pop("B_crit", None) # Doming is only checked for funnel-flow slots
+        columns[label] = [row.get(key, np.nan) for key in RESULT_ROWS]
+    table = pd.DataFrame(columns, index=list(RESULT_ROWS.values()))
+    return table.loc[table.notna().any(axis=1)]
+
+def _flow_functions(inputs):
+    """(m_inst, c_inst, m_time, c_time, sigma_1_max) of a case, NaN when its flow functions are invalid."""
+    try:
+        _, _, (m_inst, c_inst), (m_time, c_time), sigma_1_max = build_flow_functions(inputs)
+    except (KeyError, ValueError):
+        return (np.nan,) * 5
+    return m_inst, c_inst, m_time, c_time, sigma_1_max
+
+# Input rows: label -> value of an inputs dict (None where it does not apply)
+INPUT_ROWS = {
+    "Solid": lambda inputs: inputs.get("solid_name"),
+    "Wall material": lambda inputs: inputs.get("wall_material"),
+    "Time level": lambda inputs: inputs.get("time_level"),
+    "Flow pattern": lambda inputs: inputs.get("flow_pattern"),
+    "Hopper shape": lambda inputs: inputs.get("hopper_shape"),
+    "Bulk density ρb [kg/m³]": lambda inputs: inputs.get("gamma"),
+    "φe [°]": lambda inputs: inputs.get("delta"),
+    "φx [°]": lambda inputs: inputs.get("phi_prime_calc"),
+    "Hopper angle Θ [°]": lambda inputs: inputs.get("theta_prime_manual") if inputs.get("flow_pattern") != "Funnel-Flow" else None,
+    "Flow factor ff": lambda inputs: inputs.get("ff_manual") if inputs.get("flow_pattern") != "Funnel-Flow" else None,
+    "Instantaneous FF slope": lambda inputs: _flow_functions(inputs)[0],
+    "Instantaneous FF intercept [kPa]": lambda inputs: _flow_functions(inputs)[1],
+    "Time FF slope": lambda inputs: _flow_functions(inputs)[2],
+    "Time FF intercept [kPa]": lambda inputs: _flow_functions(inputs)[3],
+    "Silo D [m]": lambda inputs: inputs.get("D_silo"),
+    "Fill height h_f [m]": lambda inputs: inputs.get("h_f"),
+    "Janssen K": lambda inputs: inputs.get("K_janssen"),
+}
+
+def _same(values):
+    numbers = [value for value in values if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    if len(numbers) == len(values):
+        finite = [float(value) for value in numbers if not math.isnan(value)]
+        return len(finite) in (0, len(values)) and all(math.isclose(value, finite[0], rel_tol=1e-9, abs_tol=1e-12) for value in finite)
+    return len({str(value) for value in values}) == 1
+
+def _format(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return "–"
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return f"{float(value):.4g}"
+    return str(value)
+
+def input_differences(labels, cases):
+    """
+    The compared inputs as text, one row per INPUT_ROWS label and one column per
+    case, and a boolean Series that marks the rows whose values differ between cases.
+    """
+    values = {row: [value(inputs) for inputs in cases] for row, value in INPUT_ROWS.items()}
+    table = pd.DataFrame({label: [_format(values[row][i]) for row in INPUT_ROWS] for i, label in enumerate(labels)}, index=list(INPUT_ROWS))
+    differs = pd.Series({row: not _same(row_values) for row, row_values in values.items()})
+    return table, differs
+
+
+# --- Overlay Plots ---
+def case_style(index):
+    """Colour and line style of the index-th case (10 colours, then dashed, dotted, ...)."""
+    return {"color": f"C{index % 10}", "linestyle": ["-", "--", ":", "-."][(index // 10) % 4]}
+
+def flow_function_overlay(labels, cases):
+    """Time flow functions of all cases in one plot (figure spec)."""
+    flow_functions = [_flow_functions(inputs) for inputs in cases]
+    sigma_1_max = np.nanmax([1.0] + [values[4] for values in flow_functions])
+    sigma_1 = np.linspace(0, sigma_1_max * 1.2, 50)
+    series = [
+        line(sigma_1, m_time * sigma_1 + c_time, label, **case_style(i))
+        for i, (label, (_, _, m_time, c_time, _)) in enumerate(zip(labels, flow_functions))
+        if not np.isnan(m_time)
+    ]
+    return figure_spec("Time Flow Functions (t>0)", "Consolidation Stress ($\\sigma_1$) [kPa]", "Unconfined Yield Strength ($\\sigma_c$) [kPa]", series)
+
+def _design_points(results):
+    """(σ1,crit, σc,crit, marker) of every design point in a run_design() result."""
+    design_points = []
+    if "mass_flow" in results:
+        design_points.append((results["mass_flow"]["sigma_1_crit_kpa"], results["mass_flow"]["sigma_c_crit_kpa"], "o"))
+    for name, marker in (("lower", "s"), ("upper", "P")):
+        if name in results:
+            design_points.append((results[name]["sigma_1_crit_kpa"], results[name]["sigma_c_crit_kpa"], marker))
+    return design_points
+
+def design_point_overlay(labels, cases, evaluations):
+    """
+    Design points of all cases on their time flow functions (figure spec): ● mass-flow
+    outlet, ■ rathole lower bound, ✚ rathole upper bound.
+    """
+    series, sigma_1_max = [], 1.0
+    for evaluation in evaluations:
+        if evaluation["error"] is None:
+            sigma_1_max = max([sigma_1_max] + [float(x) for x, _, _ in _design_points(evaluation["results"])])
+    sigma_1 = np.linspace(0, sigma_1_max * 1.3, 50)
+    for i, (label, inputs, evaluation) in enumerate(zip(labels, cases, evaluations)):
+        if evaluation["error"] is not None:
+            continue
+        style = case_style(i)
+        _, _, m_time, c_time, _ = _flow_functions(inputs)
+        governing = _required_outlet(inputs, evaluation["results"])
+        series.append(line(sigma_1, m_time * sigma_1 + c_time, f"{label} ({governing:.3f} m)", **style))
+        for x, y, marker in _design_points(evaluation["results"]):
+            series.append(points([x], [y], None, color=style["color"], marker=marker))
+    return figure_spec("Design Points", "Consolidation Stress ($\\sigma_1$) [kPa]", "Unconfined Yield Strength ($\\sigma_c$) [kPa]", series)
@@ -0,0 +1,174 @@
+import json
+import os
+import threading
+
+import numpy as np
+
+from app_utils import create_line_func
+from design_calcs import (
+    FF_X_COL,
+    FF_Y_COL,
+    HOPPER_ANGLE_MARGIN,
+    get_valid_xy,
+    mean_wall_friction_angle,
+    mass_flow_limit_angle,
+    flow_factor_approx,
+)
+
+# --- Case Library ---
+# Bulk solids, wall materials and the wall yield loci measured for solid/wall pairs,
+# stored in one JSON file:
+#
+# {
+#     "solids": {name: {"gamma": kg/m³, "delta": °, "flow_functions": {time level: [FF rows]}}},
+#     "walls": {name: {"description": str}},
+#     "wall_yield_loci": {solid name: {wall name: [WYL rows]}}
+# }
+#
+# FF and WYL rows use the same column names as the User Inputs tables, so a submitted
+# case can be added directly. A solid can have yield loci on many walls and a wall
+# can carry yield loci of many solids.
+
+CASE_LIBRARY_FILE = os.environ.get("SILO_CASE_LIBRARY", "case_library.json")
+WYL_X_COL = "Normal Stress (kPa)"
+WYL_Y_COL = "Shear Stress (kPa)"
+INSTANTANEOUS = "Instantaneous"
+
+
+def empty_library():
+    return {"solids": {}, "walls": {}, "wall_yield_loci": {}}
+
+def load_library(path=CASE_LIBRARY_FILE):
+    """Returns the stored library, or an empty one if the file does not exist."""
+    try:
+        with open(path, "r") as f:
+            library = json.load(f)
+    except FileNotFoundError:
+        return empty_library()
+    validate_library(library)
+    return library
+
+def save_library(library, path=CASE_LIBRARY_FILE):
+    validate_library(library)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(library, f, indent=4)
+    os.replace(tmp_path, path)
+
+def validate_library(library):
+    """Raises ValueError if `library` does not have the case-library structure."""
+    if not isinstance(library, dict) or any(not isinstance(library.get(key), dict) for key in empty_library()):
+        raise ValueError("A case library needs 'solids', 'walls' and 'wall_yield_loci' objects.")
+    for solid, loci in library["wall_yield_loci"].items():
+        if solid not in library["solids"]:
+            raise ValueError(f"Wall yield loci refer to unknown solid '{solid}'.")
+        for wall in loci:
+            if wall not in library["walls"]:
+                raise ValueError(f"Wall yield locus of '{solid}' refers to unknown wall '{wall}'.")
+
+
+# --- Editing ---
+def add_solid(library, name, gamma, delta, flow_functions):
+    """Adds or replaces a solid. flow_functions maps a time level label to FF rows."""
+    if gamma <= 0:
+        raise ValueError("Bulk density must be greater than 0.")
+    if not (0 < delta < 90):
+        raise ValueError("Effective angle of internal friction must be between 0 and 90 degrees.")
+    library["solids"][name] = {"gamma": float(gamma), "delta": float(delta), "flow_functions": dict(flow_functions)}
+
+def add_wall(library, name, description=""):
+    library["walls"].setdefault(name, {"description": description})
+
+def attach_wall_yield_locus(library, solid, wall, rows):
+    """Stores the WYL rows measured for `solid` on `wall` (the wall is created if needed)."""
+    if solid not in library["solids"]:
+        raise ValueError(f"Unknown solid '{solid}'. Add the solid first.")
+    add_wall(library, wall)
+    library["wall_yield_loci"].setdefault(solid, {})[wall] = list(rows)
+
+def remove_solid(library, name):
+    library["solids"].pop(name, None)
+    library["wall_yield_loci"].pop(name, None)
+
+def remove_wall(library, name):
+    library["walls"].pop(name, None)
+    for loci in library["wall_yield_loci"].values():
+        loci.pop(name, None)
+
+def line_rows(m, c, x_col, y_col, x_values=(5.0, 20.0)):
+    """Two rows on the line y = m*x + c, for inputs defined by equation."""
+    return [{x_col: x, y_col: m * x + c} for x in x_values]
+
+def add_case(library, inputs, time_label="Time"):
+    """
+    Adds a submitted inputs dict (last_inputs.json format): the solid with its
+    instantaneous and time flow functions, the wall, and their wall yield locus.
+    Returns (solid name, wall name).
+    """
+    solid = inputs.get("solid_name") or "Unnamed solid"
+    wall = inputs.get("wall_material") or "Unnamed wall"
+    if inputs["ff_input_method"] == "Define by N test points":
+        ff_inst, ff_time = inputs["ff_inst_data"], inputs["ff_time_data"]
+    else:
+        ff_inst = line_rows(inputs["m_inst"], inputs["c_inst"], FF_X_COL, FF_Y_COL)
+        ff_time = line_rows(inputs["m_time"], inputs["c_time"], FF_X_COL, FF_Y_COL)
+    if inputs["wyl_input_method"] == "Define by N test points":
+        wyl = inputs["wyl_data"]
+    else:
+        wyl = line_rows(inputs["m_wyl"], inputs["c_wyl"], WYL_X_COL, WYL_Y_COL)
+
+    flow_functions = dict(library["solids"].get(solid, {}).get("flow_functions", {}))
+    flow_functions.update({INSTANTANEOUS: ff_inst, time_label: ff_time})
+    add_solid(library, solid, inputs["gamma"], inputs["delta"], flow_functions)
+    attach_wall_yield_locus(library, solid, wall, wyl)
+    return solid, wall
+
+def time_levels(library):
+    """All time level labels in the library, instantaneous first, then in order of appearance."""
+    labels = []
+    for solid in library["solids"].values():
+        for label in solid["flow_functions"]:
+            if label not in labels:
+                labels.append(label)
+    return sorted(labels, key=lambda label: label != INSTANTANEOUS)
+
+def library_cases(library, base_inputs, time_level=None, pairs=None, margin=HOPPER_ANGLE_MARGIN):
+    """
+    Inputs dicts (last_inputs.json format) for the solid/wall pairs with a wall yield
+    locus (all of them, or the (solid, wall) `pairs`). Geometry and flow pattern come
+    from base_inputs; the time flow function is `time_level` (default: the solid's
+    last time level). φx is the mean of the WYL point angles, as on the User Inputs
+    page. Mass- and expanded-flow cases are designed `margin` degrees below the
+    mass-flow limit with the approximate ff, as in the comparison matrix; pairs
+    without a mass-flow hopper angle are left out.
+    """
+    cases = []
+    for solid, loci in library["wall_yield_loci"].items():
+        for wall, wyl_rows in loci.items():
+            if pairs is not None and (solid, wall) not in pairs:
+                continue
+            entry = library["solids"][solid]
+            flow_functions = entry["flow_functions"]
+            label = time_level if time_level in flow_functions else list(flow_functions)[-1]
+            wyl_x, wyl_y = get_valid_xy(wyl_rows, WYL_X_COL, WYL_Y_COL)
+            phi_x = float(mean_wall_friction_angle(wyl_x, wyl_y))
+            if np.isnan(phi_x):
+                continue
+            _, (m_wyl, c_wyl) = create_line_func(wyl_x, wyl_y)
+            hopper = {}
+            if base_inputs["flow_pattern"] in ("Mass-Flow", "Expanded-Flow"):
+                theta = float(mass_flow_limit_angle(entry["delta"], phi_x, base_inputs["hopper_shape"])) - margin
+                if not theta > 0:
+                    continue
+                ff = float(flow_factor_approx(theta, entry["delta"], phi_x, base_inputs["hopper_shape"]))
+                hopper = {"theta_prime_manual": theta, "ff_manual": ff}
+            cases.append(dict(
+                base_inputs,
+                solid_name=solid, wall_material=wall, gamma=entry["gamma"], delta=entry["delta"],
+                wyl_input_method="Define by N test points", wyl_data=wyl_rows,
+                m_wyl=float(m_wyl), c_wyl=float(c_wyl), phi_prime_calc=phi_x,
+                ff_input_method="Define by N test points",
+                ff_inst_data=flow_functions.get(INSTANTANEOUS, flow_functions[label]),
+                ff_time_data=flow_functions[label], time_level=label, **hopper,
+            ))
+    return cases
@@ -0,0 +1,135 @@
+import numpy as np
+
+from case_store import WYL_X_COL, WYL_Y_COL, time_levels
+from design_calcs import (
+    FF_X_COL,
+    FF_Y_COL,
+    HOPPER_ANGLE_MARGIN,
+    mass_flow_limit_angle,
+    flow_factor_approx,
+    mass_flow_outlet_kernel,
+    mean_wall_friction_angle,
+)
+
+# --- Wall x Solid Comparison Matrix ---
+# Mass-flow design values for every (solid, wall, time level) of a case library,
+# computed as broadcast arrays of shape (solids, walls, time levels):
+# wall friction angle φx (mean of the measured WYL points, as on the User Inputs
+# page), mass-flow limit angle, design hopper angle (limit minus margin), flow
+# factor ff(Θ) and minimum outlet B_min = H(Θ)·σc,crit/(ρb·g). Pairs without a
+# wall yield locus or time levels without a flow function are NaN.
+
+MATRIX_COLUMNS = {
+    "phi_x": "φx [°]",
+    "theta_limit": "Mass-flow limit Θ [°]",
+    "theta": "Design Θ [°]",
+    "ff": "ff",
+    "sigma_c_crit_kpa": "σc,crit [kPa]",
+    "B_min": "B_min [m]",
+}
+
+
+def padded_points(row_lists, x_col, y_col):
+    """Stacks lists of table rows into NaN-padded (n, max points) x and y arrays."""
+    n_points = max([len(rows) for rows in row_lists] + [1])
+    x = np.full((len(row_lists), n_points), np.nan)
+    y = np.full((len(row_lists), n_points), np.nan)
+    for i, rows in enumerate(row_lists):
+        for j, row in enumerate(rows):
+            if row.get(x_col) is not None and row.get(y_col) is not None:
+                x[i, j] = row[x_col]
+                y[i, j] = row[y_col]
+    return x, y
+
+def fit_lines(x, y):
+    """
+    Least-squares lines y = m*x + c along the last axis of NaN-padded arrays
+    (the same fit as create_line_func). NaN where fewer than 2 points.
+    """
+    valid = ~(np.isnan(x) | np.isnan(y))
+    n = valid.sum(axis=-1)
+    x0, y0 = np.where(valid, x, 0.0), np.where(valid, y, 0.0)
+    sx, sy = x0.sum(axis=-1), y0.sum(axis=-1)
+    sxx, sxy = (x0 * x0).sum(axis=-1), (x0 * y0).sum(axis=-1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        denominator = n * sxx - sx**2
+        m = np.where(denominator > 0, (n * sxy - sx * sy) / denominator, 0.0)
+        c = (sy - m * sx) / n
+    ok = n >= 2
+    return np.where(ok, m, np.nan), np.where(ok, c, np.nan)
+
+def library_arrays(library):
+    """Converts a case library to the arrays used by comparison_matrix."""
+    solids = list(library["solids"])
+    walls = list(library["walls"])
+    levels = time_levels(library)
+
+    gamma = np.array([library["solids"][s]["gamma"] for s in solids], dtype=float)
+    delta = np.array([library["solids"][s]["delta"] for s in solids], dtype=float)
+
+    ff_rows = [library["solids"][s]["flow_functions"].get(level, []) for s in solids for level in levels]
+    m_ff, c_ff = fit_lines(*padded_points(ff_rows, FF_X_COL, FF_Y_COL))
+
+    loci = library["wall_yield_loci"]
+    wyl_rows = [loci.get(s, {}).get(w, []) for s in solids for w in walls]
+    wyl_x, wyl_y = padded_points(wyl_rows, WYL_X_COL, WYL_Y_COL)
+    phi_x = mean_wall_friction_angle(wyl_x, wyl_y)
+    m_wyl, c_wyl = fit_lines(wyl_x, wyl_y)
+
+    shape = (len(solids), len(walls), len(levels))
+    return {
+        "solids": solids,
+        "walls": walls,
+        "time_levels": levels,
+        "gamma": gamma,
+        "delta": delta,
+        "m_ff": m_ff.reshape(len(solids), len(levels)) if shape[0] and shape[2] else np.empty((shape[0], shape[2])),
+        "c_ff": c_ff.reshape(len(solids), len(levels)) if shape[0] and shape[2] else np.empty((shape[0], shape[2])),
+        "phi_x": phi_x.reshape(len(solids), len(walls)) if shape[0] and shape[1] else np.empty(shape[:2]),
+        "m_wyl": m_wyl.reshape(len(solids), len(walls)) if shape[0] and shape[1] else np.empty(shape[:2]),
+        "c_wyl": c_wyl.reshape(len(solids), len(walls)) if shape[0] and shape[1] else np.empty(shape[:2]),
+    }
+
+def comparison_matrix(library, hopper_shape, margin=HOPPER_ANGLE_MARGIN, arrays=None):
+    """
+    Mass-flow design values for every solid x wall x time level, each an array of
+    shape (solids, walls, time levels). Also returns the axis labels. `arrays` are
+    the library_arrays of the library, if already converted.
+    """
+    if arrays is None:
+        arrays = library_arrays(library)
+    delta = arrays["delta"][:, None, None]
+    gamma = arrays["gamma"][:, None, None]
+    phi_x = arrays["phi_x"][:, :, None]
+    m_ff = arrays["m_ff"][:, None, :]
+    c_ff = arrays["c_ff"][:, None, :]
+
+    theta_limit = mass_flow_limit_angle(delta, phi_x, hopper_shape)
+    theta = np.where(theta_limit - margin > 0, theta_limit - margin, np.nan)
+    ff = flow_factor_approx(theta, delta, phi_x, hopper_shape)
+    outlet = mass_flow_outlet_kernel(m_ff, c_ff, ff, gamma, theta, hopper_shape)
+
+    full = np.broadcast_shapes(theta.shape, outlet["B_min"].shape)
+    values = {
+        "phi_x": phi_x,
+        "theta_limit": theta_limit,
+        "theta": theta,
+        "ff": ff,
+        "sigma_c_crit_kpa": outlet["sigma_c_crit_kpa"],
+        "B_min": outlet["B_min"],
+    }
+    matrix = {key: np.broadcast_to(value, full) for key, value in values.items()}
+    matrix.update({"solids": arrays["solids"], "walls": arrays["walls"], "time_levels": arrays["time_levels"]})
+    return matrix
+
+def ranked_table(matrix, sort_by="B_min", ascending=True):
+    """One row per (solid, wall, time level) with a design, sorted by `sort_by` (NaN rows dropped)."""
+    index = np.argwhere(np.isfinite(matrix[sort_by]))
+    values = matrix[sort_by][tuple(index.T)]
+    order = np.argsort(values if ascending else -values, kind="stable")
+    rows = []
+    for rank, (i, j, k) in enumerate(index[order], start=1):
+        row = {"Rank": rank, "Solid": matrix["solids"][i], "Wall": matrix["walls"][j], "Time level": matrix["time_levels"][k]}
+        row.update({label: float(matrix[key][i, j, k]) for key, label in MATRIX_COLUMNS.items()})
+        rows.append(row)
+    return rows
@@ -0,0 +1,182 @@
+import io
+import os
+import re
+import zipfile
+
+import numpy as np
+import pandas as pd
+
+from case_store import WYL_X_COL, WYL_Y_COL
+from design_calcs import FF_X_COL, FF_Y_COL
+
+# --- Test Data Import ---
+# Reads WYL and flow-function test points from CSV/XLSX exports (e.g. from
+# automated shear testers) into the User Inputs tables. Everything works on whole
+# columns: the stress columns are found by their headers, converted to kPa,
+# and the points are cleaned in one pass:
+# - empty, non-numeric and non-finite values are dropped (decimal commas are read in
+#   semicolon/tab separated files and Excel text cells; in comma separated files a
+#   comma inside a value is ambiguous, e.g. "1,250", and the value is dropped)
+# - negative stresses are dropped
+# - repeated (x, y) points are kept once
+# - optionally, outliers from the linear fit are dropped: residuals further than
+#   OUTLIER_Z robust standard deviations (1.4826 * MAD) from the median residual
+
+TABLE_KINDS = {
+    "wyl": (WYL_X_COL, WYL_Y_COL),
+    "ff": (FF_X_COL, FF_Y_COL),
+}
+# Header patterns (lower case) of the x and y columns
+COLUMN_PATTERNS = {
+    "wyl": (r"normal|σ\s*_?w|sigma\s*_?w", r"shear|τ|tau"),
+    "ff": (r"consol|σ\s*_?1|sigma\s*_?1|major", r"strength|σ\s*_?c|sigma\s*_?c|f\s*_?c\b|unconfined"),
+}
+# Header unit (lower case) -> (label, factor to kPa)
+UNITS = {
+    "kpa": ("kPa", 1.0), "pa": ("Pa", 1e-3), "mpa": ("MPa", 1e3), "bar": ("bar", 100.0), "mbar": ("mbar", 0.1),
+    "psi": ("psi", 6.894757), "kn/m2": ("kN/m²", 1.0), "n/m2": ("N/m²", 1e-3),
+}
+PA_THRESHOLD = 1000.0 # Median stress above which a column without unit is taken as Pa
+OUTLIER_Z = 3.5
+MIN_POINTS_FOR_OUTLIERS = 5
+EXCEL_EXTENSIONS = (".xlsx", ".xlsm", ".xls")
+
+
+def read_table(file, filename=None):
+    """
+    Reads a CSV (comma, semicolon or tab separated) or Excel file into a DataFrame
+    (all columns as read). The CSV field separator is kept in table.attrs["separator"].
+    """
+    filename = filename or getattr(file, "name", "") or ""
+    extension = os.path.splitext(str(filename))[1].lower()
+    if extension in EXCEL_EXTENSIONS:
+        try:
+            return pd.read_excel(file)
+        except (ImportError, zipfile.BadZipFile) as e:
+            raise ValueError(f"Could not read the Excel file: {e}")
+
+    if hasattr(file, "read"):
+        raw = file.read()
+    else:
+        with open(file, "rb") as f:
+            raw = f.read()
+    text = raw.decode("utf-8-sig", errors="replace") if isinstance(raw, bytes) else raw
+    header = text.split("\n", 1)[0]
+    separator = max([";", "\t", ","], key=header.count)
+    try:
+        table = pd.read_csv(io.StringIO(text), sep=separator, dtype=str, skipinitialspace=True)
+    except (pd.errors.ParserError, pd.errors.EmptyDataError) as e:
+        raise ValueError(f"Could not parse the CSV file: {e}")
+    table.attrs["separator"] = separator
+    return table
+
+def find_columns(columns, kind):
+    """Names of the x and y stress columns of a table of `kind` ('wyl' or 'ff')."""
+    found = []
+    for pattern in COLUMN_PATTERNS[kind]:
+        matches = [column for column in columns if re.search(pattern, str(column).lower())]
+        found.append(matches[0] if matches else None)
+    if None in found or found[0] == found[1]:
+        if len(columns) == 2:
+            return columns[0], columns[1] # Two-column file without recognizable headers
+        x_label, y_label = TABLE_KINDS[kind]
+        raise ValueError(f"Could not find the '{x_label}' and '{y_label}' columns in {list(columns)}.")
+    return found[0], found[1]
+
+def column_unit(column):
+    """Unit of a header like 'Normal Stress (Pa)' or 'sigma_1 [kPa]', lower case, or None."""
+    match = re.search(r"[\[(]\s*([a-zA-Z/²2]+)\s*[\])]", str(column))
+    if match is None:
+        return None
+    unit = match.group(1).lower().replace("²", "2")
+    return unit if unit in UNITS else None
+
+def to_numbers(values, decimal_comma=True):
+    """
+    Column to floats; anything non-numeric becomes NaN. With decimal_comma, a single
+    comma in a value without a "." is read as the decimal mark ("2,5" -> 2.5). Other
+    values with commas ("1,250" in a comma separated file, "1.250,5") are ambiguous
+    and become NaN rather than being misread.
+    """
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float, na_value=np.nan)
+    text = values.astype(str).str.strip()
+    if decimal_comma:
+        decimal = (text.str.count(",") == 1) & ~text.str.contains(".", regex=False)
+        text = text.where(~decimal, text.str.replace(",", ".", regex=False))
+    return pd.to_numeric(text, errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+def to_kpa(values, column):
+    """Converts a stress column to kPa. Returns the values and the unit label ('assumed' if not in the header)."""
+    unit = column_unit(column)
+    if unit is not None:
+        label, factor = UNITS[unit]
+        return values * factor, label
+    finite = values[np.isfinite(values)]
+    unit = "pa" if finite.size and np.median(np.abs(finite)) > PA_THRESHOLD else "kpa"
+    label, factor = UNITS[unit]
+    return values * factor, f"{label}, assumed"
+
+def clean_points(x, y, remove_outliers=True, z=OUTLIER_Z):
+    """
+    Drops invalid, negative, repeated and (optionally) outlying points (arrays in kPa).
+    Returns the kept x, y and the number of points dropped for each reason.
+    """
+    x, y = np.asarray(x, dtype=float), np.asarray(y, dtype=float)
+    report = {"rows": int(x.size)}
+
+    finite = np.isfinite(x) & np.isfinite(y)
+    report["invalid"] = int((~finite).sum())
+    x, y = x[finite], y[finite]
+
+    positive = (x >= 0) & (y >= 0)
+    report["negative"] = int((~positive).sum())
+    x, y = x[positive], y[positive]
+
+    _, first = np.unique(np.column_stack([x, y]), axis=0, return_index=True)
+    keep = np.sort(first) # Keep the first of each repeated point, in file order
+    report["duplicates"] = int(x.size - keep.size)
+    x, y = x[keep], y[keep]
+
+    report["outliers"] = 0
+    if remove_outliers and x.size >= MIN_POINTS_FOR_OUTLIERS and np.ptp(x) > 0:
+        m, c = np.polyfit(x, y, 1)
+        residual = y - (m * x + c)
+        deviation = np.abs(residual - np.median(residual))
+        scale = 1.4826 * np.median(deviation)
+        if scale > 0:
+            inlier = deviation <= z * scale
+            report["outliers"] = int((~inlier).sum())
+            x, y = x[inlier], y[inlier]
+
+    report["points"] = int(x.size)
+    return x, y, report
+
+def import_test_data(file, kind, filename=None, remove_outliers=True):
+    """
+    Reads and cleans a test data file for a table of `kind` ('wyl' or 'ff').
+    Returns a DataFrame with the User Inputs columns (kPa) and the import report.
+    """
+    if kind not in TABLE_KINDS:
+        raise ValueError(f"Unknown table kind '{kind}'. Use one of {list(TABLE_KINDS)}.")
+    table = read_table(file, filename)
+    x_column, y_column = find_columns(list(table.columns), kind)
+    decimal_comma = table.attrs.get("separator") != "," # A comma that separates fields cannot also be the decimal mark
+    x, x_unit = to_kpa(to_numbers(table[x_column], decimal_comma), x_column)
+    y, y_unit = to_kpa(to_numbers(table[y_column], decimal_comma), y_column)
+    x, y, report = clean_points(x, y, remove_outliers)
+    if report["points"] < 2:
+        raise ValueError(f"Only {report['points']} valid point(s) left after cleaning; at least 2 are needed.")
+    report.update({"x_column": str(x_column), "y_column": str(y_column), "x_unit": x_unit, "y_unit": y_unit})
+    x_label, y_label = TABLE_KINDS[kind]
+    return pd.DataFrame({x_label: x, y_label: y}), report
+
+def import_summary(report):
+    """One-line description of an import report."""
+    dropped = [
+        f"{report[key]:,} {label}" for key, label in
+        [("invalid", "empty/non-numeric"), ("negative", "negative"), ("duplicates", "duplicate"), ("outliers", "outlier")]
+        if report[key]
+    ]
+    text = f"{report['points']:,} of {report['rows']:,} points imported from '{report['x_column']}' ({report['x_unit']}) and '{report['y_column']}' ({report['y_unit']})."
+    return text + (f" Dropped: {', '.join(dropped)}." if dropped else "")
@@ -0,0 +1,446 @@
+import numpy as np
+
+from app_utils import (
+    get_f_phi_i,
+    get_phi_lin,
+    get_flow_factor_ffp,
+    create_line_func,
+    find_positive_intersection,
+)
+from perf_spans import timed
+
+# --- Define constants ---
+g = 9.81 # m/s^2
+
+FF_X_COL = "Consol. Stress σ₁ (kPa)"
+FF_Y_COL = "Strength σc (kPa)"
+FLOW_PATTERNS = ["Mass-Flow", "Funnel-Flow", "Expanded-Flow"] # Expanded flow: mass-flow hopper below a funnel-flow bin
+
+# --- Design Calculations (Results page) ---
+# All flow-function stresses are in kPa. Outlet and rathole equations convert to Pa.
+
+def get_valid_xy(rows, x_col, y_col):
+    """
+    Returns paired numeric x/y arrays, skipping incomplete rows (None, NaN or inf).
+    rows is a DataFrame (data editor), a NumPy structured array (session records)
+    or a list of row dicts (saved inputs).
+    """
+    if getattr(rows, "dtype", None) is not None and rows.dtype.names is not None: # Records
+        if x_col not in rows.dtype.names or y_col not in rows.dtype.names:
+            return np.zeros(0), np.zeros(0)
+        x = np.asarray(rows[x_col], dtype=float)
+        y = np.asarray(rows[y_col], dtype=float)
+    elif hasattr(rows, "columns"): # DataFrame
+        if x_col not in rows.columns or y_col not in rows.columns:
+            return np.zeros(0), np.zeros(0)
+        x = rows[x_col].to_numpy(dtype=float, na_value=np.nan)
+        y = rows[y_col].to_numpy(dtype=float, na_value=np.nan)
+    else:
+        x = np.array([row.get(x_col) for row in rows], dtype=float)
+        y = np.array([row.get(y_col) for row in rows], dtype=float)
+    valid = np.isfinite(x) & np.isfinite(y)
+    return x[valid], y[valid]
+
+def mean_wall_friction_angle(x, y):
+    """Mean of arctan(τ/σ) over the WYL points with σ > 0, along the last axis (°). NaN with fewer than 2 points."""
+    with np.errstate(divide="ignore", invalid="ignore"):
+        angles = np.where(x > 1e-6, np.degrees(np.arctan(y / x)), np.nan)
+    n = (~np.isnan(angles)).sum(axis=-1)
+    with np.errstate(invalid="ignore"):
+        return np.where(n >= 2, np.nansum(angles, axis=-1) / n, np.nan)
+
+def require_positive(value, label):
+    if value <= 0:
+        raise ValueError(f"{label} must be greater than 0.")
+
+def validate_design_inputs(inputs):
+    """Raises ValueError when the submitted inputs cannot be used for the design."""
+    require_positive(inputs["gamma"], "Bulk density")
+    if not (0 < inputs["delta"] < 90):
+        raise ValueError("Effective angle of internal friction must be between 0 and 90 degrees.")
+    if inputs["flow_pattern"] not in FLOW_PATTERNS:
+        raise ValueError(f"Unknown flow pattern '{inputs['flow_pattern']}'. Use one of {FLOW_PATTERNS}.")
+    if inputs["flow_pattern"] in ("Mass-Flow", "Expanded-Flow"):
+        require_positive(inputs["ff_manual"], "Flow factor")
+    if inputs["flow_pattern"] in ("Funnel-Flow", "Expanded-Flow"):
+        require_positive(inputs["h_f"], "Filling height")
+        require_positive(inputs["D_silo"], "Silo diameter/width")
+        require_positive(inputs["K_janssen"], "Janssen stress ratio K")
+
+def build_flow_functions(inputs):
+    """
+    Builds the instantaneous and time flow functions (kPa) from the submitted inputs.
+    Returns (ff_inst_func, ff_time_func, (m_inst, c_inst), (m_time, c_time), sigma_1_plot_max_base).
+    """
+    if inputs["ff_input_method"] == "Define by N test points":
+        inst_x, inst_y = get_valid_xy(inputs["ff_inst_data"], FF_X_COL, FF_Y_COL)
+        time_x, time_y = get_valid_xy(inputs["ff_time_data"], FF_X_COL, FF_Y_COL)
+
+        if len(inst_x) < 2 or len(time_x) < 2:
+            raise ValueError("Flow Function data must include at least 2 complete instantaneous points and 2 complete time-function points.")
+
+        ff_inst_func, (m_inst, c_inst) = create_line_func(inst_x, inst_y)
+        ff_time_func, (m_time, c_time) = create_line_func(time_x, time_y)
+
+        sigma_1_plot_max_base = float(max(inst_x.max(), time_x.max()))
+    else:
+        m_inst, c_inst = inputs["m_inst"], inputs["c_inst"]
+        m_time, c_time = inputs["m_time"], inputs["c_time"]
+
+        ff_inst_func = lambda sigma_1: m_inst * sigma_1 + c_inst
+        ff_time_func = lambda sigma_1: m_time * sigma_1 + c_time
+
+        sigma_1_plot_max_base = 30
+        if m_time > 0.01:
+            sigma_1_plot_max_base = max(30, (c_time * 5) / m_time)
+
+    return ff_inst_func, ff_time_func, (m_inst, c_inst), (m_time, c_time), sigma_1_plot_max_base
+
+# --- Arching Function and Vectorized Outlet Kernels ---
+# All kernels accept scalars or NumPy arrays and broadcast their arguments,
+# so B(Θ) curves and sweeps are evaluated in one array expression.
+
+DOMING_THETA = 30.0 # Hopper angle (°) used for the funnel-flow no-doming check, H = 1.15
+DOMING_FF = 1.7 # Flow factor of the no-doming check (Schulze 10.3.2.5)
+HOPPER_ANGLE_MARGIN = 3.0 # ° below the mass-flow limit for design (Schulze recommends 2-3°)
+
+def arching_function_coefficients(hopper_shape):
+    """(H(0°), slope per 100°) of the arching function: (2, 1.5) conical, (1, 0.5) plane flow."""
+    m = 1.0 if hopper_shape == "Conical" else 0.0
+    return 1 + m, 0.5 + m
+
+def arching_function_H(theta, hopper_shape):
+    """
+    Jenike's arching function H(Θ) after Arnold & McLean (1976):
+    H = (1 + m) + (0.5 + m) * Θ / 100, with m = 1 for conical and m = 0 for
+    plane-flow hoppers (Θ = hopper angle from vertical in degrees).
+    H(0°) = 2 (conical) and 1 (plane flow) are the Schulze Eq. 10.6b/a constants.
+    """
+    H_0, slope = arching_function_coefficients(hopper_shape)
+    H = H_0 + slope * np.asarray(theta, dtype=float) / 100
+    return H if H.ndim else float(H)
+
+def arching_function_dH(theta, hopper_shape):
+    """dH/dΘ (per degree) of arching_function_H, broadcast to the shape of theta."""
+    dH = np.full(np.shape(theta), arching_function_coefficients(hopper_shape)[1] / 100)
+    return dH if dH.ndim else float(dH)
+
+def outlet_size(sigma_c_crit_kpa, gamma, theta, hopper_shape):
+    """Minimum outlet diameter/width (m): B = H(Θ) * σc,crit / (ρb * g), with σc,crit in kPa."""
+    return arching_function_H(theta, hopper_shape) * np.asarray(sigma_c_crit_kpa, dtype=float) * 1000 / (np.asarray(gamma, dtype=float) * g)
+
+def linear_flow_intersection(m_ff, c_ff, ff):
+    """
+    Vectorized intersection of a linear flow function σc = m_ff * σ1 + c_ff (kPa)
+    with the flow factor line σc = σ1 / ff. Returns σ1,crit (kPa), NaN where there
+    is no non-negative intersection.
+    """
+    m_ff, c_ff, ff = np.broadcast_arrays(*(np.asarray(value, dtype=float) for value in (m_ff, c_ff, ff)))
+    denominator = 1 / ff - m_ff
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sigma_1_crit = c_ff / denominator
+    return np.where((denominator != 0) & (sigma_1_crit >= 0), sigma_1_crit, np.nan)
+
+def mass_flow_outlet_kernel(m_ff, c_ff, ff, gamma, theta, hopper_shape):
+    """
+    Array version of calc_mass_flow for linear time flow functions: returns
+    σ1,crit and σc,crit (kPa), H(Θ) and B_min (m), broadcast over all arguments.
+    """
+    sigma_1_crit_kpa = linear_flow_intersection(m_ff, c_ff, ff)
+    sigma_c_crit_kpa = sigma_1_crit_kpa / np.asarray(ff, dtype=float)
+    return {
+        "sigma_1_crit_kpa": sigma_1_crit_kpa,
+        "sigma_c_crit_kpa": sigma_c_crit_kpa,
+        "H_theta": arching_function_H(theta, hopper_shape),
+        "B_min": outlet_size(sigma_c_crit_kpa, gamma, theta, hopper_shape),
+    }
+
+def mass_flow_limit_angle(phi_e, phi_x, hopper_shape):
+    """
+    Steepest-wall limit for mass flow Θ (°, from vertical), approximating the dashed
+    limit lines of Jenike's mass-flow charts (Schulze Figs. 10.30-10.45).
+    Conical: Θc = 90 - ½·arccos((1 - sinφe)/(2·sinφe)) - ½·(φx + arcsin(sinφx / sinφe))
+    Plane flow: linear fit to Figs. 10.38-10.45, φx = (39.5 + 0.125·φe) - (0.47 + 0.006·φe)·Θp,
+    capped at Θp = 60° and at φx = φe - 3°.
+    NaN where no mass flow is possible.
+    """
+    phi_e = np.asarray(phi_e, dtype=float)
+    phi_x = np.asarray(phi_x, dtype=float)
+    if hopper_shape == "Conical":
+        sin_phi_e = np.sin(np.radians(phi_e))
+        with np.errstate(invalid="ignore"):
+            alpha = np.degrees(np.arccos(np.clip((1 - sin_phi_e) / (2 * sin_phi_e), -1, 1)))
+            omega = np.degrees(np.arcsin(np.sin(np.radians(phi_x)) / sin_phi_e))
+        theta = 90 - 0.5 * alpha - 0.5 * (phi_x + omega)
+        theta = np.where(theta > 0, theta, np.nan)
+    else:
+        theta = np.minimum(((39.5 + 0.125 * phi_e) - phi_x) / (0.47 + 0.006 * phi_e), 60.0)
+        theta = np.where((phi_x <= phi_e - 3) & (theta > 0), theta, np.nan)
+    return theta if theta.ndim else float(theta)
+
+def flow_factor_approx(theta, phi_e, phi_x, hopper_shape):
+    """
+    Approximate Jenike flow factor ff(Θ, φe, φx) for mass-flow hoppers
+    (closed-form approximation of the radial stress field, with H(Θ)).
+    Agrees with the ff lines of Schulze Figs. 10.30-10.45 to chart-reading accuracy
+    inside the mass-flow region; check Θ against mass_flow_limit_angle.
+    """
+    m = 1.0 if hopper_shape == "Conical" else 0.0
+    theta_rad = np.radians(np.asarray(theta, dtype=float))
+    sin_d = np.sin(np.radians(phi_e))
+    phi_x_rad = np.radians(phi_x)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        beta = 0.5 * (phi_x_rad + np.arcsin(np.sin(phi_x_rad) / sin_d))
+        X = 2**m * sin_d / (1 - sin_d) * (np.sin(2 * beta + theta_rad) / np.sin(theta_rad) + 1)
+        Y = (
+            (2 * (1 - np.cos(beta + theta_rad)))**m * (beta + theta_rad)**(1 - m) * np.sin(beta)
+            + np.sin(theta_rad) * np.sin(beta + theta_rad)**(1 + m)
+        ) / ((1 - sin_d) * np.sin(beta + theta_rad)**(2 + m))
+        ff = arching_function_H(np.degrees(theta_rad), hopper_shape) * (1 + sin_d) * Y / (2 * (X - 1) * np.sin(theta_rad))
+    ff = np.where(theta_rad > 0, ff, np.nan)
+    return ff if ff.ndim else float(ff)
+
+def critical_point(ff_design_func, ff, upper_hint=30.0):
+    """σ1,crit and σc,crit (kPa) where the design flow function meets the line σ1 / ff."""
+    sigma_1_crit_kpa = find_positive_intersection(
+        ff_design_func,
+        lambda sigma_1: sigma_1 / ff,
+        upper_hint=upper_hint
+    )
+    return sigma_1_crit_kpa, ff_design_func(sigma_1_crit_kpa)
+
+def rathole_factors(delta, show_message=True):
+    """φlin (approximated by φe), f(φi) (Schulze Fig. 10.19) and ff_p (Eq. 10.11) for the rathole checks."""
+    phi_lin = get_phi_lin(delta, show_message=show_message)
+    f_phi_i = get_f_phi_i(phi_lin, show_message=show_message)
+    ff_p = get_flow_factor_ffp(delta, phi_lin, f_phi_i, show_message=show_message)
+    return phi_lin, f_phi_i, ff_p
+
+def mass_flow_outlet(sigma_1_crit_kpa, sigma_c_crit_kpa, gamma, hopper_shape, theta):
+    """B = H(Θ) * σc,crit / (ρb * g) for a mass-flow critical point (Schulze Eq. 10.6)."""
+    # --- Convert to Pa for physics equations ---
+    sigma_c_crit_pa = sigma_c_crit_kpa * 1000
+
+    H_theta = arching_function_H(theta, hopper_shape)
+    B_min = H_theta * sigma_c_crit_pa / (gamma * g)
+
+    return {
+        "sigma_1_crit_kpa": sigma_1_crit_kpa,
+        "sigma_c_crit_kpa": sigma_c_crit_kpa,
+        "sigma_c_crit_pa": sigma_c_crit_pa,
+        "H_theta": H_theta,
+        "B_min": B_min,
+    }
+
+def calc_mass_flow(ff_design_func, ff_value, gamma, hopper_shape, theta, upper_hint=30.0):
+    """
+    Mass-flow outlet sizing (Schulze 10.3.1). Intersects the design flow function
+    with the flow factor line and applies B = H(Θ) * σc,crit / (ρb * g).
+    """
+    sigma_1_crit_kpa, sigma_c_crit_kpa = critical_point(ff_design_func, ff_value, upper_hint)
+    return mass_flow_outlet(sigma_1_crit_kpa, sigma_c_crit_kpa, gamma, hopper_shape, theta)
+
+def rathole_lower(sigma_1_crit_kpa, sigma_c_crit_kpa, factors, gamma):
+    """Lower-bound rathole dimension for the ff_p critical point."""
+    phi_lin, f_phi_i, ff_p = factors
+    # Convert to Pa for physics equation
+    D_crit = f_phi_i * (sigma_c_crit_kpa * 1000) / (gamma * g)
+
+    return {
+        "phi_lin": phi_lin,
+        "f_phi_i": f_phi_i,
+        "ff_p": ff_p,
+        "sigma_1_crit_kpa": sigma_1_crit_kpa,
+        "sigma_c_crit_kpa": sigma_c_crit_kpa,
+        "D_crit": D_crit,
+    }
+
+def calc_rathole_lower(ff_design_func, delta, gamma, upper_hint=30.0, show_message=True):
+    """Lower-bound (emptying) rathole dimension using ff_p (Schulze 10.3.2.3)."""
+    factors = rathole_factors(delta, show_message=show_message)
+    sigma_1_crit_kpa, sigma_c_crit_kpa = critical_point(ff_design_func, factors[2], upper_hint)
+    return rathole_lower(sigma_1_crit_kpa, sigma_c_crit_kpa, factors, gamma)
+
+@timed("janssen")
+def janssen_sigma_v_max(gamma, D_silo, h_f, K_janssen, phi_x):
+    """
+    Janssen vertical stress (Pa) at depth h_f in a cylinder of diameter D_silo.
+    Plane-flow silos use the same circular (D) logic.
+    """
+    A_silo = np.pi * (D_silo/2)**2
+    U_silo = np.pi * D_silo
+
+    phi_x_rad = np.radians(phi_x)
+
+    term_in_exp = -K_janssen * np.tan(phi_x_rad) * U_silo * h_f / A_silo
+    return (gamma * g * A_silo / (K_janssen * np.tan(phi_x_rad) * U_silo)) * (1 - np.exp(term_in_exp))
+
+def rathole_upper(ff_design_func, sigma_v_max_pa, f_phi_i, gamma):
+    """Upper-bound rathole dimension for the Janssen stress σv,max (Pa)."""
+    # Convert to kPa for FF
+    sigma_1_crit_kpa = sigma_v_max_pa / 1000
+    sigma_c_crit_kpa = ff_design_func(sigma_1_crit_kpa)
+
+    # Convert to Pa for physics equation
+    D_crit = f_phi_i * (sigma_c_crit_kpa * 1000) / (gamma * g)
+
+    return {
+        "sigma_v_max_pa": sigma_v_max_pa,
+        "sigma_1_crit_kpa": sigma_1_crit_kpa,
+        "sigma_c_crit_kpa": sigma_c_crit_kpa,
+        "f_phi_i": f_phi_i,
+        "D_crit": D_crit,
+    }
+
+def calc_rathole_upper(ff_design_func, delta, gamma, phi_x, D_silo, h_f, K_janssen, show_message=True):
+    """Upper-bound (filling) rathole dimension from the Janssen stress (Schulze 10.3.2.4)."""
+    sigma_v_max_pa = janssen_sigma_v_max(gamma, D_silo, h_f, K_janssen, phi_x)
+    phi_lin = get_phi_lin(delta, show_message=show_message)
+    f_phi_i = get_f_phi_i(phi_lin, show_message=show_message)
+    return rathole_upper(ff_design_func, sigma_v_max_pa, f_phi_i, gamma)
+
+def doming_outlet(sigma_1_crit_kpa, sigma_c_crit_kpa, gamma, theta=DOMING_THETA):
+    """No-doming slot width for the doming critical point, plane-flow H(Θ)."""
+    H_theta_doming = arching_function_H(theta, "Plane-Flow (Slot)")
+    # Convert to Pa for physics equation
+    B_crit = H_theta_doming * (sigma_c_crit_kpa * 1000) / (gamma * g)
+
+    return {
+        "ff_doming": DOMING_FF,
+        "H_theta": H_theta_doming,
+        "sigma_1_crit_kpa": sigma_1_crit_kpa,
+        "sigma_c_crit_kpa": sigma_c_crit_kpa,
+        "B_crit": B_crit,
+    }
+
+def calc_doming(ff_design_func, gamma, upper_hint=30.0, theta=DOMING_THETA):
+    """No-doming check for slot outlets in funnel flow (Schulze 10.3.2.5), plane-flow H(Θ)."""
+    sigma_1_crit_kpa, sigma_c_crit_kpa = critical_point(ff_design_func, DOMING_FF, upper_hint)
+    return doming_outlet(sigma_1_crit_kpa, sigma_c_crit_kpa, gamma, theta)
+
+def run_design(inputs):
+    """
+    Runs the full Results-page calculation for one submitted inputs dict
+    (the same format as st.session_state.inputs / last_inputs.json), without UI output.
+    """
+    validate_design_inputs(inputs)
+    _, ff_time_func, _, _, sigma_1_plot_max_base = build_flow_functions(inputs)
+
+    gamma = inputs["gamma"]
+    hopper_shape = inputs["hopper_shape"]
+
+    results = {}
+    if inputs["flow_pattern"] in ("Mass-Flow", "Expanded-Flow"):
+        results["mass_flow"] = calc_mass_flow(
+            ff_time_func, inputs["ff_manual"], gamma, hopper_shape, inputs["theta_prime_manual"],
+            upper_hint=sigma_1_plot_max_base
+        )
+        if inputs["flow_pattern"] == "Mass-Flow":
+            return results
+
+    lower = calc_rathole_lower(ff_time_func, inputs["delta"], gamma, upper_hint=sigma_1_plot_max_base, show_message=False)
+    upper = calc_rathole_upper(
+        ff_time_func, inputs["delta"], gamma, inputs["phi_prime_calc"],
+        inputs["D_silo"], inputs["h_f"], inputs["K_janssen"], show_message=False
+    )
+    results.update(lower=lower, upper=upper)
+    if inputs["flow_pattern"] == "Expanded-Flow":
+        results["expanded"] = expanded_flow_hopper(
+            results["mass_flow"]["B_min"], max(lower["D_crit"], upper["D_crit"]), inputs["theta_prime_manual"], inputs["D_silo"]
+        )
+        return results
+
+    B_crit = 0.0
+    if hopper_shape == "Plane-Flow (Slot)":
+        results["doming"] = calc_doming(ff_time_func, gamma, upper_hint=sigma_1_plot_max_base)
+        B_crit = results["doming"]["B_crit"]
+
+    results["final_crit_dim"] = max(lower["D_crit"], upper["D_crit"], B_crit)
+    return results
+
+# --- Time at Rest ---
+# The time flow function is measured for one storage time. For other times at rest
+# the flow function is interpolated linearly between the instantaneous (t = 0) and
+# time flow functions (t = storage_time_h), and held at the time flow function
+# beyond the tested storage time (no extrapolation).
+
+def flow_function_at_rest(rest_h, inst_line, time_line, storage_time_h):
+    """Slope and intercept of the linear flow function after rest_h hours at rest (broadcasts over rest_h)."""
+    (m_inst, c_inst), (m_time, c_time) = inst_line, time_line
+    weight = np.clip(np.asarray(rest_h, dtype=float) / storage_time_h, 0, 1)
+    return m_inst + weight * (m_time - m_inst), c_inst + weight * (c_time - c_inst)
+
+def critical_strength(m_ff, c_ff, ff):
+    """
+    σc (kPa) where a linear flow function σc = m_ff * σ1 + c_ff meets σ1 / ff at
+    σ1 >= 0 (0 for a zero intercept), as found by run_design. inf where there is no
+    such intersection, e.g. a negative intercept below the ff line: run_design
+    rejects these flow functions, so no finite outlet counts as safe.
+    """
+    sigma_1_crit = linear_flow_intersection(m_ff, c_ff, ff)
+    return np.where(np.isnan(sigma_1_crit), np.where(np.asarray(c_ff) == 0, 0.0, np.inf), sigma_1_crit / ff)
+
+def required_outlet(inputs, m_ff, c_ff, h_f=None, theta=None, D_silo=None):
+    """
+    Smallest safe outlet (m) for linear flow functions (arrays) with the checks of
+    run_design: mass and expanded flow B_min with ff_manual; funnel flow the lower
+    and Janssen upper rathole dimensions at fill height h_f, plus doming for slots.
+    h_f, theta and D_silo default to the inputs.
+    """
+    if inputs["flow_pattern"] in ("Mass-Flow", "Expanded-Flow"):
+        theta = inputs["theta_prime_manual"] if theta is None else theta
+        return outlet_size(critical_strength(m_ff, c_ff, inputs["ff_manual"]), inputs["gamma"], theta, inputs["hopper_shape"])
+
+    required = rathole_dimension(inputs, m_ff, c_ff, h_f, D_silo)
+    if inputs["hopper_shape"] == "Plane-Flow (Slot)":
+        required = np.maximum(required, outlet_size(critical_strength(m_ff, c_ff, DOMING_FF), inputs["gamma"], DOMING_THETA, "Plane-Flow (Slot)"))
+    return required
+
+def rathole_dimension(inputs, m_ff, c_ff, h_f=None, D_silo=None):
+    """
+    Critical rathole dimension (m) for linear flow functions (arrays): the larger of
+    the lower bound and the Janssen upper bound at fill height h_f.
+    h_f and D_silo default to the inputs.
+    """
+    gamma = inputs["gamma"]
+    h_f = inputs["h_f"] if h_f is None else h_f
+    D_silo = inputs["D_silo"] if D_silo is None else D_silo
+    phi_lin = get_phi_lin(inputs["delta"], show_message=False)
+    f_phi_i = get_f_phi_i(phi_lin, show_message=False)
+    ff_p = get_flow_factor_ffp(inputs["delta"], phi_lin, f_phi_i, show_message=False)
+
+    lower = f_phi_i * critical_strength(m_ff, c_ff, ff_p) * 1000 / (gamma * g)
+    sigma_1_kpa = janssen_sigma_v_max(gamma, D_silo, np.maximum(h_f, 0), inputs["K_janssen"], inputs["phi_prime_calc"]) / 1000
+    upper = f_phi_i * (m_ff * sigma_1_kpa + c_ff) * 1000 / (gamma * g)
+    return np.maximum(lower, upper)
+
+# --- Expanded Flow ---
+# A mass-flow hopper below a funnel-flow bin. The bin empties through the top
+# opening of the hopper, so that opening must be wider than the critical rathole
+# dimension of the bin (the larger of the lower bound and the Janssen upper bound at
+# the bin's fill height). The hopper outlet is sized against arching with the
+# mass-flow intersection (B_min). If the top opening does not fit into the bin, the
+# whole cross-section has to be in mass flow.
+
+def expanded_flow_hopper(B_min, D_crit, theta, D_silo):
+    """
+    Lower mass-flow hopper of an expanded-flow silo (broadcasts): top opening
+    D_top = max(D_crit, B_min) (m), hopper height h_hopper from the outlet B_min to
+    D_top at Θ (° from vertical), and whether D_top fits into the bin (D_top < D_silo).
+    """
+    B_min, D_crit, D_silo = (np.asarray(value, dtype=float) for value in (B_min, D_crit, D_silo))
+    D_top = np.maximum(D_crit, B_min)
+    h_hopper = (D_top - B_min) / (2 * np.tan(np.radians(theta)))
+    results = {"B_min": B_min, "D_crit": D_crit, "D_top": D_top, "h_hopper": h_hopper, "fits": D_top < D_silo}
+    return {key: value if np.ndim(value) else value.item() for key, value in results.items()}
+
+def expanded_flow_kernel(inputs, m_ff, c_ff, theta=None, h_f=None, D_silo=None):
+    """
+    Array version of the expanded-flow checks for linear time flow functions: the
+    mass-flow outlet and the rathole dimension of the bin, combined by
+    expanded_flow_hopper. theta, h_f and D_silo default to the inputs.
+    """
+    theta = inputs["theta_prime_manual"] if theta is None else theta
+    D_silo = inputs["D_silo"] if D_silo is None else D_silo
+    B_min = outlet_size(critical_strength(m_ff, c_ff, inputs["ff_manual"]), inputs["gamma"], theta, inputs["hopper_shape"])
+    return expanded_flow_hopper(B_min, rathole_dimension(inputs, m_ff, c_ff, h_f, D_silo), theta, D_silo)
@@ -0,0 +1,254 @@
+import time
+from collections import defaultdict
+from collections.abc import Mapping
+
+import perf_spans
+from design_calcs import (
+    DOMING_FF,
+    require_positive,
+    validate_design_inputs,
+    build_flow_functions,
+    critical_point,
+    rathole_factors,
+    mass_flow_outlet,
+    rathole_lower,
+    janssen_sigma_v_max,
+    rathole_upper,
+    doming_outlet,
+    expanded_flow_hopper,
+)
+from hopper_stresses import hopper_stress_profiles
+from sensitivities import design_sensitivities
+
+# --- Incremental Design Graph ---
+# The design calculation as a graph of memoized nodes:
+#   inputs -> flow-function fits -> critical points (σ1,crit, σc,crit) -> B_min / D_crit
+#   inputs -> φx -> Janssen σv,max -> upper-bound rathole dimension
+#   Janssen σv,max + B_min -> mass-flow hopper stress profiles
+#   rathole bounds + B_min -> expanded-flow hopper (top opening and height)
+# Each node is a function (inputs, get) -> value. The graph records which input keys
+# and which nodes a node reads while it runs, so branches that depend on the flow
+# pattern or hopper shape only depend on what they used. update(inputs) diffs the
+# new inputs against the previous ones and drops only the nodes downstream of the
+# changed keys; everything else is reused on the next get(). Changing K_janssen
+# re-solves only the Janssen bound, and changing the solid name recomputes nothing.
+#
+# The "results" node returns the same dict as design_calcs.run_design, and the
+# "sensitivities" node its closed-form input derivatives from the same memoized
+# flow-function fit. A graph is not thread-safe: keep one per session, worker
+# thread or process.
+
+RESULTS = "results"
+MEMOIZED_ERRORS = (KeyError, ValueError) # Invalid inputs: kept until an input they read changes
+
+
+def _snapshot(value):
+    """Copy of JSON-like input values (dicts, lists, scalars), so later edits by the caller are seen as changes."""
+    if isinstance(value, dict):
+        return {key: _snapshot(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_snapshot(item) for item in value]
+    return value
+
+
+class _RecordingInputs(Mapping):
+    """Read-only view of the graph inputs that records the keys a node reads."""
+
+    __slots__ = ("_graph", "_node")
+
+    def __init__(self, graph, node):
+        self._graph = graph
+        self._node = node
+
+    def __getitem__(self, key):
+        self._graph._record_input(self._node, key)
+        return self._graph.inputs[key]
+
+    def __iter__(self):
+        return iter(self._graph.inputs)
+
+    def __len__(self):
+        return len(self._graph.inputs)
+
+
+class DesignGraph:
+    """
+    Memoized, incrementally invalidated evaluation of design nodes ({name: function}).
+    After every update(), `recomputed` lists the (node, seconds) evaluated since,
+    with the node's own time excluding the nodes it pulled in. With span recording
+    on (SILO_PERF=1) every evaluation is also recorded as stage "node <name>".
+    """
+
+    def __init__(self, nodes=None):
+        self.nodes = DESIGN_NODES if nodes is None else nodes
+        self.inputs = {}
+        self.recomputed = []
+        self._values = {} # name -> (value, error)
+        self._input_readers = defaultdict(set) # input key -> nodes that read it
+        self._node_readers = defaultdict(set) # node -> nodes that read it
+        self._reads = {} # node -> (input keys, nodes) read during its last evaluation
+        self._active = [] # Nodes being evaluated, innermost last
+        self._child_seconds = []
+
+    def update(self, inputs):
+        """Sets new inputs (copied) and invalidates the nodes that depend on changed keys. Returns the invalidated nodes."""
+        changed = [
+            key for key in set(self.inputs) | set(inputs)
+            if key not in inputs or key not in self.inputs or inputs[key] != self.inputs[key]
+        ]
+        self.inputs = {key: _snapshot(value) for key, value in inputs.items()}
+        self.recomputed = []
+        return self._invalidate(changed)
+
+    def get(self, name):
+        """Value of a node, evaluated if it is not memoized. Memoized errors are raised again."""
+        if self._active:
+            self._node_readers[name].add(self._active[-1])
+            self._reads[self._active[-1]][1].add(name)
+        if name not in self._values:
+            self._evaluate(name)
+        value, error = self._values[name]
+        if error is not None:
+            raise error
+        return value
+
+    def evaluate(self, inputs, name=RESULTS):
+        """update(inputs), then the value of node `name`."""
+        self.update(inputs)
+        return self.get(name)
+
+    def is_memoized(self, name):
+        return name in self._values
+
+    def _evaluate(self, name):
+        if name in self._active:
+            raise RuntimeError(f"Dependency cycle at design node '{name}'.")
+        self._reads[name] = (set(), set())
+        self._active.append(name)
+        self._child_seconds.append(0.0)
+        start = time.perf_counter()
+        try:
+            self._values[name] = (self.nodes[name](_RecordingInputs(self, name), self.get), None)
+        except MEMOIZED_ERRORS as e:
+            self._values[name] = (None, e)
+        finally:
+            seconds = time.perf_counter() - start
+            self._active.pop()
+            own_seconds = seconds - self._child_seconds.pop()
+            if self._child_seconds:
+                self._child_seconds[-1] += seconds
+        self.recomputed.append((name, own_seconds))
+        if perf_spans.ENABLED:
+            perf_spans.record(perf_spans.current_page(), f"node {name}", own_seconds)
+
+    def _record_input(self, node, key):
+        self._input_readers[key].add(node)
+        self._reads[node][0].add(key)
+
+    def _invalidate(self, keys):
+        stale = set()
+        stack = [node for key in keys for node in self._input_readers.get(key, ())]
+        while stack:
+            node = stack.pop()
+            if node in stale:
+                continue
+            stale.add(node)
+            stack.extend(self._node_readers.get(node, ()))
+        for node in stale:
+            self._values.pop(node, None)
+            input_keys, nodes = self._reads.pop(node, (set(), set()))
+            for key in input_keys:
+                self._input_readers[key].discard(node)
+            for dependency in nodes:
+                self._node_readers[dependency].discard(node)
+        return stale
+
+
+# --- Design Nodes ---
+def _valid(inputs, get):
+    validate_design_inputs(inputs)
+    return True
+
+def _flow_functions(inputs, get):
+    return build_flow_functions(inputs)
+
+def _phi_x(inputs, get):
+    return inputs["phi_prime_calc"]
+
+def _rathole_factors(inputs, get):
+    return rathole_factors(inputs["delta"], show_message=False)
+
+def _critical_point(ff):
+    """Node intersecting the time flow function with σ1 / ff, for ff(inputs, get)."""
+    def node(inputs, get):
+        _, ff_time_func, _, _, upper_hint = get("flow_functions")
+        return critical_point(ff_time_func, ff(inputs, get), upper_hint=upper_hint)
+    return node
+
+def _mass_flow(inputs, get):
+    return mass_flow_outlet(*get("mass_flow_point"), inputs["gamma"], inputs["hopper_shape"], inputs["theta_prime_manual"])
+
+def _rathole_lower(inputs, get):
+    return rathole_lower(*get("lower_point"), get("rathole_factors"), inputs["gamma"])
+
+def _janssen(inputs, get):
+    return janssen_sigma_v_max(inputs["gamma"], inputs["D_silo"], inputs["h_f"], inputs["K_janssen"], get("phi_x"))
+
+def _rathole_upper(inputs, get):
+    ff_time_func = get("flow_functions")[1]
+    return rathole_upper(ff_time_func, get("janssen"), get("rathole_factors")[1], inputs["gamma"])
+
+def _hopper_stresses(inputs, get):
+    # The Janssen stress at the transition is the one of the upper-bound rathole check
+    require_positive(inputs["h_f"], "Filling height")
+    require_positive(inputs["K_janssen"], "Janssen stress ratio K")
+    return hopper_stress_profiles(
+        inputs["gamma"], inputs["theta_prime_manual"], inputs["delta"], get("phi_x"), inputs["D_silo"],
+        get("mass_flow")["B_min"], inputs["hopper_shape"], sigma_v_t_pa=get("janssen"),
+    )
+
+def _doming(inputs, get):
+    return doming_outlet(*get("doming_point"), inputs["gamma"])
+
+def _sensitivities(inputs, get):
+    get("valid")
+    return design_sensitivities(inputs, get("flow_functions")[3])
+
+def _expanded(inputs, get):
+    D_crit = max(get("rathole_lower")["D_crit"], get("rathole_upper")["D_crit"])
+    return expanded_flow_hopper(get("mass_flow")["B_min"], D_crit, inputs["theta_prime_manual"], inputs["D_silo"])
+
+def _results(inputs, get):
+    get("valid")
+    if inputs["flow_pattern"] == "Mass-Flow":
+        return {"mass_flow": get("mass_flow")}
+    if inputs["flow_pattern"] == "Expanded-Flow":
+        return {"mass_flow": get("mass_flow"), "lower": get("rathole_lower"), "upper": get("rathole_upper"), "expanded": get("expanded")}
+
+    lower, upper = get("rathole_lower"), get("rathole_upper")
+    results = {"lower": lower, "upper": upper}
+    B_crit = 0.0
+    if inputs["hopper_shape"] == "Plane-Flow (Slot)":
+        results["doming"] = get("doming")
+        B_crit = results["doming"]["B_crit"]
+    results["final_crit_dim"] = max(lower["D_crit"], upper["D_crit"], B_crit)
+    return results
+
+DESIGN_NODES = {
+    "valid": _valid,
+    "flow_functions": _flow_functions,
+    "phi_x": _phi_x,
+    "rathole_factors": _rathole_factors,
+    "mass_flow_point": _critical_point(lambda inputs, get: inputs["ff_manual"]),
+    "mass_flow": _mass_flow,
+    "lower_point": _critical_point(lambda inputs, get: get("rathole_factors")[2]),
+    "rathole_lower": _rathole_lower,
+    "janssen": _janssen,
+    "rathole_upper": _rathole_upper,
+    "hopper_stresses": _hopper_stresses,
+    "expanded": _expanded,
+    "doming_point": _critical_point(lambda inputs, get: DOMING_FF),
+    "doming": _doming,
+    "sensitivities": _sensitivities,
+    RESULTS: _results,
+}
@@ -0,0 +1,524 @@
+import argparse
+import hashlib
+import json
+import os
+import signal
+import sys
+import threading
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, HTTPServer, ThreadingHTTPServer
+
+import numpy as np
+
+import disk_cache
+from app_utils import get_design_chart, get_f_phi_i, get_flow_factor_ffp, get_phi_lin
+from design_calcs import FF_X_COL, FF_Y_COL, janssen_sigma_v_max
+from design_graph import DesignGraph
+from study_jobs import summarize_design
+
+# --- Design Service (HTTP/JSON) ---
+# Exposes the Results-page calculations to other tools without the Streamlit UI.
+# Every POST endpoint takes one case (a JSON object) or a batch {"cases": [...]}.
+# A batch returns {"results": [...]} in the same order, with an "error" entry for
+# each case that could not be evaluated. Results are cached per worker by a hash
+# of the endpoint and the case, and in the shared disk cache when SILO_CACHE_DIR
+# is set (see disk_cache.py), so workers, replicas and restarts reuse them.
+#
+# Run:  python design_service.py --port 8502 --workers 4
+# The parent process binds the socket and forks the workers, which all accept on it.
+
+API_VERSION = "1.0"
+CACHE_SIZE = 4096 # Cached results per worker
+MAX_BATCH = 100_000
+MAX_BODY_BYTES = 64 * 1024 * 1024
+SHAPES = ["Conical", "Plane-Flow (Slot)"]
+
+
+# --- Request Parsing ---
+def require(case, key):
+    if key not in case or case[key] is None:
+        raise ValueError(f"Missing field '{key}'.")
+    return case[key]
+
+def require_number(case, key):
+    value = require(case, key)
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise ValueError(f"Field '{key}' must be a number.")
+    return float(value)
+
+def require_shape(case):
+    shape = case.get("hopper_shape", "Conical")
+    if shape not in SHAPES:
+        raise ValueError(f"Field 'hopper_shape' must be one of {SHAPES}.")
+    return shape
+
+def flow_function_inputs(case):
+    """
+    Converts the 'ff_time' field to the flow-function part of an inputs dict.
+    Accepts {"m": ..., "c": ...} (sigma_c = m * sigma_1 + c, kPa) or
+    {"points": [[sigma_1, sigma_c], ...]} (kPa, at least 2 points).
+    """
+    ff_time = require(case, "ff_time")
+    if not isinstance(ff_time, dict):
+        raise ValueError("Field 'ff_time' must be an object with 'm' and 'c' or with 'points'.")
+    if "points" in ff_time:
+        try:
+            rows = [{FF_X_COL: float(x), FF_Y_COL: float(y)} for x, y in ff_time["points"]]
+        except (TypeError, ValueError):
+            raise ValueError("Field 'ff_time.points' must be a list of [sigma_1, sigma_c] pairs.")
+        return {
+            "ff_input_method": "Define by N test points",
+            "ff_inst_data": rows, # Not used by the design, only validated
+            "ff_time_data": rows,
+        }
+    m = require_number(ff_time, "m")
+    c = require_number(ff_time, "c")
+    return {
+        "ff_input_method": "Define by Equation",
+        "m_inst": m, "c_inst": c,
+        "m_time": m, "c_time": c,
+    }
+
+def mass_flow_inputs(case):
+    inputs = {
+        "flow_pattern": "Mass-Flow",
+        "hopper_shape": require_shape(case),
+        "gamma": require_number(case, "rho_b"),
+        "delta": require_number(case, "phi_e"),
+        "ff_manual": require_number(case, "ff"),
+        "theta_prime_manual": require_number(case, "theta"),
+    }
+    inputs.update(flow_function_inputs(case))
+    return inputs
+
+def funnel_flow_inputs(case):
+    inputs = {
+        "flow_pattern": "Funnel-Flow",
+        "hopper_shape": require_shape(case),
+        "gamma": require_number(case, "rho_b"),
+        "delta": require_number(case, "phi_e"),
+        "phi_prime_calc": require_number(case, "phi_x"),
+        "D_silo": require_number(case, "D_silo"),
+        "h_f": require_number(case, "h_f"),
+        "K_janssen": require_number(case, "K_janssen"),
+    }
+    inputs.update(flow_function_inputs(case))
+    return inputs
+
+
+# --- Endpoint Handlers ---
+_graphs = threading.local() # Design graphs are not thread-safe: one per request thread
+
+def design_results(inputs):
+    """
+    Design results (run_design format) from this thread's DesignGraph, so cases of a
+    batch that differ in a few fields only recompute the nodes those fields feed.
+    """
+    graph = getattr(_graphs, "graph", None)
+    if graph is None:
+        graph = _graphs.graph = DesignGraph()
+    return graph.evaluate(inputs)
+
+
+# Each handler takes one case dict and returns a JSON-serializable dict.
+# ValueError means the case is invalid (HTTP 422 / per-case error in a batch).
+
+def handle_mass_flow(case):
+    results = design_results(mass_flow_inputs(case))["mass_flow"]
+    return {
+        "sigma_1_crit_kpa": results["sigma_1_crit_kpa"],
+        "sigma_c_crit_kpa": results["sigma_c_crit_kpa"],
+        "H_theta": results["H_theta"],
+        "B_min": results["B_min"],
+    }
+
+def handle_funnel_flow(case):
+    results = design_results(funnel_flow_inputs(case))
+    response = {
+        "ff_p": results["lower"]["ff_p"],
+        "f_phi_i": results["lower"]["f_phi_i"],
+        "D_crit_lower": results["lower"]["D_crit"],
+        "sigma_v_max_kpa": results["upper"]["sigma_v_max_pa"] / 1000,
+        "D_crit_upper": results["upper"]["D_crit"],
+        "final_crit_dim": results["final_crit_dim"],
+    }
+    if "doming" in results:
+        response["B_crit"] = results["doming"]["B_crit"]
+    return response
+
+def handle_janssen(case):
+    rho_b = require_number(case, "rho_b")
+    D_silo = require_number(case, "D_silo")
+    h_f = require_number(case, "h_f")
+    K_janssen = require_number(case, "K_janssen")
+    phi_x = require_number(case, "phi_x")
+    for key, value in [("rho_b", rho_b), ("D_silo", D_silo), ("h_f", h_f), ("K_janssen", K_janssen), ("phi_x", phi_x)]:
+        if value <= 0:
+            raise ValueError(f"Field '{key}' must be greater than 0.")
+    sigma_v_max_pa = janssen_sigma_v_max(rho_b, D_silo, h_f, K_janssen, phi_x)
+    return {"sigma_v_max_kpa": sigma_v_max_pa / 1000}
+
+def handle_chart_lookup(case):
+    """Design chart values for phi_e: mass-flow chart, phi_lin, f(phi_i) and ff_p."""
+    phi_e = require_number(case, "phi_e")
+    if not (0 < phi_e < 90):
+        raise ValueError("Field 'phi_e' must be between 0 and 90 degrees.")
+    chart, caption = get_design_chart(phi_e, require_shape(case), show_message=False)
+    phi_lin = get_phi_lin(phi_e, show_message=False)
+    f_phi_i = get_f_phi_i(phi_lin, show_message=False)
+    return {
+        "mass_flow_chart": chart,
+        "mass_flow_chart_caption": caption,
+        "phi_lin": phi_lin,
+        "f_phi_i": f_phi_i,
+        "ff_p": get_flow_factor_ffp(phi_e, phi_lin, f_phi_i, show_message=False),
+    }
+
+TABLE_FIELDS = ("wyl_data", "ff_inst_data", "ff_time_data")
+
+def handle_design(case):
+    """Full design for an inputs dict in the last_inputs.json format."""
+    if not isinstance(case, dict):
+        raise ValueError("Inputs must be an object.")
+    for key in TABLE_FIELDS:
+        rows = case.get(key)
+        if rows is not None and (not isinstance(rows, list) or not all(isinstance(row, dict) for row in rows)):
+            raise ValueError(f"Field '{key}' must be a list of row objects.")
+    try:
+        return summarize_design(design_results(case))
+    except KeyError as e:
+        raise ValueError(f"Missing field {e}.")
+
+ENDPOINTS = {
+    "/mass-flow": handle_mass_flow,
+    "/funnel-flow": handle_funnel_flow,
+    "/janssen": handle_janssen,
+    "/chart-lookup": handle_chart_lookup,
+    "/design": handle_design,
+}
+
+
+# --- Result Cache ---
+class ResultCache:
+    """LRU cache of endpoint results keyed by a hash of the endpoint and the case."""
+
+    def __init__(self, max_size=CACHE_SIZE):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(path, case):
+        canonical = json.dumps([path, case], sort_keys=True, separators=(",", ":"))
+        return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        with self._lock:
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.max_size:
+                self._items.popitem(last=False)
+
+    def stats(self):
+        with self._lock:
+            return {"size": len(self._items), "hits": self.hits, "misses": self.misses}
+
+def to_builtin(value):
+    """Converts NumPy scalars in a result to plain Python numbers for JSON."""
+    if isinstance(value, dict):
+        return {k: to_builtin(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [to_builtin(v) for v in value]
+    if isinstance(value, np.integer):
+        return int(value)
+    if isinstance(value, np.floating):
+        return float(value)
+    return value
+
+def evaluate(path, case, cache):
+    """Returns (result, cached) for one case. Raises ValueError for an invalid case."""
+    key = ResultCache.key(path, case)
+    result = cache.get(key)
+    if result is not None:
+        return result, True
+    shared = disk_cache.default_cache()
+    disk_key = shared.key(f"service{path}", case) if shared is not None else None
+    result = shared.get(disk_key) if shared is not None else None
+    if result is not None:
+        cache.put(key, result)
+        return result, True
+    try:
+        result = to_builtin(ENDPOINTS[path](case))
+    except (ValueError, TypeError, ZeroDivisionError, OverflowError, AttributeError, IndexError) as e:
+        raise ValueError(str(e) or type(e).__name__) # Malformed fields of one case must not drop the connection
+    cache.put(key, result)
+    if shared is not None:
+        shared.put(disk_key, result)
+    return result, False
+
+
+# --- OpenAPI Schema ---
+def number(description):
+    return {"type": "number", "description": description}
+
+FLOW_FUNCTION_SCHEMA = {
+    "description": "Time flow function: sigma_c = m * sigma_1 + c (kPa), or at least 2 measured [sigma_1, sigma_c] points (kPa).",
+    "oneOf": [
+        {"type": "object", "required": ["m", "c"], "properties": {"m": number("Slope [-]"), "c": number("Intercept [kPa]")}},
+        {"type": "object", "required": ["points"], "properties": {"points": {"type": "array", "minItems": 2, "items": {"type": "array", "items": {"type": "number"}, "minItems": 2, "maxItems": 2}}}},
+    ],
+}
+SHAPE_SCHEMA = {"type": "string", "enum": SHAPES, "default": "Conical"}
+
+REQUEST_SCHEMAS = {
+    "/mass-flow": {
+        "type": "object",
+        "required": ["rho_b", "phi_e", "ff", "theta", "ff_time"],
+        "properties": {
+            "rho_b": number("Bulk density [kg/m³]"),
+            "phi_e": number("Effective angle of internal friction [°]"),
+            "ff": number("Flow factor [-]"),
+            "theta": number("Hopper angle from vertical [°]"),
+            "hopper_shape": SHAPE_SCHEMA,
+            "ff_time": FLOW_FUNCTION_SCHEMA,
+        },
+    },
+    "/funnel-flow": {
+        "type": "object",
+        "required": ["rho_b", "phi_e", "phi_x", "D_silo", "h_f", "K_janssen", "ff_time"],
+        "properties": {
+            "rho_b": number("Bulk density [kg/m³]"),
+            "phi_e": number("Effective angle of internal friction [°]"),
+            "phi_x": number("Wall friction angle [°]"),
+            "D_silo": number("Silo diameter/width [m]"),
+            "h_f": number("Filling height [m]"),
+            "K_janssen": number("Janssen stress ratio [-]"),
+            "hopper_shape": SHAPE_SCHEMA,
+            "ff_time": FLOW_FUNCTION_SCHEMA,
+        },
+    },
+    "/janssen": {
+        "type": "object",
+        "required": ["rho_b", "D_silo", "h_f", "K_janssen", "phi_x"],
+        "properties": {
+            "rho_b": number("Bulk density [kg/m³]"),
+            "D_silo": number("Silo diameter [m]"),
+            "h_f": number("Filling height [m]"),
+            "K_janssen": number("Janssen stress ratio [-]"),
+            "phi_x": number("Wall friction angle [°]"),
+        },
+    },
+    "/chart-lookup": {
+        "type": "object",
+        "required": ["phi_e"],
+        "properties": {
+            "phi_e": number("Effective angle of internal friction [°]"),
+            "hopper_shape": SHAPE_SCHEMA,
+        },
+    },
+    "/design": {
+        "type": "object",
+        "description": "Full inputs in the last_inputs.json format (as saved by the User Inputs page).",
+    },
+}
+
+SUMMARIES = {
+    "/mass-flow": "Minimum mass-flow outlet dimension B_min (Schulze 10.3.1)",
+    "/funnel-flow": "Critical rathole (and doming) dimensions for funnel flow (Schulze 10.3.2)",
+    "/janssen": "Janssen vertical stress at the filling height",
+    "/chart-lookup": "Design chart values for phi_e (mass-flow chart, phi_lin, f(phi_i), ff_p)",
+    "/design": "Full design for a saved inputs file",
+}
+
+def openapi_schema():
+    paths = {
+        "/health": {"get": {"summary": "Liveness check and cache statistics", "responses": {"200": {"description": "OK"}}}},
+        "/openapi.json": {"get": {"summary": "This schema", "responses": {"200": {"description": "OpenAPI 3 schema"}}}},
+    }
+    for path, request_schema in REQUEST_SCHEMAS.items():
+        paths[path] = {
+            "post": {
+                "summary": SUMMARIES[path],
+                "requestBody": {
+                    "required": True,
+                    "content": {"application/json": {"schema": {
+                        "oneOf": [
+                            request_schema,
+                            {"type": "object", "required": ["cases"], "properties": {"cases": {"type": "array", "maxItems": MAX_BATCH, "items": request_schema}}},
+                        ]
+                    }}},
+                },
+                "responses": {
+                    "200": {"description": "Result object, or {\"results\": [...]} for a batch (failed cases carry an \"error\")"},
+                    "400": {"description": "Body is not valid JSON"},
+                    "422": {"description": "Case could not be evaluated ({\"error\": ...})"},
+                },
+            }
+        }
+    return {
+        "openapi": "3.0.3",
+        "info": {
+            "title": "Silo Design Service",
+            "version": API_VERSION,
+            "description": "Outlet and rathole design calculations after Schulze, Powders and Bulk Solids (2021). Stresses in kPa, dimensions in m.",
+        },
+        "paths": paths,
+    }
+
+
+# --- HTTP Server ---
+class DesignRequestHandler(BaseHTTPRequestHandler):
+    server_version = "SiloDesignService/" + API_VERSION
+    cache = None # Set per worker by make_handler()
+    quiet = True
+
+    def log_message(self, format, *args):
+        if not self.quiet:
+            super().log_message(format, *args)
+
+    def send_json(self, status, data, headers=None):
+        body = json.dumps(data).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == "/openapi.json":
+            self.send_json(200, openapi_schema())
+        elif self.path == "/health":
+            shared = disk_cache.default_cache()
+            self.send_json(200, {"status": "ok", "pid": os.getpid(), "cache": self.cache.stats(), "disk_cache": shared.stats() if shared is not None else None})
+        else:
+            self.send_json(404, {"error": f"Unknown path '{self.path}'."})
+
+    def do_POST(self):
+        if self.path not in ENDPOINTS:
+            self.send_json(404, {"error": f"Unknown path '{self.path}'."})
+            return
+
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            self.send_json(413, {"error": f"Request body larger than {MAX_BODY_BYTES} bytes."})
+            return
+        try:
+            body = json.loads(self.rfile.read(length) or b"null")
+        except ValueError as e:
+            self.send_json(400, {"error": f"Invalid JSON: {e}"})
+            return
+        if not isinstance(body, dict):
+            self.send_json(400, {"error": "Request body must be a JSON object."})
+            return
+
+        if "cases" in body:
+            cases = body["cases"]
+            if not isinstance(cases, list) or len(cases) > MAX_BATCH:
+                self.send_json(400, {"error": f"'cases' must be a list of at most {MAX_BATCH} objects."})
+                return
+            results, hits = [], 0
+            for case in cases:
+                try:
+                    if not isinstance(case, dict):
+                        raise ValueError("Each case must be an object.")
+                    result, cached = evaluate(self.path, case, self.cache)
+                    hits += cached
+                    results.append(result)
+                except ValueError as e:
+                    results.append({"error": str(e)})
+            self.send_json(200, {"results": results}, {"X-Cache-Hits": str(hits)})
+            return
+
+        try:
+            result, cached = evaluate(self.path, body, self.cache)
+        except ValueError as e:
+            self.send_json(422, {"error": str(e)})
+            return
+        self.send_json(200, result, {"X-Cache": "HIT" if cached else "MISS"})
+
+def make_handler(cache_size=CACHE_SIZE, quiet=True):
+    """Returns a handler class with its own result cache (one per worker process)."""
+    return type("DesignRequestHandler", (DesignRequestHandler,), {"cache": ResultCache(cache_size), "quiet": quiet})
+
+def make_server(host="127.0.0.1", port=0, threaded=True, cache_size=CACHE_SIZE, quiet=True):
+    """Creates a bound server (port 0 picks a free port; see server.server_address)."""
+    server_class = ThreadingHTTPServer if threaded else HTTPServer
+    return server_class((host, port), make_handler(cache_size, quiet))
+
+def serve_prefork(server, workers):
+    """
+    Forks `workers` processes that all accept on the already-bound server socket.
+    The parent only waits and stops the workers on SIGINT/SIGTERM.
+    """
+    children = []
+    for _ in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            signal.signal(signal.SIGTERM, signal.SIG_DFL)
+            try:
+                server.serve_forever()
+            finally:
+                os._exit(0)
+        children.append(pid)
+
+    def stop(signum, frame):
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+
+    signal.signal(signal.SIGINT, stop)
+    signal.signal(signal.SIGTERM, stop)
+    for pid in children:
+        while True:
+            try:
+                os.waitpid(pid, 0)
+                break
+            except InterruptedError:
+                continue
+            except ChildProcessError:
+                break
+    server.server_close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="HTTP/JSON service for the silo design calculations.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8502, help="0 picks a free port")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Pre-forked worker processes")
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE, help="Cached results per worker")
+    parser.add_argument("--cache-dir", default=disk_cache.CACHE_DIR, help="Shared disk cache directory (default: SILO_CACHE_DIR; unset disables it)")
+    parser.add_argument("--verbose", action="store_true", help="Log every request")
+    args = parser.parse_args()
+    disk_cache.set_cache_dir(args.cache_dir)
+
+    prefork = hasattr(os, "fork") and args.workers > 1
+    server = make_server(args.host, args.port, threaded=not prefork, cache_size=args.cache_size, quiet=not args.verbose)
+    host, port = server.server_address[:2]
+    print(f"Serving on http://{host}:{port} ({args.workers if prefork else 1} worker(s)); schema at /openapi.json", flush=True)
+
+    if prefork:
+        serve_prefork(server, args.workers)
+    else:
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.server_close()
+    sys.exit(0)
@@ -0,0 +1,97 @@
+import numpy as np
+
+from design_calcs import g
+
+# --- Discharge Rate Prediction ---
+# Mass discharge rate (kg/s) from a mass-flow hopper outlet. Every function takes
+# scalars or NumPy arrays and broadcasts outlet size B against hopper angle Θ, so a
+# throughput-vs-outlet family of curves is a single array evaluation.
+#
+# - Coarse, free-flowing solids: Johanson's correlation,
+#   W = ρb · A · sqrt(B · g / (2 · (1 + m) · tanΘ)), m = 1 conical / 0 plane flow,
+#   with Beverloo's empty annulus (B - k·d) for particles that are not small against B.
+# - Fine powders: the outflow is limited by the air that has to permeate into the
+#   dilating bed (limiting flow rate). With the permeability K (superficial air
+#   velocity at a pressure gradient of ρb·g) the outlet velocity is limited to
+#   v_lim = K / (ρb / ρb,o - 1), where ρb,o is the (looser) bulk density at the
+#   outlet. The fine-powder rate is the smaller of the limiting and coarse rates.
+
+COARSE = "Coarse (free-flowing)"
+FINE = "Fine powder (permeability-limited)"
+MODELS = [COARSE, FINE]
+BEVERLOO_K = 1.4 # Empty annulus, in particle diameters
+
+
+def outlet_area(B, hopper_shape, length=None):
+    """Outlet area (m²): circle of diameter B, or slot B x length."""
+    B = np.asarray(B, dtype=float)
+    if hopper_shape == "Conical":
+        return np.pi * B**2 / 4
+    if not length or length <= 0:
+        raise ValueError("Plane-flow outlets need a slot length greater than 0.")
+    return B * length
+
+def effective_outlet(B, particle_size=0.0):
+    """Outlet size reduced by Beverloo's empty annulus, never negative."""
+    return np.maximum(np.asarray(B, dtype=float) - BEVERLOO_K * particle_size, 0.0)
+
+def coarse_discharge_rate(B, theta, rho_b, hopper_shape, length=None, particle_size=0.0):
+    """Johanson's discharge rate (kg/s) of a coarse, free-flowing solid. Θ in degrees (> 0)."""
+    m = 1.0 if hopper_shape == "Conical" else 0.0
+    B_eff = effective_outlet(B, particle_size)
+    area = outlet_area(B_eff, hopper_shape, length)
+    tan_theta = np.tan(np.radians(np.asarray(theta, dtype=float)))
+    return rho_b * area * np.sqrt(B_eff * g / (2 * (1 + m) * tan_theta))
+
+def limiting_discharge_rate(B, rho_b, rho_b_outlet, permeability, hopper_shape, length=None):
+    """Permeability-limited discharge rate (kg/s) of a fine powder, v_lim = K / (ρb / ρb,o - 1)."""
+    if not (0 < rho_b_outlet < rho_b):
+        raise ValueError("Outlet bulk density must be greater than 0 and smaller than the bulk density.")
+    if permeability <= 0:
+        raise ValueError("Permeability must be greater than 0.")
+    v_lim = permeability / (rho_b / rho_b_outlet - 1)
+    return rho_b_outlet * outlet_area(B, hopper_shape, length) * v_lim
+
+def discharge_rate(B, theta, rho_b, hopper_shape, model=COARSE, length=None, particle_size=0.0,
+                   rho_b_outlet=None, permeability=None):
+    """Predicted discharge rate (kg/s) for the selected model, broadcast over B and Θ."""
+    coarse = coarse_discharge_rate(B, theta, rho_b, hopper_shape, length, particle_size)
+    if model == COARSE:
+        return coarse
+    if model == FINE:
+        return np.minimum(coarse, limiting_discharge_rate(B, rho_b, rho_b_outlet, permeability, hopper_shape, length))
+    raise ValueError(f"Unknown discharge model '{model}'. Use one of {MODELS}.")
+
+def outlet_grid(B_min, B_max, n=400):
+    """Geometric grid of outlet sizes (m) for throughput curves."""
+    return np.geomspace(B_min, B_max, n)
+
+def smallest_outlet(target_rate, B_arching, theta, rho_b, hopper_shape, B_max=None, n=2000, **model_args):
+    """
+    Smallest outlet (m) that meets both the arching/rathole minimum B_arching and the
+    required discharge rate target_rate (kg/s), for every Θ in `theta`. One batched
+    evaluation on a geometric B grid, refined by interpolation in log space.
+    Returns a dict of arrays with 'B_throughput' (NaN if the rate is not reached
+    below B_max), 'B_required' and 'controlling' ("arching" or "throughput").
+    """
+    theta = np.atleast_1d(np.asarray(theta, dtype=float))
+    B_max = B_max or max(10.0, 10 * B_arching)
+    B = outlet_grid(1e-3, B_max, n)
+    W = discharge_rate(B[:, None], theta[None, :], rho_b, hopper_shape, **model_args)
+
+    # Rates increase with B: first grid point reaching the target, per Θ
+    reached = W >= target_rate
+    first = np.argmax(reached, axis=0)
+    ok = reached.any(axis=0)
+    prev = np.maximum(first - 1, 0)
+    cols = np.arange(theta.size)
+    W_lo, W_hi = W[prev, cols], W[first, cols]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(W_hi > W_lo, (np.log(target_rate) - np.log(np.maximum(W_lo, 1e-300))) / (np.log(W_hi) - np.log(np.maximum(W_lo, 1e-300))), 1.0)
+    B_throughput = np.exp(np.log(B[prev]) + np.clip(fraction, 0, 1) * (np.log(B[first]) - np.log(B[prev])))
+    B_throughput = np.where(ok, np.where(first == 0, B[0], B_throughput), np.nan)
+
+    B_required = np.fmax(B_throughput, B_arching)
+    B_required = np.where(ok, B_required, np.nan)
+    controlling = np.where(B_throughput > B_arching, "throughput", "arching")
+    return {"theta": theta, "B_throughput": B_throughput, "B_required": B_required, "controlling": controlling}
@@ -0,0 +1,306 @@
+import functools
+import glob
+import hashlib
+import json
+import os
+import pickle
+import threading
+import time
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError: # Windows
+    fcntl = None
+    import msvcrt
+
+# --- Disk-Backed Result Cache ---
+# Content-addressed store for design results, chart tables and rendered figures that
+# is shared by every process pointed at the same directory (Streamlit replicas,
+# design-service workers, report builds) and survives restarts. Only enabled when
+# SILO_CACHE_DIR is set, e.g. to a directory on a shared local volume.
+#
+# Layout:  <dir>/objects/<2 hex>/<sha256>.pkl   pickled values
+#          <dir>/stats.json                     hits, misses, writes, evictions, bytes
+#          <dir>/.lock                          serializes writes, eviction and stats
+#
+# The key hashes the namespace, the canonical JSON of the payload and CODE_VERSION
+# (a hash of the calculation modules), so editing the code or the digitized chart
+# data orphans old entries instead of serving them; eviction removes them in time.
+# Values are written to a temporary file and renamed into place, so readers never
+# lock and never see a partial entry. Reads refresh the file time, and eviction
+# deletes the least recently used entries until the store is EVICT_TO of MAX_BYTES.
+# Entries are pickles: only point SILO_CACHE_DIR at a directory you trust.
+
+CACHE_DIR = os.environ.get("SILO_CACHE_DIR") or None
+MAX_BYTES = int(float(os.environ.get("SILO_CACHE_MAX_MB", "1024")) * 2**20)
+EVICT_TO = 0.8 # Fraction of MAX_BYTES left after an eviction
+FLUSH_EVERY = 100 # Lookups between writes of the local hit/miss counters to stats.json
+STAT_KEYS = ("hits", "misses", "writes", "evictions")
+SOURCE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+@functools.lru_cache(maxsize=1)
+def code_version():
+    """Hash of the calculation modules (root *.py files other than tests)."""
+    digest = hashlib.sha256()
+    for path in sorted(glob.glob(os.path.join(SOURCE_DIR, "*.py"))):
+        if os.path.basename(path).startswith("test_"):
+            continue
+        digest.update(os.path.basename(path).encode("utf-8"))
+        with open(path, "rb") as f:
+            digest.update(f.read())
+    return digest.hexdigest()[:16]
+
+def _builtin(value):
+    """JSON fallback for NumPy values in a payload."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"Cannot hash a {type(value).__name__} in a cache payload.")
+
+def canonical_json(payload):
+    return json.dumps(payload, sort_keys=True, separators=(",", ":"), default=_builtin, allow_nan=True)
+
+def cache_key(namespace, payload, version=None):
+    """sha256 of the namespace, the code version and the canonical JSON of the payload."""
+    text = canonical_json([namespace, version or code_version(), payload])
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class FileLock:
+    """Exclusive lock on a file, across processes (flock) and threads."""
+
+    def __init__(self, path):
+        self.path = path
+        self._thread_lock = threading.Lock()
+        self._file = None
+
+    def __enter__(self):
+        self._thread_lock.acquire()
+        try:
+            self._file = open(self.path, "a+b")
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_EX)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_LOCK, 1)
+        except BaseException:
+            if self._file is not None:
+                self._file.close()
+            self._thread_lock.release()
+            raise
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._file, fcntl.LOCK_UN)
+            else:
+                self._file.seek(0)
+                msvcrt.locking(self._file.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._file.close()
+            self._thread_lock.release()
+        return False
+
+
+class DiskCache:
+    """Size-bounded LRU store of picklable values under `directory`, safe across processes."""
+
+    def __init__(self, directory, max_bytes=MAX_BYTES, version=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.version = version
+        self._objects = os.path.join(directory, "objects")
+        self._stats_path = os.path.join(directory, "stats.json")
+        os.makedirs(self._objects, exist_ok=True)
+        self._lock = FileLock(os.path.join(directory, ".lock"))
+        self._counts_lock = threading.Lock()
+        self._pending = dict.fromkeys(STAT_KEYS, 0) # Not yet in stats.json
+        self._lookups = 0
+
+    def key(self, namespace, payload):
+        return cache_key(namespace, payload, self.version)
+
+    def _path(self, key):
+        return os.path.join(self._objects, key[:2], f"{key}.pkl")
+
+    def _count(self, name, flush=False):
+        with self._counts_lock:
+            self._pending[name] += 1
+            self._lookups += name in ("hits", "misses")
+            flush = flush or self._lookups >= FLUSH_EVERY
+        if flush:
+            self.flush()
+
+    def get(self, key):
+        """The stored value, or None if `key` is not in the cache."""
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+        except FileNotFoundError:
+            self._count("misses")
+            return None
+        except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            # Written by an incompatible version of a class: drop it and recompute
+            self._remove(path)
+            self._count("misses")
+            return None
+        try:
+            os.utime(path) # Most recently used
+        except FileNotFoundError: # Evicted by another process meanwhile
+            pass
+        self._count("hits")
+        return value
+
+    def put(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        with self._lock:
+            try:
+                previous = os.path.getsize(path)
+            except FileNotFoundError:
+                previous = 0
+            os.replace(tmp_path, path)
+            stats = self._read_stats()
+            stats["bytes"] = max(0, stats["bytes"] + len(data) - previous)
+            with self._counts_lock:
+                self._pending["writes"] += 1
+                stats = self._merge_pending(stats)
+            if stats["bytes"] > self.max_bytes:
+                stats = self._evict(stats)
+            self._write_stats(stats)
+
+    def cached(self, namespace, payload, compute):
+        """The value stored for (namespace, payload), computing and storing it on a miss."""
+        key = self.key(namespace, payload)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+    def _entries(self):
+        """(mtime, size, path) of every stored entry."""
+        entries = []
+        for path in glob.glob(os.path.join(self._objects, "*", "*.pkl")):
+            try:
+                info = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((info.st_mtime_ns, info.st_size, path))
+        return entries
+
+    def _evict(self, stats):
+        """Deletes least recently used entries down to EVICT_TO of max_bytes (holding the lock)."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = EVICT_TO * self.max_bytes
+        for _, size, path in entries:
+            if total <= target:
+                break
+            self._remove(path)
+            total -= size
+            stats["evictions"] += 1
+        # Temporary files of writers that died before the rename
+        cutoff = time.time() - 3600
+        for path in glob.glob(os.path.join(self._objects, "*", "*.tmp")):
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.remove(path)
+            except FileNotFoundError:
+                pass
+        stats["bytes"] = total # Re-measured, corrects drift from other writers
+        return stats
+
+    def _read_stats(self):
+        try:
+            with open(self._stats_path, "r") as f:
+                stats = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            stats = {}
+        return {key: int(stats.get(key, 0)) for key in STAT_KEYS + ("bytes",)}
+
+    def _write_stats(self, stats):
+        tmp_path = f"{self._stats_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(stats, f)
+        os.replace(tmp_path, self._stats_path)
+
+    def _merge_pending(self, stats):
+        """Adds the local counters to stats and resets them (holding _counts_lock)."""
+        for name in STAT_KEYS:
+            stats[name] += self._pending[name]
+            self._pending[name] = 0
+        self._lookups = 0
+        return stats
+
+    def flush(self):
+        """Adds this process's hit/miss counters to the shared stats.json."""
+        with self._lock:
+            stats = self._read_stats()
+            with self._counts_lock:
+                stats = self._merge_pending(stats)
+            self._write_stats(stats)
+
+    def stats(self):
+        """Counters of all processes sharing the directory, with the hit rate and entry count."""
+        self.flush()
+        with self._lock:
+            stats = self._read_stats()
+        lookups = stats["hits"] + stats["misses"]
+        stats["hit_rate"] = stats["hits"] / lookups if lookups else None
+        stats["entries"] = len(self._entries())
+        stats["max_bytes"] = self.max_bytes
+        return stats
+
+    def clear(self):
+        """Deletes every entry and resets the counters."""
+        with self._lock:
+            for _, _, path in self._entries():
+                self._remove(path)
+            with self._counts_lock:
+                self._pending = dict.fromkeys(STAT_KEYS, 0)
+                self._lookups = 0
+            self._write_stats(dict.fromkeys(STAT_KEYS + ("bytes",), 0))
+
+
+# --- Shared Instance ---
+_default = None
+_default_lock = threading.Lock()
+
+def default_cache():
+    """The cache in SILO_CACHE_DIR, or None when the disk cache is disabled."""
+    global _default
+    if CACHE_DIR is None:
+        return None
+    with _default_lock:
+        if _default is None or _default.directory != CACHE_DIR:
+            _default = DiskCache(CACHE_DIR)
+        return _default
+
+def set_cache_dir(directory):
+    """Points this process at another cache directory (None disables the cache)."""
+    global CACHE_DIR
+    CACHE_DIR = directory or None
+
+def cached(namespace, payload, compute):
+    """compute() through the shared disk cache, or directly when it is disabled."""
+    cache = default_cache()
+    if cache is None:
+        return compute()
+    return cache.cached(namespace, payload, compute)
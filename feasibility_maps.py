@@ -0,0 +1,110 @@
+import numpy as np
+
+from design_calcs import (
+    validate_design_inputs,
+    build_flow_functions,
+    mass_flow_limit_angle,
+    flow_factor_approx,
+    critical_strength,
+    outlet_size,
+    required_outlet,
+)
+
+# --- Feasibility Envelope Maps ---
+# Evaluates the mass-flow/funnel-flow boundary and the outlet requirement of one
+# material over dense grids, in one broadcast array pass per map:
+# - (Θ, φx): margin to the mass-flow limit angle and the required outlet, B_min
+#   with ff(Θ) from the numeric chart approximation where the hopper is in mass
+#   flow, otherwise the funnel-flow rathole/doming dimension (Janssen with φx)
+# - (Θ, B): margin of an installed outlet B over that requirement at the inputs' φx
+# All outlet checks use the time flow function (linear fit of the submitted data).
+# A point Θ on the mass-flow limit counts as funnel flow.
+
+GRID_SIZE = 200
+THETA_RANGE = (1.0, 60.0)
+PHI_X_RANGE = (5.0, 45.0)
+# Region codes of the (Θ, B) map
+MASS_FLOW_OK, ARCHING, FUNNEL_FLOW_OK, RATHOLING = 0, 1, 2, 3
+REGION_LABELS = {
+    MASS_FLOW_OK: "Mass flow, no arching",
+    ARCHING: "Mass flow, arching",
+    FUNNEL_FLOW_OK: "Funnel flow, no ratholing/doming",
+    RATHOLING: "Funnel flow, ratholing/doming",
+}
+
+
+def outlet_requirement(inputs, theta, phi_x, time_line=None):
+    """
+    Required outlet (m) and mass-flow flag for hopper angles Θ and wall friction
+    angles φx (broadcast arrays, °). Mass flow where Θ is below the limit angle.
+    """
+    if time_line is None:
+        time_line = build_flow_functions(inputs)[3]
+    m_ff, c_ff = time_line
+    theta, phi_x = np.broadcast_arrays(np.asarray(theta, dtype=float), np.asarray(phi_x, dtype=float))
+    hopper_shape, gamma = inputs["hopper_shape"], inputs["gamma"]
+
+    theta_limit = np.nan_to_num(mass_flow_limit_angle(inputs["delta"], phi_x, hopper_shape), nan=0.0)
+    mass_flow = theta < theta_limit
+    ff = flow_factor_approx(np.where(mass_flow, theta, np.nan), inputs["delta"], phi_x, hopper_shape)
+    with np.errstate(invalid="ignore"):
+        B_min = outlet_size(critical_strength(m_ff, c_ff, ff), gamma, theta, hopper_shape)
+    funnel = required_outlet(dict(inputs, flow_pattern="Funnel-Flow", phi_prime_calc=phi_x), m_ff, c_ff)
+    return np.where(mass_flow, B_min, funnel), mass_flow, theta_limit, ff
+
+def angle_friction_map(inputs, theta_range=THETA_RANGE, phi_x_range=PHI_X_RANGE, n=GRID_SIZE):
+    """
+    (Θ, φx) map on an n x n grid (rows φx, columns Θ). Returns the axes, the
+    mass-flow limit Θ per φx, the angle margin (limit - Θ, > 0 is mass flow), ff
+    (NaN outside mass flow) and the required outlet (m).
+    """
+    validate_design_inputs(dict(inputs, flow_pattern="Funnel-Flow"))
+    theta = np.linspace(*theta_range, n)
+    phi_x = np.linspace(*phi_x_range, n)
+    required, _, theta_limit, ff = outlet_requirement(inputs, theta[None, :], phi_x[:, None])
+    return {
+        "theta": theta,
+        "phi_x": phi_x,
+        "theta_limit": theta_limit[:, 0],
+        "angle_margin": theta_limit - theta[None, :],
+        "ff": ff,
+        "required": required,
+    }
+
+def angle_outlet_map(inputs, theta_range=THETA_RANGE, B_range=None, n=GRID_SIZE):
+    """
+    (Θ, B) map at the inputs' φx on an n x n grid (rows B, columns Θ). Returns
+    the axes, the required outlet per Θ, the outlet margin B - required (m) and
+    the region codes (REGION_LABELS). B_range defaults to 0 to twice the largest
+    finite requirement.
+    """
+    validate_design_inputs(dict(inputs, flow_pattern="Funnel-Flow"))
+    theta = np.linspace(*theta_range, n)
+    required, mass_flow, theta_limit, _ = outlet_requirement(inputs, theta, inputs["phi_prime_calc"])
+    if B_range is None:
+        finite = required[np.isfinite(required)]
+        B_range = (0.0, 2 * float(finite.max()) if finite.size and finite.max() > 0 else 1.0)
+    B = np.linspace(*B_range, n)
+    margin = B[:, None] - required[None, :]
+    adequate = margin >= 0
+    region = np.where(mass_flow[None, :], np.where(adequate, MASS_FLOW_OK, ARCHING), np.where(adequate, FUNNEL_FLOW_OK, RATHOLING))
+    return {
+        "theta": theta,
+        "B": B,
+        "theta_limit": float(theta_limit[0]),
+        "required": required,
+        "outlet_margin": margin,
+        "region": region,
+    }
+
+def design_margins(inputs, theta, B):
+    """Margins of one design point: Θ to the mass-flow limit (°) and B over the required outlet (m)."""
+    required, mass_flow, theta_limit, ff = outlet_requirement(inputs, theta, inputs["phi_prime_calc"])
+    return {
+        "theta_limit": float(theta_limit),
+        "angle_margin": float(theta_limit - theta),
+        "mass_flow": bool(mass_flow),
+        "ff": float(ff),
+        "required": float(required),
+        "outlet_margin": float(B - required),
+    }
@@ -0,0 +1,202 @@
+import numpy as np
+
+from app_utils import get_phi_lin, get_f_phi_i
+from design_calcs import (
+    g,
+    HOPPER_ANGLE_MARGIN,
+    validate_design_inputs,
+    build_flow_functions,
+    calc_rathole_lower,
+    calc_doming,
+    janssen_sigma_v_max,
+    mass_flow_limit_angle,
+    flow_factor_approx,
+    mass_flow_outlet_kernel,
+)
+
+# --- Hopper Geometry Optimizer ---
+# Searches hopper angle Θ, silo diameter/width D and outlet size B for a required
+# stored volume. The cylinder height follows from the volume, so every (Θ, D, B)
+# grid point is one candidate. All candidates of a material are evaluated in one
+# broadcast array pass with the same flow-function, H(Θ) and Janssen relations as
+# the Results page. Conical silos are circular; plane-flow silos are rectangular
+# with a given length L along the slot.
+
+STEEL_DENSITY = 7850.0 # kg/m³
+WALL_THICKNESS = 0.006 # m
+OBJECTIVES = {"height": "total_height", "steel_mass": "steel_mass"}
+MATERIAL_FIELDS = [
+    "gamma", "delta", "phi_prime_calc", "ff_input_method", "ff_inst_data", "ff_time_data",
+    "m_inst", "c_inst", "m_time", "c_time", "flow_pattern", "hopper_shape", "K_janssen",
+    "ff_manual", "h_f", "D_silo",
+]
+
+
+# --- Geometry ---
+def hopper_height(D, B, theta):
+    """Height (m) of a hopper from width D to outlet B at Θ from vertical."""
+    return (D - B) / (2 * np.tan(np.radians(theta)))
+
+def hopper_volume(D, B, theta, hopper_shape, length=None):
+    h = hopper_height(D, B, theta)
+    if hopper_shape == "Conical":
+        return np.pi * h / 12 * (D**2 + D * B + B**2) # Frustum
+    return length * h * (D + B) / 2 # Wedge over the slot length
+
+def cross_section_area(D, hopper_shape, length=None):
+    return np.pi * D**2 / 4 if hopper_shape == "Conical" else length * D
+
+def wall_area(D, B, theta, H_cyl, hopper_shape, length=None):
+    """Steel wall area (m²) of cylinder/box plus hopper, without roof."""
+    h = hopper_height(D, B, theta)
+    slant = (D - B) / (2 * np.sin(np.radians(theta)))
+    if hopper_shape == "Conical":
+        return np.pi * D * H_cyl + np.pi * (D + B) / 2 * slant
+    return 2 * (length + D) * H_cyl + 2 * length * slant + 2 * h * (D + B) / 2
+
+
+# --- Candidate Evaluation ---
+def material_properties(inputs):
+    """Extracts what the optimizer needs from an inputs dict (last_inputs.json format)."""
+    validate_design_inputs(inputs)
+    if inputs["flow_pattern"] == "Expanded-Flow":
+        raise ValueError("The geometry optimizer sizes single mass-flow or funnel-flow hoppers; select one of them for an expanded-flow silo.")
+    _, ff_time_func, _, (m_time, c_time), sigma_1_plot_max_base = build_flow_functions(inputs)
+    return {
+        "gamma": float(inputs["gamma"]),
+        "delta": float(inputs["delta"]),
+        "phi_x": float(inputs["phi_prime_calc"]),
+        "m_time": float(m_time),
+        "c_time": float(c_time),
+        "K_janssen": float(inputs["K_janssen"]),
+        "flow_pattern": inputs["flow_pattern"],
+        "hopper_shape": inputs["hopper_shape"],
+        "ff_time_func": ff_time_func,
+        "upper_hint": sigma_1_plot_max_base,
+    }
+
+def outlet_floor(material, theta):
+    """
+    Smallest outlet allowed by the flow pattern for each Θ (m), and the hopper
+    angle limit. Mass flow: B_min from ff(Θ) and H(Θ). Funnel flow: lower-bound
+    rathole dimension (and no-doming width for slots); the Janssen (upper-bound)
+    rathole depends on D and the fill height and is checked per candidate.
+    """
+    shape = material["hopper_shape"]
+    if material["flow_pattern"] == "Mass-Flow":
+        theta_max = mass_flow_limit_angle(material["delta"], material["phi_x"], shape) - HOPPER_ANGLE_MARGIN
+        ff = flow_factor_approx(theta, material["delta"], material["phi_x"], shape)
+        B_floor = mass_flow_outlet_kernel(material["m_time"], material["c_time"], ff, material["gamma"], theta, shape)["B_min"]
+        return B_floor, theta_max
+
+    theta_max = 65.0 - material["phi_x"] # Complete clearance, Θcd < 65° - φx
+    lower = calc_rathole_lower(material["ff_time_func"], material["delta"], material["gamma"], upper_hint=material["upper_hint"], show_message=False)
+    B_floor = lower["D_crit"]
+    if shape == "Plane-Flow (Slot)":
+        B_floor = max(B_floor, calc_doming(material["ff_time_func"], material["gamma"], upper_hint=material["upper_hint"])["B_crit"])
+    return np.full_like(np.asarray(theta, dtype=float), B_floor), theta_max
+
+def evaluate_candidates(material, volume, theta, D, B_fraction, max_height=None, max_outlet=None,
+                        length=None, wall_thickness=WALL_THICKNESS):
+    """
+    Evaluates the (Θ, D, B) grid in one broadcast pass. B runs from the outlet floor
+    at B_fraction = 0 to max_outlet at B_fraction = 1 (only the floor without a
+    max_outlet). Returns a dict of flat arrays, including the 'feasible' mask.
+    """
+    shape = material["hopper_shape"]
+    theta = np.asarray(theta, dtype=float)[:, None, None]
+    D = np.asarray(D, dtype=float)[None, :, None]
+    B_fraction = np.asarray(B_fraction, dtype=float)[None, None, :]
+
+    B_floor, theta_max = outlet_floor(material, theta)
+    if max_outlet is None:
+        B_fraction = B_fraction[..., :1] * 0
+        max_outlet = np.inf
+    B = B_floor + B_fraction * (np.minimum(max_outlet, D) - B_floor)
+
+    h_hopper = hopper_height(D, B, theta)
+    H_cyl = (volume - hopper_volume(D, B, theta, shape, length)) / cross_section_area(D, shape, length)
+    total_height = H_cyl + h_hopper
+
+    feasible = np.isfinite(B) & (B_floor < np.minimum(max_outlet, D)) & (theta <= theta_max) & (H_cyl >= 0)
+    if max_height is not None:
+        feasible &= total_height <= max_height
+
+    if material["flow_pattern"] == "Funnel-Flow":
+        # Upper-bound rathole from the Janssen stress at the bottom of the cylinder
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sigma_1_kpa = janssen_sigma_v_max(material["gamma"], D, np.maximum(H_cyl, 0), material["K_janssen"], material["phi_x"]) / 1000
+        f_phi_i = get_f_phi_i(get_phi_lin(material["delta"], show_message=False), show_message=False)
+        D_crit_upper = f_phi_i * (material["m_time"] * sigma_1_kpa + material["c_time"]) * 1000 / (material["gamma"] * g)
+        feasible &= B >= D_crit_upper
+
+    steel_mass = wall_area(D, B, theta, H_cyl, shape, length) * wall_thickness * STEEL_DENSITY
+
+    shape_3d = np.broadcast_shapes(theta.shape, D.shape, B_fraction.shape)
+    candidates = {
+        "theta": theta, "D": D, "B": B, "H_cyl": H_cyl, "h_hopper": h_hopper,
+        "total_height": total_height, "steel_mass": steel_mass, "feasible": feasible,
+    }
+    return {key: np.broadcast_to(value, shape_3d).ravel() for key, value in candidates.items()}
+
+
+# --- Optimization ---
+def pareto_front(total_height, steel_mass):
+    """Indices of the candidates not dominated in (total height, steel mass), sorted by height."""
+    order = np.lexsort((steel_mass, total_height))
+    running_min = np.minimum.accumulate(steel_mass[order])
+    keep = np.ones(len(order), dtype=bool)
+    keep[1:] = steel_mass[order][1:] < running_min[:-1]
+    return order[keep]
+
+def candidate_grid(volume, material, max_diameter=None, n_theta=60, n_D=80, n_B=25):
+    """Default search grid: Θ up to the angle limit, D around the cube root of the volume."""
+    theta_hi = 65.0 if material["flow_pattern"] == "Funnel-Flow" else 60.0
+    theta = np.linspace(2.0, theta_hi, n_theta)
+    scale = volume ** (1 / 3)
+    D_hi = max_diameter or 3.0 * scale
+    D = np.geomspace(min(0.15 * scale, D_hi / 2), D_hi, n_D)
+    B_fraction = np.linspace(0, 1, n_B)**2 # Denser near the outlet floor
+    return theta, D, B_fraction
+
+def material_inputs(inputs):
+    """The inputs that determine the result for a material (cache key for the Pareto front)."""
+    return {key: inputs[key] for key in MATERIAL_FIELDS if key in inputs}
+
+def optimize_geometry(inputs, volume, objective="height", max_height=None, max_diameter=None,
+                      max_outlet=None, length=None, wall_thickness=WALL_THICKNESS, grid=None):
+    """
+    Finds the geometry with the smallest total height or steel mass that stores
+    `volume` (m³) and satisfies the flow constraints of the inputs' flow pattern,
+    the headroom (max_height) and footprint (max_diameter) limits. Without max_outlet
+    the outlet is the smallest allowed one; with it, larger outlets up to max_outlet
+    are searched too. Plane-flow silos need the slot `length` (m).
+    Returns the best candidate, the Pareto front (height vs. steel mass) and the
+    number of candidates evaluated. Raises ValueError if no candidate is feasible.
+    """
+    if objective not in OBJECTIVES:
+        raise ValueError(f"Unknown objective '{objective}'. Use one of {list(OBJECTIVES)}.")
+    if volume <= 0:
+        raise ValueError("Required volume must be greater than 0.")
+    if inputs["hopper_shape"] != "Conical" and not (length and length > 0):
+        raise ValueError("Plane-flow silos need a slot length greater than 0.")
+
+    material = material_properties(inputs)
+    theta, D, B_fraction = grid or candidate_grid(volume, material, max_diameter)
+    candidates = evaluate_candidates(material, volume, theta, D, B_fraction, max_height, max_outlet, length, wall_thickness)
+
+    feasible = np.flatnonzero(candidates["feasible"])
+    if feasible.size == 0:
+        raise ValueError("No feasible geometry found. Increase the headroom, diameter or outlet limits, or check the flow properties.")
+
+    def row(index):
+        return {key: float(values[index]) for key, values in candidates.items() if key != "feasible"}
+
+    best = feasible[np.argmin(candidates[OBJECTIVES[objective]][feasible])]
+    front = feasible[pareto_front(candidates["total_height"][feasible], candidates["steel_mass"][feasible])]
+    return {
+        "best": row(best),
+        "pareto": [row(index) for index in front],
+        "evaluated": int(candidates["feasible"].size),
+        "feasible": int(feasible.size),
+    }
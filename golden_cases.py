@@ -0,0 +1,448 @@
+import argparse
+import json
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from design_calcs import (
+    FF_X_COL,
+    FF_Y_COL,
+    FLOW_PATTERNS,
+    build_flow_functions,
+    expanded_flow_kernel,
+    flow_factor_approx,
+    mass_flow_limit_angle,
+    mass_flow_outlet_kernel,
+    rathole_factors,
+    required_outlet,
+    run_design,
+    validate_design_inputs,
+)
+from design_graph import DesignGraph
+
+# --- Golden-Case Corpus and Equivalence Checker ---
+# The scalar Results-page calculation (design_calcs.run_design: fitted flow
+# functions, find_positive_intersection/brentq and the chart helpers of app_utils)
+# is the reference. `generate` samples realistic cases around the last_inputs.json
+# example, adds edge cases (the example itself, the ff_p = 1.7 floor, intersections
+# far beyond the first bracket of find_positive_intersection, flow functions that
+# never meet the ff line, negative intercepts, ...) and records the reference
+# outputs of every case. The corpus file has one case per line for readable diffs.
+# `check` runs each fast path over the corpus in a process pool, one chunk of cases
+# per task, compares every output with a per-quantity tolerance and reports the
+# worst error together with the speedup over run_design timed in the same workers.
+# A case the reference rejects must also be rejected (or give a non-finite value)
+# by the fast path. run_design itself is checked as well, so drift of the reference
+# code against the recorded outputs is caught too.
+#
+# New fast paths are added to FAST_PATHS: a function from a list of cases to one
+# outputs dict (design_outputs() keys, any subset) or {"error": ...} per case.
+
+GOLDEN_FILE = "golden_cases.json"
+EXAMPLE_FILE = "last_inputs.json"
+CORPUS_VERSION = 2
+DEFAULT_CASES = 1000
+CHUNK_SIZE = 100 # Cases per worker task
+SHAPES = ["Conical", "Plane-Flow (Slot)"]
+
+# Per-quantity tolerances (rtol, atol): |fast - reference| <= atol + rtol * |reference|.
+# Closed-form quantities must agree to rounding; quantities behind the flow-function
+# intersection allow for brentq's tolerance against the analytic intersection.
+ROOT_TOLERANCE = (1e-9, 1e-12)
+CLOSED_FORM_TOLERANCE = (1e-12, 1e-15)
+TOLERANCES = {
+    "sigma_1_crit_kpa": ROOT_TOLERANCE,
+    "sigma_c_crit_kpa": ROOT_TOLERANCE,
+    "H_theta": CLOSED_FORM_TOLERANCE,
+    "B_min": ROOT_TOLERANCE,
+    "ff_p": CLOSED_FORM_TOLERANCE,
+    "f_phi_i": CLOSED_FORM_TOLERANCE,
+    "D_crit_lower": ROOT_TOLERANCE,
+    "sigma_v_max_kpa": CLOSED_FORM_TOLERANCE,
+    "D_crit_upper": CLOSED_FORM_TOLERANCE,
+    "B_crit": ROOT_TOLERANCE,
+    "final_crit_dim": ROOT_TOLERANCE,
+    "D_top": ROOT_TOLERANCE,
+    "h_hopper": ROOT_TOLERANCE,
+}
+
+
+# --- Reference Outputs ---
+def design_outputs(results):
+    """Flattens a run_design() result to the quantities compared by the checker."""
+    outputs = {}
+    if "mass_flow" in results:
+        outputs.update({key: results["mass_flow"][key] for key in ("sigma_1_crit_kpa", "sigma_c_crit_kpa", "H_theta", "B_min")})
+    if "lower" in results:
+        outputs.update(
+            ff_p=results["lower"]["ff_p"],
+            f_phi_i=results["lower"]["f_phi_i"],
+            D_crit_lower=results["lower"]["D_crit"],
+            sigma_v_max_kpa=results["upper"]["sigma_v_max_pa"] / 1000,
+            D_crit_upper=results["upper"]["D_crit"],
+        )
+    if "doming" in results:
+        outputs["B_crit"] = results["doming"]["B_crit"]
+    if "final_crit_dim" in results:
+        outputs["final_crit_dim"] = results["final_crit_dim"]
+    if "expanded" in results:
+        outputs.update(D_top=results["expanded"]["D_top"], h_hopper=results["expanded"]["h_hopper"])
+    return {key: float(value) for key, value in outputs.items()}
+
+def _guarded(function, case):
+    try:
+        outputs = function(case)
+    except Exception as e:
+        return {"error": str(e) or type(e).__name__}
+    if not all(np.isfinite(value) for value in outputs.values()):
+        return {"error": "Non-finite result"}
+    return outputs
+
+
+# --- Fast Paths ---
+def run_design_path(cases):
+    """The reference implementation itself, checked against the recorded outputs."""
+    return [_guarded(lambda case: design_outputs(run_design(case)), case) for case in cases]
+
+def design_graph_path(cases):
+    """Memoized design graph, one graph per chunk as in the Studies runner."""
+    graph = DesignGraph()
+    return [_guarded(lambda case: design_outputs(graph.evaluate(case)), case) for case in cases]
+
+def kernel_path(cases):
+    """
+    Closed-form kernels for linear flow functions: mass_flow_outlet_kernel on all
+    mass-flow outlets of a chunk at once (per hopper shape), required_outlet for
+    funnel flow and expanded_flow_kernel for expanded flow.
+    """
+    outputs = [None] * len(cases)
+    lines = {}
+    for i, case in enumerate(cases):
+        try:
+            validate_design_inputs(case)
+            lines[i] = build_flow_functions(case)[3]
+        except Exception as e:
+            outputs[i] = {"error": str(e) or type(e).__name__}
+
+    for shape in SHAPES:
+        batch = [i for i in lines if cases[i]["flow_pattern"] != "Funnel-Flow" and cases[i]["hopper_shape"] == shape]
+        if not batch:
+            continue
+        column = lambda key: np.array([cases[i][key] for i in batch], dtype=float)
+        m_time, c_time = np.array([lines[i] for i in batch], dtype=float).T
+        mass_flow = mass_flow_outlet_kernel(m_time, c_time, column("ff_manual"), column("gamma"), column("theta_prime_manual"), shape)
+        for j, i in enumerate(batch):
+            outputs[i] = {key: float(mass_flow[key][j]) for key in ("sigma_1_crit_kpa", "sigma_c_crit_kpa", "H_theta", "B_min")}
+
+    for i, (m_time, c_time) in lines.items():
+        case = cases[i]
+        if case["flow_pattern"] == "Funnel-Flow":
+            outputs[i] = _guarded(lambda case: {"final_crit_dim": float(required_outlet(case, m_time, c_time))}, case)
+        elif case["flow_pattern"] == "Expanded-Flow":
+            with np.errstate(invalid="ignore"): # inf - inf where there is no intersection
+                expanded = _guarded(lambda case: {key: float(value) for key, value in expanded_flow_kernel(case, m_time, c_time).items() if key in ("D_top", "h_hopper")}, case)
+            outputs[i] = expanded if "error" in expanded else dict(outputs[i], **expanded)
+        if not all(np.isfinite(value) for key, value in outputs[i].items() if key != "error"):
+            outputs[i] = {"error": "Non-finite result"}
+    return outputs
+
+REFERENCE_PATH = "run_design"
+FAST_PATHS = {
+    REFERENCE_PATH: run_design_path,
+    "design_graph": design_graph_path,
+    "kernels": kernel_path,
+}
+
+
+# --- Corpus Generation ---
+def _round(value, digits=6):
+    return float(f"{value:.{digits}g}")
+
+def _flow_function_overrides(rng, m_time, c_time, use_points):
+    m_inst, c_inst = m_time * rng.uniform(0.4, 0.9), c_time * rng.uniform(0.2, 0.8)
+    if not use_points:
+        return {
+            "ff_input_method": "Define by Equation",
+            "m_inst": _round(m_inst), "c_inst": _round(c_inst),
+            "m_time": _round(m_time), "c_time": _round(c_time),
+        }
+    # Measured points scatter around the lines (2-5 points, 2% noise), so the fitted
+    # intercept of a small c can come out negative, as it does for measured data
+    rows = {}
+    for key, (m, c) in (("ff_inst_data", (m_inst, c_inst)), ("ff_time_data", (m_time, c_time))):
+        sigma_1 = np.sort(rng.uniform(1.0, 30.0, rng.integers(2, 6)))
+        sigma_c = np.round((m * sigma_1 + c) * rng.normal(1.0, 0.02, sigma_1.size), 4)
+        rows[key] = [{FF_X_COL: float(x), FF_Y_COL: float(y)} for x, y in zip(np.round(sigma_1, 4), sigma_c)]
+    return dict(ff_input_method="Define by N test points", **rows)
+
+def sample_case(rng, flow_pattern):
+    """Overrides of the example inputs for one random but realistic case."""
+    shape = SHAPES[rng.integers(2)]
+    delta = rng.uniform(30.0, 62.0)
+    phi_x = rng.uniform(10.0, min(35.0, delta - 5.0))
+    overrides = {
+        "flow_pattern": flow_pattern,
+        "hopper_shape": shape,
+        "gamma": _round(rng.uniform(500.0, 2800.0)),
+        "delta": _round(delta),
+        "phi_prime_calc": _round(phi_x),
+        "D_silo": _round(rng.uniform(1.0, 10.0)),
+        "h_f": _round(rng.uniform(1.0, 30.0)),
+        "K_janssen": _round(rng.uniform(0.3, 0.6)),
+    }
+    if flow_pattern != "Funnel-Flow":
+        # Design Θ a few degrees below the mass-flow limit with the approximate ff
+        theta = mass_flow_limit_angle(delta, phi_x, shape) - rng.uniform(2.0, 5.0)
+        theta = theta if theta > 1.0 else rng.uniform(5.0, 25.0)
+        ff = flow_factor_approx(theta, delta, phi_x, shape)
+        ff = ff if np.isfinite(ff) and ff > 1.0 else rng.uniform(1.1, 2.0)
+        overrides.update(theta_prime_manual=_round(theta), ff_manual=_round(ff))
+    # One case in ten has a time flow function with a negative intercept
+    c_time = rng.uniform(0.1, 3.0) if rng.random() >= 0.1 else -rng.uniform(0.01, 0.5)
+    overrides.update(_flow_function_overrides(rng, rng.uniform(0.05, 0.35), c_time, rng.random() < 0.5))
+    return overrides
+
+def edge_cases(base):
+    """(name, overrides) of the edge cases that every corpus contains."""
+    cases = [
+        (f"example {flow_pattern}, {shape}", {"flow_pattern": flow_pattern, "hopper_shape": shape})
+        for flow_pattern in FLOW_PATTERNS for shape in SHAPES
+    ]
+    # ff_p of Eq. 10.11 below 1.7 for small φe: the floor applies
+    for delta in (20.0, 24.0, 28.0):
+        for flow_pattern in ("Funnel-Flow", "Expanded-Flow"):
+            cases.append((f"ff_p floor, phi_e = {delta:g}, {flow_pattern}", {"flow_pattern": flow_pattern, "delta": delta}))
+    # Intersections far beyond the first bracket, so find_positive_intersection expands it
+    ff_p = rathole_factors(base["delta"], show_message=False)[2]
+    for flow_pattern, ff in (("Mass-Flow", base["ff_manual"]), ("Funnel-Flow", ff_p)):
+        for factor in (40.0, 5000.0):
+            c_time = 0.8
+            m_time = 1 / ff - c_time / (factor * 30.0) # σ1,crit = factor * the equation-mode hint of 30 kPa
+            cases.append((f"bracket expansion x{factor:g}, {flow_pattern}", {
+                "flow_pattern": flow_pattern, "ff_input_method": "Define by Equation",
+                "m_inst": 0.12, "c_inst": 0.2, "m_time": m_time, "c_time": c_time,
+            }))
+        m_time = 1 / ff - 0.8 / 2000.0
+        cases.append((f"bracket expansion from test points, {flow_pattern}", {
+            "flow_pattern": flow_pattern,
+            "ff_time_data": [{FF_X_COL: x, FF_Y_COL: m_time * x + 0.8} for x in (2.0, 6.0)],
+        }))
+    # Flow functions that never meet the ff line, pass through the origin or run on it,
+    # and negative intercepts below the ff line (no intersection) or crossing it
+    for flow_pattern in FLOW_PATTERNS:
+        ff = ff_p if flow_pattern == "Funnel-Flow" else base["ff_manual"]
+        for name, (m_time, c_time) in (
+            ("no intersection", (1 / ff + 0.05, 0.8)),
+            ("zero intercept", (0.2, 0.0)),
+            ("parallel to the ff line", (1 / ff, 0.8)),
+            ("negative intercept", (0.2, -0.16)),
+            ("negative intercept crossing the ff line", (1 / ff + 0.05, -0.16)),
+        ):
+            cases.append((f"{name}, {flow_pattern}", {
+                "flow_pattern": flow_pattern, "ff_input_method": "Define by Equation",
+                "m_inst": 0.12, "c_inst": 0.2, "m_time": m_time, "c_time": c_time,
+            }))
+        # Three measured points whose fit has c ≈ -0.15 kPa
+        cases.append((f"negative intercept from test points, {flow_pattern}", {
+            "flow_pattern": flow_pattern,
+            "ff_time_data": [{FF_X_COL: x, FF_Y_COL: y} for x, y in ((3.1, 0.52), (10.0, 2.06), (18.9, 3.99))],
+        }))
+    # Geometry extremes: shallow and deep fills, steep hoppers, invalid K
+    cases += [
+        ("shallow fill, Funnel-Flow", {"flow_pattern": "Funnel-Flow", "h_f": 0.05}),
+        ("deep fill, Funnel-Flow", {"flow_pattern": "Funnel-Flow", "h_f": 200.0, "D_silo": 1.0}),
+        ("steep hopper, Expanded-Flow", {"flow_pattern": "Expanded-Flow", "theta_prime_manual": 0.5}),
+        ("zero K, Funnel-Flow", {"flow_pattern": "Funnel-Flow", "K_janssen": 0.0}),
+    ]
+    return cases
+
+def generate_corpus(n=DEFAULT_CASES, seed=0, base=None):
+    """
+    The edge cases plus n random cases (overrides of `base`, default the
+    last_inputs.json example) with their reference outputs (or errors).
+    """
+    if base is None:
+        with open(EXAMPLE_FILE, "r") as f:
+            base = json.load(f)
+    rng = np.random.default_rng(seed)
+    named = edge_cases(base) + [(f"random {i}", sample_case(rng, FLOW_PATTERNS[i % len(FLOW_PATTERNS)])) for i in range(n)]
+    names = [name for name, _ in named]
+    overrides = [case for _, case in named]
+    return {
+        "version": CORPUS_VERSION,
+        "seed": seed,
+        "base": base,
+        "names": names,
+        "cases": overrides,
+        "reference": run_design_path([dict(base, **case) for case in overrides]),
+    }
+
+def save_corpus(corpus, path=GOLDEN_FILE):
+    """Writes the corpus with one case, name or reference per line, so diffs show the changed cases."""
+    with open(path, "w") as f:
+        f.write("{\n")
+        for n, (key, value) in enumerate(corpus.items()):
+            f.write(f"{json.dumps(key)}: ")
+            if isinstance(value, list):
+                f.write("[\n" + ",\n".join(json.dumps(item) for item in value) + "\n]")
+            else:
+                f.write(json.dumps(value))
+            f.write(",\n" if n < len(corpus) - 1 else "\n")
+        f.write("}\n")
+
+def load_corpus(path=GOLDEN_FILE):
+    with open(path, "r") as f:
+        corpus = json.load(f)
+    if corpus.get("version") != CORPUS_VERSION:
+        raise ValueError(f"'{path}' is a version {corpus.get('version')} corpus; regenerate it (version {CORPUS_VERSION}).")
+    return corpus
+
+
+# --- Equivalence Check ---
+def compare_outputs(references, outputs, start_index=0, tolerances=TOLERANCES):
+    """
+    Compares one path's outputs with the references. Returns the worst error per
+    quantity ({quantity: {"ratio" (error / tolerance), "abs_error", "rel_error",
+    "case", "reference", "value"}}), the cases both reject and the mismatched cases
+    (one side rejects, the other does not).
+    """
+    worst, both_rejected, mismatches = {}, 0, []
+    for offset, (reference, output) in enumerate(zip(references, outputs)):
+        index = start_index + offset
+        if "error" in reference or "error" in output:
+            if "error" in reference and "error" in output:
+                both_rejected += 1
+            else:
+                mismatches.append(index)
+            continue
+        for quantity, value in output.items():
+            if quantity not in reference:
+                continue
+            expected = reference[quantity]
+            rtol, atol = tolerances.get(quantity, ROOT_TOLERANCE)
+            abs_error = abs(value - expected)
+            ratio = abs_error / (atol + rtol * abs(expected))
+            if quantity not in worst or ratio > worst[quantity]["ratio"]:
+                worst[quantity] = {
+                    "ratio": ratio,
+                    "abs_error": abs_error,
+                    "rel_error": abs_error / abs(expected) if expected else abs_error,
+                    "case": index,
+                    "reference": expected,
+                    "value": value,
+                }
+    return {"worst": worst, "both_rejected": both_rejected, "mismatches": mismatches}
+
+def check_chunk(job):
+    """Runs and compares every path on one chunk of cases (runs in the worker processes)."""
+    start_index, cases, references, paths = job
+    summary = {}
+    for name in paths:
+        start = time.perf_counter()
+        outputs = FAST_PATHS[name](cases)
+        seconds = time.perf_counter() - start
+        summary[name] = dict(compare_outputs(references, outputs, start_index), seconds=seconds)
+    return summary
+
+def _merge(total, part):
+    total["seconds"] += part["seconds"]
+    total["both_rejected"] += part["both_rejected"]
+    total["mismatches"] += part["mismatches"]
+    for quantity, entry in part["worst"].items():
+        if quantity not in total["worst"] or entry["ratio"] > total["worst"][quantity]["ratio"]:
+            total["worst"][quantity] = entry
+
+def check_corpus(corpus, paths=None, workers=None, chunk_size=CHUNK_SIZE):
+    """
+    Checks the fast paths (default: all of FAST_PATHS) against the corpus in a pool
+    of `workers` processes (None: one per CPU; 1: in this process). The reference
+    path is always run to time the speedups. Returns the report: per path the worst
+    error per quantity, the mismatched cases, the time and the speedup over
+    run_design, and whether everything is within tolerance.
+    """
+    paths = [REFERENCE_PATH] + [name for name in (paths or FAST_PATHS) if name != REFERENCE_PATH]
+    unknown = set(paths) - set(FAST_PATHS)
+    if unknown:
+        raise ValueError(f"Unknown fast path(s) {sorted(unknown)}. Use {list(FAST_PATHS)}.")
+    base = corpus["base"]
+    cases = [dict(base, **case) for case in corpus["cases"]]
+    jobs = [
+        (start, cases[start:start + chunk_size], corpus["reference"][start:start + chunk_size], paths)
+        for start in range(0, len(cases), chunk_size)
+    ]
+
+    start = time.perf_counter()
+    if workers == 1 or len(jobs) == 1:
+        summaries = [check_chunk(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            summaries = list(pool.map(check_chunk, jobs))
+    wall_seconds = time.perf_counter() - start
+
+    report = {"cases": len(cases), "chunks": len(jobs), "wall_seconds": wall_seconds, "paths": {}}
+    for name in paths:
+        total = {"seconds": 0.0, "both_rejected": 0, "mismatches": [], "worst": {}}
+        for summary in summaries:
+            _merge(total, summary[name])
+        total["max_ratio"] = max([entry["ratio"] for entry in total["worst"].values()] or [0.0])
+        total["passed"] = total["max_ratio"] <= 1.0 and not total["mismatches"]
+        report["paths"][name] = total
+    reference_seconds = report["paths"][REFERENCE_PATH]["seconds"]
+    for total in report["paths"].values():
+        total["speedup"] = reference_seconds / total["seconds"] if total["seconds"] > 0 else float("inf")
+    report["passed"] = all(total["passed"] for total in report["paths"].values())
+    return report
+
+def format_report(report, names=None):
+    lines = [f"{report['cases']} cases in {report['chunks']} chunks, {report['wall_seconds']:.2f} s wall time"]
+    lines.append(f"{'path':<14} {'worst error/tol':>15}  {'worst quantity (case)':<48} {'mismatches':>10} {'time [s]':>9} {'speedup':>8}")
+    for name, total in report["paths"].items():
+        worst = max(total["worst"].items(), key=lambda item: item[1]["ratio"], default=None)
+        where = "-"
+        if worst is not None and worst[1]["ratio"] > 0:
+            case = worst[1]["case"]
+            where = f"{worst[0]} ({names[case] if names else case})"
+        status = "" if total["passed"] else "  FAILED"
+        lines.append(f"{name:<14} {total['max_ratio']:>15.3g}  {where:<48.48} {len(total['mismatches']):>10} {total['seconds']:>9.3f} {total['speedup']:>7.2f}x{status}")
+        for case in total["mismatches"][:5]:
+            lines.append(f"    mismatch: case {case}" + (f" ({names[case]})" if names else ""))
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Golden-case corpus and numerical-equivalence checker for the fast design paths.")
+    parser.add_argument("command", choices=["generate", "check"], help="generate: sample cases and record the reference outputs, check: compare the fast paths with them")
+    parser.add_argument("--corpus", default=GOLDEN_FILE, help=f"Corpus JSON file (default {GOLDEN_FILE})")
+    parser.add_argument("--n", type=int, default=DEFAULT_CASES, help=f"Random cases besides the edge cases (generate, default {DEFAULT_CASES})")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (generate)")
+    parser.add_argument("--paths", default=None, help=f"Comma-separated fast paths to check (default all: {','.join(FAST_PATHS)})")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default one per CPU; 1 runs in this process)")
+    parser.add_argument("--json", default=None, help="Also write the check report to this JSON file")
+    args = parser.parse_args(argv)
+
+    if args.command == "generate":
+        corpus = generate_corpus(args.n, args.seed)
+        save_corpus(corpus, args.corpus)
+        rejected = sum("error" in reference for reference in corpus["reference"])
+        print(f"{len(corpus['cases'])} cases ({rejected} rejected by the reference) written to '{args.corpus}'.")
+        return 0
+
+    try:
+        corpus = load_corpus(args.corpus)
+    except FileNotFoundError:
+        print(f"No corpus file found ('{args.corpus}'). Run 'generate' first.")
+        return 2
+    paths = [name.strip() for name in args.paths.split(",") if name.strip()] if args.paths else None
+    report = check_corpus(corpus, paths, args.workers)
+    print(format_report(report, corpus["names"]))
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=4)
+    print("\nAll paths within tolerance." if report["passed"] else "\nEquivalence check FAILED.")
+    return 0 if report["passed"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
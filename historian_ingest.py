@@ -0,0 +1,224 @@
+import argparse
+import csv
+import json
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from design_calcs import validate_design_inputs, build_flow_functions, flow_function_at_rest, required_outlet
+
+# --- Plant Historian Ingestion ---
+# Streams silo level histories (multi-GB CSV exports) in chunks and keeps only a
+# few numbers per silo, so memory stays constant however long the history is.
+# Expected columns: timestamp (ISO date/time, or numeric seconds), silo_id and
+# level_m (fill height above the hopper transition, m). Rows of each silo must be
+# in time order; silos may be interleaved.
+#
+# Per silo it tracks, online:
+# - residence time (Little's law): time-averaged level / average drawdown rate
+# - time at rest (consolidation exposure): mass flow moves all material on every
+#   discharge, so the clock restarts whenever the level drops; in funnel flow the
+#   stagnant zone only moves when the silo is emptied, so it restarts at empty
+# - at every level change, the design checks of the Results page with the flow
+#   function for the current time at rest: mass-flow arching (B_min) or funnel-flow
+#   ratholing (lower/emptying and Janssen upper/filling bounds) and doming (slots)
+#
+# The flow function for a time at rest comes from design_calcs.flow_function_at_rest;
+# rows beyond the tested storage time are counted per silo.
+
+HISTORIAN_COLUMNS = {"time": "timestamp", "silo": "silo_id", "level": "level_m"}
+EVENT_FIELDS = ["timestamp_h", "silo_id", "level_m", "rest_h", "required_m", "ratio"]
+DEFAULT_CHUNKSIZE = 1_000_000
+EMPTY_LEVEL = 0.05 # m; at or below this level a funnel-flow silo counts as emptied
+
+
+class SiloMonitor:
+    """
+    Online risk monitor for silos of one material. `inputs` is a submitted inputs dict
+    (last_inputs.json format); `silos` maps silo_id to {"B": outlet size (m)} plus
+    optional "D_silo" and "theta_prime_manual" overrides. storage_time_h is the
+    storage time (h) of the time flow function.
+    """
+
+    def __init__(self, inputs, silos, storage_time_h, default_outlet=None, empty_level=EMPTY_LEVEL):
+        validate_design_inputs(inputs)
+        if storage_time_h <= 0:
+            raise ValueError("Storage time of the time flow function must be greater than 0.")
+        _, _, self.inst_line, self.time_line, _ = build_flow_functions(inputs)
+        self.inputs = inputs
+        self.silos = {str(silo_id): config for silo_id, config in silos.items()}
+        self.storage_time_h = float(storage_time_h)
+        self.default_outlet = default_outlet
+        self.empty_level = empty_level
+        self.mass_flow = inputs["flow_pattern"] != "Funnel-Flow" # The outlet of an expanded-flow silo is in mass flow
+        self.state = {}
+
+    def config(self, silo_id):
+        config = self.silos.get(silo_id)
+        if config is None:
+            if self.default_outlet is None:
+                raise ValueError(f"No outlet size configured for silo '{silo_id}'.")
+            config = {"B": self.default_outlet}
+        return {
+            "B": float(config["B"]),
+            "D_silo": float(config.get("D_silo", self.inputs["D_silo"])),
+            "theta": float(config.get("theta_prime_manual", self.inputs["theta_prime_manual"])),
+        }
+
+    def required_outlet(self, level, rest_h, config):
+        """Smallest safe outlet (m) for the current levels and times at rest (arrays)."""
+        m_ff, c_ff = flow_function_at_rest(rest_h, self.inst_line, self.time_line, self.storage_time_h)
+        return required_outlet(self.inputs, m_ff, c_ff, h_f=level, theta=config["theta"], D_silo=config["D_silo"])
+
+    def new_state(self, silo_id, t0):
+        return {
+            "config": self.config(silo_id), "t0": t0, "last_t": t0, "last_level": np.nan, "rest_start": t0,
+            "rows": 0, "level_changes": 0, "risk_events": 0, "level_integral": 0.0, "drawdown": 0.0,
+            "max_rest_h": 0.0, "beyond_tested_time": 0, "max_ratio": 0.0, "max_ratio_t": np.nan,
+        }
+
+    def update(self, silo_id, t, level, events=None):
+        """Processes one time-ordered block of rows (hours, m) of a silo."""
+        state = self.state.get(silo_id) or self.state.setdefault(silo_id, self.new_state(silo_id, t[0]))
+        t_prev = np.concatenate(([state["last_t"]], t[:-1]))
+        level_prev = np.concatenate(([state["last_level"]], level[:-1]))
+        dt = t - t_prev
+        if np.any(dt < 0):
+            raise ValueError(f"Rows of silo '{silo_id}' are not in time order.")
+        d_level = level - level_prev
+
+        # Residence time sums, trapezoidal level-time integral
+        known = ~np.isnan(level_prev)
+        state["level_integral"] += float(np.sum(0.5 * (level + level_prev)[known] * dt[known]))
+        state["drawdown"] += float(np.sum(np.maximum(-d_level[known], 0)))
+
+        # Time at rest: restarts at the latest discharge (mass flow) or emptying (funnel flow)
+        restart = (d_level < 0) if self.mass_flow else (level <= self.empty_level)
+        rest_start = np.maximum.accumulate(np.where(restart, t, -np.inf))
+        rest_start = np.maximum(rest_start, state["rest_start"])
+        rest_h = t - rest_start
+
+        # Design checks at every level change
+        changed = d_level != 0 # Also true for the first row of a silo (NaN)
+        if changed.any():
+            required = self.required_outlet(level[changed], rest_h[changed], state["config"])
+            ratio = required / state["config"]["B"]
+            risk = ratio > 1
+            state["level_changes"] += int(changed.sum())
+            state["risk_events"] += int(risk.sum())
+            i = int(np.argmax(ratio))
+            if ratio[i] > state["max_ratio"]:
+                state["max_ratio"], state["max_ratio_t"] = float(ratio[i]), float(t[changed][i])
+            if events is not None and risk.any():
+                columns = (t[changed][risk], level[changed][risk], rest_h[changed][risk], required[risk], ratio[risk])
+                t_h, levels, rests, required_m, ratios = (column.tolist() for column in columns)
+                events.writerows(zip(t_h, [silo_id] * len(t_h), levels, rests, required_m, ratios))
+
+        state["rows"] += len(t)
+        state["max_rest_h"] = max(state["max_rest_h"], float(rest_h.max()))
+        state["beyond_tested_time"] += int(np.sum(rest_h[changed] > self.storage_time_h))
+        state["last_t"], state["last_level"], state["rest_start"] = float(t[-1]), float(level[-1]), float(rest_start[-1])
+
+    def summary(self):
+        """One row per silo with residence time, exposure and risk counts."""
+        rows = []
+        for silo_id, state in self.state.items():
+            elapsed = state["last_t"] - state["t0"]
+            mean_level = state["level_integral"] / elapsed if elapsed > 0 else state["last_level"]
+            rows.append({
+                "silo_id": silo_id,
+                "rows": state["rows"],
+                "hours": float(elapsed),
+                "mean_level_m": mean_level,
+                "residence_time_h": state["level_integral"] / state["drawdown"] if state["drawdown"] > 0 else np.inf,
+                "max_rest_h": state["max_rest_h"],
+                "level_changes": state["level_changes"],
+                "risk_events": state["risk_events"],
+                "max_ratio": state["max_ratio"],
+                "max_ratio_timestamp_h": state["max_ratio_t"],
+                "beyond_tested_time": state["beyond_tested_time"],
+            })
+        return rows
+
+
+def timestamps_in_hours(values):
+    """Hours since the epoch, from ISO date/time strings or numeric seconds."""
+    if pd.api.types.is_numeric_dtype(values):
+        return values.to_numpy(dtype=float) / 3600
+    return pd.to_datetime(values).to_numpy(dtype="datetime64[ns]").astype(np.int64) / 3.6e12
+
+def ingest(path, monitor, chunksize=DEFAULT_CHUNKSIZE, memory_map=False, events_path=None, columns=HISTORIAN_COLUMNS):
+    """
+    Streams a historian CSV through `monitor` in chunks of `chunksize` rows.
+    memory_map=True maps the file instead of buffered reads. Risk events (required
+    outlet above the installed one) are written to events_path if given.
+    Returns the per-silo summary and the processing statistics.
+    """
+    start = time.perf_counter()
+    events_file = open(events_path, "w", newline="") if events_path else None
+    try:
+        events = None
+        if events_file:
+            events = csv.writer(events_file)
+            events.writerow(EVENT_FIELDS)
+        n_rows = 0
+        reader = pd.read_csv(
+            path, usecols=list(columns.values()), dtype={columns["silo"]: str, columns["level"]: float},
+            chunksize=chunksize, memory_map=memory_map,
+        )
+        for chunk in reader:
+            t = timestamps_in_hours(chunk[columns["time"]])
+            level = chunk[columns["level"]].to_numpy(dtype=float)
+            for silo_id, index in chunk.groupby(columns["silo"], sort=False).indices.items():
+                monitor.update(silo_id, t[index], level[index], events)
+            n_rows += len(chunk)
+    finally:
+        if events_file:
+            events_file.close()
+
+    elapsed = time.perf_counter() - start
+    summary = monitor.summary()
+    history_h = max((row["hours"] for row in summary), default=0.0)
+    return summary, {
+        "rows": n_rows,
+        "seconds": elapsed,
+        "rows_per_second": n_rows / elapsed if elapsed > 0 else np.inf,
+        "history_hours": history_h,
+        "speedup_over_real_time": history_h * 3600 / elapsed if elapsed > 0 else np.inf,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stream a plant-historian level CSV and report residence time and rathole/arching risk per silo.")
+    parser.add_argument("csv", help=f"Historian export with columns {', '.join(HISTORIAN_COLUMNS.values())}")
+    parser.add_argument("--inputs", default="last_inputs.json", help="Material inputs (last_inputs.json format)")
+    parser.add_argument("--silos", default=None, help='JSON file mapping silo_id to {"B": m, "D_silo": m, "theta_prime_manual": deg}')
+    parser.add_argument("--outlet", type=float, default=None, help="Outlet size (m) for silos not in --silos")
+    parser.add_argument("--storage-time", type=float, required=True, help="Storage time (h) of the time flow function")
+    parser.add_argument("--chunksize", type=int, default=DEFAULT_CHUNKSIZE)
+    parser.add_argument("--memory-map", action="store_true", help="Memory-map the CSV instead of buffered reads")
+    parser.add_argument("--events", default=None, help="Write risk events to this CSV")
+    args = parser.parse_args(argv)
+
+    with open(args.inputs, "r") as f:
+        inputs = json.load(f)
+    silos = {}
+    if args.silos:
+        with open(args.silos, "r") as f:
+            silos = json.load(f)
+    try:
+        monitor = SiloMonitor(inputs, silos, args.storage_time, default_outlet=args.outlet)
+        summary, stats = ingest(args.csv, monitor, args.chunksize, args.memory_map, args.events)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+
+    print(pd.DataFrame(summary).to_string(index=False))
+    print(f"{stats['rows']:,} rows in {stats['seconds']:.2f} s ({stats['rows_per_second']:,.0f} rows/s, {stats['speedup_over_real_time']:,.0f}x real time)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,155 @@
+import numpy as np
+
+from design_calcs import g, janssen_sigma_v_max, require_positive
+from discharge_rate import outlet_area
+
+# --- Hopper Stress Field and Feeder Loads ---
+# Stresses in a converging mass-flow hopper from the transition down to the outlet,
+# from the equilibrium of a horizontal slice (Walker/Motzkus, as in the hopper loads
+# of EN 1991-4). With x the height above the (virtual) apex, h_h = D / (2·tanΘ) the
+# apex-to-transition height and σv,t the Janssen vertical stress at the transition
+# (the stress the funnel-flow upper bound uses):
+#
+#   σv(x) = ρb·g·h_h / (n - 1) · ((x/h_h) - (x/h_h)^n) + σv,t · (x/h_h)^n
+#   n = S·(F·μ·cotΘ + F - 1), S = 2 conical / 1 plane flow, μ = tanφx
+#
+# The wall normal stress is σn = F·σv and the wall shear stress τw = μ·σn. The stress
+# ratio F is
+#
+#   filling:   Ff = 1 - b / (1 + tanΘ / μ), b = 0.2
+#   discharge: Fe = (1 + sinφe·cosε) / (1 - sinφe·cos(2Θ + ε)), ε = φx + arcsin(sinφx / sinφe)
+#
+# During discharge the bulk solid is at steady flow, so the wall stress lies on the
+# Mohr circle of the effective yield locus and σ1 = σn·(1 + sinφe) / (1 + sinφe·cosε).
+# After filling the major principal stress is close to vertical, σ1 = max(σv, σn).
+# The vertical stress at the outlet times the outlet area gives the initial (after
+# filling) and flow (during discharge) loads on the feeder.
+#
+# Every function broadcasts its arguments: a column of silos against a row of
+# positions gives all profiles in one array evaluation.
+
+FILLING = "Filling"
+DISCHARGE = "Discharge"
+STATES = [FILLING, DISCHARGE]
+B_FILLING = 0.2 # Empirical filling coefficient b of EN 1991-4 Eq. 6.19
+N_POSITIONS = 60
+
+
+def _angles(theta, phi_e, phi_x):
+    theta = np.asarray(theta, dtype=float)
+    if np.any((theta <= 0) | (theta >= 90)):
+        raise ValueError("Hopper angle must be between 0 and 90 degrees for the hopper stresses.")
+    return np.radians(theta), np.radians(np.asarray(phi_e, dtype=float)), np.radians(np.asarray(phi_x, dtype=float))
+
+def hopper_height(D, theta):
+    """Height (m) of the hopper apex below a transition of diameter/width D, Θ in degrees."""
+    return np.asarray(D, dtype=float) / (2 * np.tan(np.radians(np.asarray(theta, dtype=float))))
+
+def stress_ratio(theta, phi_e, phi_x, state):
+    """Ratio F = σn / σv of the wall normal to the mean vertical stress for filling or discharge."""
+    theta_rad, phi_e_rad, phi_x_rad = _angles(theta, phi_e, phi_x)
+    if state == FILLING:
+        return 1 - B_FILLING / (1 + np.tan(theta_rad) / np.tan(phi_x_rad))
+    if state == DISCHARGE:
+        sin_phi_e = np.sin(phi_e_rad)
+        with np.errstate(invalid="ignore"):
+            epsilon = phi_x_rad + np.arcsin(np.sin(phi_x_rad) / sin_phi_e) # NaN where φx > φe
+        return (1 + sin_phi_e * np.cos(epsilon)) / (1 - sin_phi_e * np.cos(2 * theta_rad + epsilon))
+    raise ValueError(f"Unknown hopper state '{state}'. Use one of {STATES}.")
+
+def stress_exponent(F, theta, phi_x, hopper_shape):
+    """Exponent n of the hopper stress distribution, n = S·(F·μ·cotΘ + F - 1)."""
+    S = 2.0 if hopper_shape == "Conical" else 1.0
+    theta_rad = np.radians(np.asarray(theta, dtype=float))
+    return S * (F * np.tan(np.radians(phi_x)) / np.tan(theta_rad) + F - 1)
+
+def hopper_stresses(x, gamma, theta, phi_e, phi_x, D, sigma_v_t_kpa, hopper_shape, state):
+    """
+    Stresses (kPa) at height x (m) above the hopper apex for a transition of
+    diameter/width D and the vertical stress σv,t (kPa) acting on it. Returns a dict
+    of arrays: sigma_v (mean vertical), sigma_n (wall normal), tau_w (wall shear)
+    and sigma_1 (major principal stress at the wall).
+    """
+    F = stress_ratio(theta, phi_e, phi_x, state)
+    n = stress_exponent(F, theta, phi_x, hopper_shape)
+    h_h = hopper_height(D, theta)
+    ratio = np.clip(np.asarray(x, dtype=float) / h_h, 0.0, 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        shape_term = np.where(
+            np.abs(n - 1) > 1e-9,
+            (ratio - ratio**n) / (n - 1),
+            -ratio * np.log(np.where(ratio > 0, ratio, 1.0)), # n → 1 limit
+        )
+    sigma_v = np.asarray(gamma, dtype=float) * g * h_h / 1000 * shape_term + np.asarray(sigma_v_t_kpa, dtype=float) * ratio**n
+    sigma_n = F * sigma_v
+    if state == FILLING:
+        sigma_1 = np.maximum(sigma_v, sigma_n)
+    else:
+        sin_phi_e = np.sin(np.radians(phi_e))
+        phi_x_rad = np.radians(phi_x)
+        with np.errstate(invalid="ignore"):
+            epsilon = phi_x_rad + np.arcsin(np.sin(phi_x_rad) / sin_phi_e)
+        sigma_1 = sigma_n * (1 + sin_phi_e) / (1 + sin_phi_e * np.cos(epsilon))
+    return {
+        "sigma_v": sigma_v,
+        "sigma_n": sigma_n,
+        "tau_w": np.tan(np.radians(phi_x)) * sigma_n,
+        "sigma_1": sigma_1,
+    }
+
+def hopper_stress_profiles(gamma, theta, phi_e, phi_x, D, B, hopper_shape, h_f=None, K_janssen=None,
+                           sigma_v_t_pa=None, n=N_POSITIONS):
+    """
+    Filling and discharge stress profiles from the transition down to the outlet B (m)
+    for one silo (scalars) or many (1-D arrays of equal length). The transition
+    stress σv,t (Pa) is the Janssen stress at filling height h_f unless it is given.
+    Returns a dict with "z" (height above the outlet, m) and "x" (above the apex),
+    shape (silos, n) or (n,), the transition stress in kPa and per state the
+    hopper_stresses arrays. Index 0 along the positions is the outlet.
+    """
+    _angles(theta, phi_e, phi_x)
+    values = [np.asarray(value, dtype=float) for value in (gamma, theta, phi_e, phi_x, D, B)]
+    single = all(value.ndim == 0 for value in values)
+    gamma, theta, phi_e, phi_x, D, B = (np.atleast_1d(value)[:, None] for value in values)
+    require_positive(float(np.min(D)), "Silo diameter/width")
+    if sigma_v_t_pa is None:
+        require_positive(float(np.min(K_janssen)), "Janssen stress ratio K")
+        h_f, K_janssen = (np.reshape(np.asarray(value, dtype=float), (-1, 1)) for value in (h_f, K_janssen))
+        sigma_v_t_pa = janssen_sigma_v_max(gamma, D, np.maximum(h_f, 0), K_janssen, phi_x)
+    sigma_v_t_kpa = np.reshape(np.asarray(sigma_v_t_pa, dtype=float), (-1, 1)) / 1000
+
+    h_h = hopper_height(D, theta)
+    x_outlet = np.minimum(hopper_height(B, theta), h_h)
+    x = x_outlet + np.linspace(0.0, 1.0, n)[None, :] * (h_h - x_outlet)
+    profiles = {"x": x, "z": x - x_outlet, "sigma_v_t_kpa": np.broadcast_to(sigma_v_t_kpa, D.shape)[:, 0]}
+    for state in STATES:
+        profiles[state] = hopper_stresses(x, gamma, theta, phi_e, phi_x, D, sigma_v_t_kpa, hopper_shape, state)
+
+    if single:
+        profiles = _squeeze(profiles)
+    return profiles
+
+def _squeeze(value):
+    if isinstance(value, dict):
+        return {key: _squeeze(item) for key, item in value.items()}
+    value = value[0]
+    return value if value.ndim else float(value)
+
+def feeder_loads(profiles, B, hopper_shape, length=None):
+    """
+    Vertical loads on the feeder (kN) from the outlet stresses of
+    hopper_stress_profiles: the initial load after filling and the flow load during
+    discharge. Plane-flow loads are per metre of slot unless the slot length is given.
+    """
+    if hopper_shape != "Conical" and length is None:
+        length = 1.0
+    area = outlet_area(B, hopper_shape, length)
+    sigma_v_initial = profiles[FILLING]["sigma_v"][..., 0]
+    sigma_v_flow = profiles[DISCHARGE]["sigma_v"][..., 0]
+    return {
+        "outlet_area": area,
+        "sigma_v_initial_kpa": sigma_v_initial,
+        "sigma_v_flow_kpa": sigma_v_flow,
+        "initial_kn": sigma_v_initial * area,
+        "flow_kn": sigma_v_flow * area,
+    }
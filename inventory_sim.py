@@ -0,0 +1,188 @@
+import numpy as np
+
+from design_calcs import validate_design_inputs, build_flow_functions, flow_function_at_rest, required_outlet
+
+# --- Silo Inventory Simulation ---
+# Event-driven layer model of a silo under a fill/discharge schedule. Every fill
+# event adds a layer (volume, time filled). Discharges remove material:
+# - mass flow (FIFO): from the bottom layer up, and every discharge sets the
+#   whole content in motion, so the time at rest restarts for all layers
+# - funnel flow (FILO): from the top layer down through the flow channel; the
+#   stagnant material below never moves until it is discharged
+# Layers are kept in one preallocated array pair (volume, time filled) used as a
+# deque between a bottom and a top index, so a discharge that empties several
+# layers is one cumulative-sum search, not a loop over layers.
+
+FIFO = "Mass-Flow"
+FILO = "Funnel-Flow"
+RTD_BINS = 50
+
+
+class LayerBuffer:
+    """Array-backed deque of layers: volume (m³) and time filled (h), bottom to top."""
+
+    def __init__(self, capacity=1024):
+        self.volume = np.zeros(capacity)
+        self.t_in = np.zeros(capacity)
+        self.bottom = 0
+        self.top = 0 # One past the top layer
+
+    def __len__(self):
+        return self.top - self.bottom
+
+    def total(self):
+        return float(self.volume[self.bottom:self.top].sum())
+
+    def push(self, volume, t):
+        if self.top == len(self.volume):
+            # Compact to the front, grow if still more than half full
+            n = len(self)
+            size = len(self.volume) * 2 if n > len(self.volume) // 2 else len(self.volume)
+            volume_new, t_in_new = np.zeros(size), np.zeros(size)
+            volume_new[:n], t_in_new[:n] = self.volume[self.bottom:self.top], self.t_in[self.bottom:self.top]
+            self.volume, self.t_in, self.bottom, self.top = volume_new, t_in_new, 0, n
+        self.volume[self.top], self.t_in[self.top] = volume, t
+        self.top += 1
+
+    def take(self, volume, from_bottom):
+        """Removes up to `volume` m³ from the bottom or top. Returns (volumes, times filled) removed."""
+        if len(self) == 0 or volume <= 0:
+            return np.zeros(0), np.zeros(0)
+        if from_bottom:
+            available, t_in = self.volume[self.bottom:self.top], self.t_in[self.bottom:self.top]
+        else:
+            available, t_in = self.volume[self.top - 1:self.bottom - 1 if self.bottom else None:-1], self.t_in[self.top - 1:self.bottom - 1 if self.bottom else None:-1]
+        cumulative = np.cumsum(available)
+        # Layers removed completely; the tolerance keeps round-off residues from lingering as layers
+        n_full = int(np.searchsorted(cumulative, volume * (1 + 1e-9), side="right"))
+        removed, removed_t_in = available[:n_full].copy(), t_in[:n_full].copy()
+        rest = volume - (cumulative[n_full - 1] if n_full else 0.0)
+        if n_full < len(available) and rest > 0:
+            index = self.bottom + n_full if from_bottom else self.top - 1 - n_full
+            self.volume[index] -= rest
+            removed, removed_t_in = np.append(removed, rest), np.append(removed_t_in, self.t_in[index])
+        if from_bottom:
+            self.bottom += n_full
+        else:
+            self.top -= n_full
+        return removed, removed_t_in
+
+    def oldest(self):
+        return float(self.t_in[self.bottom]) if len(self) else np.nan # Layers are filled in time order
+
+
+def simulate(times, fill, discharge, flow_pattern, capacity=None):
+    """
+    Runs the fill/discharge schedule (arrays of event times in h and volumes in m³;
+    at each event the fill is added before the discharge). Returns the removed
+    volumes and their residence times (h), the longest time at rest of any
+    material (h), and the overflow/shortfall volumes.
+    """
+    times, fill, discharge = (np.asarray(values, dtype=float) for values in (times, fill, discharge))
+    if flow_pattern not in (FIFO, FILO):
+        raise ValueError(f"Unknown flow pattern '{flow_pattern}'.")
+    if np.any(np.diff(times) < 0):
+        raise ValueError("Schedule times must be in increasing order.")
+    if np.any(fill < 0) or np.any(discharge < 0):
+        raise ValueError("Fill and discharge volumes must not be negative.")
+
+    layers = LayerBuffer()
+    inventory = 0.0
+    last_move = times[0] if times.size else 0.0 # Mass flow: time of the last discharge
+    max_rest = 0.0
+    removed_volume, removed_age = [], []
+    overflow = shortfall = 0.0
+
+    for t, fill_volume, discharge_volume in zip(times.tolist(), fill.tolist(), discharge.tolist()):
+        if capacity is not None and inventory + fill_volume > capacity:
+            overflow += inventory + fill_volume - capacity
+            fill_volume = capacity - inventory
+        if fill_volume > 0:
+            layers.push(fill_volume, t)
+            inventory += fill_volume
+        if discharge_volume > 0:
+            if discharge_volume > inventory:
+                shortfall += discharge_volume - inventory
+                discharge_volume = inventory
+            if flow_pattern == FIFO and len(layers):
+                # Material at the outlet rested since the last discharge or since it was filled
+                max_rest = max(max_rest, t - max(last_move, layers.oldest()))
+                last_move = t
+            volume, t_in = layers.take(discharge_volume, from_bottom=flow_pattern == FIFO)
+            if flow_pattern == FILO and t_in.size:
+                max_rest = max(max_rest, float((t - t_in).max()))
+            inventory -= float(volume.sum())
+            removed_volume.append(volume)
+            removed_age.append(t - t_in)
+
+    # Material still in the silo at the end of the schedule
+    t_end = times[-1] if times.size else 0.0
+    if len(layers):
+        start = max(last_move, layers.oldest()) if flow_pattern == FIFO else layers.oldest()
+        max_rest = max(max_rest, t_end - start)
+
+    volume = np.concatenate(removed_volume) if removed_volume else np.zeros(0)
+    age = np.concatenate(removed_age) if removed_age else np.zeros(0)
+    return {
+        "volume": volume,
+        "residence_time": age,
+        "max_rest_h": float(max_rest),
+        "final_inventory": inventory,
+        "overflow": overflow,
+        "shortfall": shortfall,
+    }
+
+def residence_time_distribution(volume, residence_time, bins=RTD_BINS, upper=None):
+    """Volume-weighted residence-time histogram: bin edges (h) and volume fraction per bin."""
+    upper = upper or (float(residence_time.max()) if residence_time.size else 1.0) or 1.0
+    counts, edges = np.histogram(residence_time, bins=bins, range=(0, upper), weights=volume)
+    total = volume.sum()
+    return edges, counts / total if total > 0 else counts
+
+def weighted_percentile(values, weights, q):
+    """Volume-weighted percentile(s) q (0-100) of values."""
+    if values.size == 0:
+        return np.full(np.shape(q), np.nan)
+    order = np.argsort(values, kind="stable")
+    cumulative = np.cumsum(weights[order])
+    return np.interp(np.asarray(q, dtype=float) / 100 * cumulative[-1], cumulative, values[order])
+
+def simulate_both(inputs, times, fill, discharge, storage_time_h, B, capacity=None):
+    """
+    Simulates the schedule for mass flow and funnel flow, and checks the outlet B (m)
+    with the flow function for each pattern's longest time at rest. Mass flow uses
+    the inputs' hopper; funnel flow the rathole (and doming) checks at fill height h_f.
+    """
+    validate_design_inputs(inputs)
+    if storage_time_h <= 0:
+        raise ValueError("Storage time of the time flow function must be greater than 0.")
+    _, _, inst_line, time_line, _ = build_flow_functions(inputs)
+
+    results = {}
+    for flow_pattern in (FIFO, FILO):
+        run = simulate(times, fill, discharge, flow_pattern, capacity)
+        m_ff, c_ff = flow_function_at_rest(run["max_rest_h"], inst_line, time_line, storage_time_h)
+        required = float(required_outlet(dict(inputs, flow_pattern=flow_pattern), m_ff, c_ff))
+        p50, p90, p99 = weighted_percentile(run["residence_time"], run["volume"], [50, 90, 99])
+        total = run["volume"].sum()
+        run.update({
+            "mean_residence_h": float(np.dot(run["volume"], run["residence_time"]) / total) if total > 0 else np.nan,
+            "p50_h": float(p50), "p90_h": float(p90), "p99_h": float(p99),
+            "beyond_tested_time": run["max_rest_h"] > storage_time_h,
+            "required_outlet": required,
+            "adequate": bool(required <= B),
+        })
+        results[flow_pattern] = run
+    return results
+
+def periodic_schedule(hours, fill_rate, discharge_rate, fill_hours=range(6, 22), discharge_hours=range(0, 24),
+                      discharge_days=range(7), fill_days=range(7)):
+    """
+    Hourly schedule: fill_rate (m³/h) during fill_hours on fill_days, discharge_rate
+    (m³/h) during discharge_hours on discharge_days (0 = Monday) of every week.
+    """
+    t = np.arange(int(hours), dtype=float)
+    hour_of_day, day_of_week = t % 24, (t // 24) % 7
+    fill = np.where(np.isin(hour_of_day, list(fill_hours)) & np.isin(day_of_week, list(fill_days)), fill_rate, 0.0)
+    discharge = np.where(np.isin(hour_of_day, list(discharge_hours)) & np.isin(day_of_week, list(discharge_days)), discharge_rate, 0.0)
+    return t, fill, discharge
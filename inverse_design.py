@@ -0,0 +1,122 @@
+import numpy as np
+
+from design_calcs import g, arching_function_H, mass_flow_limit_angle, flow_factor_approx
+
+# --- Inverse (Retrofit) Design ---
+# Runs the mass-flow outlet equation of the Results page backwards for existing
+# hoppers: B = H(Θ) * σc,crit / (ρb * g) gives the largest unconfined strength an
+# outlet of size B can break, σc,max = B * ρb * g / H(Θ). The consolidation stress
+# acting on the arch at the outlet is σ1 = ff * σc,max (the point where the flow
+# factor line σc = σ1 / ff reaches σc,max). A solid flows if its flow function
+# stays at or below σc,max there, i.e. the outlet is at least B_min.
+#
+# All functions broadcast over silos, so one call screens every installed silo.
+# A flow-function family is given by storage times t (h, 0 = instantaneous) and
+# linear flow functions σc = m_t * σ1 + c_t; the strength at the outlet stress is
+# interpolated linearly between the tested times (no extrapolation).
+
+HOPPER_SHAPES = ["Conical", "Plane-Flow (Slot)"]
+FLOWS = "flows at all tested times"
+TIME_LIMITED = "time-limited"
+NO_FLOW = "does not flow"
+NOT_MASS_FLOW = "not mass flow"
+
+
+def max_breakable_strength(B, gamma, theta, hopper_shape):
+    """Largest unconfined yield strength σc,max (kPa) an outlet B (m) breaks at Θ (°)."""
+    return np.asarray(B, dtype=float) * np.asarray(gamma, dtype=float) * g / (arching_function_H(theta, hopper_shape) * 1000)
+
+def silo_flow_factors(theta, phi_e, phi_x, hopper_shapes):
+    """
+    Flow factor ff(Θ) and mass-flow limit angle for silos of mixed shapes
+    (hopper_shapes is an array of shape names). NaN where mass flow is not possible.
+    """
+    theta, phi_e, phi_x, hopper_shapes = np.broadcast_arrays(
+        np.asarray(theta, dtype=float), np.asarray(phi_e, dtype=float), np.asarray(phi_x, dtype=float), np.asarray(hopper_shapes)
+    )
+    ff = np.full(theta.shape, np.nan)
+    theta_limit = np.full(theta.shape, np.nan)
+    for shape in HOPPER_SHAPES:
+        mask = hopper_shapes == shape
+        if mask.any():
+            theta_limit[mask] = mass_flow_limit_angle(phi_e[mask], phi_x[mask], shape)
+            ff[mask] = flow_factor_approx(theta[mask], phi_e[mask], phi_x[mask], shape)
+    return ff, theta_limit
+
+def outlet_capacity(B, theta, gamma, ff, hopper_shapes):
+    """
+    σc,max (kPa) and the consolidation stress at the outlet σ1 = ff * σc,max (kPa)
+    for silos of mixed shapes, broadcast over all arguments.
+    """
+    B, theta, gamma, ff, hopper_shapes = np.broadcast_arrays(
+        np.asarray(B, dtype=float), np.asarray(theta, dtype=float), np.asarray(gamma, dtype=float),
+        np.asarray(ff, dtype=float), np.asarray(hopper_shapes)
+    )
+    sigma_c_max = np.full(B.shape, np.nan)
+    for shape in HOPPER_SHAPES:
+        mask = hopper_shapes == shape
+        if mask.any():
+            sigma_c_max[mask] = max_breakable_strength(B[mask], gamma[mask], theta[mask], shape)
+    return sigma_c_max, ff * sigma_c_max
+
+def max_storage_time(sigma_c_max, sigma_1_outlet, times, m_ff, c_ff):
+    """
+    Longest storage time (h) whose flow function still allows flow at every silo.
+    times, m_ff and c_ff describe the flow-function family (one entry per tested
+    time, sorted by time). Returns (t_max, strength at each time level [silos x times],
+    status): t_max is inf if all tested times flow and NaN if the first one does not.
+    """
+    times = np.asarray(times, dtype=float)
+    order = np.argsort(times, kind="stable")
+    times, m_ff, c_ff = times[order], np.asarray(m_ff, dtype=float)[order], np.asarray(c_ff, dtype=float)[order]
+    sigma_c_max = np.asarray(sigma_c_max, dtype=float)[..., None]
+    strength = m_ff * np.asarray(sigma_1_outlet, dtype=float)[..., None] + c_ff
+    excess = strength - sigma_c_max # > 0: arch is stable at that time level
+
+    fails = excess > 0
+    first_fail = np.argmax(fails, axis=-1)
+    any_fail = fails.any(axis=-1)
+    previous = np.maximum(first_fail - 1, 0)
+    e_lo = np.take_along_axis(excess, previous[..., None], axis=-1)[..., 0]
+    e_hi = np.take_along_axis(excess, first_fail[..., None], axis=-1)[..., 0]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fraction = np.where(e_hi > e_lo, -e_lo / (e_hi - e_lo), 0.0)
+    t_max = times[previous] + np.clip(fraction, 0, 1) * (times[first_fail] - times[previous])
+
+    t_max = np.where(any_fail, np.where(first_fail == 0, np.nan, t_max), np.inf)
+    t_max = np.where(np.isnan(sigma_c_max[..., 0]), np.nan, t_max)
+    status = np.where(~any_fail, FLOWS, np.where(first_fail == 0, NO_FLOW, TIME_LIMITED))
+    return t_max, strength, status
+
+def screen_silos(silos, gamma, phi_e, times, m_ff, c_ff):
+    """
+    Screens existing mass-flow hoppers against a product. `silos` is a dict of
+    equal-length arrays: 'B' (m), 'theta' (°), 'hopper_shape' and 'phi_x' (° wall
+    friction of the product on each silo's wall). The product has bulk density
+    gamma, effective angle of internal friction phi_e and the flow-function family
+    (times, m_ff, c_ff). Returns a dict of per-silo arrays.
+    """
+    B = np.asarray(silos["B"], dtype=float)
+    theta = np.asarray(silos["theta"], dtype=float)
+    shapes = np.asarray(silos["hopper_shape"])
+    if np.any(B <= 0):
+        raise ValueError("Outlet sizes must be greater than 0.")
+    if np.any((theta <= 0) | (theta >= 90)):
+        raise ValueError("Hopper angles must be between 0 and 90 degrees.")
+    unknown = set(shapes.tolist()) - set(HOPPER_SHAPES)
+    if unknown:
+        raise ValueError(f"Unknown hopper shape(s) {sorted(unknown)}. Use one of {HOPPER_SHAPES}.")
+
+    ff, theta_limit = silo_flow_factors(theta, phi_e, silos["phi_x"], shapes)
+    mass_flow = theta <= theta_limit
+    sigma_c_max, sigma_1_outlet = outlet_capacity(B, theta, gamma, ff, shapes)
+    t_max, strength, status = max_storage_time(sigma_c_max, sigma_1_outlet, times, m_ff, c_ff)
+    return {
+        "ff": ff,
+        "theta_limit": theta_limit,
+        "sigma_c_max_kpa": sigma_c_max,
+        "sigma_1_outlet_kpa": sigma_1_outlet,
+        "strength_kpa": strength,
+        "max_storage_time": np.where(mass_flow, t_max, np.nan),
+        "status": np.where(mass_flow, status, NOT_MASS_FLOW),
+    }
@@ -0,0 +1,335 @@
+import argparse
+import contextlib
+import json
+import os
+import resource
+import sys
+import threading
+import time
+import warnings
+from concurrent.futures import ThreadPoolExecutor
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
+import numpy as np
+from unittest.mock import MagicMock
+
+import streamlit
+import streamlit.testing.v1.app_test as app_test_module
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.testing.v1 import AppTest
+
+from session_memory import TABLE_COLUMNS, state_usage, to_records
+
+HOME_PAGE = "1_Hopper_Design.py"
+INPUTS_PAGE = "pages/3_User_Inputs.py"
+RESULTS_PAGE = "pages/4_Results.py"
+DESIGN_STEPS_PAGE = "pages/2_Design_Steps.py"
+SAVE_FILE = "last_inputs.json"
+RUN_TIMEOUT = 60 # s per simulated rerun
+
+
+# --- Process Metrics ---
+def current_rss_mb():
+    """Current resident set size (MB). Uses /proc on Linux, otherwise the peak RSS."""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1e6 if sys.platform == "darwin" else peak / 1e3
+
+def cpu_seconds():
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_utime + usage.ru_stime
+
+
+# --- Shared Runtime ---
+# AppTest has no option for sessions that share one runtime, so shared_runtime()
+# patches Streamlit internals: the Runtime name inside streamlit.testing.v1.app_test
+# and the private Runtime._instance. This depends on the Streamlit version pinned in
+# requirements.txt (TESTED_STREAMLIT). check_streamlit_internals() fails with a clear
+# error if the internals are missing and warns on other versions; re-check the
+# patch against app_test.py whenever the pin changes.
+TESTED_STREAMLIT = "1.48"
+
+def check_streamlit_internals():
+    """Raises RuntimeError if AppTest lacks the internals shared_runtime() patches; warns on untested versions."""
+    if getattr(app_test_module, "Runtime", None) is not Runtime or not hasattr(Runtime, "_instance"):
+        raise RuntimeError(
+            f"load_test.py patches streamlit.testing.v1.app_test.Runtime and Runtime._instance, which Streamlit "
+            f"{streamlit.__version__} does not provide. It was written for Streamlit {TESTED_STREAMLIT}.x (requirements.txt)."
+        )
+    if not streamlit.__version__.startswith(f"{TESTED_STREAMLIT}."):
+        warnings.warn(
+            f"load_test.py was written for Streamlit {TESTED_STREAMLIT}.x; Streamlit {streamlit.__version__} may run "
+            "AppTest sessions differently, so check the shared runtime before trusting the results.",
+            stacklevel=2,
+        )
+
+class _RuntimeStandIn:
+    """
+    Replaces the Runtime name inside AppTest. AppTest installs a fresh mock runtime
+    as the process-global Runtime._instance on every run and clears it afterwards,
+    so concurrent sessions in one process would clear each other's runtime.
+    """
+    _instance = None
+
+@contextlib.contextmanager
+def shared_runtime():
+    """Installs one mock runtime shared by all simulated sessions, like a single server replica."""
+    check_streamlit_internals()
+    mock_runtime = MagicMock(spec=Runtime)
+    mock_runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    mock_runtime.cache_storage_manager = MemoryCacheStorageManager()
+
+    saved_instance = Runtime._instance
+    Runtime._instance = mock_runtime
+    app_test_module.Runtime = _RuntimeStandIn
+    try:
+        yield mock_runtime
+    finally:
+        app_test_module.Runtime = Runtime
+        Runtime._instance = saved_instance
+
+
+# --- Simulated User ---
+class SimulatedUser:
+    """
+    One browser session driven headlessly through the app pages with AppTest.
+    Each user submits its own case (solid name 'Load User <n>') so overwrites of
+    the shared save file by other sessions can be detected.
+    """
+
+    def __init__(self, user_id, seed=0):
+        self.user_id = user_id
+        self.solid_name = f"Load User {user_id}"
+        self.rng = np.random.default_rng(seed + user_id)
+        self.latencies = [] # (step, seconds)
+        self.errors = []
+        self.save_file_mismatches = 0
+        self.save_file_read_errors = 0
+        self.at = AppTest.from_file(HOME_PAGE, default_timeout=RUN_TIMEOUT)
+
+    def _run(self, step, action):
+        start = time.perf_counter()
+        try:
+            action()
+            if self.at.exception:
+                self.errors.append(f"{step}: {self.at.exception[0].message}")
+        except Exception as e:
+            self.errors.append(f"{step}: {e}")
+        self.latencies.append((step, time.perf_counter() - start))
+
+    def _edit_data_editors(self):
+        """Simulates data-editor edits by writing perturbed tables (compact records) into session state."""
+        scale = self.rng.uniform(0.8, 1.2, size=3)
+        self.at.session_state["wyl_data"] = to_records([
+            {"Normal Stress (kPa)": 3.1, "Shear Stress (kPa)": 1.4 * scale[0]},
+            {"Normal Stress (kPa)": 12.4, "Shear Stress (kPa)": 4.9 * scale[0]},
+            {"Normal Stress (kPa)": 20.0, "Shear Stress (kPa)": 7.8 * scale[0]},
+        ], TABLE_COLUMNS["wyl_data"])
+        self.at.session_state["ff_inst_data"] = to_records([
+            {"Consol. Stress σ₁ (kPa)": 3.1, "Strength σc (kPa)": 0.6 * scale[1]},
+            {"Consol. Stress σ₁ (kPa)": 18.9, "Strength σc (kPa)": 2.5 * scale[1]},
+        ], TABLE_COLUMNS["ff_inst_data"])
+        self.at.session_state["ff_time_data"] = to_records([
+            {"Consol. Stress σ₁ (kPa)": 3.1, "Strength σc (kPa)": 1.5 * scale[2]},
+            {"Consol. Stress σ₁ (kPa)": 18.9, "Strength σc (kPa)": 5.0 * scale[2]},
+        ], TABLE_COLUMNS["ff_time_data"])
+
+    def _check_save_file(self):
+        try:
+            with open(SAVE_FILE, "r") as f:
+                saved = json.load(f)
+        except (OSError, ValueError):
+            self.save_file_read_errors += 1
+            return
+        if saved.get("solid_name") != self.solid_name:
+            self.save_file_mismatches += 1
+
+    def _load_last_inputs(self):
+        """Clicks 'Load Last Inputs' and checks the session got back its own last submission."""
+        load = [button for button in self.at.button if button.label.startswith("Load Last")]
+        if not load:
+            self.errors.append("inputs: load button not found")
+            return
+        self._run("inputs load", lambda: load[0].click().run())
+        if self.at.session_state["solid_name"] != self.solid_name:
+            self.save_file_mismatches += 1
+
+    def run_session(self, iterations):
+        """
+        Replays: home -> design steps, then `iterations` times:
+        inputs (load last inputs, edit, submit) -> results.
+        """
+        self._run("home", self.at.run)
+        self._run("design steps", lambda: self.at.switch_page(DESIGN_STEPS_PAGE).run())
+        for i in range(iterations):
+            self._run("inputs", lambda: self.at.switch_page(INPUTS_PAGE).run())
+            if self.at.exception:
+                return
+            if i > 0:
+                self._load_last_inputs()
+
+            flow_pattern = "Mass-Flow" if i % 2 == 0 else "Funnel-Flow"
+            self.at.text_input(key="solid_name").set_value(self.solid_name)
+            self.at.number_input(key="gamma").set_value(float(self.rng.uniform(800, 2600)))
+            self.at.radio(key="flow_pattern").set_value(flow_pattern)
+            self._edit_data_editors()
+            self._run("inputs edit", self.at.run)
+
+            submit = [button for button in self.at.button if button.label.startswith("Submit")]
+            if not submit:
+                self.errors.append("inputs: submit button not found")
+                return
+            self._run("inputs submit", lambda: submit[0].click().run())
+            self._check_save_file()
+
+            self._run("results", lambda: self.at.switch_page(RESULTS_PAGE).run())
+
+
+class ProcessSampler:
+    """Background thread sampling RSS and open matplotlib figures during the run."""
+
+    def __init__(self, interval=0.05):
+        self.interval = interval
+        self.peak_rss_mb = current_rss_mb()
+        self.peak_figures = len(plt.get_fignums())
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss_mb = max(self.peak_rss_mb, current_rss_mb())
+            self.peak_figures = max(self.peak_figures, len(plt.get_fignums()))
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        return False
+
+
+# --- Load Test ---
+def percentile_table(latencies):
+    """Returns {step: {count, p50_ms, p95_ms, p99_ms, max_ms}} for (step, seconds) samples."""
+    by_step = {}
+    for step, seconds in latencies:
+        by_step.setdefault(step, []).append(seconds * 1000)
+    table = {}
+    for step, ms in by_step.items():
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        table[step] = {"count": len(ms), "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "max_ms": max(ms)}
+    return table
+
+def run_load_test(users, iterations, seed=0):
+    """
+    Runs `users` simulated sessions concurrently as threads of one process (as a single
+    Streamlit replica does) and returns a report dict. The save file is restored afterwards.
+    """
+    try:
+        with open(SAVE_FILE, "rb") as f:
+            saved_inputs = f.read()
+    except FileNotFoundError:
+        saved_inputs = None
+
+    rss_start = current_rss_mb()
+    cpu_start = cpu_seconds()
+    figures_start = len(plt.get_fignums())
+    threads_start = threading.active_count()
+    start = time.perf_counter()
+
+    sessions = [SimulatedUser(user_id, seed) for user_id in range(users)]
+    try:
+        with shared_runtime(), ProcessSampler() as sampler, ThreadPoolExecutor(max_workers=users) as pool:
+            list(pool.map(lambda user: user.run_session(iterations), sessions))
+    finally:
+        if saved_inputs is None:
+            if os.path.exists(SAVE_FILE):
+                os.remove(SAVE_FILE)
+        else:
+            with open(SAVE_FILE, "wb") as f:
+                f.write(saved_inputs)
+
+    wall = time.perf_counter() - start
+    latencies = [sample for user in sessions for sample in user.latencies]
+    return {
+        "users": users,
+        "iterations": iterations,
+        "wall_s": wall,
+        "reruns": len(latencies),
+        "reruns_per_s": len(latencies) / wall if wall > 0 else 0.0,
+        "cpu_s": cpu_seconds() - cpu_start,
+        "rss_start_mb": rss_start,
+        "rss_end_mb": current_rss_mb(),
+        "rss_peak_mb": sampler.peak_rss_mb,
+        "session_state_kb": float(np.mean([sum(state_usage(user.at.session_state).values()) for user in sessions])) / 1024,
+        "open_figures_start": figures_start,
+        "open_figures_peak": sampler.peak_figures,
+        "open_figures_end": len(plt.get_fignums()),
+        "threads_start": threads_start,
+        "threads_end": threading.active_count(),
+        "save_file_mismatches": sum(user.save_file_mismatches for user in sessions),
+        "save_file_read_errors": sum(user.save_file_read_errors for user in sessions),
+        "errors": [error for user in sessions for error in user.errors],
+        "latency": percentile_table(latencies),
+    }
+
+def print_report(report):
+    print(f"\nSimulated users: {report['users']}, iterations per user: {report['iterations']}")
+    print(f"Wall time: {report['wall_s']:.1f} s, reruns: {report['reruns']} ({report['reruns_per_s']:.1f}/s), CPU: {report['cpu_s']:.1f} s")
+    print(f"\n{'Step':<16}{'Count':>7}{'p50 [ms]':>11}{'p95 [ms]':>11}{'p99 [ms]':>11}{'max [ms]':>11}")
+    for step, row in report["latency"].items():
+        print(f"{step:<16}{row['count']:>7}{row['p50_ms']:>11.1f}{row['p95_ms']:>11.1f}{row['p99_ms']:>11.1f}{row['max_ms']:>11.1f}")
+
+    rss_growth = report["rss_end_mb"] - report["rss_start_mb"]
+    print(f"\nRSS: {report['rss_start_mb']:.0f} MB -> {report['rss_end_mb']:.0f} MB ({rss_growth:+.0f} MB, peak {report['rss_peak_mb']:.0f} MB, {rss_growth / report['users']:+.1f} MB per session)")
+    print(f"Session state: {report['session_state_kb']:.1f} KB per session")
+    print(f"Open matplotlib figures: {report['open_figures_start']} at start, peak {report['open_figures_peak']}, {report['open_figures_end']} at end")
+
+    print("\nProblems:")
+    problems = 0
+    leaked = report["open_figures_end"] - report["open_figures_start"]
+    if leaked > 0:
+        problems += 1
+        print(f"- {leaked} matplotlib figure(s) left open after the run (figures are not closed after st.pyplot).")
+    if report["open_figures_peak"] > report["users"] * 2:
+        problems += 1
+        print(f"- Up to {report['open_figures_peak']} matplotlib figures were open at once; pages keep every figure open until the end of the rerun.")
+    if report["save_file_mismatches"] or report["save_file_read_errors"]:
+        problems += 1
+        print(f"- Shared '{SAVE_FILE}': {report['save_file_mismatches']} time(s) a session read back or loaded another session's inputs, {report['save_file_read_errors']} read(s) hit a partially written file.")
+    if report["errors"]:
+        problems += 1
+        print(f"- {len(report['errors'])} page error(s), first: {report['errors'][0]}")
+    if not problems:
+        print("- None detected.")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless concurrent-session load test for the Streamlit app (no server or network needed).")
+    parser.add_argument("--users", type=int, default=4, help="Concurrent simulated sessions (default 4)")
+    parser.add_argument("--iterations", type=int, default=3, help="Edit/submit/results cycles per session (default 3)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", dest="json_file", default=None, help="Also write the report to this JSON file")
+    args = parser.parse_args(argv)
+
+    report = run_load_test(args.users, args.iterations, args.seed)
+    print_report(report)
+    if args.json_file:
+        with open(args.json_file, "w") as f:
+            json.dump(report, f, indent=4)
+    return 1 if report["errors"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,123 @@
+import streamlit as st
+import json
+import time
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from inventory_sim import FIFO, FILO, simulate_both, periodic_schedule, residence_time_distribution
+from session_memory import track_session
+
+st.set_page_config(
+    page_title="Inventory Simulation",
+    page_icon="⏳",
+    layout="wide"
+)
+track_session("10_Inventory_Simulation")
+
+SAVE_FILE = "last_inputs.json"
+SCHEDULE_COLUMNS = ["time_h", "fill_m3", "discharge_m3"]
+WEEKDAYS = ["Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun"]
+PATTERN_LABELS = {FIFO: "Mass flow (first in, first out)", FILO: "Funnel flow (first in, last out)"}
+
+st.title("⏳ Silo Inventory Simulation")
+st.markdown("Follows every filled layer through a fill/discharge schedule. In mass flow the oldest material leaves first and every discharge moves the whole content. In funnel flow material leaves from the top through the flow channel while the stagnant zone stays at rest. The longest time at rest sets the flow function used for the outlet check.")
+st.markdown("---")
+
+def get_base_case():
+    """Returns the last submitted inputs of this session, or the saved inputs file."""
+    if "inputs" in st.session_state:
+        return st.session_state.inputs, "your last submitted inputs"
+    try:
+        with open(SAVE_FILE, 'r') as f:
+            return json.load(f), f"the saved inputs ('{SAVE_FILE}')"
+    except (FileNotFoundError, ValueError):
+        return None, None
+
+
+base_case, base_label = get_base_case()
+if base_case is None:
+    st.warning("No inputs found. Submit a case on the 'User Inputs' page first.")
+    st.stop()
+st.caption(f"Material from {base_label}: **{base_case['solid_name']}**, {base_case['hopper_shape']}.")
+
+# --- Schedule ---
+st.header("Schedule")
+source = st.radio("Schedule Source", ["Weekly pattern", "Upload CSV"], horizontal=True)
+if source == "Weekly pattern":
+    cols = st.columns(4)
+    days = cols[0].number_input("Simulated Days", min_value=1, max_value=3650, value=365)
+    fill_rate = cols[1].number_input("Fill Rate [m³/h]", min_value=0.0, value=2.0)
+    fill_hours = cols[2].slider("Fill Hours", 0, 24, (6, 22))
+    fill_days = cols[3].multiselect("Fill Days", WEEKDAYS, default=WEEKDAYS)
+    cols = st.columns(4)
+    discharge_rate = cols[1].number_input("Discharge Rate [m³/h]", min_value=0.0, value=1.3)
+    discharge_hours = cols[2].slider("Discharge Hours", 0, 24, (0, 24))
+    discharge_days = cols[3].multiselect("Discharge Days", WEEKDAYS, default=WEEKDAYS)
+
+    times, fill, discharge = periodic_schedule(
+        days * 24, fill_rate, discharge_rate, range(*fill_hours), range(*discharge_hours),
+        [WEEKDAYS.index(day) for day in discharge_days], [WEEKDAYS.index(day) for day in fill_days]
+    )
+else:
+    uploaded = st.file_uploader("Schedule (CSV)", type="csv", help=f"Columns: {', '.join(SCHEDULE_COLUMNS)}. Events in time order; at each event the fill is added before the discharge.")
+    if uploaded is None:
+        st.info("Upload a schedule to run the simulation.")
+        st.stop()
+    try:
+        schedule = pd.read_csv(uploaded)
+        missing = set(SCHEDULE_COLUMNS) - set(schedule.columns)
+        if missing:
+            raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}.")
+    except ValueError as e:
+        st.error(f"Could not read the schedule: {e}")
+        st.stop()
+    times, fill, discharge = (schedule[column].to_numpy(dtype=float) for column in SCHEDULE_COLUMNS)
+
+cylinder_volume = np.pi * base_case["D_silo"]**2 / 4 * base_case["h_f"]
+cols = st.columns(3)
+capacity = cols[0].number_input("Capacity [m³]", min_value=0.1, value=float(round(cylinder_volume, 1)), help="Defaults to the cylinder volume from D and h_f. Fill above the capacity is counted as overflow.")
+storage_time_h = cols[1].number_input("Storage Time of the Time Flow Function [h]", min_value=0.1, value=24.0, help="The time flow function is interpolated for shorter times at rest and held beyond this time.")
+B = cols[2].number_input("Installed Outlet (B) [m]", min_value=0.01, value=0.3, format="%.3f")
+
+# --- Simulation ---
+try:
+    start = time.perf_counter()
+    results = simulate_both(base_case, times, fill, discharge, storage_time_h, B, capacity)
+    elapsed = time.perf_counter() - start
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+
+st.header("Results")
+st.caption(f"{len(times):,} events ({times[-1] - times[0] if len(times) else 0:,.0f} h) simulated for both flow patterns in {elapsed:.2f} s.")
+for col, (flow_pattern, run) in zip(st.columns(2), results.items()):
+    with col:
+        st.subheader(PATTERN_LABELS[flow_pattern])
+        metric_cols = st.columns(3)
+        metric_cols[0].metric("Mean Residence Time", f"{run['mean_residence_h']:.1f} h")
+        metric_cols[1].metric("90% Discharged Within", f"{run['p90_h']:.1f} h")
+        metric_cols[2].metric("Longest Time at Rest", f"{run['max_rest_h']:.1f} h")
+        check = "minimum outlet $B_{min}$" if flow_pattern == FIFO else "critical rathole/doming dimension"
+        message = f"Required {check} after {run['max_rest_h']:.1f} h at rest: **{run['required_outlet']:.3f} m** (installed {B:.3f} m)."
+        if run["adequate"]:
+            st.success(message)
+        else:
+            st.error(message)
+        if run["beyond_tested_time"]:
+            st.warning("The longest time at rest exceeds the storage time of the time flow function. Strength beyond the tested time is not extrapolated; test a longer storage time.")
+        if run["overflow"] > 0 or run["shortfall"] > 0:
+            st.caption(f"Overflow: {run['overflow']:,.0f} m³, discharge not met (silo empty): {run['shortfall']:,.0f} m³.")
+
+fig, ax = plt.subplots()
+upper = max((run["residence_time"].max() for run in results.values() if run["residence_time"].size), default=1.0)
+for flow_pattern, run in results.items():
+    edges, fraction = residence_time_distribution(run["volume"], run["residence_time"], upper=upper)
+    ax.stairs(fraction * 100, edges, label=PATTERN_LABELS[flow_pattern], fill=flow_pattern == FIFO, alpha=0.6 if flow_pattern == FIFO else 1.0)
+ax.axvline(storage_time_h, color="gray", linestyle="--", label="Storage time of time FF")
+ax.set_xlabel("Residence Time [h]")
+ax.set_ylabel("Discharged Volume [%]")
+ax.set_title(f"Residence-Time Distribution for {base_case['solid_name']}")
+ax.legend()
+ax.grid(True)
+st.pyplot(fig)
+plt.close(fig)
@@ -0,0 +1,208 @@
+import streamlit as st
+import json
+import time
+import matplotlib.pyplot as plt
+import numpy as np
+import disk_cache
+from adaptive_sampling import SAMPLING_PARAMETERS, REGION_LABELS as SAMPLE_REGION_LABELS, RESOLUTION, adaptive_sample
+from feasibility_maps import (
+    GRID_SIZE,
+    THETA_RANGE,
+    PHI_X_RANGE,
+    REGION_LABELS,
+    angle_friction_map,
+    angle_outlet_map,
+    design_margins,
+)
+from geometry_optimizer import material_inputs
+from session_memory import track_session
+
+st.set_page_config(
+    page_title="Feasibility Maps",
+    page_icon="🗺️",
+    layout="wide"
+)
+track_session("11_Feasibility_Maps")
+
+SAVE_FILE = "last_inputs.json"
+
+st.title("🗺️ Feasibility Envelope Maps")
+st.markdown("Maps the mass-flow/funnel-flow boundary and the outlet requirement around your design. The mass-flow limit angle and $ff(\\Theta)$ come from the numeric approximation of the mass-flow charts. The outlet checks use the time flow function: $B_{min}$ in mass flow, and the rathole (and doming) dimension in funnel flow. The maps are computed once per material; moving the design point only redraws them.")
+st.markdown("---")
+
+def get_base_case():
+    """Returns the last submitted inputs of this session, or the saved inputs file."""
+    if "inputs" in st.session_state:
+        return st.session_state.inputs, "your last submitted inputs"
+    try:
+        with open(SAVE_FILE, 'r') as f:
+            return json.load(f), f"the saved inputs ('{SAVE_FILE}')"
+    except (FileNotFoundError, ValueError):
+        return None, None
+
+@st.cache_data(max_entries=32, show_spinner="Evaluating the design grids...")
+def maps_for_material(material_json, theta_range, phi_x_range, B_max, n):
+    """Both feasibility maps of one material and grid, cached across sessions and in the disk cache."""
+    inputs = json.loads(material_json)
+    start = time.perf_counter()
+    friction_map, outlet_map = disk_cache.cached("feasibility_maps", [inputs, theta_range, phi_x_range, B_max, n], lambda: (
+        angle_friction_map(inputs, theta_range, phi_x_range, n),
+        angle_outlet_map(inputs, theta_range, None if B_max is None else (0.0, B_max), n),
+    ))
+    return friction_map, outlet_map, time.perf_counter() - start
+
+@st.cache_data(max_entries=16, show_spinner="Sampling the design space...")
+def adaptive_samples_for_material(material_json, bounds_json, seed, resolution, max_evaluations):
+    """Adaptive sample table and run statistics of one material and box, cached across sessions."""
+    start = time.perf_counter()
+    result = adaptive_sample(json.loads(material_json), json.loads(bounds_json), seed=seed, resolution=resolution, max_evaluations=max_evaluations)
+    result.pop("interpolant") # The page shows the table only
+    return result, time.perf_counter() - start
+
+def default_bounds(inputs, key):
+    """Sampling range of one parameter around the submitted inputs."""
+    if key == "delta":
+        return max(20.0, inputs["delta"] - 10), min(70.0, inputs["delta"] + 10)
+    if key == "ff_manual":
+        return 1.0, 3.0
+    if key in ("m_time", "c_time"):
+        return 0.0, round(2 * max(inputs.get(key, 0.0), 0.1), 2)
+    return {"phi_prime_calc": PHI_X_RANGE, "theta_prime_manual": THETA_RANGE}[key]
+
+
+base_case, base_label = get_base_case()
+if base_case is None:
+    st.warning("No inputs found. Submit a case on the 'User Inputs' page first.")
+    st.stop()
+st.caption(f"Material from {base_label}: **{base_case['solid_name']}** on {base_case['wall_material']}, {base_case['hopper_shape']}.")
+
+# --- Grid ---
+with st.expander("Grid"):
+    cols = st.columns(4)
+    theta_range = cols[0].slider("Hopper Angle Θ [°]", 0.5, 80.0, THETA_RANGE)
+    phi_x_range = cols[1].slider("Wall Friction Angle φx [°]", 1.0, 60.0, PHI_X_RANGE)
+    n = cols[2].select_slider("Grid Points per Axis", [100, 200, 300, 400], value=GRID_SIZE)
+    B_max = None
+    if cols[3].checkbox("Set outlet range", help="Without this, the (Θ, B) map goes up to twice the largest finite outlet requirement."):
+        B_max = cols[3].number_input("Max. Outlet on Map [m]", min_value=0.05, value=1.0, format="%.2f")
+
+try:
+    material = material_inputs(base_case)
+    for key in ("flow_pattern", "ff_manual"): # The maps cover both flow patterns and use ff(Θ)
+        material.pop(key, None)
+    friction_map, outlet_map, elapsed = maps_for_material(json.dumps(material, sort_keys=True), theta_range, phi_x_range, B_max, n)
+except (KeyError, ValueError) as e:
+    st.error(f"Could not evaluate the maps: {e}")
+    st.stop()
+st.caption(f"{2 * n * n:,} grid points evaluated in {elapsed * 1000:.0f} ms.")
+
+# --- Design Point ---
+st.header("Design Point")
+phi_x = base_case["phi_prime_calc"]
+cols = st.columns(2)
+theta_submitted = float(np.clip(base_case.get("theta_prime_manual", 20.0), *theta_range))
+theta = cols[0].slider("Design Hopper Angle Θ [°]", float(theta_range[0]), float(theta_range[1]), theta_submitted, step=0.5)
+required_submitted = design_margins(base_case, theta_submitted, 0.0)["required"] # Default outlet: 25% over the submitted design
+B_default = max(round(1.25 * required_submitted, 2), 0.05) if np.isfinite(required_submitted) else 1.0
+B = cols[1].number_input("Installed Outlet (B) [m]", min_value=0.01, value=float(B_default), format="%.3f")
+margins = design_margins(base_case, theta, B)
+
+metric_cols = st.columns(4)
+metric_cols[0].metric("Flow Pattern at Θ", "Mass flow" if margins["mass_flow"] else "Funnel flow")
+metric_cols[1].metric("Margin to Mass-Flow Limit", f"{margins['angle_margin']:+.1f}°", help=f"Limit Θ = {margins['theta_limit']:.1f}° at φx = {phi_x:.1f}°. Positive: steeper than the limit (mass flow).")
+metric_cols[2].metric("Required Outlet", f"{margins['required']:.3f} m")
+metric_cols[3].metric("Outlet Margin", f"{margins['outlet_margin']:+.3f} m", help="Installed B minus the required outlet.")
+if not margins["mass_flow"] and base_case["flow_pattern"] == "Mass-Flow":
+    st.warning("The design point lies on the funnel-flow side of the mass-flow limit.")
+
+# --- Maps ---
+col1, col2 = st.columns(2)
+with col1:
+    st.subheader("Hopper Angle vs. Wall Friction")
+    required = friction_map["required"]
+    finite = required[np.isfinite(required)]
+    cap = float(np.percentile(finite, 95)) if finite.size else 1.0
+    fig, ax = plt.subplots()
+    contour = ax.contourf(friction_map["theta"], friction_map["phi_x"], np.clip(np.nan_to_num(required, nan=cap, posinf=cap), 0, cap), levels=20, cmap="viridis")
+    fig.colorbar(contour, ax=ax, label="Required outlet [m]")
+    ax.contour(friction_map["theta"], friction_map["phi_x"], friction_map["angle_margin"], levels=[0], colors="white", linewidths=2)
+    ax.plot([], [], color="white", linewidth=2, label="Mass-flow limit")
+    ax.plot(theta, phi_x, "r*", markersize=14, label="Design")
+    ax.set_xlabel("Hopper Angle Θ [°]")
+    ax.set_ylabel("Wall Friction Angle φx [°]")
+    ax.set_title("Mass flow left of the limit line")
+    ax.legend(loc="upper right", facecolor="lightgray")
+    st.pyplot(fig)
+    plt.close(fig)
+
+with col2:
+    st.subheader("Hopper Angle vs. Outlet Size")
+    margin = np.nan_to_num(outlet_map["outlet_margin"], nan=-np.inf)
+    limit = float(np.abs(margin[np.isfinite(margin)]).max()) if np.isfinite(margin).any() else 1.0
+    fig, ax = plt.subplots()
+    levels = np.linspace(-limit, limit, 21)
+    contour = ax.contourf(outlet_map["theta"], outlet_map["B"], np.clip(margin, -limit, limit), levels=levels, cmap="RdYlGn")
+    fig.colorbar(contour, ax=ax, label="Outlet margin B - required [m]")
+    ax.plot(outlet_map["theta"], outlet_map["required"], color="black", linewidth=2, label="Required outlet")
+    if outlet_map["theta_limit"] > 0:
+        ax.axvline(outlet_map["theta_limit"], color="gray", linestyle="--", label="Mass-flow limit")
+    ax.plot(theta, B, "b*", markersize=14, label="Design")
+    ax.set_ylim(outlet_map["B"][0], outlet_map["B"][-1])
+    ax.set_xlabel("Hopper Angle Θ [°]")
+    ax.set_ylabel("Outlet Size B [m]")
+    ax.set_title(f"At φx = {phi_x:.1f}°")
+    ax.legend(loc="upper left")
+    st.pyplot(fig)
+    plt.close(fig)
+
+region = outlet_map["region"]
+st.caption(" · ".join(f"{label}: {np.mean(region == code) * 100:.0f}% of the map" for code, label in REGION_LABELS.items()))
+
+# --- Adaptive Exploration ---
+st.header("Adaptive Exploration")
+st.markdown("Samples up to all six mass-flow inputs at once. Samples are added only where neighbouring samples fall on different sides of the mass-flow limit or of the 'arches at any outlet' boundary, or where $B_{min}$ changes quickly. Sampling stops when these boundaries are resolved to the set fraction of each range.")
+with st.form("adaptive_form"):
+    keys = st.multiselect("Parameters", list(SAMPLING_PARAMETERS), default=["theta_prime_manual", "phi_prime_calc", "delta"], format_func=SAMPLING_PARAMETERS.get)
+    bounds = {}
+    for key in keys:
+        low, high = default_bounds(base_case, key)
+        cols = st.columns(2)
+        bounds[key] = (
+            cols[0].number_input(f"{SAMPLING_PARAMETERS[key]} from", value=float(low), key=f"adaptive_{key}_low"),
+            cols[1].number_input("to", value=float(high), key=f"adaptive_{key}_high"),
+        )
+    cols = st.columns(3)
+    resolution = 1 / cols[0].select_slider("Boundary Resolution [1/range]", [32, 64, 128, 256], value=int(round(1 / RESOLUTION)))
+    max_evaluations = cols[1].number_input("Max. Evaluations", min_value=100, max_value=200000, value=20000, step=1000)
+    seed = cols[2].number_input("Seed", min_value=0, value=0, step=1)
+    run = st.form_submit_button("Sample")
+
+if run:
+    sampled_material = dict(material, theta_prime_manual=theta) # Unsampled Θ: the design point above
+    st.session_state.adaptive_request = (json.dumps(sampled_material, sort_keys=True), json.dumps(bounds), int(seed), resolution, int(max_evaluations))
+if "adaptive_request" in st.session_state:
+    try:
+        result, sample_seconds = adaptive_samples_for_material(*st.session_state.adaptive_request)
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
+    table = result["table"]
+    names = [column for column in table.columns if column in SAMPLING_PARAMETERS]
+    st.caption(
+        f"{result['evaluations']:,} evaluations in {result['rounds']} refinement rounds ({sample_seconds:.2f} s) instead of "
+        f"{result['grid_evaluations']:,} for a full grid at the same resolution. "
+        + ("Converged" if result["converged"] else "Stopped at the evaluation budget")
+        + f", boundary resolved to {result['boundary_error'] * 100:.1f}% of the ranges."
+    )
+    if len(names) >= 2:
+        fig, ax = plt.subplots()
+        for code, label in SAMPLE_REGION_LABELS.items():
+            rows = table[table["region"] == code]
+            ax.scatter(rows[names[0]], rows[names[1]], s=3, label=f"{label} ({len(rows):,})")
+        ax.set_xlabel(SAMPLING_PARAMETERS[names[0]])
+        ax.set_ylabel(SAMPLING_PARAMETERS[names[1]])
+        ax.set_title("Samples (projection on the first two parameters)")
+        ax.legend(markerscale=4)
+        st.pyplot(fig)
+        plt.close(fig)
+    st.download_button("Download Samples (CSV)", table.to_csv(index=False), file_name="adaptive_samples.csv", mime="text/csv")
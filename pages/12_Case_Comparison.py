@@ -0,0 +1,147 @@
+import streamlit as st
+import json
+import time
+from concurrent.futures import ProcessPoolExecutor
+import matplotlib.pyplot as plt
+import pandas as pd
+from case_comparison import (
+    RESULT_ROWS,
+    saved_cases,
+    design_cases,
+    result_table,
+    smallest_per_flow_pattern,
+    input_differences,
+    flow_function_overlay,
+    design_point_overlay,
+)
+from case_store import CASE_LIBRARY_FILE, load_library
+from design_calcs import HOPPER_ANGLE_MARGIN
+from session_memory import track_session
+
+st.set_page_config(
+    page_title="Case Comparison",
+    page_icon="⚖️",
+    layout="wide"
+)
+track_session("12_Case_Comparison")
+
+SAVE_FILE = "last_inputs.json"
+DEFAULT_SELECTION = 3
+DIFFERENCE_COLOR = "background-color: rgba(255, 196, 0, 0.25)"
+BEST_COLOR = "rgba(46, 160, 67, 0.25)"
+
+st.title("⚖️ Case Comparison")
+st.markdown("Select saved cases to design side by side: your submitted inputs, the solid/wall pairs of the case library (with your geometry and flow pattern, at every time level), batch studies and uploaded case lists. The selected cases are designed in parallel in a background process pool; cases already in the result cache are read from it.")
+st.markdown("---")
+
+@st.cache_resource
+def get_pool():
+    """One process pool shared by all sessions."""
+    return ProcessPoolExecutor()
+
+@st.cache_data(max_entries=16, show_spinner="Designing the selected cases...")
+def evaluate_selection(cases_json):
+    """Evaluations of the selected cases (JSON list), cached across sessions and in the disk cache."""
+    start = time.perf_counter()
+    evaluations = design_cases(json.loads(cases_json), get_pool())
+    return evaluations, time.perf_counter() - start
+
+def get_base_case():
+    """Returns the last submitted inputs of this session, or the saved inputs file."""
+    if "inputs" in st.session_state:
+        return st.session_state.inputs
+    try:
+        with open(SAVE_FILE, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return None
+
+def get_library():
+    if "case_library" in st.session_state:
+        return st.session_state.case_library
+    try:
+        return load_library()
+    except ValueError as e:
+        st.warning(f"Could not read the case library '{CASE_LIBRARY_FILE}': {e}")
+        return None
+
+def draw(spec):
+    fig, ax = plt.subplots(figsize=(7, 5))
+    for series in spec["series"]:
+        if series["kind"] == "line":
+            ax.plot(series["x"], series["y"], label=series["label"], **series["style"])
+        else:
+            ax.plot(series["x"], series["y"], linestyle="none", label=series["label"], **series["style"])
+    ax.set_title(spec["title"])
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    ax.legend(fontsize="small")
+    ax.grid(True)
+    ax.set_xlim(left=0)
+    ax.set_ylim(bottom=0)
+    st.pyplot(fig)
+    plt.close(fig)
+
+# --- Case Selection ---
+base_inputs = get_base_case()
+cases = saved_cases(base_inputs, get_library())
+uploaded = st.file_uploader("Add cases from a JSON file (a list of inputs dicts in the last_inputs.json format, or {\"cases\": [...]})", type="json")
+if uploaded is not None:
+    try:
+        data = json.load(uploaded)
+        for index, inputs in enumerate(data["cases"] if isinstance(data, dict) else data):
+            cases[f"Upload #{index + 1}: {inputs.get('solid_name', 'Case')} on {inputs.get('wall_material', '')}"] = inputs
+    except (ValueError, KeyError, TypeError, AttributeError) as e:
+        st.error(f"Could not read the uploaded cases: {e}")
+
+if not cases:
+    st.warning("No saved cases yet. Submit a case on the 'User Inputs' page, fill the case library or run a batch study first.")
+    st.stop()
+if base_inputs is None:
+    st.info("Submit a case on the 'User Inputs' page to compare the case library with your geometry.")
+
+labels = st.multiselect(
+    "Cases to Compare",
+    list(cases),
+    default=list(cases)[:DEFAULT_SELECTION],
+    help=f"Library cases use the geometry and flow pattern of your submitted inputs. Mass- and expanded-flow library cases are designed {HOPPER_ANGLE_MARGIN:g}° below the mass-flow limit with the approximate ff.",
+)
+if len(labels) < 2:
+    st.info("Select at least two cases.")
+    st.stop()
+
+selected = [cases[label] for label in labels]
+evaluations, seconds = evaluate_selection(json.dumps(selected, sort_keys=True))
+n_cached = sum(evaluation["cached"] for evaluation in evaluations)
+st.caption(f"{len(labels)} cases designed in {seconds * 1000:.0f} ms; {n_cached} read from the result cache.")
+for label, evaluation in zip(labels, evaluations):
+    if evaluation["error"] is not None:
+        st.error(f"**{label}** could not be designed: {evaluation['error']}")
+
+# --- Results ---
+st.header("Results")
+results = result_table(labels, selected, evaluations)
+styled = results.style.format("{:.3f}", na_rep="–")
+governing = RESULT_ROWS["governing"]
+if governing in results.index:
+    smallest = smallest_per_flow_pattern(selected, results.loc[governing].to_numpy())
+    styled = styled.apply(lambda row: [f"background-color: {BEST_COLOR}" if marked else "" for marked in smallest], axis=1, subset=pd.IndexSlice[[governing], :])
+st.dataframe(styled)
+st.caption("Within each flow pattern, the smallest required outlet is highlighted: B_min for mass flow, the controlling dimension for funnel flow and the top opening for expanded flow, so cases of different flow patterns are not ranked against each other. A dash means the value does not apply to the case's flow pattern.")
+st.download_button("Download results (CSV)", results.to_csv().encode("utf-8"), "case_comparison.csv", "text/csv")
+
+# --- Plots ---
+plot_cols = st.columns(2)
+with plot_cols[0]:
+    draw(flow_function_overlay(labels, selected))
+with plot_cols[1]:
+    draw(design_point_overlay(labels, selected, evaluations))
+st.caption("Design points: ● mass-flow outlet, ■ rathole lower bound, ✚ rathole upper bound (Janssen). The legend gives each case's required outlet.")
+
+# --- Inputs ---
+st.header("Inputs")
+inputs_table, differs = input_differences(labels, selected)
+if st.checkbox("Show only inputs that differ", value=False):
+    inputs_table = inputs_table.loc[differs[differs].index]
+st.dataframe(inputs_table.style.apply(lambda row: [DIFFERENCE_COLOR if differs[row.name] else ""] * len(row), axis=1))
+st.caption(f"{int(differs.sum())} of {len(differs)} inputs differ between the selected cases (highlighted).")
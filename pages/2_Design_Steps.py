@@ -1,10 +1,12 @@
 import streamlit as st
+from session_memory import track_session
 
 st.set_page_config(
     page_title="Hopper Design Steps",
     page_icon="📋",
     layout="wide"
 )
+track_session("2_Design_Steps")
 
 st.title("📋 Hopper Design Steps")
 st.markdown("This page describe the key design procedure for silo/hopper design follows the logic established by Jenike and described in Schulze (2021), Chapter 10. It aims to provide a quick overview of the key steps in the design process which can be followed for a quick design evaluation.")
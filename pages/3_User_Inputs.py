@@ -1,15 +1,25 @@
 import streamlit as st
 import numpy as np
 import json
+import os
+import time
 import matplotlib.pyplot as plt
 import pandas as pd
-from app_utils import create_line_func
+from app_utils import create_line_func, get_design_chart
+from case_store import CASE_LIBRARY_FILE, load_library
+from data_import import import_test_data, import_summary
+from design_calcs import FLOW_PATTERNS, HOPPER_ANGLE_MARGIN, get_valid_xy, mean_wall_friction_angle
+from perf_spans import span, start_page, end_page
+from session_memory import TABLE_COLUMNS, track_session, to_records, to_frame, to_rows
+from similar_designs import FEATURES, RESULTS, SimilarityIndex
 
 st.set_page_config(
     page_title="User Inputs",
     page_icon="📥",
     layout="wide"
 )
+start_page("3_User_Inputs")
+track_session("3_User_Inputs")
 
 # --- Define constants and save file path ---
 SAVE_FILE = "last_inputs.json"
@@ -19,45 +29,6 @@ st.title("📥 Step 1: Enter Your Test Data")
 st.markdown("Enter all your measured bulk solid properties and design choices here. All units are SI (kPa, m, kg/m³). When finished, click 'Submit Data'.")
 st.markdown("---")
 
-# --- Function to select and display the correct chart ---
-def get_design_chart(phi_e, shape):
-    """
-    Selects the correct chart filename based on user input.
-    Returns the filename and a caption.
-    """
-    # Round phi_e to the nearest 5 degrees to match the charts
-    phi_e_rounded = int(5 * round(phi_e / 5))
-    
-    if shape == "Conical":
-        phi_e_clamped = np.clip(phi_e_rounded, 25, 60)
-        if phi_e_clamped != phi_e_rounded:
-            st.warning(f"$\phi_e$ of {phi_e:.1f}° is outside the chart range [25°, 60°]. Using chart for {phi_e_clamped}°.")
-        
-        chart_map = {
-            25: "fig_10_30.png", 30: "fig_10_31.png", 35: "fig_10_32.png",
-            40: "fig_10_33.png", 45: "fig_10_34.png", 50: "fig_10_35.png",
-            55: "fig_10_36.png", 60: "fig_10_37.png"
-        }
-        filename = chart_map.get(phi_e_clamped, "fig_10_33.png") # Default to 40
-        caption = f"Fig. {filename.split('_')[1].split('.')[0]}: Mass flow chart for CONICAL hopper with $\phi_e = {phi_e_clamped}^\circ$."
-        return filename, caption
-
-    elif shape == "Plane-Flow (Slot)":
-        phi_e_clamped = np.clip(phi_e_rounded, 25, 60)
-        if phi_e_clamped != phi_e_rounded:
-            st.warning(f"$\phi_e$ of {phi_e:.1f}° is outside the chart range [25°, 60°]. Using chart for {phi_e_clamped}°.")
-
-        chart_map = {
-            25: "fig_10_38.png", 30: "fig_10_39.png", 35: "fig_10_40.png",
-            40: "fig_10_41.png", 45: "fig_10_42.png", 50: "fig_10_43.png",
-            55: "fig_10_44.png", 60: "fig_10_45.png"
-        }
-        filename = chart_map.get(phi_e_clamped, "fig_10_41.png") # Default to 40
-        caption = f"Fig. {filename.split('_')[1].split('.')[0]}: Mass flow chart for PLANE-FLOW hopper with $\phi_e = {phi_e_clamped}^\circ$."
-        return filename, caption
-    
-    return None, None
-
 # --- Save and Load Functions ---
 def load_inputs():
     """Reads the JSON save file and populates st.session_state."""
@@ -68,8 +39,8 @@ def load_inputs():
             for key, value in data.items():
                 if key in st.session_state:
                     # Special handling for data_editor data (list of dicts)
-                    if key.endswith("_data"):
-                         st.session_state[key] = pd.DataFrame(value)
+                    if key in TABLE_COLUMNS:
+                         st.session_state[key] = to_records(value, TABLE_COLUMNS[key])
                     else:
                          st.session_state[key] = value
         st.success("Loaded last saved inputs!")
@@ -94,16 +65,31 @@ def save_inputs(data_dict):
     except Exception as e:
         st.error(f"Error saving inputs to '{SAVE_FILE}': {e}")
 
-def get_valid_xy(dataframe, x_col, y_col):
-    """Returns paired numeric x/y values, skipping incomplete rows."""
-    x_vals, y_vals = [], []
-    for row in dataframe.to_dict("records"):
-        x_val = row.get(x_col)
-        y_val = row.get(y_col)
-        if pd.notna(x_val) and pd.notna(y_val):
-            x_vals.append(float(x_val))
-            y_vals.append(float(y_val))
-    return x_vals, y_vals
+def import_points(label, data_key, kind):
+    """CSV/XLSX upload that replaces the points of a data editor table (kind 'wyl' or 'ff')."""
+    with st.expander(f"Import {label} from CSV/XLSX"):
+        uploaded = st.file_uploader(f"{label} file", type=["csv", "txt", "xlsx", "xls"], key=f"{data_key}_upload", help="Stress columns are found by their headers (e.g. 'Normal Stress (Pa)', 'sigma_1 [kPa]'). Units in the headers are converted to kPa; without a unit, values above 1000 are read as Pa.")
+        remove_outliers = st.checkbox("Drop outliers from the linear fit", value=True, key=f"{data_key}_outliers")
+        if uploaded is not None and st.button(f"Replace {label} with upload", key=f"{data_key}_import"):
+            try:
+                table, report = import_test_data(uploaded, kind, filename=uploaded.name, remove_outliers=remove_outliers)
+                st.session_state[data_key] = to_records(table, TABLE_COLUMNS[data_key])
+                st.session_state.pop(f"{data_key}_editor", None) # Drop edits of the previous table
+                st.session_state[f"{data_key}_report"] = import_summary(report)
+            except ValueError as e:
+                st.error(f"Could not import '{uploaded.name}': {e}")
+        if f"{data_key}_report" in st.session_state:
+            st.caption(st.session_state[f"{data_key}_report"])
+
+@st.cache_resource(max_entries=4, show_spinner="Indexing the case library...")
+def similarity_index(path, modified_ns, hopper_shape):
+    """Nearest-neighbour index of the case library file, rebuilt when the file changes."""
+    return SimilarityIndex.from_library(load_library(path), hopper_shape)
+
+def use_design(theta, ff):
+    """Fills the hopper angle and flow factor with a similar past design."""
+    st.session_state.theta_prime_manual = round(float(theta), 1)
+    st.session_state.ff_manual = round(float(ff), 2)
 
 def validate_inputs_before_submit():
     """Stops submission when required engineering inputs are incomplete or nonphysical."""
@@ -129,10 +115,10 @@ def validate_inputs_before_submit():
         if len(time_x) < 2:
             errors.append("Time Flow Function requires at least 2 complete data points.")
 
-    if st.session_state.flow_pattern == "Mass-Flow" and st.session_state.ff_manual <= 0:
+    if st.session_state.flow_pattern in ("Mass-Flow", "Expanded-Flow") and st.session_state.ff_manual <= 0:
         errors.append("Flow factor must be greater than 0.")
 
-    if st.session_state.flow_pattern == "Funnel-Flow":
+    if st.session_state.flow_pattern in ("Funnel-Flow", "Expanded-Flow"):
         if st.session_state.h_f <= 0:
             errors.append("Filling height must be greater than 0.")
         if st.session_state.D_silo <= 0:
@@ -156,20 +142,20 @@ defaults = {
     "gamma": 2400.0, # kg/m^3
     "delta": 50.0,
     "wyl_input_method": "Define by N test points",
-    "wyl_data": pd.DataFrame([ # Wall Yield Locus
+    "wyl_data": to_records([ # Wall Yield Locus
         {"Normal Stress (kPa)": 3.1, "Shear Stress (kPa)": 1.4},
         {"Normal Stress (kPa)": 12.4, "Shear Stress (kPa)": 4.9},
-    ]),
+    ], TABLE_COLUMNS["wyl_data"]),
     "mu": 0.4, "tau_ad": 0.2, # Adhesion in kPa
     "ff_input_method": "Define by N test points",
-    "ff_inst_data": pd.DataFrame([
+    "ff_inst_data": to_records([
         {"Consol. Stress σ₁ (kPa)": 3.1, "Strength σc (kPa)": 0.6},
         {"Consol. Stress σ₁ (kPa)": 18.9, "Strength σc (kPa)": 2.5},
-    ]),
-    "ff_time_data": pd.DataFrame([
+    ], TABLE_COLUMNS["ff_inst_data"]),
+    "ff_time_data": to_records([
         {"Consol. Stress σ₁ (kPa)": 3.1, "Strength σc (kPa)": 1.5},
         {"Consol. Stress σ₁ (kPa)": 18.9, "Strength σc (kPa)": 5.0},
-    ]),
+    ], TABLE_COLUMNS["ff_time_data"]),
     "m_inst": 0.12, "c_inst": 0.2, # Intercept in kPa
     "m_time": 0.22, "c_time": 0.8, # Intercept in kPa
     "flow_pattern": "Mass-Flow",
@@ -182,7 +168,7 @@ defaults = {
     "phi_prime_calc": 22.0 # Default calculated value
 }
 
-# Initialize session_state keys if they don't exist
+# Initialize session_state keys if they don't exist (tables are compact NumPy records, see session_memory.py)
 for key, value in defaults.items():
     if key not in st.session_state:
         st.session_state[key] = value
@@ -213,25 +199,22 @@ with col1:
     
     if st.session_state.wyl_input_method == "Define by N test points":
         st.markdown("Enter your test points (Normal Stress vs. Shear Stress) in **kPa**.")
-        st.session_state.wyl_data = st.data_editor(
-            st.session_state.wyl_data,
+        import_points("WYL Points", "wyl_data", "wyl")
+        st.session_state.wyl_data = to_records(st.data_editor(
+            to_frame(st.session_state.wyl_data),
             num_rows="dynamic",
             key="wyl_data_editor"
-        )
+        ), TABLE_COLUMNS["wyl_data"])
         
         try:
             wyl_x, wyl_y = get_valid_xy(st.session_state.wyl_data, "Normal Stress (kPa)", "Shear Stress (kPa)")
             
-            phi_x_angles = []
-            if wyl_x and wyl_y and len(wyl_x) >= 2 and len(wyl_x) == len(wyl_y):
-                for sigma_w, tau_w in zip(wyl_x, wyl_y):
-                    if sigma_w > 1e-6:
-                        phi_x_angles.append(np.degrees(np.arctan(tau_w / sigma_w)))
+            phi_x_mean = mean_wall_friction_angle(wyl_x, wyl_y)
             
-            if phi_x_angles:
-                phi_prime_calc = np.mean(phi_x_angles)
-                st.info(f"Calculated average Wall Friction Angle ($\\phi_x$): **{phi_prime_calc:.1f}°** (from {len(phi_x_angles)} points)")
-                wyl_plot_max = max(wyl_x) * 1.5
+            if not np.isnan(phi_x_mean):
+                phi_prime_calc = float(phi_x_mean)
+                st.info(f"Calculated average Wall Friction Angle ($\\phi_x$): **{phi_prime_calc:.1f}°** (from {int(np.sum(wyl_x > 1e-6))} points)")
+                wyl_plot_max = wyl_x.max() * 1.5
                 _, (m_wyl, c_wyl) = create_line_func(wyl_x, wyl_y) # Get fit params
             else:
                 st.warning("Please enter at least 2 WYL data points.")
@@ -259,24 +242,26 @@ with col1:
     # --- WYL Verification Plot ---
     st.markdown("##### WYL Verification Plot")
     try:
-        fig_wyl, ax_wyl = plt.subplots()
-        sigma_w_plot = np.linspace(0, wyl_plot_max, 50)
+        with span("plotting"):
+            fig_wyl, ax_wyl = plt.subplots()
+            sigma_w_plot = np.linspace(0, wyl_plot_max, 50)
         
-        if st.session_state.wyl_input_method == "Define by N test points":
-            wyl_func, (m_wyl_fit, c_wyl_fit) = create_line_func(wyl_x, wyl_y)
-            ax_wyl.plot(sigma_w_plot, wyl_func(sigma_w_plot), 'r--', label=f'Fit: $\\tau_w = {m_wyl_fit:.3f}\\sigma_w + {c_wyl_fit:.3f}$')
-            ax_wyl.plot(wyl_x, wyl_y, 'bo', label='Data Points')
-        else:
-            wyl_func = lambda sigma_w: m_wyl * sigma_w + c_wyl
-            ax_wyl.plot(sigma_w_plot, wyl_func(sigma_w_plot), 'r-', label=f'Eq: $\\tau_w = {m_wyl:.3f}\\sigma_w + {c_wyl:.3f}$')
-
-        ax_wyl.set_xlabel("Normal Stress ($\\sigma_w$) [kPa]")
-        ax_wyl.set_ylabel("Shear Stress ($\\tau_w$) [kPa]")
-        ax_wyl.legend()
-        ax_wyl.grid(True)
-        ax_wyl.set_ylim(bottom=0)
-        ax_wyl.set_xlim(left=0)
-        st.pyplot(fig_wyl)
+            if st.session_state.wyl_input_method == "Define by N test points":
+                wyl_func, (m_wyl_fit, c_wyl_fit) = create_line_func(wyl_x, wyl_y)
+                ax_wyl.plot(sigma_w_plot, wyl_func(sigma_w_plot), 'r--', label=f'Fit: $\\tau_w = {m_wyl_fit:.3f}\\sigma_w + {c_wyl_fit:.3f}$')
+                ax_wyl.plot(wyl_x, wyl_y, 'bo', label='Data Points')
+            else:
+                wyl_func = lambda sigma_w: m_wyl * sigma_w + c_wyl
+                ax_wyl.plot(sigma_w_plot, wyl_func(sigma_w_plot), 'r-', label=f'Eq: $\\tau_w = {m_wyl:.3f}\\sigma_w + {c_wyl:.3f}$')
+
+            ax_wyl.set_xlabel("Normal Stress ($\\sigma_w$) [kPa]")
+            ax_wyl.set_ylabel("Shear Stress ($\\tau_w$) [kPa]")
+            ax_wyl.legend()
+            ax_wyl.grid(True)
+            ax_wyl.set_ylim(bottom=0)
+            ax_wyl.set_xlim(left=0)
+            st.pyplot(fig_wyl)
+            plt.close(fig_wyl)
     except Exception as e:
         st.warning(f"Could not draw WYL plot. Error: {e}")
 
@@ -296,49 +281,53 @@ with col2:
 
     if st.session_state.ff_input_method == "Define by N test points":
         st.markdown("**Instantaneous (t=0)**: Enter test points in **kPa**.")
-        st.session_state.ff_inst_data = st.data_editor(
-            st.session_state.ff_inst_data,
+        import_points("Instantaneous FF Points", "ff_inst_data", "ff")
+        st.session_state.ff_inst_data = to_records(st.data_editor(
+            to_frame(st.session_state.ff_inst_data),
             num_rows="dynamic",
             key="ff_inst_data_editor"
-        )
+        ), TABLE_COLUMNS["ff_inst_data"])
         
         st.markdown("**Time (t>0)**: Enter test points in **kPa**.")
-        st.session_state.ff_time_data = st.data_editor(
-            st.session_state.ff_time_data,
+        import_points("Time FF Points", "ff_time_data", "ff")
+        st.session_state.ff_time_data = to_records(st.data_editor(
+            to_frame(st.session_state.ff_time_data),
             num_rows="dynamic",
             key="ff_time_data_editor"
-        )
+        ), TABLE_COLUMNS["ff_time_data"])
         
         # --- Verification Plot (from N points) ---
         st.markdown("##### Flow Function Verification Plot")
         try:
-            fig, ax = plt.subplots()
+            with span("plotting"):
+                fig, ax = plt.subplots()
             
-            inst_x, inst_y = get_valid_xy(st.session_state.ff_inst_data, "Consol. Stress σ₁ (kPa)", "Strength σc (kPa)")
-            time_x, time_y = get_valid_xy(st.session_state.ff_time_data, "Consol. Stress σ₁ (kPa)", "Strength σc (kPa)")
+                inst_x, inst_y = get_valid_xy(st.session_state.ff_inst_data, "Consol. Stress σ₁ (kPa)", "Strength σc (kPa)")
+                time_x, time_y = get_valid_xy(st.session_state.ff_time_data, "Consol. Stress σ₁ (kPa)", "Strength σc (kPa)")
             
-            sigma_1_plot_max_base = max(max(inst_x) if inst_x else 0, max(time_x) if time_x else 30)
-            if sigma_1_plot_max_base == 0: sigma_1_plot_max_base = 30
+                sigma_1_plot_max_base = max(inst_x.max() if inst_x.size else 0, time_x.max() if time_x.size else 30)
+                if sigma_1_plot_max_base == 0: sigma_1_plot_max_base = 30
             
-            sigma_1_plot = np.linspace(0, sigma_1_plot_max_base * 1.5, 50)
+                sigma_1_plot = np.linspace(0, sigma_1_plot_max_base * 1.5, 50)
             
-            if len(inst_x) >= 2:
-                ff_inst_func, _ = create_line_func(inst_x, inst_y)
-                ax.plot(sigma_1_plot, ff_inst_func(sigma_1_plot), label="Instantaneous FF (t=0)")
-                ax.plot(inst_x, inst_y, 'bo', label='Inst. data points')
+                if len(inst_x) >= 2:
+                    ff_inst_func, _ = create_line_func(inst_x, inst_y)
+                    ax.plot(sigma_1_plot, ff_inst_func(sigma_1_plot), label="Instantaneous FF (t=0)")
+                    ax.plot(inst_x, inst_y, 'bo', label='Inst. data points')
             
-            if len(time_x) >= 2:
-                ff_time_func, _ = create_line_func(time_x, time_y)
-                ax.plot(sigma_1_plot, ff_time_func(sigma_1_plot), label="Time FF (t>0) (Design)", linestyle='--', color='red')
-                ax.plot(time_x, time_y, 'rs', label='Time data points')
-
-            ax.set_xlabel("Consolidation Stress ($\\sigma_1$) [kPa]")
-            ax.set_ylabel("Unconfined Yield Strength ($\\sigma_c$) [kPa]")
-            ax.legend()
-            ax.grid(True)
-            ax.set_ylim(bottom=0)
-            ax.set_xlim(left=0)
-            st.pyplot(fig)
+                if len(time_x) >= 2:
+                    ff_time_func, _ = create_line_func(time_x, time_y)
+                    ax.plot(sigma_1_plot, ff_time_func(sigma_1_plot), label="Time FF (t>0) (Design)", linestyle='--', color='red')
+                    ax.plot(time_x, time_y, 'rs', label='Time data points')
+
+                ax.set_xlabel("Consolidation Stress ($\\sigma_1$) [kPa]")
+                ax.set_ylabel("Unconfined Yield Strength ($\\sigma_c$) [kPa]")
+                ax.legend()
+                ax.grid(True)
+                ax.set_ylim(bottom=0)
+                ax.set_xlim(left=0)
+                st.pyplot(fig)
+                plt.close(fig)
             
         except Exception as e:
             st.warning(f"Could not draw plot. Please enter at least 2 points for each function. Error: {e}")
@@ -357,40 +346,83 @@ with col2:
         # --- Verification Plot (from equation) ---
         st.markdown("##### Flow Function Verification Plot")
         try:
-            fig, ax = plt.subplots()
-            sigma_1_plot_max_base = 30.0 # default kPa
-            if st.session_state.m_time > 0.01:
-                sigma_1_plot_max_base = max(30, (st.session_state.c_time * 5) / st.session_state.m_time)
+            with span("plotting"):
+                fig, ax = plt.subplots()
+                sigma_1_plot_max_base = 30.0 # default kPa
+                if st.session_state.m_time > 0.01:
+                    sigma_1_plot_max_base = max(30, (st.session_state.c_time * 5) / st.session_state.m_time)
             
-            sigma_1_plot = np.linspace(0, sigma_1_plot_max_base, 50)
+                sigma_1_plot = np.linspace(0, sigma_1_plot_max_base, 50)
             
-            ff_inst_func = lambda sigma_1: st.session_state.m_inst * sigma_1 + st.session_state.c_inst
-            ff_time_func = lambda sigma_1: st.session_state.m_time * sigma_1 + st.session_state.c_time
-
-            ax.plot(sigma_1_plot, ff_inst_func(sigma_1_plot), label="Instantaneous FF (t=0)")
-            ax.plot(sigma_1_plot, ff_time_func(sigma_1_plot), label="Time FF (t>0) (Design)", linestyle='--', color='red')
-
-            ax.set_xlabel("Consolidation Stress ($\\sigma_1$) [kPa]")
-            ax.set_ylabel("Unconfined Yield Strength ($\\sigma_c$) [kPa]")
-            ax.legend()
-            ax.grid(True)
-            ax.set_ylim(bottom=0)
-            ax.set_xlim(left=0)
-            st.pyplot(fig)
+                ff_inst_func = lambda sigma_1: st.session_state.m_inst * sigma_1 + st.session_state.c_inst
+                ff_time_func = lambda sigma_1: st.session_state.m_time * sigma_1 + st.session_state.c_time
+
+                ax.plot(sigma_1_plot, ff_inst_func(sigma_1_plot), label="Instantaneous FF (t=0)")
+                ax.plot(sigma_1_plot, ff_time_func(sigma_1_plot), label="Time FF (t>0) (Design)", linestyle='--', color='red')
+
+                ax.set_xlabel("Consolidation Stress ($\\sigma_1$) [kPa]")
+                ax.set_ylabel("Unconfined Yield Strength ($\\sigma_c$) [kPa]")
+                ax.legend()
+                ax.grid(True)
+                ax.set_ylim(bottom=0)
+                ax.set_xlim(left=0)
+                st.pyplot(fig)
+                plt.close(fig)
         except Exception as e:
             st.error(f"Could not draw plot. Error: {e}")
 
     st.subheader("Design Choices")
-    st.radio("Flow Pattern", ["Mass-Flow", "Funnel-Flow"], key="flow_pattern")
+    st.radio("Flow Pattern", FLOW_PATTERNS, key="flow_pattern", help="Expanded-Flow: a mass-flow hopper below a funnel-flow bin. The hopper's top opening must be wider than the bin's critical rathole dimension.")
     st.radio("Hopper Shape", ["Conical", "Plane-Flow (Slot)"], key="hopper_shape")
 
+# --- Similar Past Designs (nearest cases of the case library, no design calculation) ---
+st.markdown("---")
+st.subheader("Similar Past Designs")
+if st.session_state.ff_input_method == "Define by N test points":
+    time_x, time_y = get_valid_xy(st.session_state.ff_time_data, "Consol. Stress σ₁ (kPa)", "Strength σc (kPa)")
+    m_time_fit, c_time_fit = create_line_func(time_x, time_y)[1] if len(time_x) >= 2 else (np.nan, np.nan)
+else:
+    m_time_fit, c_time_fit = st.session_state.m_time, st.session_state.c_time
+similar_values = {
+    "gamma": st.session_state.gamma, "delta": st.session_state.delta, "phi_x": phi_prime_calc,
+    "c_wyl": c_wyl, "m_time": m_time_fit, "c_time": c_time_fit,
+}
+try:
+    index = similarity_index(CASE_LIBRARY_FILE, os.stat(CASE_LIBRARY_FILE).st_mtime_ns, st.session_state.hopper_shape)
+except (FileNotFoundError, ValueError):
+    index = None
+if index is None or len(index) == 0:
+    st.caption(f"No cases in the case library ('{CASE_LIBRARY_FILE}') yet. Add submitted cases on the 'Case Library' page to see the closest past designs here.")
+else:
+    try:
+        start = time.perf_counter()
+        similar = index.query(similar_values)
+        lookup_us = (time.perf_counter() - start) * 1e6
+    except ValueError:
+        similar = None
+        st.caption("Enter the WYL and time flow function to find similar past designs.")
+    if similar:
+        table = pd.DataFrame(similar).rename(columns=dict(
+            {"solid": "Solid", "wall": "Wall", "time_level": "Time Level", "distance": "Distance"}, **FEATURES, **RESULTS
+        ))
+        st.dataframe(table.style.format(precision=2), hide_index=True)
+        st.caption(f"The {len(similar)} closest of {len(index)} library cases ({st.session_state.hopper_shape}, {lookup_us:.0f} µs). Distance is in standard deviations of the library properties; designs are {HOPPER_ANGLE_MARGIN:g}° below each case's mass-flow limit with the approximate ff.")
+        best = similar[0]
+        if st.session_state.flow_pattern != "Funnel-Flow" and np.isfinite(best["theta"]):
+            st.button(
+                f"Start from the closest design (Θ = {best['theta']:.1f}°, ff = {best['ff']:.2f})",
+                on_click=use_design, args=(best["theta"], best["ff"]),
+                help="Fills the hopper angle and flow factor below; check them against the chart for your φx.",
+            )
+
 # --- Conditional Inputs (based on selections above) ---
-if st.session_state.flow_pattern == "Mass-Flow":
+if st.session_state.flow_pattern in ("Mass-Flow", "Expanded-Flow"):
     st.markdown("---")
     st.subheader("Mass-Flow Chart Lookup")
     st.warning(f"Your design requires the chart for **{st.session_state.hopper_shape}** and **$\\phi_e \\approx {st.session_state.delta:.1f}^\circ$**.")
     
-    chart_file, chart_caption = get_design_chart(st.session_state.delta, st.session_state.hopper_shape)
+    with span("chart lookup"):
+        chart_file, chart_caption = get_design_chart(st.session_state.delta, st.session_state.hopper_shape)
     
     if chart_file:
         st.image(f"assets/{chart_file}", caption=chart_caption)
@@ -407,6 +439,17 @@ if st.session_state.flow_pattern == "Mass-Flow":
     else:
         st.error("Could not find a matching design chart for the selected parameters.")
 
+    if st.session_state.flow_pattern == "Expanded-Flow":
+        st.markdown("#### Funnel-Flow Bin Dimensions")
+        st.markdown("The bin above the mass-flow hopper sets the lower and upper bound (Janssen) rathole dimensions. The hopper's top opening must be wider than the larger of the two.")
+    else:
+        st.markdown("#### Silo Dimensions for Hopper Loads")
+        st.markdown("The cylinder above the hopper sets the Janssen stress at the transition for the hopper stresses and feeder loads.")
+    silo_cols = st.columns(3)
+    silo_cols[0].number_input("Filling Height (h_f) [m]", min_value=0.01, format="%.1f", key="h_f")
+    silo_cols[1].number_input("Silo Diameter/Width (D) [m]", min_value=0.01, format="%.1f", key="D_silo")
+    silo_cols[2].number_input("Janssen Stress Ratio (K)", min_value=0.01, format="%.2f", help="Typically 0.4-0.5", key="K_janssen")
+
 elif st.session_state.flow_pattern == "Funnel-Flow":
     with col2:
         st.markdown("#### Funnel-Flow Silo Dimensions")
@@ -433,15 +476,15 @@ if st.button("Submit Data and Go to Results", type="primary"):
         "phi_prime_calc": phi_prime_calc, 
         
         "wyl_input_method": st.session_state.wyl_input_method,
-        "wyl_data": st.session_state.wyl_data.to_dict('records'),
+        "wyl_data": to_rows(st.session_state.wyl_data),
         "mu": st.session_state.mu,
         "tau_ad": st.session_state.tau_ad,
         "m_wyl": m_wyl, # Save the calculated fit
         "c_wyl": c_wyl, # Save the calculated fit
         
         "ff_input_method": st.session_state.ff_input_method,
-        "ff_inst_data": st.session_state.ff_inst_data.to_dict('records'),
-        "ff_time_data": st.session_state.ff_time_data.to_dict('records'),
+        "ff_inst_data": to_rows(st.session_state.ff_inst_data),
+        "ff_time_data": to_rows(st.session_state.ff_time_data),
         
         "m_inst": st.session_state.m_inst, "c_inst": st.session_state.c_inst, 
         "m_time": st.session_state.m_time, "c_time": st.session_state.c_time, 
@@ -456,11 +499,14 @@ if st.button("Submit Data and Go to Results", type="primary"):
         "A_shear_cell": A_SHEAR_CELL
     }
     
-    # Save this dictionary to the session_state for the results page
-    st.session_state.inputs = inputs_to_save
-    
-    # Save to file
-    save_inputs(inputs_to_save)
+    with span("session state"):
+        # Save this dictionary to the session_state for the results page
+        st.session_state.inputs = inputs_to_save
+        
+        # Save to file
+        save_inputs(inputs_to_save)
     
     st.success("Data saved! Please navigate to the '4_Results' page in the sidebar.")
     st.page_link("pages/4_Results.py", label="**Go to Results Page →**")
+
+end_page()
@@ -1,40 +1,24 @@
 import streamlit as st
 import numpy as np
 import matplotlib.pyplot as plt
-from app_utils import (
-    get_f_phi_i,
-    get_phi_lin,
-    get_flow_factor_ffp,
-    create_line_func,
-    find_positive_intersection
-)
+from design_calcs import g, arching_function_coefficients, mass_flow_outlet_kernel
+from design_graph import DesignGraph
+from hopper_stresses import FILLING, DISCHARGE, feeder_loads
+from discharge_rate import MODELS, FINE, discharge_rate, outlet_grid, smallest_outlet
+from perf_spans import span, start_page, end_page
+from sensitivities import SENSITIVITY_INPUTS, TORNADO_STEP, tornado_rows
+from session_memory import track_session
 
 st.set_page_config(
     page_title="Design Results",
     page_icon="📊",
     layout="wide"
 )
-
-# --- Define constants ---
-g = 9.81 # m/s^2
+start_page("4_Results")
+track_session("4_Results")
 
 st.title("📊 Step 2: Design Results & Plots")
 
-def get_valid_xy(rows, x_col, y_col):
-    """Returns paired numeric x/y values, skipping incomplete rows."""
-    x_vals, y_vals = [], []
-    for row in rows:
-        x_val = row.get(x_col)
-        y_val = row.get(y_col)
-        if x_val is not None and y_val is not None:
-            x_vals.append(float(x_val))
-            y_vals.append(float(y_val))
-    return x_vals, y_vals
-
-def require_positive(value, label):
-    if value <= 0:
-        raise ValueError(f"{label} must be greater than 0.")
-
 # Check if inputs exist in the session state
 if 'inputs' not in st.session_state:
     st.error("No input data found. Please go to the '3_User_Inputs' page and submit your data.")
@@ -47,13 +31,6 @@ else:
     gamma = inputs["gamma"] # This is rho_b in kg/m^3
     delta = inputs["delta"]
     phi_prime_calc = inputs["phi_prime_calc"] 
-    
-    # Load Flow Function method and data
-    ff_input_method = inputs["ff_input_method"]
-    ff_inst_data = inputs["ff_inst_data"] # List of dicts
-    ff_time_data = inputs["ff_time_data"] # List of dicts
-    m_inst_eq, c_inst_eq = inputs["m_inst"], inputs["c_inst"] # Equation inputs (kPa)
-    m_time_eq, c_time_eq = inputs["m_time"], inputs["c_time"] # Equation inputs (kPa)
 
     # Load WYL fit parameters
     m_wyl = inputs.get("m_wyl", 0.0) 
@@ -68,43 +45,24 @@ else:
     theta_prime = inputs["theta_prime_manual"]
     ff_value = inputs["ff_manual"]
 
+    # Design graph of this session: only the nodes downstream of changed inputs are recomputed
+    if "design_graph" not in st.session_state:
+        st.session_state.design_graph = DesignGraph()
+    graph = st.session_state.design_graph
+    graph.update(inputs)
+
     try:
-        require_positive(gamma, "Bulk density")
-        if not (0 < delta < 90):
-            raise ValueError("Effective angle of internal friction must be between 0 and 90 degrees.")
-        if flow_pattern == "Mass-Flow":
-            require_positive(ff_value, "Flow factor")
-        if flow_pattern == "Funnel-Flow":
-            require_positive(h_f, "Filling height")
-            require_positive(D_silo, "Silo diameter/width")
-            require_positive(K_janssen, "Janssen stress ratio K")
+        graph.get("valid")
     except ValueError as e:
         st.error(str(e))
         st.stop()
 
     # --- Process Inputs into Usable Functions (all stress in kPa) ---
-    if ff_input_method == "Define by N test points":
-        inst_x, inst_y = get_valid_xy(ff_inst_data, "Consol. Stress σ₁ (kPa)", "Strength σc (kPa)")
-        time_x, time_y = get_valid_xy(ff_time_data, "Consol. Stress σ₁ (kPa)", "Strength σc (kPa)")
-
-        if len(inst_x) < 2 or len(time_x) < 2:
-            st.error("Flow Function data must include at least 2 complete instantaneous points and 2 complete time-function points.")
-            st.stop()
-        
-        ff_inst_func, (m_inst, c_inst) = create_line_func(inst_x, inst_y)
-        ff_time_func, (m_time, c_time) = create_line_func(time_x, time_y)
-        
-        sigma_1_plot_max_base = max(max(inst_x) if inst_x else 0, max(time_x) if time_x else 30)
-    else: 
-        m_inst, c_inst = m_inst_eq, c_inst_eq
-        m_time, c_time = m_time_eq, c_time_eq
-        
-        ff_inst_func = lambda sigma_1: m_inst * sigma_1 + c_inst
-        ff_time_func = lambda sigma_1: m_time * sigma_1 + c_time
-        
-        sigma_1_plot_max_base = 30 
-        if m_time > 0.01:
-             sigma_1_plot_max_base = max(30, (c_time * 5) / m_time)
+    try:
+        ff_inst_func, ff_time_func, (m_inst, c_inst), (m_time, c_time), sigma_1_plot_max_base = graph.get("flow_functions")
+    except ValueError as e:
+        st.error(str(e))
+        st.stop()
 
 
     st.header("Design Results")
@@ -131,24 +89,20 @@ else:
                 st.info(f"Using manual inputs: $\\Theta = {theta_prime:.1f}^\circ$ and $ff = {ff_value:.2f}$")
                 
                 ff_line_func = lambda sigma_1: sigma_1 / ff_value
-                ff_design_func = ff_time_func
                 
-                sigma_1_crit_kpa = find_positive_intersection(
-                    ff_design_func,
-                    ff_line_func,
-                    upper_hint=sigma_1_plot_max_base
-                )
-                sigma_c_crit_kpa = ff_design_func(sigma_1_crit_kpa) 
-                
-                # --- Convert to Pa for physics equations ---
-                sigma_c_crit_pa = sigma_c_crit_kpa * 1000
+                mass_flow = graph.get("mass_flow")
+                sigma_1_crit_kpa = mass_flow["sigma_1_crit_kpa"]
+                sigma_c_crit_kpa = mass_flow["sigma_c_crit_kpa"]
+                sigma_c_crit_pa = mass_flow["sigma_c_crit_pa"]
+                B_min = mass_flow["B_min"]
+                H_theta = mass_flow["H_theta"]
                 
+                H_0, H_slope = arching_function_coefficients(hopper_shape)
+                arching_text = f"$H(\\Theta) = {H_0:g} + {H_slope:g} \\cdot \\Theta / 100$"
                 if hopper_shape == "Conical":
-                    B_min = (2 * sigma_c_crit_pa) / (gamma * g) 
-                    caption_text = f"Calculated using Schulze Eq. 10.6b: $d_{{crit}} = 2 \\cdot \\sigma_{{c,crit}} / (\\rho_b \\cdot g) = (2 \\cdot {sigma_c_crit_pa:.1f} Pa) / ({gamma} \\cdot {g})$"
+                    caption_text = f"Calculated using Schulze Eq. 10.6b with the arching function {arching_text}: $d_{{crit}} = H(\\Theta) \\cdot \\sigma_{{c,crit}} / (\\rho_b \\cdot g) = ({H_theta:.3f} \\cdot {sigma_c_crit_pa:.1f} Pa) / ({gamma} \\cdot {g})$"
                 else: # Plane-Flow (Slot)
-                    B_min = sigma_c_crit_pa / (gamma * g)
-                    caption_text = f"Calculated using Schulze Eq. 10.6a: $b_{{crit}} = \\sigma_{{c,crit}} / (\\rho_b \\cdot g) = {sigma_c_crit_pa:.1f} Pa / ({gamma} \\cdot {g})$"
+                    caption_text = f"Calculated using Schulze Eq. 10.6a with the arching function {arching_text}: $b_{{crit}} = H(\\Theta) \\cdot \\sigma_{{c,crit}} / (\\rho_b \\cdot g) = ({H_theta:.3f} \\cdot {sigma_c_crit_pa:.1f} Pa) / ({gamma} \\cdot {g})$"
 
                 st.success(f"**Required Hopper Angle ($\\Theta$):** Steeper than **{theta_prime:.1f}°** from vertical.")
                 st.success(f"**Minimum Outlet Dimension (B or d):** **{B_min:.2f} m**")
@@ -159,33 +113,53 @@ else:
 
         with results_cols[1]:
             st.subheader("Flow Function vs. Flow Factor Plot")
-            sigma_1_plot_max = max(sigma_1_plot_max_base, locals().get("sigma_1_crit_kpa", 0)) * 1.5
-            sigma_1_plot = np.linspace(0, sigma_1_plot_max, 50)
+            with span("plotting"):
+                sigma_1_plot_max = max(sigma_1_plot_max_base, locals().get("sigma_1_crit_kpa", 0)) * 1.5
+                sigma_1_plot = np.linspace(0, sigma_1_plot_max, 50)
             
-            fig, ax = plt.subplots()
-            ax.plot(sigma_1_plot, ff_inst_func(sigma_1_plot), label="Instantaneous FF (t=0)")
-            ax.plot(sigma_1_plot, ff_time_func(sigma_1_plot), label="Time FF (t>0) (Design)", linestyle='--', color='red')
+                fig, ax = plt.subplots()
+                ax.plot(sigma_1_plot, ff_inst_func(sigma_1_plot), label="Instantaneous FF (t=0)")
+                ax.plot(sigma_1_plot, ff_time_func(sigma_1_plot), label="Time FF (t>0) (Design)", linestyle='--', color='red')
             
-            if 'ff_value' in locals() and 'sigma_1_crit_kpa' in locals():
-                ax.plot(sigma_1_plot, ff_line_func(sigma_1_plot), label=f"Hopper Flow Factor ($ff = {ff_value:.2f}$)", color='green')
-                ax.plot(sigma_1_crit_kpa, sigma_c_crit_kpa, 'ro', label=f"Design Point ($\\sigma_{{c,crit}} = {sigma_c_crit_kpa:.1f}$ kPa)")
-                ax.vlines(sigma_1_crit_kpa, 0, sigma_c_crit_kpa, colors='gray', linestyles='dotted')
-                ax.hlines(sigma_c_crit_kpa, 0, sigma_1_crit_kpa, colors='gray', linestyles='dotted')
+                if 'ff_value' in locals() and 'sigma_1_crit_kpa' in locals():
+                    ax.plot(sigma_1_plot, ff_line_func(sigma_1_plot), label=f"Hopper Flow Factor ($ff = {ff_value:.2f}$)", color='green')
+                    ax.plot(sigma_1_crit_kpa, sigma_c_crit_kpa, 'ro', label=f"Design Point ($\\sigma_{{c,crit}} = {sigma_c_crit_kpa:.1f}$ kPa)")
+                    ax.vlines(sigma_1_crit_kpa, 0, sigma_c_crit_kpa, colors='gray', linestyles='dotted')
+                    ax.hlines(sigma_c_crit_kpa, 0, sigma_1_crit_kpa, colors='gray', linestyles='dotted')
             
-            ax.set_xlabel("Consolidation Stress ($\\sigma_1$) [kPa]")
-            ax.set_ylabel("Unconfined Yield Strength ($\\sigma_c$) [kPa]")
-            ax.set_title(f"Mass-Flow Design for {solid_name}")
-            ax.legend()
-            ax.grid(True)
-            ax.set_ylim(bottom=0)
-            ax.set_xlim(left=0)
-            st.pyplot(fig)
+                ax.set_xlabel("Consolidation Stress ($\\sigma_1$) [kPa]")
+                ax.set_ylabel("Unconfined Yield Strength ($\\sigma_c$) [kPa]")
+                ax.set_title(f"Mass-Flow Design for {solid_name}")
+                ax.legend()
+                ax.grid(True)
+                ax.set_ylim(bottom=0)
+                ax.set_xlim(left=0)
+                st.pyplot(fig)
+                plt.close(fig)
+
+            if 'B_min' in locals():
+                st.subheader("Outlet Size vs. Hopper Angle")
+                with span("plotting"):
+                    theta_plot = np.linspace(0, max(45.0, theta_prime * 1.5), 91)
+                    B_theta = mass_flow_outlet_kernel(m_time, c_time, ff_value, gamma, theta_plot, hopper_shape)["B_min"]
+
+                    fig, ax = plt.subplots()
+                    ax.plot(theta_plot, B_theta, color='purple', label="$B = H(\\Theta) \\cdot \\sigma_{c,crit} / (\\rho_b \\cdot g)$")
+                    ax.plot(theta_prime, B_min, 'ro', label=f"Design ($\\Theta = {theta_prime:.1f}^\\circ$, $B = {B_min:.2f}$ m)")
+                    ax.set_xlabel("Hopper Angle from Vertical ($\\Theta$) [°]")
+                    ax.set_ylabel("Minimum Outlet Dimension (B or d) [m]")
+                    ax.set_title(f"Outlet Size at $ff = {ff_value:.2f}$")
+                    ax.legend()
+                    ax.grid(True)
+                    ax.set_xlim(left=0)
+                    st.pyplot(fig)
+                    plt.close(fig)
+                st.caption("The flow factor is kept at the manual value; only the arching function $H(\\Theta)$ changes with the hopper angle.")
 
     # --- Funnel-Flow Calculation ---
     elif flow_pattern == "Funnel-Flow":
         with results_cols[0]:
             st.subheader("Funnel-Flow Design (Schulze 10.3.2)")
-            ff_design_func = ff_time_func 
 
             # 1. Complete Clearance Check
             st.markdown("#### 1. Complete Clearance (Schulze 10.3.2.1)")
@@ -198,22 +172,18 @@ else:
             try:
                 # --- Calculate Lower Bound (Emptying) ---
                 st.info("Calculating **Lower Bound (Emptying)** condition.")
-                phi_lin_approx_lower = get_phi_lin(delta) 
-                f_phi_i_val_lower = get_f_phi_i(phi_lin_approx_lower)
-                
-                ff_p = get_flow_factor_ffp(delta, phi_lin_approx_lower, f_phi_i_val_lower)
+                lower = graph.get("rathole_lower")
+                st.warning(f"Using Effective Angle of Friction ($\\phi_e$ = {delta:.1f}°) as an approximation for $\\phi_{{lin}}$. A more precise design would use the measured $\\phi_{{lin}}$ vs. $\\sigma_1$ relationship.", icon="⚠️")
+                st.info("Calculating f($\\phi_i$) using digitized data from Schulze Fig. 10.19 and the flow factor for ratholing ($ff_p$) using Schulze Eq. 10.11.")
+                if lower["ff_p"] == 1.7:
+                    st.warning("Calculated $ff_p$ is < 1.7. Using $ff_p = 1.7$ as per Schulze 10.3.2.3.", icon="⚠️")
+                phi_lin_approx_lower = lower["phi_lin"]
+                f_phi_i_lower = lower["f_phi_i"]
+                ff_p = lower["ff_p"]
                 ffp_line_func = lambda sigma_1: sigma_1 / ff_p
-                
-                sigma_1_crit_kpa_lower = find_positive_intersection(
-                    ff_design_func,
-                    ffp_line_func,
-                    upper_hint=sigma_1_plot_max_base
-                )
-                sigma_c_crit_kpa_lower = ff_design_func(sigma_1_crit_kpa_lower)
-                f_phi_i_lower = f_phi_i_val_lower
-                
-                # Convert to Pa for physics equation
-                D_crit_lower = f_phi_i_lower * (sigma_c_crit_kpa_lower * 1000) / (gamma * g) 
+                sigma_1_crit_kpa_lower = lower["sigma_1_crit_kpa"]
+                sigma_c_crit_kpa_lower = lower["sigma_c_crit_kpa"]
+                D_crit_lower = lower["D_crit"]
                 
                 st.metric("Min. Ratholing Dimension ($D_{crit, lower}$)", f"{D_crit_lower:.2f} m")
                 st.caption(
@@ -227,29 +197,15 @@ else:
                 # --- Calculate Upper Bound (Filling) ---
                 st.info("Calculating **Upper Bound (Filling)** condition. [Schulze 10.3.2.4]")
                 
-                if hopper_shape == 'Conical':
-                    A_silo = np.pi * (D_silo/2)**2
-                    U_silo = np.pi * D_silo
-                else: 
+                if hopper_shape != 'Conical':
                     st.warning("Janssen calculation for Plane-Flow is simplified, using circular (D) logic.")
-                    A_silo = np.pi * (D_silo/2)**2 
-                    U_silo = np.pi * D_silo       
 
-                phi_x_rad = np.radians(phi_prime_calc)
-                
-                # Janssen Equation (Pa)
-                term_in_exp = -K_janssen * np.tan(phi_x_rad) * U_silo * h_f / A_silo
-                sigma_v_max_pa = (gamma * g * A_silo / (K_janssen * np.tan(phi_x_rad) * U_silo)) * (1 - np.exp(term_in_exp))
-                
-                # Convert to kPa for FF
-                sigma_1_crit_kpa_upper = sigma_v_max_pa / 1000
-                sigma_c_crit_kpa_upper = ff_design_func(sigma_1_crit_kpa_upper)
-                
-                phi_lin_crit_upper = get_phi_lin(delta) 
-                f_phi_i_upper = get_f_phi_i(phi_lin_crit_upper)
-                
-                # Convert to Pa for physics equation
-                D_crit_upper = f_phi_i_upper * (sigma_c_crit_kpa_upper * 1000) / (gamma * g)
+                # Janssen Equation (Pa), converted to kPa for FF
+                upper = graph.get("rathole_upper")
+                sigma_1_crit_kpa_upper = upper["sigma_1_crit_kpa"]
+                sigma_c_crit_kpa_upper = upper["sigma_c_crit_kpa"]
+                f_phi_i_upper = upper["f_phi_i"]
+                D_crit_upper = upper["D_crit"]
                 
                 st.metric("Min. Ratholing Dimension ($D_{crit, upper}$)", f"{D_crit_upper:.2f} m")
                 
@@ -267,19 +223,10 @@ else:
 
                 if hopper_shape == "Plane-Flow (Slot)":
                     st.markdown("#### 3. No-Doming (Slot Outlet) [Schulze 10.3.2.5]")
-                    ff_doming = 1.7
-                    ff_line_func_doming = lambda sigma_1: sigma_1 / ff_doming
-                    
-                    sigma_1_crit_kpa_doming = find_positive_intersection(
-                        ff_design_func,
-                        ff_line_func_doming,
-                        upper_hint=sigma_1_plot_max_base
-                    )
-                    sigma_c_crit_kpa_doming = ff_design_func(sigma_1_crit_kpa_doming)
-                    
-                    H_theta_doming = 1.15
-                    # Convert to Pa for physics equation
-                    B_crit = H_theta_doming * (sigma_c_crit_kpa_doming * 1000) / (gamma * g) 
+                    doming = graph.get("doming")
+                    sigma_1_crit_kpa_doming = doming["sigma_1_crit_kpa"]
+                    sigma_c_crit_kpa_doming = doming["sigma_c_crit_kpa"]
+                    B_crit = doming["B_crit"]
                     
                     st.metric("Minimum Minor Dimension ($b_{crit}$) (No-Doming)", f"{B_crit:.2f} m")
                     st.caption(
@@ -299,33 +246,243 @@ else:
 
         with results_cols[1]:
             st.subheader("Funnel-Flow Ratholing Plot")
+            with span("plotting"):
+                # Determine plot range
+                plot_max_stress = sigma_1_plot_max_base
+                if 'sigma_1_crit_kpa_lower' in locals():
+                     plot_max_stress = max(plot_max_stress, sigma_1_crit_kpa_lower, sigma_1_crit_kpa_upper)
+                sigma_1_plot_max = plot_max_stress * 1.5
+                sigma_1_plot = np.linspace(0, sigma_1_plot_max, 50)
             
-            # Determine plot range
-            plot_max_stress = sigma_1_plot_max_base
-            if 'sigma_1_crit_kpa_lower' in locals():
-                 plot_max_stress = max(plot_max_stress, sigma_1_crit_kpa_lower, sigma_1_crit_kpa_upper)
-            sigma_1_plot_max = plot_max_stress * 1.5
-            sigma_1_plot = np.linspace(0, sigma_1_plot_max, 50)
-            
-            fig, ax = plt.subplots()
-            ax.plot(sigma_1_plot, ff_inst_func(sigma_1_plot), label="Instantaneous FF (t=0)")
-            ax.plot(sigma_1_plot, ff_time_func(sigma_1_plot), label="Time FF (t>0) (Design)", linestyle='--', color='red')
+                fig, ax = plt.subplots()
+                ax.plot(sigma_1_plot, ff_inst_func(sigma_1_plot), label="Instantaneous FF (t=0)")
+                ax.plot(sigma_1_plot, ff_time_func(sigma_1_plot), label="Time FF (t>0) (Design)", linestyle='--', color='red')
             
-            if 'sigma_1_crit_kpa_lower' in locals():
-                # Plot Lower Bound
-                ax.plot(sigma_1_plot, ffp_line_func(sigma_1_plot), label=f"$ff_p = {ff_p:.2f}$ (Lower Bound)", color='green')
-                ax.plot(sigma_1_crit_kpa_lower, sigma_c_crit_kpa_lower, 'go', label=f"Lower Bound $\\sigma_{{c,crit}} = {sigma_c_crit_kpa_lower:.1f}$ kPa")
+                if 'sigma_1_crit_kpa_lower' in locals():
+                    # Plot Lower Bound
+                    ax.plot(sigma_1_plot, ffp_line_func(sigma_1_plot), label=f"$ff_p = {ff_p:.2f}$ (Lower Bound)", color='green')
+                    ax.plot(sigma_1_crit_kpa_lower, sigma_c_crit_kpa_lower, 'go', label=f"Lower Bound $\\sigma_{{c,crit}} = {sigma_c_crit_kpa_lower:.1f}$ kPa")
                 
-                # Plot Upper Bound
-                ax.axvline(sigma_1_crit_kpa_upper, label=f"Upper Bound $\\sigma_{{1,crit}} = {sigma_1_crit_kpa_upper:.1f}$ kPa", color='purple', linestyle='dashed')
-                ax.plot(sigma_1_crit_kpa_upper, sigma_c_crit_kpa_upper, 'mP', markersize=8, label=f"Upper Bound $\\sigma_{{c,crit}} = {sigma_c_crit_kpa_upper:.1f}$ kPa")
+                    # Plot Upper Bound
+                    ax.axvline(sigma_1_crit_kpa_upper, label=f"Upper Bound $\\sigma_{{1,crit}} = {sigma_1_crit_kpa_upper:.1f}$ kPa", color='purple', linestyle='dashed')
+                    ax.plot(sigma_1_crit_kpa_upper, sigma_c_crit_kpa_upper, 'mP', markersize=8, label=f"Upper Bound $\\sigma_{{c,crit}} = {sigma_c_crit_kpa_upper:.1f}$ kPa")
 
             
-            ax.set_xlabel("Consolidation Stress ($\\sigma_1$) [kPa]")
-            ax.set_ylabel("Unconfined Yield Strength ($\\sigma_c$) [kPa]")
-            ax.set_title(f"Funnel-Flow Ratholing for {solid_name}")
-            ax.legend()
-            ax.grid(True)
-            ax.set_ylim(bottom=0)
-            ax.set_xlim(left=0)
-            st.pyplot(fig)
+                ax.set_xlabel("Consolidation Stress ($\\sigma_1$) [kPa]")
+                ax.set_ylabel("Unconfined Yield Strength ($\\sigma_c$) [kPa]")
+                ax.set_title(f"Funnel-Flow Ratholing for {solid_name}")
+                ax.legend()
+                ax.grid(True)
+                ax.set_ylim(bottom=0)
+                ax.set_xlim(left=0)
+                st.pyplot(fig)
+                plt.close(fig)
+
+    # --- Expanded-Flow Calculation (mass-flow hopper below a funnel-flow bin) ---
+    elif flow_pattern == "Expanded-Flow":
+        with results_cols[0]:
+            st.subheader("Expanded-Flow Design")
+            st.info(f"Mass-flow hopper with $\\Theta = {theta_prime:.1f}^\\circ$ and $ff = {ff_value:.2f}$ below a funnel-flow bin ($D = {D_silo:g}$ m, $h_f = {h_f:g}$ m).")
+            try:
+                mass_flow = graph.get("mass_flow")
+                lower = graph.get("rathole_lower")
+                upper = graph.get("rathole_upper")
+                expanded = graph.get("expanded")
+                B_min = mass_flow["B_min"]
+                metric_cols = st.columns(2)
+                metric_cols[0].metric("Min. Ratholing Dimension ($D_{crit, lower}$)", f"{lower['D_crit']:.2f} m")
+                metric_cols[1].metric("Min. Ratholing Dimension ($D_{crit, upper}$)", f"{upper['D_crit']:.2f} m")
+                metric_cols[0].metric("Min. Outlet of the Hopper ($B_{min}$)", f"{B_min:.2f} m")
+                metric_cols[1].metric("Min. Top Opening of the Hopper ($D_{top}$)", f"{expanded['D_top']:.2f} m")
+                if expanded["fits"]:
+                    st.success(f"**Mass-flow hopper from {B_min:.2f} m to at least {expanded['D_top']:.2f} m, {expanded['h_hopper']:.2f} m high**, steeper than {theta_prime:.1f}° from vertical. Above its top opening the bin may run in funnel flow.")
+                else:
+                    st.error(f"The top opening ({expanded['D_top']:.2f} m) does not fit into the bin ($D = {D_silo:g}$ m): a stable rathole could form across the whole silo. Design the silo for mass flow.")
+                st.caption("The hopper outlet is sized against arching with the mass-flow intersection; its top opening must exceed the larger of the lower-bound and Janssen upper-bound rathole dimensions of the bin (Schulze 10.3.2).")
+            except Exception as e:
+                st.error(f"An error occurred during Expanded-Flow calculation: {e}")
+
+        with results_cols[1]:
+            st.subheader("Expanded-Flow Design Plot")
+            with span("plotting"):
+                plot_max_stress = sigma_1_plot_max_base
+                if 'expanded' in locals():
+                    plot_max_stress = max(plot_max_stress, mass_flow["sigma_1_crit_kpa"], lower["sigma_1_crit_kpa"], upper["sigma_1_crit_kpa"])
+                sigma_1_plot = np.linspace(0, plot_max_stress * 1.5, 50)
+
+                fig, ax = plt.subplots()
+                ax.plot(sigma_1_plot, ff_time_func(sigma_1_plot), label="Time FF (t>0) (Design)", linestyle='--', color='red')
+                if 'expanded' in locals():
+                    ax.plot(sigma_1_plot, sigma_1_plot / ff_value, label=f"Hopper Flow Factor ($ff = {ff_value:.2f}$)", color='tab:blue')
+                    ax.plot(mass_flow["sigma_1_crit_kpa"], mass_flow["sigma_c_crit_kpa"], 'o', color='tab:blue', label=f"Outlet $\\sigma_{{c,crit}} = {mass_flow['sigma_c_crit_kpa']:.1f}$ kPa")
+                    ax.plot(sigma_1_plot, sigma_1_plot / lower["ff_p"], label=f"$ff_p = {lower['ff_p']:.2f}$ (Lower Bound)", color='green')
+                    ax.plot(lower["sigma_1_crit_kpa"], lower["sigma_c_crit_kpa"], 'go', label=f"Lower Bound $\\sigma_{{c,crit}} = {lower['sigma_c_crit_kpa']:.1f}$ kPa")
+                    ax.axvline(upper["sigma_1_crit_kpa"], label=f"Upper Bound $\\sigma_{{1,crit}} = {upper['sigma_1_crit_kpa']:.1f}$ kPa", color='purple', linestyle='dashed')
+                ax.set_xlabel("Consolidation Stress ($\\sigma_1$) [kPa]")
+                ax.set_ylabel("Unconfined Yield Strength ($\\sigma_c$) [kPa]")
+                ax.set_title(f"Expanded-Flow Design for {solid_name}")
+                ax.legend()
+                ax.grid(True)
+                ax.set_ylim(bottom=0)
+                ax.set_xlim(left=0)
+                st.pyplot(fig)
+                plt.close(fig)
+
+    # --- Sensitivities (closed-form, from the memoized design values) ---
+    try:
+        sensitivities = graph.get("sensitivities")
+    except (KeyError, ValueError):
+        sensitivities = None
+    governing = sensitivities[sensitivities["governing"]] if sensitivities else None
+    if governing is not None and np.isfinite(governing["value"]):
+        st.markdown("---")
+        st.header("Sensitivities")
+        dimension_label = "$B_{min}$" if flow_pattern != "Funnel-Flow" else "the final funnel-flow dimension"
+        st.markdown(f"Change of {dimension_label} ({float(governing['value']):.3f} m) for a ±{TORNADO_STEP:.0%} change of each input, linearized with the analytic derivatives. The largest bars show which measurement matters most.")
+        values = sensitivities["input_values"]
+        rows = tornado_rows(governing, values)
+        sens_cols = st.columns(2)
+        with sens_cols[0]:
+            with span("plotting"):
+                fig, ax = plt.subplots()
+                labels = [SENSITIVITY_INPUTS[key] for key, _, _ in rows][::-1]
+                low = [row[1] for row in rows][::-1]
+                high = [row[2] for row in rows][::-1]
+                ax.barh(labels, low, color="tab:blue", label=f"Input -{TORNADO_STEP:.0%}")
+                ax.barh(labels, high, color="tab:red", label=f"Input +{TORNADO_STEP:.0%}")
+                ax.axvline(0, color="black", linewidth=0.8)
+                ax.set_xlabel("Change of the outlet dimension [m]")
+                ax.set_title(f"Sensitivity Tornado for {solid_name}")
+                ax.legend()
+                ax.grid(True, axis="x")
+                st.pyplot(fig)
+                plt.close(fig)
+        with sens_cols[1]:
+            st.dataframe(
+                [
+                    {
+                        "Input": SENSITIVITY_INPUTS[key],
+                        "Value": float(values[key]),
+                        "Derivative [m per unit]": float(governing["d"][key]),
+                        "Elasticity [% per %]": float(governing["d"][key]) * float(values[key]) / float(governing["value"]),
+                    }
+                    for key, _, _ in rows
+                ],
+                hide_index=True,
+            )
+
+    # --- Hopper Stresses and Feeder Loads (mass flow) ---
+    if flow_pattern == "Mass-Flow" and 'B_min' in locals():
+        try:
+            stresses = graph.get("hopper_stresses")
+        except ValueError as e:
+            stresses = None
+            st.warning(f"Hopper stresses not available: {e}")
+        if stresses is not None:
+            st.markdown("---")
+            st.header("Hopper Stresses and Feeder Loads")
+            stress_cols = st.columns(2)
+            with stress_cols[0]:
+                with span("plotting"):
+                    fig, ax = plt.subplots()
+                    for state, color in [(FILLING, "tab:blue"), (DISCHARGE, "tab:red")]:
+                        ax.plot(stresses[state]["sigma_v"], stresses["z"], color=color, label=f"{state}: $\\sigma_v$")
+                        ax.plot(stresses[state]["sigma_n"], stresses["z"], color=color, linestyle="--", label=f"{state}: $\\sigma_n$ (wall)")
+                    ax.plot(stresses[DISCHARGE]["sigma_1"], stresses["z"], color="tab:red", linestyle=":", label=f"{DISCHARGE}: $\\sigma_1$")
+                    ax.set_xlabel("Stress [kPa]")
+                    ax.set_ylabel("Height above Outlet [m]")
+                    ax.set_title(f"Hopper Stresses ($\\Theta = {theta_prime:.1f}^\\circ$, $B = {B_min:.2f}$ m)")
+                    ax.legend()
+                    ax.grid(True)
+                    ax.set_xlim(left=0)
+                    st.pyplot(fig)
+                    plt.close(fig)
+            with stress_cols[1]:
+                loads = feeder_loads(stresses, B_min, hopper_shape)
+                load_unit = "kN" if hopper_shape == "Conical" else "kN/m"
+                metric_cols = st.columns(2)
+                metric_cols[0].metric(f"Initial Feeder Load [{load_unit}]", f"{float(loads['initial_kn']):.2f}")
+                metric_cols[1].metric(f"Flow Feeder Load [{load_unit}]", f"{float(loads['flow_kn']):.2f}")
+                metric_cols[0].metric("$\\sigma_v$ at Transition [kPa]", f"{stresses['sigma_v_t_kpa']:.1f}")
+                metric_cols[1].metric("Discharge $\\sigma_1$ at Outlet [kPa]", f"{stresses[DISCHARGE]['sigma_1'][0]:.2f}")
+                st.caption(
+                    "Slice equilibrium of the hopper (as in EN 1991-4) from the Janssen stress at the transition "
+                    f"($h_f = {h_f:g}$ m, $D = {D_silo:g}$ m, $K = {K_janssen:g}$) down to the outlet. "
+                    "The initial load acts after filling, the flow load while the hopper discharges. "
+                    + ("Slot loads are per metre of slot length. " if hopper_shape != "Conical" else "")
+                    + f"Compare the discharge $\\sigma_1$ at the outlet with $\\sigma_{{1,crit}} = {sigma_1_crit_kpa:.2f}$ kPa of the flow-factor intersection."
+                )
+
+    if graph.recomputed:
+        st.caption("Recomputed for this change: " + ", ".join(f"{name} ({seconds * 1000:.2f} ms)" for name, seconds in graph.recomputed) + ". All other design nodes were reused.")
+    else:
+        st.caption("No design node depends on the changed inputs: all results were reused.")
+
+    # --- Discharge Rate ---
+    if flow_pattern in ("Mass-Flow", "Expanded-Flow"):
+        B_arching = locals().get("B_min")
+    elif hopper_shape == "Conical":
+        B_arching = locals().get("final_crit_dim")
+    else: # Slot width from the no-doming check
+        B_arching = locals().get("B_crit")
+
+    if B_arching:
+        st.markdown("---")
+        st.header("Discharge Rate")
+        rate_cols = st.columns(2)
+        with rate_cols[0]:
+            model = st.radio("Discharge Model", MODELS, horizontal=True)
+            input_cols = st.columns(2)
+            target_t_h = input_cols[0].number_input("Required Throughput [t/h]", min_value=0.01, value=50.0, format="%.2f")
+            theta_rate = input_cols[1].number_input("Hopper Angle for Discharge ($\\Theta$) [°]", min_value=1.0, max_value=60.0, value=float(min(max(theta_prime, 1.0), 60.0)), format="%.1f")
+            model_args = {"model": model}
+            if hopper_shape == "Plane-Flow (Slot)":
+                model_args["length"] = input_cols[0].number_input("Slot Length (L) [m]", min_value=0.05, value=max(2.0, D_silo), format="%.2f")
+            if model == FINE:
+                model_args["permeability"] = input_cols[0].number_input("Permeability (K) [m/s]", min_value=1e-6, value=0.005, format="%.4f", help="Superficial air velocity through the bed at a pressure gradient of ρb·g.")
+                model_args["rho_b_outlet"] = input_cols[1].number_input("Bulk Density at Outlet ($\\rho_{b,o}$) [kg/m³]", min_value=1.0, max_value=float(gamma) * 0.999, value=float(gamma) * 0.9, format="%.0f")
+            else:
+                model_args["particle_size"] = input_cols[1].number_input("Particle Size (d) [mm]", min_value=0.0, value=0.0, format="%.2f", help="Reduces the outlet by Beverloo's empty annulus 1.4·d.") / 1000
+
+            try:
+                sizing = smallest_outlet(target_t_h / 3.6, B_arching, theta_rate, gamma, hopper_shape, **model_args)
+                B_throughput = sizing["B_throughput"][0]
+                B_required = sizing["B_required"][0]
+                metric_cols = st.columns(3)
+                metric_cols[0].metric("Min. Outlet for Flow", f"{B_arching:.2f} m")
+                metric_cols[1].metric("Min. Outlet for Throughput", f"{B_throughput:.2f} m" if np.isfinite(B_throughput) else "not reached")
+                metric_cols[2].metric("Required Outlet", f"{B_required:.2f} m" if np.isfinite(B_required) else "–")
+                if np.isfinite(B_required):
+                    st.success(f"**Smallest outlet meeting both constraints: {B_required:.2f} m** ({sizing['controlling'][0]} controls).")
+                else:
+                    st.warning("The required throughput is not reached with outlets up to 10 m. Check the discharge model inputs.")
+                st.caption("Coarse solids: Johanson, $W = \\rho_b A \\sqrt{B g / (2 (1+m) \\tan\\Theta)}$. Fine powders: additionally limited by air permeation, $v_{lim} = K / (\\rho_b / \\rho_{b,o} - 1)$. Rates assume mass flow at the outlet.")
+            except ValueError as e:
+                st.error(str(e))
+                sizing = None
+
+        with rate_cols[1]:
+            if sizing is not None:
+                with span("plotting"):
+                    B_plot = outlet_grid(max(B_arching, 0.01) * 0.2, max(B_arching, np.nan_to_num(B_required, nan=B_arching)) * 3)
+                    thetas = sorted({max(theta_rate - 10, 1.0), theta_rate, min(theta_rate + 10, 60.0)})
+                    W_plot = discharge_rate(B_plot[:, None], np.array(thetas)[None, :], gamma, hopper_shape, **model_args) * 3.6
+
+                    fig, ax = plt.subplots()
+                    for i, theta_i in enumerate(thetas):
+                        ax.plot(B_plot, W_plot[:, i], linestyle="-" if theta_i == theta_rate else ":", label=f"$\\Theta = {theta_i:.0f}^\\circ$")
+                    ax.axhline(target_t_h, color="gray", linestyle="dashed", label=f"Required {target_t_h:g} t/h")
+                    ax.axvline(B_arching, color="red", linestyle="dashed", label=f"Min. for flow {B_arching:.2f} m")
+                    if np.isfinite(B_required):
+                        ax.plot(B_required, max(target_t_h, discharge_rate(B_required, theta_rate, gamma, hopper_shape, **model_args) * 3.6), "ko", label=f"Required outlet {B_required:.2f} m")
+                    ax.set_xscale("log")
+                    ax.set_yscale("log")
+                    ax.set_xlabel("Outlet Dimension (B or d) [m]")
+                    ax.set_ylabel("Discharge Rate [t/h]")
+                    ax.set_title("Throughput vs. Outlet Size")
+                    ax.legend()
+                    ax.grid(True, which="both", alpha=0.4)
+                    st.pyplot(fig)
+                    plt.close(fig)
+
+end_page()
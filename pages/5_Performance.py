@@ -0,0 +1,118 @@
+import os
+import streamlit as st
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
+import perf_spans
+import disk_cache
+import session_memory
+
+st.set_page_config(
+    page_title="Performance",
+    page_icon="⏱️",
+    layout="wide"
+)
+session_memory.track_session("5_Performance")
+
+# Session ids, pages and the recording switch are for administrators only
+if os.environ.get("SILO_ADMIN", "0") in ("", "0"):
+    st.title("⏱️ Admin: Rerun Performance")
+    st.warning("This page is only available to administrators. Start the app with the `SILO_ADMIN=1` environment variable to open it.")
+    st.stop()
+
+st.title("⏱️ Admin: Rerun Performance")
+st.markdown("Timing spans recorded by this server process for the **User Inputs** and **Results** pages. Use this to see whether slow reruns come from plotting (matplotlib), fitting and root-finding (numpy/scipy), or session-state handling.")
+
+st.subheader("Disk Result Cache")
+shared_cache = disk_cache.default_cache()
+if shared_cache is None:
+    st.caption("The shared disk cache is disabled. Set `SILO_CACHE_DIR=<directory>` (and optionally `SILO_CACHE_MAX_MB`, default 1024) to keep design results, map tables and report figures across restarts and replicas.")
+else:
+    cache_stats = shared_cache.stats()
+    cols = st.columns(5)
+    cols[0].metric("Hit Rate", "–" if cache_stats["hit_rate"] is None else f"{cache_stats['hit_rate']:.1%}")
+    cols[1].metric("Hits / Misses", f"{cache_stats['hits']} / {cache_stats['misses']}")
+    cols[2].metric("Entries", cache_stats["entries"])
+    cols[3].metric("Size [MB]", f"{cache_stats['bytes'] / 2**20:.1f} of {cache_stats['max_bytes'] / 2**20:.0f}")
+    cols[4].metric("Evictions", cache_stats["evictions"])
+    st.caption(f"Shared by all processes using `{shared_cache.directory}` (code version `{disk_cache.code_version()}`).")
+
+st.subheader("Session Memory")
+session_rows = session_memory.registry.session_rows()
+cols = st.columns(4)
+cols[0].metric("Live Sessions", len(session_rows))
+cols[1].metric("Session State [KB]", f"{sum(row['bytes'] for row in session_rows) / 1024:.1f}")
+cols[2].metric("Open Figures", len(plt.get_fignums()))
+cols[3].metric("Sessions Offloaded", session_memory.registry.offloaded)
+st.caption(
+    f"Approximate bytes held in the session state of this server process. Sessions idle for more than "
+    f"{session_memory.IDLE_MINUTES:g} min are offloaded to `{session_memory.SESSIONS_DIR}/` and restored on their next rerun "
+    "(`SILO_SESSION_IDLE_MIN`, 0 disables)."
+)
+if session_rows:
+    cols = st.columns(2)
+    cols[0].dataframe(pd.DataFrame(session_rows).rename(columns={
+        "session": "Session", "page": "Last Page", "idle_s": "Idle [s]", "keys": "Keys", "bytes": "Bytes", "largest_key": "Largest Key",
+    }).style.format({"Idle [s]": "{:.0f}"}), hide_index=True)
+    cols[1].dataframe(pd.DataFrame(session_memory.registry.key_rows()).rename(columns={
+        "key": "Key", "sessions": "Sessions", "bytes": "Bytes", "mean_bytes": "Mean Bytes",
+    }).style.format({"Mean Bytes": "{:.0f}"}), hide_index=True)
+cols = st.columns([1, 2])
+idle_minutes = cols[0].number_input("Offload sessions idle for more than [min]", min_value=1.0, value=session_memory.IDLE_MINUTES or 30.0, step=5.0)
+if cols[1].button("Offload idle sessions now"):
+    count, freed = session_memory.registry.evict_idle(idle_minutes * 60)
+    st.success(f"Offloaded {count} session(s), {freed / 1024:.1f} KB of session state released.")
+
+if not perf_spans.ENABLED:
+    st.info("Performance recording is disabled. Start the app with the `SILO_PERF=1` environment variable to record timing spans (optionally set `SILO_PERF_LOG=<file>` to also append every span to a JSON-lines file).")
+    if st.button("Enable recording for this server process"):
+        perf_spans.set_enabled(True)
+        st.rerun()
+    st.stop()
+
+rows = perf_spans.summarize()
+if not rows:
+    st.warning("No spans recorded yet. Open the User Inputs or Results pages and come back.")
+    st.stop()
+
+summary = pd.DataFrame(rows)
+summary = summary.rename(columns={
+    "page": "Page", "stage": "Stage", "count": "Count", "total_ms": "Total [ms]",
+    "mean_ms": "Mean [ms]", "p50_ms": "p50 [ms]", "p95_ms": "p95 [ms]", "p99_ms": "p99 [ms]",
+})
+
+st.subheader("Latency by Page and Stage")
+st.dataframe(summary.style.format(precision=2), hide_index=True)
+
+st.subheader("Latency Histogram")
+cols = st.columns(2)
+page = cols[0].selectbox("Page", sorted(summary["Page"].unique()))
+stages = summary.loc[summary["Page"] == page, "Stage"].tolist()
+stage = cols[1].selectbox("Stage", stages, index=stages.index("rerun") if "rerun" in stages else 0)
+
+durations_ms = perf_spans.get_durations(page, stage)
+if len(durations_ms):
+    p50, p95, p99 = np.percentile(durations_ms, [50, 95, 99])
+    fig, ax = plt.subplots(figsize=(8, 3.5))
+    ax.hist(durations_ms, bins=min(50, max(10, len(durations_ms) // 5)), color="steelblue")
+    for value, label, color in [(p50, "p50", "green"), (p95, "p95", "orange"), (p99, "p99", "red")]:
+        ax.axvline(value, color=color, linestyle="dashed", label=f"{label} = {value:.1f} ms")
+    ax.set_xlabel("Duration [ms]")
+    ax.set_ylabel("Count")
+    ax.set_title(f"{page}: {stage}")
+    ax.legend()
+    ax.grid(True)
+    st.pyplot(fig)
+    plt.close(fig)
+
+st.subheader("Export")
+cols = st.columns(2)
+cols[0].download_button(
+    "Download spans (JSON lines)",
+    data=perf_spans.export_jsonl(),
+    file_name="silo_design_spans.jsonl",
+    mime="application/jsonl",
+)
+if cols[1].button("Reset recorded spans"):
+    perf_spans.reset()
+    st.rerun()
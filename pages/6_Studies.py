@@ -0,0 +1,207 @@
+import streamlit as st
+import numpy as np
+import json
+import matplotlib.pyplot as plt
+import pandas as pd
+from study_jobs import (
+    StudyRunner,
+    STUDY_PARAMETERS,
+    FINISHED_STATUSES,
+    make_sweep_cases,
+    make_monte_carlo_cases,
+    list_jobs,
+    load_job,
+    load_results,
+)
+from session_memory import track_session
+
+st.set_page_config(
+    page_title="Design Studies",
+    page_icon="🧪",
+    layout="wide"
+)
+track_session("6_Studies")
+
+SAVE_FILE = "last_inputs.json"
+REFRESH_SECONDS = 2
+
+st.title("🧪 Design Studies")
+st.markdown("Run parameter sweeps, Monte Carlo studies and batches of cases in the background. Studies keep running when you leave this page or refresh the browser, and their progress and partial results are saved to disk.")
+st.markdown("---")
+
+@st.cache_resource
+def get_runner():
+    """One background runner (event loop + process pool) shared by all sessions."""
+    return StudyRunner()
+
+def get_base_case():
+    """Returns the last submitted inputs of this session, or the saved inputs file."""
+    if "inputs" in st.session_state:
+        return st.session_state.inputs, "your last submitted inputs"
+    try:
+        with open(SAVE_FILE, 'r') as f:
+            return json.load(f), f"the saved inputs ('{SAVE_FILE}')"
+    except (FileNotFoundError, ValueError):
+        return None, None
+
+def select_job(job_id):
+    st.session_state.study_job = job_id
+    st.query_params["job"] = job_id # Survives a browser refresh
+
+def output_columns(results):
+    return [col for col in ["B_min", "final_crit_dim", "D_top", "D_crit_lower", "D_crit_upper", "B_crit"] if col in results.columns]
+
+def plot_study(job, results):
+    """Sweep: outputs vs. the swept input. Monte Carlo: histogram of the controlling dimension."""
+    ok = results[results["error"].isna()] if "error" in results.columns else results
+    outputs = output_columns(ok)
+    if ok.empty or not outputs:
+        return
+
+    fig, ax = plt.subplots()
+    if job["kind"] == "sweep":
+        key = job["params"]["parameter"]
+        for col in outputs:
+            ax.plot(ok[key], ok[col], marker=".", label=col)
+        ax.set_xlabel(STUDY_PARAMETERS.get(key, key))
+        ax.set_ylabel("Dimension [m]")
+        ax.set_title(f"Sweep of {key}")
+        ax.legend()
+    else:
+        col = outputs[0] if job["kind"] == "batch" else ("B_min" if "B_min" in ok.columns else "final_crit_dim")
+        values = ok[col].to_numpy(dtype=float)
+        p50, p95 = np.percentile(values, [50, 95])
+        ax.hist(values, bins=50, color="steelblue")
+        ax.axvline(p50, color="green", linestyle="dashed", label=f"p50 = {p50:.3f} m")
+        ax.axvline(p95, color="red", linestyle="dashed", label=f"p95 = {p95:.3f} m")
+        ax.set_xlabel(f"{col} [m]")
+        ax.set_ylabel("Count")
+        ax.set_title(f"Distribution of {col} ({len(values)} cases)")
+        ax.legend()
+    ax.grid(True)
+    st.pyplot(fig)
+    plt.close(fig)
+
+def show_job(job_id):
+    """Progress, controls and (partial) results of one study. Re-run on a timer while the study is active."""
+    runner = get_runner()
+    try:
+        job = load_job(job_id, runner.studies_dir)
+    except (OSError, ValueError):
+        st.error(f"Study '{job_id}' was not found.")
+        return
+
+    st.subheader(f"{job['title']}")
+    st.caption(f"ID `{job['id']}` · {job['kind'].replace('_', ' ')} · status **{job['status']}**")
+    st.progress(job["done"] / job["total"] if job["total"] else 0.0, text=f"{job['done']} of {job['total']} cases evaluated ({job['failed_cases']} failed)")
+    if job["error"]:
+        st.error(f"Study failed: {job['error']}")
+
+    cols = st.columns(4)
+    if job["status"] in ("queued", "running"):
+        if cols[0].button("Cancel study"):
+            runner.cancel(job_id)
+            st.rerun()
+    elif job["status"] in ("interrupted", "cancelled", "failed"):
+        if cols[0].button("Resume study"):
+            runner.resume(job_id)
+            st.rerun()
+
+    results = pd.DataFrame(load_results(job_id, runner.studies_dir))
+    if not results.empty:
+        plot_study(job, results)
+        st.dataframe(results, hide_index=True)
+        cols[1].download_button("Download results (CSV)", results.to_csv(index=False), file_name=f"study_{job_id}.csv", mime="text/csv")
+
+    if job["status"] not in FINISHED_STATUSES and job["status"] != "interrupted":
+        st.session_state.study_was_active = True
+    elif st.session_state.get("study_was_active"):
+        # The study just finished: rerun the page once to stop the refresh timer
+        st.session_state.study_was_active = False
+        st.rerun()
+
+
+runner = get_runner()
+base_case, base_label = get_base_case()
+
+# --- New Study ---
+st.header("New Study")
+if base_case is None:
+    st.warning("No inputs found. Submit a case on the 'User Inputs' page first (sweeps and Monte Carlo studies start from it).")
+else:
+    st.caption(f"Sweeps and Monte Carlo studies start from {base_label}: **{base_case['solid_name']}**, {base_case['flow_pattern']}, {base_case['hopper_shape']}.")
+
+tab_sweep, tab_mc, tab_batch = st.tabs(["Parameter Sweep", "Monte Carlo", "Batch of Cases"])
+
+with tab_sweep:
+    if base_case is not None:
+        key = st.selectbox("Parameter", list(STUDY_PARAMETERS), format_func=STUDY_PARAMETERS.get, key="sweep_parameter")
+        base_value = 1.0 if key == "ff_time_strength" else float(base_case[key])
+        cols = st.columns(3)
+        start = cols[0].number_input("From", value=base_value * 0.5, format="%.3f", key=f"sweep_start_{key}")
+        stop = cols[1].number_input("To", value=base_value * 1.5, format="%.3f", key=f"sweep_stop_{key}")
+        n_points = cols[2].number_input("Points", min_value=2, max_value=1_000_000, value=50, step=10, key="sweep_points")
+        if st.button("Start Sweep", type="primary"):
+            cases = make_sweep_cases(base_case, key, np.linspace(start, stop, int(n_points)))
+            title = f"Sweep of {key} from {start:g} to {stop:g} ({base_case['solid_name']})"
+            select_job(runner.submit("sweep", title, cases, {"parameter": key, "start": start, "stop": stop, "points": int(n_points)}))
+            st.rerun()
+
+with tab_mc:
+    if base_case is not None:
+        keys = st.multiselect("Uncertain parameters", list(STUDY_PARAMETERS), default=["gamma", "ff_time_strength"], format_func=STUDY_PARAMETERS.get)
+        relative_std = {}
+        cols = st.columns(max(1, len(keys)))
+        for col, key in zip(cols, keys):
+            relative_std[key] = col.number_input(f"Rel. std. dev. of {key} [%]", min_value=0.0, max_value=100.0, value=10.0, key=f"mc_std_{key}") / 100
+        cols = st.columns(2)
+        n_samples = cols[0].number_input("Samples", min_value=10, max_value=1_000_000, value=2000, step=1000)
+        seed = cols[1].number_input("Random seed", min_value=0, value=0, step=1)
+        if st.button("Start Monte Carlo", type="primary", disabled=not keys):
+            cases = make_monte_carlo_cases(base_case, relative_std, int(n_samples), int(seed))
+            title = f"Monte Carlo, {int(n_samples)} samples of {', '.join(keys)} ({base_case['solid_name']})"
+            select_job(runner.submit("monte_carlo", title, cases, {"relative_std": relative_std, "samples": int(n_samples), "seed": int(seed)}))
+            st.rerun()
+
+with tab_batch:
+    st.markdown("Upload a JSON file with a list of input cases (each in the same format as `last_inputs.json`).")
+    uploaded = st.file_uploader("Cases (JSON)", type=["json"])
+    if uploaded is not None and st.button("Start Batch", type="primary"):
+        try:
+            cases = json.load(uploaded)
+            if isinstance(cases, dict):
+                cases = [cases]
+            for i, case in enumerate(cases):
+                case["study_params"] = {"case": case.get("solid_name", f"Case {i + 1}")}
+            select_job(runner.submit("batch", f"Batch of {len(cases)} cases ({uploaded.name})", cases, {"file": uploaded.name}))
+            st.rerun()
+        except (ValueError, TypeError, AttributeError) as e:
+            st.error(f"Could not read cases from '{uploaded.name}': {e}")
+
+st.markdown("---")
+
+# --- Existing Studies ---
+st.header("Studies")
+runner.recover_stale_jobs() # Studies of stopped processes (replicas, restarted servers) become resumable
+jobs = list_jobs(runner.studies_dir)
+if not jobs:
+    st.info("No studies yet.")
+else:
+    st.dataframe(
+        pd.DataFrame([
+            {"ID": job["id"], "Title": job["title"], "Status": job["status"], "Progress": f"{job['done']}/{job['total']}"}
+            for job in jobs
+        ]),
+        hide_index=True,
+    )
+
+    job_ids = [job["id"] for job in jobs]
+    selected = st.session_state.get("study_job") or st.query_params.get("job")
+    if selected not in job_ids:
+        selected = job_ids[0]
+    titles = {job["id"]: f"{job['title']} [{job['status']}]" for job in jobs}
+    selected = st.selectbox("Show study", job_ids, index=job_ids.index(selected), format_func=titles.get)
+    select_job(selected)
+
+    active = load_job(selected, runner.studies_dir)["status"] in ("queued", "running", "cancelling")
+    st.fragment(run_every=REFRESH_SECONDS if active else None)(show_job)(selected)
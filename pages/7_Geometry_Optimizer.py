@@ -0,0 +1,115 @@
+import streamlit as st
+import json
+import matplotlib.pyplot as plt
+import pandas as pd
+import disk_cache
+from geometry_optimizer import optimize_geometry, material_inputs, WALL_THICKNESS
+from session_memory import track_session
+
+st.set_page_config(
+    page_title="Geometry Optimizer",
+    page_icon="📐",
+    layout="wide"
+)
+track_session("7_Geometry_Optimizer")
+
+SAVE_FILE = "last_inputs.json"
+OBJECTIVE_LABELS = {"height": "Minimum total height", "steel_mass": "Minimum steel mass"}
+COLUMN_LABELS = {
+    "theta": "Θ [°]", "D": "D [m]", "B": "B [m]", "H_cyl": "Cylinder height [m]",
+    "h_hopper": "Hopper height [m]", "total_height": "Total height [m]", "steel_mass": "Steel mass [kg]",
+}
+
+st.title("📐 Hopper Geometry Optimizer")
+st.markdown("Searches hopper angle, outlet size, diameter and cylinder height for a required storage volume. Mass-flow designs use the mass-flow limit angle and an approximate flow factor $ff(\\Theta)$. Funnel-flow designs use the rathole, doming and complete-clearance checks of the Results page.")
+st.markdown("---")
+
+def get_base_case():
+    """Returns the last submitted inputs of this session, or the saved inputs file."""
+    if "inputs" in st.session_state:
+        return st.session_state.inputs, "your last submitted inputs"
+    try:
+        with open(SAVE_FILE, 'r') as f:
+            return json.load(f), f"the saved inputs ('{SAVE_FILE}')"
+    except (FileNotFoundError, ValueError):
+        return None, None
+
+@st.cache_data(max_entries=64, show_spinner="Evaluating candidate geometries...")
+def pareto_front_for_material(material_json, volume, max_height, max_diameter, max_outlet, length, wall_thickness):
+    """Pareto front of one material and set of limits, cached across sessions and in the disk cache."""
+    def compute():
+        result = optimize_geometry(
+            json.loads(material_json), volume, "height", max_height=max_height, max_diameter=max_diameter,
+            max_outlet=max_outlet, length=length, wall_thickness=wall_thickness
+        )
+        return result["pareto"], result["evaluated"], result["feasible"]
+    return disk_cache.cached("pareto_front", [json.loads(material_json), volume, max_height, max_diameter, max_outlet, length, wall_thickness], compute)
+
+
+base_case, base_label = get_base_case()
+if base_case is None:
+    st.warning("No inputs found. Submit a case on the 'User Inputs' page first.")
+    st.stop()
+
+hopper_shape = base_case["hopper_shape"]
+st.caption(f"Material from {base_label}: **{base_case['solid_name']}**, {base_case['flow_pattern']}, {hopper_shape}.")
+
+cols = st.columns(3)
+volume = cols[0].number_input("Required Volume [m³]", min_value=0.1, value=100.0, format="%.1f")
+objective = cols[1].radio("Objective", list(OBJECTIVE_LABELS), format_func=OBJECTIVE_LABELS.get)
+wall_thickness = cols[2].number_input("Wall Thickness [mm]", min_value=1.0, value=WALL_THICKNESS * 1000, format="%.1f") / 1000
+
+cols = st.columns(4)
+max_height = cols[0].number_input("Max. Total Height (headroom) [m]", min_value=0.5, value=20.0, format="%.1f")
+max_diameter = cols[1].number_input("Max. Diameter/Width [m]", min_value=0.2, value=6.0, format="%.2f")
+max_outlet = None
+if cols[2].checkbox("Allow larger outlets", help="Without this, the smallest outlet allowed by the flow checks is used."):
+    max_outlet = cols[2].number_input("Max. Outlet Size [m]", min_value=0.01, value=1.0, format="%.2f")
+length = None
+if hopper_shape == "Plane-Flow (Slot)":
+    length = cols[3].number_input("Slot Length (L) [m]", min_value=0.1, value=4.0, format="%.2f")
+
+try:
+    pareto, evaluated, feasible = pareto_front_for_material(
+        json.dumps(material_inputs(base_case), sort_keys=True), volume, max_height, max_diameter, max_outlet, length, wall_thickness
+    )
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+
+front = pd.DataFrame(pareto)
+best = front.loc[front["total_height"].idxmin() if objective == "height" else front["steel_mass"].idxmin()]
+
+st.header("Optimum")
+st.caption(f"{evaluated:,} candidate geometries evaluated, {feasible:,} feasible.")
+metric_cols = st.columns(4)
+metric_cols[0].metric("Hopper Angle ($\\Theta$)", f"{best['theta']:.1f}°")
+metric_cols[1].metric("Diameter/Width ($D$)", f"{best['D']:.2f} m")
+metric_cols[2].metric("Outlet ($B$)", f"{best['B']:.2f} m")
+metric_cols[3].metric("Cylinder Height", f"{best['H_cyl']:.2f} m")
+metric_cols = st.columns(4)
+metric_cols[0].metric("Hopper Height", f"{best['h_hopper']:.2f} m")
+metric_cols[1].metric("Total Height", f"{best['total_height']:.2f} m")
+metric_cols[2].metric("Steel Mass", f"{best['steel_mass']:,.0f} kg")
+
+if "inputs" in st.session_state and st.button("Use this geometry for the Results page"):
+    st.session_state.inputs = dict(
+        st.session_state.inputs, D_silo=float(best["D"]), h_f=float(best["H_cyl"]), theta_prime_manual=float(best["theta"])
+    )
+    st.success("Updated $D$, $h_f$ and $\\Theta$ of your submitted inputs. Open the Results page to review the design.")
+
+st.header("Pareto Front")
+plot_col, table_col = st.columns(2)
+with plot_col:
+    fig, ax = plt.subplots()
+    ax.plot(front["total_height"], front["steel_mass"], marker="o", color="steelblue", label="Pareto front")
+    ax.plot(best["total_height"], best["steel_mass"], "ro", label=OBJECTIVE_LABELS[objective])
+    ax.set_xlabel("Total Height [m]")
+    ax.set_ylabel("Steel Mass [kg]")
+    ax.set_title(f"Height vs. Steel Mass for {volume:g} m³")
+    ax.legend()
+    ax.grid(True)
+    st.pyplot(fig)
+    plt.close(fig)
+with table_col:
+    st.dataframe(front.rename(columns=COLUMN_LABELS).round(3), hide_index=True)
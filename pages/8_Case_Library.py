@@ -0,0 +1,121 @@
+import streamlit as st
+import json
+import time
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from case_store import (
+    CASE_LIBRARY_FILE,
+    load_library,
+    save_library,
+    validate_library,
+    add_case,
+    remove_solid,
+    remove_wall,
+)
+from comparison_matrix import comparison_matrix, ranked_table, MATRIX_COLUMNS
+from session_memory import track_session
+
+st.set_page_config(
+    page_title="Case Library",
+    page_icon="🗂️",
+    layout="wide"
+)
+track_session("8_Case_Library")
+
+HOPPER_SHAPES = ["Conical", "Plane-Flow (Slot)"]
+
+st.title("🗂️ Case Library & Liner Comparison")
+st.markdown("Collect solids, wall materials and the wall yield loci measured for each pair, then compare every solid on every wall at once. For each pair and time level the table gives the wall friction angle $\\phi_x$, the mass-flow hopper angle (limit minus a 3° margin), the approximate flow factor $ff$ and the minimum outlet $B_{min}$.")
+st.markdown("---")
+
+if "case_library" not in st.session_state:
+    try:
+        st.session_state.case_library = load_library()
+    except ValueError as e:
+        st.error(f"Could not read '{CASE_LIBRARY_FILE}': {e}")
+        st.stop()
+library = st.session_state.case_library
+
+# --- Library Editing ---
+st.header("Library")
+add_col, file_col = st.columns(2)
+with add_col:
+    if "inputs" in st.session_state:
+        inputs = st.session_state.inputs
+        time_label = st.text_input("Time Level Label", value="Time", help="Label for the time flow function of your submitted inputs, e.g. '24 h'.")
+        if st.button(f"Add submitted case ({inputs['solid_name']} on {inputs['wall_material']})"):
+            add_case(library, inputs, time_label)
+            save_library(library)
+            st.success("Case added to the library.")
+    else:
+        st.info("Submit a case on the 'User Inputs' page to add it to the library.")
+
+    solids, walls = list(library["solids"]), list(library["walls"])
+    remove_cols = st.columns(2)
+    solid_to_remove = remove_cols[0].selectbox("Solid", ["-"] + solids)
+    if solid_to_remove != "-" and remove_cols[0].button("Remove solid"):
+        remove_solid(library, solid_to_remove)
+        save_library(library)
+        st.rerun()
+    wall_to_remove = remove_cols[1].selectbox("Wall", ["-"] + walls)
+    if wall_to_remove != "-" and remove_cols[1].button("Remove wall"):
+        remove_wall(library, wall_to_remove)
+        save_library(library)
+        st.rerun()
+
+with file_col:
+    uploaded = st.file_uploader("Import Library (JSON)", type="json")
+    if uploaded is not None and st.button("Replace library with upload"):
+        try:
+            new_library = json.load(uploaded)
+            validate_library(new_library)
+        except ValueError as e:
+            st.error(f"Invalid library file: {e}")
+        else:
+            st.session_state.case_library = new_library
+            save_library(new_library)
+            st.rerun()
+    st.download_button("Download Library (JSON)", json.dumps(library, indent=4), file_name=CASE_LIBRARY_FILE, mime="application/json")
+
+n_loci = sum(len(loci) for loci in library["wall_yield_loci"].values())
+st.caption(f"{len(library['solids'])} solids, {len(library['walls'])} walls, {n_loci} wall yield loci.")
+
+if not library["solids"] or not library["walls"]:
+    st.warning("The library needs at least one solid with a wall yield locus to build the comparison matrix.")
+    st.stop()
+
+# --- Comparison Matrix ---
+st.header("Comparison Matrix")
+cols = st.columns(3)
+hopper_shape = cols[0].radio("Hopper Shape", HOPPER_SHAPES)
+metric = cols[1].selectbox("Heatmap Value", list(MATRIX_COLUMNS), index=list(MATRIX_COLUMNS).index("B_min"), format_func=MATRIX_COLUMNS.get)
+
+start = time.perf_counter()
+matrix = comparison_matrix(library, hopper_shape)
+table = ranked_table(matrix)
+elapsed = time.perf_counter() - start
+
+time_level = cols[2].selectbox("Time Level", matrix["time_levels"], index=len(matrix["time_levels"]) - 1)
+k = matrix["time_levels"].index(time_level)
+values = matrix[metric][:, :, k]
+
+fig, ax = plt.subplots(figsize=(max(6, 0.6 * len(matrix["walls"]) + 3), max(3, 0.35 * len(matrix["solids"]) + 1.5)))
+image = ax.imshow(np.ma.masked_invalid(values), cmap="viridis_r" if metric == "B_min" else "viridis", aspect="auto")
+ax.set_xticks(range(len(matrix["walls"])), matrix["walls"], rotation=45, ha="right")
+ax.set_yticks(range(len(matrix["solids"])), matrix["solids"])
+ax.set_xlabel("Wall Material")
+ax.set_ylabel("Bulk Solid")
+ax.set_title(f"{MATRIX_COLUMNS[metric]} ({hopper_shape}, {time_level})")
+fig.colorbar(image, ax=ax, label=MATRIX_COLUMNS[metric])
+fig.tight_layout()
+st.pyplot(fig)
+plt.close(fig)
+st.caption(f"Grey cells: no wall yield locus, no flow function at this time level, or no mass-flow design possible. {values.size * len(matrix['time_levels'])} combinations computed in {elapsed * 1000:.1f} ms.")
+
+st.subheader("Ranked Designs")
+st.markdown("Sorted by $B_{min}$, smallest first. Click a column header to sort by another value.")
+if table:
+    st.dataframe(pd.DataFrame(table).round(3), hide_index=True)
+else:
+    st.warning("No solid/wall pair allows a mass-flow design for this hopper shape.")
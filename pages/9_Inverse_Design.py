@@ -0,0 +1,140 @@
+import streamlit as st
+import json
+import time
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+from design_calcs import validate_design_inputs, build_flow_functions
+from inverse_design import HOPPER_SHAPES, FLOWS, TIME_LIMITED, NO_FLOW, NOT_MASS_FLOW, screen_silos
+from session_memory import track_session
+
+st.set_page_config(
+    page_title="Inverse Design",
+    page_icon="🔁",
+    layout="wide"
+)
+track_session("9_Inverse_Design")
+
+SAVE_FILE = "last_inputs.json"
+SILO_COLUMNS = {"name": "Silo", "hopper_shape": "Shape", "B": "Outlet B [m]", "theta": "Hopper Angle Θ [°]", "phi_x": "Wall Friction φx [°]"}
+FAMILY_COLUMNS = {"time": "Storage Time [h]", "m": "Slope m", "c": "Intercept c [kPa]"}
+STATUS_COLORS = {FLOWS: "tab:green", TIME_LIMITED: "tab:orange", NO_FLOW: "tab:red", NOT_MASS_FLOW: "tab:gray"}
+
+st.title("🔁 Inverse Design (Retrofit Screening)")
+st.markdown("Checks existing mass-flow hoppers against a product. For each silo the outlet equation $B = H(\\Theta)\\,\\sigma_{c,crit} / (\\rho_b g)$ is run backwards: $\\sigma_{c,max} = B \\rho_b g / H(\\Theta)$ is the largest strength the outlet can break, and $\\sigma_1 = ff \\cdot \\sigma_{c,max}$ is the consolidation stress at the outlet. The product flows as long as its flow function stays below $\\sigma_{c,max}$ at that stress.")
+st.markdown("---")
+
+def get_base_case():
+    """Returns the last submitted inputs of this session, or the saved inputs file."""
+    if "inputs" in st.session_state:
+        return st.session_state.inputs, "your last submitted inputs"
+    try:
+        with open(SAVE_FILE, 'r') as f:
+            return json.load(f), f"the saved inputs ('{SAVE_FILE}')"
+    except (FileNotFoundError, ValueError):
+        return None, None
+
+
+base_case, base_label = get_base_case()
+if base_case is None:
+    st.warning("No inputs found. Submit a case on the 'User Inputs' page first.")
+    st.stop()
+try:
+    validate_design_inputs(base_case)
+    _, _, (m_inst, c_inst), (m_time, c_time), _ = build_flow_functions(base_case)
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+
+# --- Product ---
+st.header("Product")
+st.caption(f"Product from {base_label}: **{base_case['solid_name']}**, $\\rho_b$ = {base_case['gamma']:g} kg/m³, $\\phi_e$ = {base_case['delta']:g}°.")
+st.markdown("Flow-function family: one linear flow function $\\sigma_c = m \\sigma_1 + c$ per tested storage time. The strength is interpolated linearly between the tested times.")
+if "inverse_family" not in st.session_state:
+    st.session_state.inverse_family = pd.DataFrame([
+        {FAMILY_COLUMNS["time"]: 0.0, FAMILY_COLUMNS["m"]: m_inst, FAMILY_COLUMNS["c"]: c_inst},
+        {FAMILY_COLUMNS["time"]: 24.0, FAMILY_COLUMNS["m"]: m_time, FAMILY_COLUMNS["c"]: c_time},
+    ])
+family = st.data_editor(st.session_state.inverse_family, num_rows="dynamic", key="inverse_family_editor").dropna()
+
+# --- Installed Silos ---
+st.header("Installed Silos")
+uploaded = st.file_uploader("Import Silos (CSV)", type="csv", help=f"Columns: {', '.join(SILO_COLUMNS)} (hopper_shape: {' or '.join(HOPPER_SHAPES)}).")
+if uploaded is not None and st.button("Replace silos with upload"):
+    try:
+        silos = pd.read_csv(uploaded)
+        missing = set(SILO_COLUMNS) - set(silos.columns)
+        if missing:
+            raise ValueError(f"Missing column(s): {', '.join(sorted(missing))}.")
+        st.session_state.inverse_silos = silos[list(SILO_COLUMNS)].rename(columns=SILO_COLUMNS)
+        st.session_state.pop("inverse_silos_editor", None) # Drop edits of the previous table
+    except ValueError as e:
+        st.error(f"Could not read the silo table: {e}")
+if "inverse_silos" not in st.session_state:
+    st.session_state.inverse_silos = pd.DataFrame([{
+        SILO_COLUMNS["name"]: "Silo 1",
+        SILO_COLUMNS["hopper_shape"]: base_case["hopper_shape"],
+        SILO_COLUMNS["B"]: 0.3,
+        SILO_COLUMNS["theta"]: base_case.get("theta_prime_manual", 15.0),
+        SILO_COLUMNS["phi_x"]: base_case["phi_prime_calc"],
+    }])
+silos = st.data_editor(
+    st.session_state.inverse_silos,
+    num_rows="dynamic",
+    column_config={SILO_COLUMNS["hopper_shape"]: st.column_config.SelectboxColumn(options=HOPPER_SHAPES, required=True)},
+    key="inverse_silos_editor",
+).dropna()
+
+if silos.empty or len(family) < 1:
+    st.warning("Enter at least one silo and one flow function.")
+    st.stop()
+
+# --- Screening ---
+try:
+    start = time.perf_counter()
+    result = screen_silos(
+        {key: silos[label].to_numpy() for key, label in SILO_COLUMNS.items() if key != "name"},
+        base_case["gamma"], base_case["delta"],
+        family[FAMILY_COLUMNS["time"]].to_numpy(), family[FAMILY_COLUMNS["m"]].to_numpy(), family[FAMILY_COLUMNS["c"]].to_numpy(),
+    )
+    elapsed = time.perf_counter() - start
+except ValueError as e:
+    st.error(str(e))
+    st.stop()
+
+st.header("Results")
+table = pd.DataFrame({
+    "Silo": silos[SILO_COLUMNS["name"]].to_numpy(),
+    "Status": result["status"],
+    "Max. Storage Time [h]": result["max_storage_time"],
+    "σc,max [kPa]": result["sigma_c_max_kpa"],
+    "σ1 at Outlet [kPa]": result["sigma_1_outlet_kpa"],
+    "ff": result["ff"],
+    "Mass-flow limit Θ [°]": result["theta_limit"],
+})
+counts = table["Status"].value_counts()
+metric_cols = st.columns(4)
+for col, status in zip(metric_cols, STATUS_COLORS):
+    col.metric(status.capitalize(), int(counts.get(status, 0)))
+st.caption(f"{len(table)} silos screened in {elapsed * 1000:.1f} ms. 'inf' storage time: the product flows at every tested time (no extrapolation beyond the last one).")
+st.dataframe(table.round(3), hide_index=True)
+
+fig, ax = plt.subplots()
+sigma_1_max = np.nanmax(result["sigma_1_outlet_kpa"]) if np.isfinite(result["sigma_1_outlet_kpa"]).any() else 10.0
+sigma_1 = np.linspace(0, 1.2 * sigma_1_max, 50)
+for _, row in family.sort_values(FAMILY_COLUMNS["time"]).iterrows():
+    ax.plot(sigma_1, row[FAMILY_COLUMNS["m"]] * sigma_1 + row[FAMILY_COLUMNS["c"]], label=f"FF, t = {row[FAMILY_COLUMNS['time']]:g} h")
+for status, color in STATUS_COLORS.items():
+    mask = result["status"] == status
+    if mask.any():
+        ax.scatter(result["sigma_1_outlet_kpa"][mask], result["sigma_c_max_kpa"][mask], color=color, label=status, zorder=3)
+ax.set_xlabel("Consolidation Stress at Outlet ($\\sigma_1$) [kPa]")
+ax.set_ylabel("Strength ($\\sigma_c$) [kPa]")
+ax.set_title(f"Outlet Capacity of Installed Silos for {base_case['solid_name']}")
+ax.set_xlim(left=0)
+ax.set_ylim(bottom=0)
+ax.legend()
+ax.grid(True)
+st.pyplot(fig)
+plt.close(fig)
+st.caption("Each point is the largest strength a silo's outlet breaks. A silo handles the product as long as the point lies above the flow function.")
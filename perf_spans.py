@@ -0,0 +1,156 @@
+import functools
+import json
+import os
+import threading
+import time
+from collections import defaultdict, deque
+
+import numpy as np
+
+# --- Rerun Latency Instrumentation ---
+# Spans are only recorded when the SILO_PERF environment variable is set (e.g. SILO_PERF=1).
+# When disabled, span() returns a shared no-op context manager, so instrumented code
+# pays one function call and one flag check per span.
+
+ENABLED = os.environ.get("SILO_PERF", "0") not in ("", "0")
+LOG_FILE = os.environ.get("SILO_PERF_LOG") # Optional JSON-lines file that every span is appended to
+MAX_SAMPLES = 2000 # Durations kept per (page, stage) for the percentiles
+MAX_EVENTS = 20000 # Events kept in memory for the JSON-lines export
+
+STAGES = ["rerun", "fitting", "root-finding", "janssen", "chart lookup", "plotting", "session state"]
+
+_lock = threading.Lock()
+_durations = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+_events = deque(maxlen=MAX_EVENTS)
+_local = threading.local() # Streamlit runs each session's script in its own thread
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+_NULL_SPAN = _NullSpan()
+
+
+class _Span:
+    __slots__ = ("page", "stage", "start")
+
+    def __init__(self, page, stage):
+        self.page = page
+        self.stage = stage
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        record(self.page, self.stage, time.perf_counter() - self.start)
+        return False
+
+
+def set_enabled(enabled):
+    """Turns recording on or off for this process (used by the admin page and benchmarks)."""
+    global ENABLED
+    ENABLED = bool(enabled)
+
+def current_page():
+    return getattr(_local, "page", "(no page)")
+
+def span(stage):
+    """
+    Context manager timing one stage of the current page's rerun.
+    Usage: with span("plotting"): ...
+    """
+    if not ENABLED:
+        return _NULL_SPAN
+    return _Span(current_page(), stage)
+
+def timed(stage):
+    """Decorator recording every call of the wrapped function as a span of the given stage."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not ENABLED:
+                return func(*args, **kwargs)
+            with _Span(current_page(), stage):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+def start_page(page):
+    """Marks the start of a page rerun. Call at the top of a page script."""
+    if not ENABLED:
+        return
+    _local.page = page
+    _local.rerun_start = time.perf_counter()
+
+def end_page():
+    """
+    Records the total rerun time for the page started with start_page().
+    Call at the bottom of the page script; reruns ended by st.stop() are not recorded.
+    """
+    if not ENABLED:
+        return
+    start = getattr(_local, "rerun_start", None)
+    if start is not None:
+        record(current_page(), "rerun", time.perf_counter() - start)
+        _local.rerun_start = None
+
+def record(page, stage, seconds):
+    """Stores one span duration (s)."""
+    event = {"ts": time.time(), "page": page, "stage": stage, "ms": seconds * 1000}
+    with _lock:
+        _durations[(page, stage)].append(seconds)
+        _events.append(event)
+    if LOG_FILE:
+        try:
+            with open(LOG_FILE, "a") as f:
+                f.write(json.dumps(event) + "\n")
+        except OSError:
+            pass
+
+def reset():
+    with _lock:
+        _durations.clear()
+        _events.clear()
+
+def get_durations(page, stage):
+    """Returns the recorded durations (ms) for one page and stage as an array."""
+    with _lock:
+        return np.array(_durations.get((page, stage), ()), dtype=float) * 1000
+
+def summarize():
+    """
+    Aggregates the recorded spans per page and stage.
+    Returns a list of dicts with count, total, mean and p50/p95/p99 (all times in ms).
+    """
+    with _lock:
+        items = [(key, np.array(values, dtype=float) * 1000) for key, values in _durations.items()]
+
+    rows = []
+    for (page, stage), ms in sorted(items):
+        if len(ms) == 0:
+            continue
+        p50, p95, p99 = np.percentile(ms, [50, 95, 99])
+        rows.append({
+            "page": page,
+            "stage": stage,
+            "count": len(ms),
+            "total_ms": float(ms.sum()),
+            "mean_ms": float(ms.mean()),
+            "p50_ms": float(p50),
+            "p95_ms": float(p95),
+            "p99_ms": float(p99),
+        })
+    return rows
+
+def export_jsonl():
+    """Returns the recorded span events as JSON lines (one event per line)."""
+    with _lock:
+        events = list(_events)
+    return "".join(json.dumps(event) + "\n" for event in events)
@@ -0,0 +1,383 @@
+import argparse
+import base64
+import hashlib
+import io
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from jinja2 import Environment
+
+import disk_cache
+from app_utils import create_line_func
+from case_store import WYL_X_COL, WYL_Y_COL, validate_library, library_cases
+from design_calcs import (
+    FF_X_COL,
+    FF_Y_COL,
+    get_valid_xy,
+    build_flow_functions,
+    run_design,
+)
+
+# --- Engineering Reports ---
+# Builds one HTML and/or PDF design report per case with the content of the Results
+# page: inputs summary, WYL and flow-function verification plots, the design-point
+# plot and the results. Cases are inputs dicts (last_inputs.json format).
+#
+# Figures are described by plain-data specs (series of lines/points). Identical
+# specs share one key (sha256 of the spec), so a figure used by several cases,
+# e.g. the same flow function on several walls, is rendered once. The unique
+# figures are rendered to PNG in a process pool; the same pool then assembles
+# the case reports from the rendered images. With SILO_CACHE_DIR set, rendered
+# figures are kept in the shared disk cache and reused by later builds.
+
+FORMATS = ["html", "pdf"]
+FIGURE_DPI = 110
+
+
+# --- Figure Specs ---
+def line(x, y, label, **style):
+    return {"kind": "line", "x": [float(v) for v in x], "y": [float(v) for v in y], "label": label, "style": style}
+
+def points(x, y, label, **style):
+    return {"kind": "points", "x": [float(v) for v in x], "y": [float(v) for v in y], "label": label, "style": style}
+
+def vline(x, label, **style):
+    return {"kind": "vline", "x": float(x), "label": label, "style": style}
+
+def figure_spec(title, xlabel, ylabel, series):
+    return {"title": title, "xlabel": xlabel, "ylabel": ylabel, "series": series}
+
+def figure_key(spec):
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode()).hexdigest()[:16]
+
+def render_figure(spec):
+    """Renders a figure spec to PNG bytes (runs in the worker processes)."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig, ax = plt.subplots(figsize=(6.4, 4.4), layout="constrained")
+    for series in spec["series"]:
+        if series["kind"] == "line":
+            ax.plot(series["x"], series["y"], label=series["label"], **series["style"])
+        elif series["kind"] == "points":
+            ax.plot(series["x"], series["y"], linestyle="none", label=series["label"], **series["style"])
+        else:
+            ax.axvline(series["x"], label=series["label"], **series["style"])
+    ax.set_title(spec["title"])
+    ax.set_xlabel(spec["xlabel"])
+    ax.set_ylabel(spec["ylabel"])
+    ax.legend()
+    ax.grid(True)
+    ax.set_xlim(left=0)
+    ax.set_ylim(bottom=0)
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format="png", dpi=FIGURE_DPI)
+    plt.close(fig)
+    return buffer.getvalue()
+
+
+def wyl_figure(inputs):
+    """WYL verification plot (User Inputs page)."""
+    if inputs["wyl_input_method"] == "Define by N test points":
+        wyl_x, wyl_y = get_valid_xy(inputs["wyl_data"], WYL_X_COL, WYL_Y_COL)
+        sigma_w = np.linspace(0, max(wyl_x) * 1.5, 50)
+        _, (m_wyl, c_wyl) = create_line_func(wyl_x, wyl_y)
+        series = [
+            line(sigma_w, m_wyl * sigma_w + c_wyl, f"Fit: $\\tau_w = {m_wyl:.3f}\\sigma_w + {c_wyl:.3f}$", color="red", linestyle="--"),
+            points(wyl_x, wyl_y, "Data Points", color="blue", marker="o"),
+        ]
+    else:
+        m_wyl, c_wyl = inputs["m_wyl"], inputs["c_wyl"]
+        sigma_w = np.linspace(0, 20.0, 50)
+        series = [line(sigma_w, m_wyl * sigma_w + c_wyl, f"Eq: $\\tau_w = {m_wyl:.3f}\\sigma_w + {c_wyl:.3f}$", color="red")]
+    return figure_spec(f"Wall Yield Locus: {inputs['solid_name']} on {inputs['wall_material']}", "Normal Stress ($\\sigma_w$) [kPa]", "Shear Stress ($\\tau_w$) [kPa]", series)
+
+def flow_function_figure(inputs):
+    """Flow-function verification plot (User Inputs page)."""
+    _, _, (m_inst, c_inst), (m_time, c_time), sigma_1_max = build_flow_functions(inputs)
+    sigma_1 = np.linspace(0, sigma_1_max * 1.2, 50)
+    series = [
+        line(sigma_1, m_inst * sigma_1 + c_inst, "Instantaneous FF (t=0)", color="tab:blue"),
+        line(sigma_1, m_time * sigma_1 + c_time, "Time FF (t>0)", color="red", linestyle="--"),
+    ]
+    if inputs["ff_input_method"] == "Define by N test points":
+        inst_x, inst_y = get_valid_xy(inputs["ff_inst_data"], FF_X_COL, FF_Y_COL)
+        time_x, time_y = get_valid_xy(inputs["ff_time_data"], FF_X_COL, FF_Y_COL)
+        series += [
+            points(inst_x, inst_y, "Instantaneous data", color="tab:blue", marker="o"),
+            points(time_x, time_y, "Time data", color="red", marker="s"),
+        ]
+    return figure_spec(f"Flow Functions: {inputs['solid_name']}", "Consolidation Stress ($\\sigma_1$) [kPa]", "Unconfined Yield Strength ($\\sigma_c$) [kPa]", series)
+
+def design_figure(inputs, results):
+    """Design-point plot of the Results page (mass flow, funnel-flow ratholing or both for expanded flow)."""
+    _, _, (m_inst, c_inst), (m_time, c_time), sigma_1_max = build_flow_functions(inputs)
+    if inputs["flow_pattern"] == "Expanded-Flow":
+        mass_flow, lower, upper = results["mass_flow"], results["lower"], results["upper"]
+        ff = inputs["ff_manual"]
+        sigma_1 = np.linspace(0, max(sigma_1_max, mass_flow["sigma_1_crit_kpa"], lower["sigma_1_crit_kpa"], upper["sigma_1_crit_kpa"]) * 1.5, 50)
+        series = [
+            line(sigma_1, m_time * sigma_1 + c_time, "Time FF (t>0) (Design)", color="red", linestyle="--"),
+            line(sigma_1, sigma_1 / ff, f"Hopper Flow Factor ($ff = {ff:.2f}$)", color="tab:blue"),
+            points([mass_flow["sigma_1_crit_kpa"]], [mass_flow["sigma_c_crit_kpa"]], f"Outlet $\\sigma_{{c,crit}} = {mass_flow['sigma_c_crit_kpa']:.1f}$ kPa", color="tab:blue", marker="o"),
+            line(sigma_1, sigma_1 / lower["ff_p"], f"$ff_p = {lower['ff_p']:.2f}$ (Lower Bound)", color="green"),
+            points([lower["sigma_1_crit_kpa"]], [lower["sigma_c_crit_kpa"]], f"Lower Bound $\\sigma_{{c,crit}} = {lower['sigma_c_crit_kpa']:.1f}$ kPa", color="green", marker="o"),
+            vline(upper["sigma_1_crit_kpa"], f"Upper Bound $\\sigma_{{1,crit}} = {upper['sigma_1_crit_kpa']:.1f}$ kPa", color="purple", linestyle="dashed"),
+        ]
+        return figure_spec(f"Expanded-Flow Design for {inputs['solid_name']}", "Consolidation Stress ($\\sigma_1$) [kPa]", "Unconfined Yield Strength ($\\sigma_c$) [kPa]", series)
+    if inputs["flow_pattern"] == "Mass-Flow":
+        mass_flow = results["mass_flow"]
+        ff = inputs["ff_manual"]
+        sigma_1 = np.linspace(0, max(sigma_1_max, mass_flow["sigma_1_crit_kpa"]) * 1.5, 50)
+        series = [
+            line(sigma_1, m_inst * sigma_1 + c_inst, "Instantaneous FF (t=0)"),
+            line(sigma_1, m_time * sigma_1 + c_time, "Time FF (t>0) (Design)", color="red", linestyle="--"),
+            line(sigma_1, sigma_1 / ff, f"Hopper Flow Factor ($ff = {ff:.2f}$)", color="green"),
+            points([mass_flow["sigma_1_crit_kpa"]], [mass_flow["sigma_c_crit_kpa"]], f"Design Point ($\\sigma_{{c,crit}} = {mass_flow['sigma_c_crit_kpa']:.1f}$ kPa)", color="red", marker="o"),
+        ]
+        return figure_spec(f"Mass-Flow Design for {inputs['solid_name']}", "Consolidation Stress ($\\sigma_1$) [kPa]", "Unconfined Yield Strength ($\\sigma_c$) [kPa]", series)
+
+    lower, upper = results["lower"], results["upper"]
+    sigma_1 = np.linspace(0, max(sigma_1_max, lower["sigma_1_crit_kpa"], upper["sigma_1_crit_kpa"]) * 1.5, 50)
+    series = [
+        line(sigma_1, m_inst * sigma_1 + c_inst, "Instantaneous FF (t=0)"),
+        line(sigma_1, m_time * sigma_1 + c_time, "Time FF (t>0) (Design)", color="red", linestyle="--"),
+        line(sigma_1, sigma_1 / lower["ff_p"], f"$ff_p = {lower['ff_p']:.2f}$ (Lower Bound)", color="green"),
+        points([lower["sigma_1_crit_kpa"]], [lower["sigma_c_crit_kpa"]], f"Lower Bound $\\sigma_{{c,crit}} = {lower['sigma_c_crit_kpa']:.1f}$ kPa", color="green", marker="o"),
+        vline(upper["sigma_1_crit_kpa"], f"Upper Bound $\\sigma_{{1,crit}} = {upper['sigma_1_crit_kpa']:.1f}$ kPa", color="purple", linestyle="dashed"),
+        points([upper["sigma_1_crit_kpa"]], [upper["sigma_c_crit_kpa"]], f"Upper Bound $\\sigma_{{c,crit}} = {upper['sigma_c_crit_kpa']:.1f}$ kPa", color="m", marker="P", markersize=8),
+    ]
+    return figure_spec(f"Funnel-Flow Ratholing for {inputs['solid_name']}", "Consolidation Stress ($\\sigma_1$) [kPa]", "Unconfined Yield Strength ($\\sigma_c$) [kPa]", series)
+
+
+# --- Report Content ---
+def summary_rows(inputs):
+    _, _, (m_inst, c_inst), (m_time, c_time), _ = build_flow_functions(inputs)
+    return [
+        ("Solid", f"{inputs['solid_name']} on {inputs['wall_material']}"),
+        ("Bulk density ρb", f"{inputs['gamma']:g} kg/m³"),
+        ("Effective angle of internal friction φe", f"{inputs['delta']:g}°"),
+        ("Avg. wall friction angle φx", f"{inputs['phi_prime_calc']:.1f}°"),
+        ("Instantaneous FF (t=0)", f"σc = {m_inst:.3f}·σ1 + {c_inst:.2f} kPa"),
+        ("Time FF (t>0)", f"σc = {m_time:.3f}·σ1 + {c_time:.2f} kPa"),
+        ("Flow pattern / hopper", f"{inputs['flow_pattern']}, {inputs['hopper_shape']}"),
+        ("Silo D / fill height h_f", f"{inputs['D_silo']:g} m / {inputs['h_f']:g} m"),
+        ("Janssen K", f"{inputs['K_janssen']:g}"),
+    ]
+
+def result_rows(inputs, results):
+    if inputs["flow_pattern"] == "Mass-Flow":
+        mass_flow = results["mass_flow"]
+        return [
+            ("Hopper angle Θ (from vertical)", f"≤ {inputs['theta_prime_manual']:.1f}°"),
+            ("Flow factor ff", f"{inputs['ff_manual']:.2f}"),
+            ("σ1,crit / σc,crit", f"{mass_flow['sigma_1_crit_kpa']:.2f} / {mass_flow['sigma_c_crit_kpa']:.2f} kPa"),
+            ("Arching function H(Θ)", f"{mass_flow['H_theta']:.3f}"),
+            ("Minimum outlet B_min = H(Θ)·σc,crit/(ρb·g)", f"{mass_flow['B_min']:.3f} m"),
+        ]
+    if inputs["flow_pattern"] == "Expanded-Flow":
+        mass_flow, expanded = results["mass_flow"], results["expanded"]
+        return [
+            ("Lower hopper angle Θ (from vertical)", f"≤ {inputs['theta_prime_manual']:.1f}°"),
+            ("Flow factor ff", f"{inputs['ff_manual']:.2f}"),
+            ("σ1,crit / σc,crit at the outlet", f"{mass_flow['sigma_1_crit_kpa']:.2f} / {mass_flow['sigma_c_crit_kpa']:.2f} kPa"),
+            ("Rathole dimension, lower bound (emptying)", f"{results['lower']['D_crit']:.3f} m"),
+            ("Rathole dimension, upper bound (filling, Janssen)", f"{results['upper']['D_crit']:.3f} m"),
+            ("Mass-flow hopper height", f"{expanded['h_hopper']:.3f} m"),
+            ("Top opening fits into the bin (D)", "yes" if expanded["fits"] else f"no, D = {inputs['D_silo']:g} m: use mass flow"),
+            ("Outlet B_min / hopper top opening D_top", f"{mass_flow['B_min']:.3f} m / {expanded['D_top']:.3f} m"),
+        ]
+    rows = [
+        ("Max. hopper angle Θcd for complete clearance", f"≤ {65.0 - inputs['phi_prime_calc']:.1f}°"),
+        ("Rathole dimension, lower bound (emptying)", f"{results['lower']['D_crit']:.3f} m"),
+        ("Rathole dimension, upper bound (filling, Janssen)", f"{results['upper']['D_crit']:.3f} m"),
+    ]
+    if "doming" in results:
+        rows.append(("No-doming slot width b_crit", f"{results['doming']['B_crit']:.3f} m"))
+    rows.append(("Controlling outlet dimension", f"{results['final_crit_dim']:.3f} m"))
+    return rows
+
+def case_report(inputs):
+    """Report content of one case: summary, results and figure specs (or the error)."""
+    try:
+        results = run_design(inputs)
+        figures = [wyl_figure(inputs), flow_function_figure(inputs), design_figure(inputs, results)]
+        return {"summary": summary_rows(inputs), "results": result_rows(inputs, results), "figures": figures, "error": None}
+    except (KeyError, ValueError) as e:
+        return {"summary": [], "results": [], "figures": [], "error": str(e)}
+
+def case_title(inputs, index):
+    return f"{index + 1:03d} {inputs.get('solid_name', 'Case')} on {inputs.get('wall_material', '')}".strip()
+
+def case_filename(title):
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", title).strip("_")
+
+
+# --- Output ---
+REPORT_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{{ title }}</title>
+<style>
+body { font-family: sans-serif; max-width: 60em; margin: 2em auto; }
+table { border-collapse: collapse; margin-bottom: 1.5em; }
+td, th { border: 1px solid #bbb; padding: 0.3em 0.8em; text-align: left; }
+img { max-width: 48%; margin: 0.5%; border: 1px solid #ddd; }
+.error { color: #b00; }
+</style></head><body>
+<h1>{{ title }}</h1>
+{% if error %}<p class="error">Design could not be calculated: {{ error }}</p>{% endif %}
+{% if summary %}<h2>Inputs</h2><table>{% for label, value in summary %}<tr><th>{{ label }}</th><td>{{ value }}</td></tr>{% endfor %}</table>{% endif %}
+{% if results %}<h2>Results</h2><table>{% for label, value in results %}<tr><th>{{ label }}</th><td>{{ value }}</td></tr>{% endfor %}</table>{% endif %}
+{% if figures %}<h2>Plots</h2>{% for src in figures %}<img src="{{ src }}">{% endfor %}{% endif %}
+</body></html>
+"""
+
+INDEX_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>Design Reports</title>
+<style>body { font-family: sans-serif; margin: 2em; } td, th { border: 1px solid #bbb; padding: 0.3em 0.8em; } table { border-collapse: collapse; }</style>
+</head><body><h1>Design Reports ({{ rows|length }} cases)</h1>
+<table><tr><th>Case</th><th>Flow pattern</th><th>Result</th><th>PDF</th></tr>
+{% for row in rows %}<tr><td>{% if row.html %}<a href="{{ row.html }}">{{ row.title }}</a>{% else %}{{ row.title }}{% endif %}</td><td>{{ row.flow_pattern }}</td><td>{{ row.result }}</td><td>{% if row.pdf %}<a href="{{ row.pdf }}">PDF</a>{% endif %}</td></tr>{% endfor %}
+</table></body></html>
+"""
+
+_environment = Environment(autoescape=True)
+
+def write_html(path, title, report, images):
+    sources = ["data:image/png;base64," + base64.b64encode(image).decode() for image in images]
+    html = _environment.from_string(REPORT_TEMPLATE).render(title=title, figures=sources, **{k: report[k] for k in ("summary", "results", "error")})
+    with open(path, "w", encoding="utf-8") as f:
+        f.write(html)
+
+def write_pdf(path, title, report, images):
+    """One-page A4 PDF report: inputs and results as text, the plots below."""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    fig = plt.figure(figsize=(8.27, 11.69)) # A4
+    lines = [title, ""]
+    if report["error"]:
+        lines.append(f"Design could not be calculated: {report['error']}")
+    for heading, rows in (("Inputs", report["summary"]), ("Results", report["results"])):
+        if rows:
+            lines += [heading] + [f"    {label}: {value}" for label, value in rows] + [""]
+    fig.text(0.06, 0.97, "\n".join(lines), va="top", family="monospace", fontsize=7.5)
+    # Plots in a 2 x 2 grid on the lower part of the page
+    for i, image in enumerate(images[:4]):
+        ax = fig.add_axes([0.03 + 0.48 * (i % 2), 0.34 - 0.3 * (i // 2), 0.46, 0.3])
+        ax.imshow(plt.imread(io.BytesIO(image), format="png"), interpolation="none")
+        ax.axis("off")
+    fig.savefig(path, format="pdf")
+    plt.close(fig)
+
+def _write_case(job):
+    """Writes the reports of one case (runs in the worker processes)."""
+    out_dir, name, title, report, images, formats = job
+    if "html" in formats:
+        write_html(os.path.join(out_dir, f"{name}.html"), title, report, images)
+    if "pdf" in formats:
+        write_pdf(os.path.join(out_dir, f"{name}.pdf"), title, report, images)
+
+def _chunksize(n, workers):
+    return max(1, n // (4 * (workers or os.cpu_count() or 1)))
+
+def _pool_map(pool, function, items, workers):
+    if pool is None:
+        return [function(item) for item in items]
+    return list(pool.map(function, items, chunksize=_chunksize(len(items), workers)))
+
+def build_reports(cases, out_dir, formats=("html",), workers=None):
+    """
+    Writes one report per case (and formats) plus index.html to out_dir. The unique
+    figures, then the case reports, are produced in a pool of `workers` processes
+    (None: one per CPU; 1: in this process).
+    Figures already in the shared disk cache (SILO_CACHE_DIR) are not rendered again.
+    Returns the statistics: cases, figures referenced, figures rendered and seconds.
+    """
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        raise ValueError(f"Unknown report format(s) {sorted(unknown)}. Use {FORMATS}.")
+    start = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+
+    reports = [case_report(inputs) for inputs in cases]
+    specs = {}
+    for report in reports:
+        report["figure_keys"] = [figure_key(spec) for spec in report["figures"]]
+        specs.update(zip(report["figure_keys"], report["figures"]))
+
+    titles = [case_title(inputs, index) for index, inputs in enumerate(cases)]
+    names = [case_filename(title) for title in titles]
+    pool = ProcessPoolExecutor(max_workers=workers) if workers != 1 and len(cases) > 1 else None
+    try:
+        shared = disk_cache.default_cache()
+        disk_keys = {key: shared.key("figure", [spec, FIGURE_DPI]) for key, spec in specs.items()} if shared is not None else {}
+        images = {key: shared.get(disk_key) for key, disk_key in disk_keys.items()}
+        keys = [key for key in specs if images.get(key) is None]
+        images.update(zip(keys, _pool_map(pool, render_figure, [specs[key] for key in keys], workers)))
+        if shared is not None:
+            for key in keys:
+                shared.put(disk_keys[key], images[key])
+        jobs = [
+            (out_dir, name, title, {k: report[k] for k in ("summary", "results", "error")}, [images[key] for key in report["figure_keys"]], tuple(formats))
+            for name, title, report in zip(names, titles, reports)
+        ]
+        _pool_map(pool, _write_case, jobs, workers)
+    finally:
+        if pool is not None:
+            pool.shutdown()
+
+    index_rows = [{
+        "title": title,
+        "html": f"{name}.html" if "html" in formats else None,
+        "pdf": f"{name}.pdf" if "pdf" in formats else None,
+        "flow_pattern": inputs.get("flow_pattern", ""),
+        "result": report["error"] or report["results"][-1][1],
+    } for inputs, report, title, name in zip(cases, reports, titles, names)]
+    html = _environment.from_string(INDEX_TEMPLATE).render(rows=index_rows)
+    with open(os.path.join(out_dir, "index.html"), "w", encoding="utf-8") as f:
+        f.write(html)
+
+    return {
+        "cases": len(cases),
+        "figures": sum(len(report["figure_keys"]) for report in reports),
+        "figures_rendered": len(keys),
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write HTML/PDF design reports for a set of cases.")
+    parser.add_argument("cases", help="JSON file with a list of inputs dicts (or {'cases': [...]}), or a case library with --base")
+    parser.add_argument("--base", default=None, help="Base inputs (geometry, flow pattern) to build cases from a case library")
+    parser.add_argument("--time-level", default=None, help="Flow-function time level to design with (case library only, default: last)")
+    parser.add_argument("--out", default="reports", help="Output directory (default: reports)")
+    parser.add_argument("--format", default="html", help="Comma-separated formats: html, pdf")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes for figures and reports (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    with open(args.cases, "r") as f:
+        data = json.load(f)
+    try:
+        if args.base:
+            validate_library(data)
+            with open(args.base, "r") as f:
+                cases = library_cases(data, json.load(f), args.time_level)
+        else:
+            cases = data["cases"] if isinstance(data, dict) else data
+        stats = build_reports(cases, args.out, [fmt.strip() for fmt in args.format.split(",") if fmt.strip()], args.workers)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        return 1
+    print(f"{stats['cases']} reports written to '{args.out}' in {stats['seconds']:.1f} s ({stats['figures_rendered']} of {stats['figures']} figures rendered, the rest reused).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
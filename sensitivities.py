@@ -0,0 +1,193 @@
+import numpy as np
+
+from app_utils import f_phi_i_data, f_phi_i_func
+from design_calcs import (
+    g,
+    DOMING_FF,
+    DOMING_THETA,
+    build_flow_functions,
+    arching_function_H,
+    arching_function_dH,
+    janssen_sigma_v_max,
+)
+
+# --- Analytic Sensitivities ---
+# Closed-form derivatives of the design results with respect to the inputs, for
+# linear time flow functions σc = m·σ1 + c (kPa). With q = 1 - m·ff the critical
+# point of a flow factor line is σc,crit = c / q and σ1,crit = ff·σc,crit, so
+# every derivative follows from the values by the chain rule; no extra root
+# finding is needed. The Janssen bound uses σv = ρb·g·(1 - exp(-a·h_f)) / a with
+# a = 4·K·tan(φx) / D, and f(φi) is differentiated piecewise along the digitized
+# Fig. 10.19 data (φlin = φe). Angles are in degrees, so derivatives are per degree.
+# Each quantity is {"value": ..., "d": {input key: derivative}}, broadcast over arrays.
+
+SENSITIVITY_INPUTS = {
+    "gamma": "Bulk Density ρb [kg/m³]",
+    "delta": "Effective Angle of Internal Friction φe [°]",
+    "phi_prime_calc": "Wall Friction Angle φx [°]",
+    "theta_prime_manual": "Hopper Angle Θ [°]",
+    "ff_manual": "Flow Factor ff",
+    "K_janssen": "Janssen Stress Ratio K",
+    "h_f": "Filling Height h_f [m]",
+    "D_silo": "Silo Diameter/Width D [m]",
+    "m_time": "Time Flow Function Slope m",
+    "c_time": "Time Flow Function Intercept c [kPa]",
+}
+TORNADO_STEP = 0.1 # Relative input change shown in the tornado chart
+DEGREE = np.pi / 180
+
+_phi_i = np.asarray(f_phi_i_data["phi_i"], dtype=float)
+_f_slopes = np.diff(f_phi_i_data["f"]) / np.diff(_phi_i)
+
+
+def f_phi_i_slope(phi_lin):
+    """df(φi)/dφi (per degree) of the linearly interpolated/extrapolated Fig. 10.19 data."""
+    segment = np.clip(np.searchsorted(_phi_i, phi_lin, side="right") - 1, 0, len(_f_slopes) - 1)
+    return _f_slopes[segment]
+
+def critical_point_sensitivities(m_ff, c_ff, ff):
+    """
+    σ1,crit and σc,crit (kPa) of the line σ1/ff on σc = m·σ1 + c, with derivatives
+    with respect to m, c and ff. NaN where there is no non-negative intersection.
+    """
+    m_ff, c_ff, ff = (np.asarray(value, dtype=float) for value in (m_ff, c_ff, ff))
+    q = 1 - m_ff * ff
+    valid = (q > 0) & (c_ff >= 0)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        q = np.where(valid, q, np.nan)
+        sigma_c = c_ff / q
+        return {
+            "sigma_1_crit_kpa": {"value": ff * sigma_c, "d": {"m_time": c_ff * ff**2 / q**2, "c_time": ff / q, "ff": c_ff / q**2}},
+            "sigma_c_crit_kpa": {"value": sigma_c, "d": {"m_time": c_ff * ff / q**2, "c_time": 1 / q, "ff": c_ff * m_ff / q**2}},
+        }
+
+def outlet_sensitivity(factor, sigma_c, gamma):
+    """Dimension factor·σc·1000/(ρb·g) (m) with its derivatives through σc and ρb (factor held constant)."""
+    per_kpa = factor * 1000 / (gamma * g)
+    value = per_kpa * sigma_c["value"]
+    d = {key: per_kpa * derivative for key, derivative in sigma_c["d"].items()}
+    d["gamma"] = d.get("gamma", 0.0) - value / gamma
+    return {"value": value, "d": d}
+
+def mass_flow_sensitivities(m_ff, c_ff, ff, gamma, theta, hopper_shape):
+    """σ1,crit, σc,crit and B_min of the mass-flow design with derivatives."""
+    point = critical_point_sensitivities(m_ff, c_ff, ff)
+    for quantity in point.values():
+        quantity["d"]["ff_manual"] = quantity["d"].pop("ff")
+    B_min = outlet_sensitivity(arching_function_H(theta, hopper_shape), point["sigma_c_crit_kpa"], gamma)
+    B_min["d"]["theta_prime_manual"] = arching_function_dH(theta, hopper_shape) * 1000 / (gamma * g) * point["sigma_c_crit_kpa"]["value"]
+    return dict(point, B_min=B_min)
+
+def rathole_lower_sensitivities(m_ff, c_ff, gamma, delta):
+    """Lower-bound rathole dimension (ff_p critical point) with derivatives; ff_p depends on φe."""
+    delta = np.asarray(delta, dtype=float)
+    f_phi_i, df_phi_i = f_phi_i_func(delta), f_phi_i_slope(delta)
+    sin_phi = np.sin(np.radians(delta))
+    ratio = (1 + sin_phi) / (4 * sin_phi)
+    ff_p_raw = ratio * f_phi_i
+    clamped = ff_p_raw < 1.7 # Schulze 10.3.2.3
+    ff_p = np.where(clamped, 1.7, ff_p_raw)
+    dff_p = np.where(clamped, 0.0, -np.cos(np.radians(delta)) / (4 * sin_phi**2) * DEGREE * f_phi_i + ratio * df_phi_i)
+
+    point = critical_point_sensitivities(m_ff, c_ff, ff_p)
+    for quantity in point.values():
+        quantity["d"]["delta"] = quantity["d"].pop("ff") * dff_p
+    D_crit = outlet_sensitivity(f_phi_i, point["sigma_c_crit_kpa"], gamma)
+    D_crit["d"]["delta"] = D_crit["d"]["delta"] + df_phi_i * 1000 / (gamma * g) * point["sigma_c_crit_kpa"]["value"]
+    return dict(point, D_crit=D_crit, f_phi_i=f_phi_i, ff_p=ff_p)
+
+def rathole_upper_sensitivities(m_ff, c_ff, gamma, delta, phi_x, D_silo, h_f, K_janssen):
+    """Upper-bound (Janssen) rathole dimension with derivatives."""
+    gamma, phi_x, D_silo, h_f, K_janssen = (np.asarray(value, dtype=float) for value in (gamma, phi_x, D_silo, h_f, K_janssen))
+    tan_phi_x = np.tan(np.radians(phi_x))
+    a = 4 * K_janssen * tan_phi_x / D_silo
+    decay = np.exp(-a * h_f)
+    sigma_v = janssen_sigma_v_max(gamma, D_silo, h_f, K_janssen, phi_x)
+    dsigma_v_da = gamma * g * (a * h_f * decay - (1 - decay)) / a**2
+    dsigma_v = {
+        "gamma": sigma_v / gamma,
+        "h_f": gamma * g * decay,
+        "K_janssen": dsigma_v_da * a / K_janssen,
+        "phi_prime_calc": dsigma_v_da * a / (np.sin(np.radians(phi_x)) * np.cos(np.radians(phi_x))) * DEGREE,
+        "D_silo": -dsigma_v_da * a / D_silo,
+    }
+    sigma_1 = {"value": sigma_v / 1000, "d": {key: derivative / 1000 for key, derivative in dsigma_v.items()}}
+    sigma_c = {
+        "value": m_ff * sigma_1["value"] + c_ff,
+        "d": dict({key: m_ff * derivative for key, derivative in sigma_1["d"].items()}, m_time=sigma_1["value"], c_time=np.ones_like(sigma_v)),
+    }
+    f_phi_i = f_phi_i_func(delta)
+    D_crit = outlet_sensitivity(f_phi_i, sigma_c, gamma)
+    D_crit["d"]["delta"] = f_phi_i_slope(delta) * 1000 / (gamma * g) * sigma_c["value"]
+    return {"sigma_1_crit_kpa": sigma_1, "sigma_c_crit_kpa": sigma_c, "D_crit": D_crit}
+
+def doming_sensitivities(m_ff, c_ff, gamma):
+    """No-doming slot width (ff = 1.7, plane-flow H at DOMING_THETA) with derivatives."""
+    point = critical_point_sensitivities(m_ff, c_ff, DOMING_FF)
+    for quantity in point.values():
+        quantity["d"].pop("ff")
+    return dict(point, B_crit=outlet_sensitivity(arching_function_H(DOMING_THETA, "Plane-Flow (Slot)"), point["sigma_c_crit_kpa"], gamma))
+
+def rathole_bound_sensitivities(inputs, m_ff, c_ff):
+    """Lower and Janssen upper rathole results with derivatives."""
+    gamma = inputs["gamma"]
+    return {
+        "lower": rathole_lower_sensitivities(m_ff, c_ff, gamma, inputs["delta"]),
+        "upper": rathole_upper_sensitivities(m_ff, c_ff, gamma, inputs["delta"], inputs["phi_prime_calc"], inputs["D_silo"], inputs["h_f"], inputs["K_janssen"]),
+    }
+
+def design_sensitivities(inputs, time_line=None):
+    """
+    Sensitivities of one design (inputs dict as for run_design). Mass flow: σ1,crit,
+    σc,crit and B_min. Funnel flow: the lower and upper rathole results, doming for
+    slots, and the governing "final_crit_dim". Expanded flow: the mass-flow results
+    (B_min governs) and the rathole results that size the hopper's top opening.
+    "governing" names the controlling dimension and "input_values" holds the
+    inputs the derivatives refer to.
+    """
+    if time_line is None:
+        time_line = build_flow_functions(inputs)[3]
+    m_ff, c_ff = (float(value) for value in time_line)
+    gamma = inputs["gamma"]
+    if inputs["flow_pattern"] in ("Mass-Flow", "Expanded-Flow"):
+        results = mass_flow_sensitivities(m_ff, c_ff, inputs["ff_manual"], gamma, inputs["theta_prime_manual"], inputs["hopper_shape"])
+        if inputs["flow_pattern"] == "Expanded-Flow": # The outlet governs; the bounds size the hopper's top opening
+            results.update(rathole_bound_sensitivities(inputs, m_ff, c_ff))
+        results["governing"] = "B_min"
+        results["input_values"] = input_values(inputs, time_line, results["B_min"]["d"])
+        return results
+
+    results = rathole_bound_sensitivities(inputs, m_ff, c_ff)
+    candidates = [results["lower"]["D_crit"], results["upper"]["D_crit"]]
+    if inputs["hopper_shape"] == "Plane-Flow (Slot)":
+        results["doming"] = doming_sensitivities(m_ff, c_ff, gamma)
+        candidates.append(results["doming"]["B_crit"])
+    results["final_crit_dim"] = max(candidates, key=lambda quantity: quantity["value"])
+    results["governing"] = "final_crit_dim"
+    results["input_values"] = input_values(inputs, time_line, results["final_crit_dim"]["d"])
+    return results
+
+def input_values(inputs, time_line=None, keys=SENSITIVITY_INPUTS):
+    """Current values of the input `keys` (flow-function slope and intercept from the fit)."""
+    if time_line is None:
+        time_line = build_flow_functions(inputs)[3]
+    fitted = dict(zip(("m_time", "c_time"), (float(value) for value in time_line)))
+    return {key: fitted[key] if key in fitted else inputs[key] for key in keys}
+
+def governing_derivatives(sensitivities):
+    """Derivatives of the governing dimension as flat columns, e.g. {"dB_min/dgamma": ...}."""
+    name = sensitivities["governing"]
+    return {f"d{name}/d{key}": float(derivative) for key, derivative in sensitivities[name]["d"].items()}
+
+def tornado_rows(quantity, values, step=TORNADO_STEP):
+    """
+    Linearized change of a quantity for a ±step relative change of each input,
+    largest first: (input key, change for -step, change for +step). Inputs without
+    effect are left out.
+    """
+    rows = []
+    for key, derivative in quantity["d"].items():
+        change = float(derivative) * step * float(values.get(key, 0.0))
+        if np.isfinite(change) and change != 0:
+            rows.append((key, -change, change))
+    return sorted(rows, key=lambda row: abs(row[2]), reverse=True)
@@ -0,0 +1,310 @@
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import weakref
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from case_store import WYL_X_COL, WYL_Y_COL
+from design_calcs import FF_X_COL, FF_Y_COL
+
+# --- Session Memory ---
+# Keeps the per-session state of the Streamlit pages small and bounded:
+#
+# - The test-point tables of the User Inputs page are held as NumPy structured arrays
+#   ("records", one float64 field per column) instead of DataFrames; a DataFrame is
+#   only built for the data editor while the page renders.
+# - Every page run registers its session (weakly, so closed sessions disappear) with
+#   its last activity time. session_rows()/key_rows() account the bytes held per
+#   session and per key for the Performance page.
+# - Sessions idle for longer than SILO_SESSION_IDLE_MIN minutes (0 disables) are
+#   offloaded: the inputs in OFFLOAD_KEYS are written to SILO_SESSIONS_DIR as JSON
+#   (the last_inputs.json format) and the session state is emptied. The session's
+#   next page run restores them, so the user only loses cached results. The sweep
+#   runs every SWEEP_INTERVAL seconds in one daemon thread per server process
+#   (started by the first page run), not in the page runs of other users.
+#
+# Offloads are kept out of the case store (case_store.py, case_library.json): that
+# file is one validated document of solids, walls and yield loci that every save
+# rewrites whole, while offloads are written by many sessions at once, hold
+# unsubmitted (possibly invalid) form values and are deleted after OFFLOAD_TTL_DAYS.
+# One file per session in SESSIONS_DIR needs no locking, and a restore only has to
+# read and delete its own file.
+
+SESSIONS_DIR = os.environ.get("SILO_SESSIONS_DIR", "sessions")
+IDLE_MINUTES = float(os.environ.get("SILO_SESSION_IDLE_MIN", "30"))
+SWEEP_INTERVAL = 60.0 # s between automatic idle-session sweeps
+OFFLOAD_TTL_DAYS = 7 # Offload files of sessions that never came back are deleted after this
+DATAFRAME_OVERHEAD = 2000 # B, block manager, index and column objects of a small DataFrame (tracemalloc)
+TABLE_COLUMNS = {
+    "wyl_data": (WYL_X_COL, WYL_Y_COL),
+    "ff_inst_data": (FF_X_COL, FF_Y_COL),
+    "ff_time_data": (FF_X_COL, FF_Y_COL),
+}
+OFFLOAD_KEYS = (
+    "solid_name", "wall_material", "gamma", "delta", "phi_prime_calc",
+    "wyl_input_method", "wyl_data", "mu", "tau_ad",
+    "ff_input_method", "ff_inst_data", "ff_time_data", "m_inst", "c_inst", "m_time", "c_time",
+    "flow_pattern", "hopper_shape", "h_f", "D_silo", "K_janssen", "theta_prime_manual", "ff_manual",
+    "inputs", "study_job",
+)
+
+
+# --- Compact Tables ---
+def to_records(rows, columns):
+    """
+    Test-point table as a structured float64 array with the given columns, from a
+    DataFrame (data editor), a list of row dicts (saved inputs) or records. Missing
+    or non-numeric cells become NaN.
+    """
+    dtype = _records_dtype(tuple(columns))
+    if getattr(rows, "dtype", None) is not None and rows.dtype.names is not None:
+        records = np.full(len(rows), np.nan, dtype=dtype)
+        for column in set(columns) & set(rows.dtype.names):
+            records[column] = rows[column]
+        return records
+    if hasattr(rows, "columns"): # DataFrame
+        records = np.full(len(rows), np.nan, dtype=dtype)
+        for column in columns:
+            if column in rows.columns:
+                records[column] = pd.to_numeric(rows[column], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+        return records
+    records = np.full(len(rows), np.nan, dtype=dtype)
+    for column in columns:
+        records[column] = [_number(row.get(column)) for row in rows]
+    return records
+
+@functools.lru_cache(maxsize=None)
+def _records_dtype(columns):
+    return np.dtype([(column, np.float64) for column in columns]) # Shared by all sessions
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+def to_frame(records):
+    """DataFrame of a records table, for st.data_editor."""
+    return pd.DataFrame(records)
+
+def to_rows(records):
+    """List of row dicts of a records table (the saved-inputs format)."""
+    names = records.dtype.names
+    return [dict(zip(names, row)) for row in records.tolist()]
+
+
+# --- Accounting ---
+def estimate_bytes(value, seen=None):
+    """Approximate memory held by a value, following containers and object attributes once."""
+    if seen is None:
+        seen = set()
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+    if isinstance(value, np.ndarray):
+        return sys.getsizeof(value) if value.base is None else value.nbytes
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum()) + DATAFRAME_OVERHEAD
+    if isinstance(value, (str, bytes, int, float, bool, type(None))):
+        return sys.getsizeof(value)
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        return size + sum(estimate_bytes(k, seen) + estimate_bytes(v, seen) for k, v in list(value.items()))
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(estimate_bytes(item, seen) for item in list(value))
+    if hasattr(value, "__dict__") and not isinstance(value, type):
+        return size + estimate_bytes(vars(value), seen)
+    return size
+
+def _items(state):
+    """User keys and values of a session state (SafeSessionState or a mapping)."""
+    mapping = state.filtered_state if hasattr(state, "filtered_state") else state
+    return list(mapping.items())
+
+def state_usage(state):
+    """Approximate bytes per key of one session state, largest first."""
+    seen = set()
+    usage = {str(key): estimate_bytes(value, seen) for key, value in _items(state)}
+    return dict(sorted(usage.items(), key=lambda item: item[1], reverse=True))
+
+
+# --- Offloading ---
+def _offload_path(session_id, directory):
+    return os.path.join(directory, f"{session_id}.json")
+
+def _serializable(key, value):
+    if key in TABLE_COLUMNS and getattr(value, "dtype", None) is not None:
+        return to_rows(value)
+    if isinstance(value, pd.DataFrame):
+        return value.to_dict("records")
+    return value
+
+def offload(session_id, state, directory=None):
+    """Writes the OFFLOAD_KEYS of a session to JSON and empties its state. Returns the bytes freed."""
+    directory = directory or SESSIONS_DIR
+    freed = sum(state_usage(state).values())
+    saved = {key: _serializable(key, value) for key, value in _items(state) if key in OFFLOAD_KEYS}
+    os.makedirs(directory, exist_ok=True)
+    path = _offload_path(session_id, directory)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(saved, f)
+    os.replace(tmp_path, path)
+    for key, _ in _items(state):
+        try:
+            del state[key]
+        except KeyError: # Removed by the session itself meanwhile
+            pass
+    return freed
+
+def restore(session_id, state, directory=None):
+    """Loads an offloaded session back into its state. Returns False if there was none."""
+    path = _offload_path(session_id, directory or SESSIONS_DIR)
+    try:
+        with open(path, "r") as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return False
+    for key, value in saved.items():
+        if key not in state: # Values set by this run win
+            state[key] = to_records(value, TABLE_COLUMNS[key]) if key in TABLE_COLUMNS else value
+    os.remove(path)
+    return True
+
+def remove_stale_offloads(directory=None, ttl_days=OFFLOAD_TTL_DAYS):
+    directory = directory or SESSIONS_DIR
+    cutoff = time.time() - ttl_days * 86400
+    for name in os.listdir(directory) if os.path.isdir(directory) else []:
+        path = os.path.join(directory, name)
+        try:
+            if os.path.getmtime(path) < cutoff:
+                os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+# --- Session Registry ---
+class SessionRegistry:
+    """Live sessions of this server process with their last activity (states held weakly)."""
+
+    def __init__(self):
+        self._sessions = {}
+        self._lock = threading.Lock()
+        self._sweep_lock = threading.Lock()
+        self.offloaded = 0
+        self.bytes_freed = 0
+        self.last_sweep = time.time()
+
+    def touch(self, session_id, state, page, now=None):
+        with self._lock:
+            # Keyed by the state too: headless test sessions all share one session id
+            self._sessions[(session_id, id(state))] = {"state": weakref.ref(state), "page": page, "last_seen": now or time.time()}
+
+    def live(self):
+        """(session id, state, page, last seen) of every session that still exists."""
+        with self._lock:
+            for key in [key for key, entry in self._sessions.items() if entry["state"]() is None]:
+                del self._sessions[key]
+            return [(key[0], entry["state"](), entry["page"], entry["last_seen"]) for key, entry in self._sessions.items()]
+
+    def evict_idle(self, max_idle_s, directory=None, now=None):
+        """Offloads sessions idle for more than max_idle_s. Returns (sessions, bytes freed)."""
+        now = now or time.time()
+        count = freed = 0
+        if not self._sweep_lock.acquire(blocking=False): # Another session is sweeping
+            return count, freed
+        try:
+            for session_id, state, _, last_seen in self.live():
+                if state is None or now - last_seen <= max_idle_s or not _items(state):
+                    continue
+                freed += offload(session_id, state, directory)
+                count += 1
+        finally:
+            self._sweep_lock.release()
+        with self._lock:
+            self.offloaded += count
+            self.bytes_freed += freed
+            self.last_sweep = now
+        return count, freed
+
+    def session_rows(self, now=None):
+        """One row per live session: id, page, idle time, total bytes and the largest key."""
+        now = now or time.time()
+        rows = []
+        for session_id, state, page, last_seen in self.live():
+            usage = state_usage(state) if state is not None else {}
+            rows.append({
+                "session": session_id[:8],
+                "page": page,
+                "idle_s": now - last_seen,
+                "keys": len(usage),
+                "bytes": sum(usage.values()),
+                "largest_key": next(iter(usage), ""),
+            })
+        return sorted(rows, key=lambda row: row["bytes"], reverse=True)
+
+    def key_rows(self):
+        """Bytes per state key summed over the live sessions, largest first."""
+        totals, counts = {}, {}
+        for _, state, _, _ in self.live():
+            for key, size in state_usage(state).items():
+                totals[key] = totals.get(key, 0) + size
+                counts[key] = counts.get(key, 0) + 1
+        rows = [{"key": key, "sessions": counts[key], "bytes": size, "mean_bytes": size / counts[key]} for key, size in totals.items()]
+        return sorted(rows, key=lambda row: row["bytes"], reverse=True)
+
+registry = SessionRegistry()
+
+
+# --- Idle-Session Sweeper ---
+def sweep_idle_sessions(sessions=None, directory=None, max_idle_s=None):
+    """Offloads the sessions idle for longer than max_idle_s (default IDLE_MINUTES) and deletes stale offload files."""
+    sessions = sessions or registry
+    count, freed = sessions.evict_idle(IDLE_MINUTES * 60 if max_idle_s is None else max_idle_s, directory)
+    remove_stale_offloads(directory)
+    return count, freed
+
+def start_sweeper(interval=SWEEP_INTERVAL, sessions=None, directory=None, max_idle_s=None):
+    """
+    Starts a daemon thread that calls sweep_idle_sessions every `interval` seconds.
+    Returns the thread and an event that stops it.
+    """
+    stop = threading.Event()
+
+    def run():
+        while not stop.wait(interval):
+            try:
+                sweep_idle_sessions(sessions, directory, max_idle_s)
+            except OSError: # Sessions directory not writable; retried on the next sweep
+                pass
+
+    thread = threading.Thread(target=run, name="session-sweeper", daemon=True)
+    thread.start()
+    return thread, stop
+
+@st.cache_resource(show_spinner=False)
+def shared_sweeper():
+    """The one sweeper thread of this server process."""
+    return start_sweeper()
+
+
+def track_session(page):
+    """
+    Called at the top of a page: registers the session, restores it if it was
+    offloaded, and starts the idle-session sweeper of this server process.
+    """
+    from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+    ctx = get_script_run_ctx()
+    if ctx is None: # Bare mode (e.g. benchmarks)
+        return
+    restore(ctx.session_id, ctx.session_state)
+    registry.touch(ctx.session_id, ctx.session_state, page)
+    if IDLE_MINUTES > 0:
+        shared_sweeper()
@@ -0,0 +1,104 @@
+import numpy as np
+from scipy.spatial import cKDTree
+
+from comparison_matrix import library_arrays, comparison_matrix
+from design_calcs import HOPPER_ANGLE_MARGIN
+
+# --- Similar Past Designs ---
+# Nearest-neighbour index over the cases of a case library: one point per
+# (solid, wall, time level) with a wall yield locus and a flow function. A case is
+# described by its property vector (ρb, φe, φx, WYL adhesion and the fitted time
+# flow function σc = m·σ1 + c), each standardized by its spread in the library so
+# that no unit dominates the distance. Every point stores the mass-flow design of
+# the comparison matrix (Θ = limit - margin, ff(Θ), σc,crit, B_min), so the closest
+# cases give a starting design before any calculation runs.
+# A KD-tree answers a k-nearest query in tens of microseconds for 10^6 cases.
+
+FEATURES = {
+    "gamma": "ρb [kg/m³]",
+    "delta": "φe [°]",
+    "phi_x": "φx [°]",
+    "c_wyl": "τad [kPa]",
+    "m_time": "FF slope m",
+    "c_time": "FF intercept c [kPa]",
+}
+RESULTS = {
+    "theta": "Design Θ [°]",
+    "ff": "ff",
+    "sigma_c_crit_kpa": "σc,crit [kPa]",
+    "B_min": "B_min [m]",
+}
+K_NEIGHBOURS = 5
+
+
+class SimilarityIndex:
+    """k-nearest lookup of cases by standardized property vectors."""
+
+    def __init__(self, features, results, codes, names):
+        """
+        features: (n, len(FEATURES)) array; results: {key in RESULTS: (n,) array};
+        codes: {"solid"/"wall"/"time_level": (n,) indices into names[...] lists}.
+        """
+        features = np.asarray(features, dtype=float)
+        self.features = features
+        self.results = {key: np.asarray(value, dtype=float) for key, value in results.items()}
+        self.codes = codes
+        self.names = names
+        self.center = features.mean(axis=0) if len(features) else np.zeros(len(FEATURES))
+        spread = features.std(axis=0) if len(features) else np.ones(len(FEATURES))
+        self.scale = np.where(spread > 1e-9 * np.maximum(np.abs(self.center), 1.0), spread, 1.0)
+        self.tree = cKDTree((features - self.center) / self.scale, balanced_tree=False) if len(features) else None
+
+    def __len__(self):
+        return len(self.features)
+
+    @classmethod
+    def from_library(cls, library, hopper_shape, margin=HOPPER_ANGLE_MARGIN):
+        """Index of every (solid, wall, time level) of a case library with complete properties."""
+        arrays = library_arrays(library)
+        matrix = comparison_matrix(library, hopper_shape, margin, arrays=arrays)
+        shape = (len(arrays["solids"]), len(arrays["walls"]), len(arrays["time_levels"]))
+        columns = {
+            "gamma": arrays["gamma"][:, None, None],
+            "delta": arrays["delta"][:, None, None],
+            "phi_x": arrays["phi_x"][:, :, None],
+            "c_wyl": arrays["c_wyl"][:, :, None],
+            "m_time": arrays["m_ff"][:, None, :],
+            "c_time": arrays["c_ff"][:, None, :],
+        }
+        features = np.stack([np.broadcast_to(columns[key], shape).ravel() for key in FEATURES], axis=1)
+        complete = np.isfinite(features).all(axis=1)
+        solid, wall, level = (index.ravel()[complete] for index in np.indices(shape))
+        return cls(
+            features[complete],
+            {key: np.broadcast_to(matrix[key], shape).ravel()[complete] for key in RESULTS},
+            {"solid": solid, "wall": wall, "time_level": level},
+            {"solid": arrays["solids"], "wall": arrays["walls"], "time_level": arrays["time_levels"]},
+        )
+
+    def query_indices(self, points, k=K_NEIGHBOURS):
+        """Distances and case indices of the k nearest cases of each point, (m, k) arrays."""
+        points = np.atleast_2d(np.asarray(points, dtype=float))
+        k = min(k, len(self))
+        if k == 0:
+            return np.zeros((len(points), 0)), np.zeros((len(points), 0), dtype=int)
+        distance, index = self.tree.query((points - self.center) / self.scale, k)
+        return distance.reshape(len(points), k), index.reshape(len(points), k)
+
+    def query(self, values, k=K_NEIGHBOURS):
+        """
+        The k cases closest to `values` ({key in FEATURES: value}), nearest first, as
+        rows with the names, the standardized distance, the properties and the design.
+        """
+        missing = [key for key in FEATURES if not np.isfinite(values.get(key, np.nan))]
+        if missing:
+            raise ValueError(f"Similar designs need finite values of {missing}.")
+        distance, index = self.query_indices([[values[key] for key in FEATURES]], k)
+        rows = []
+        for d, i in zip(distance[0], index[0]):
+            row = {name: self.names[name][self.codes[name][i]] for name in ("solid", "wall", "time_level")}
+            row["distance"] = float(d)
+            row.update({key: float(self.features[i, column]) for column, key in enumerate(FEATURES)})
+            row.update({key: float(self.results[key][i]) for key in RESULTS})
+            rows.append(row)
+        return rows
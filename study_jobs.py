@@ -0,0 +1,384 @@
+import asyncio
+import copy
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from design_calcs import FF_Y_COL
+from design_graph import DesignGraph
+from sensitivities import governing_derivatives
+
+# --- Design Studies (background jobs) ---
+# A study is a list of input dicts (same format as last_inputs.json) evaluated in a
+# process pool. Each chunk runs through one design_graph.DesignGraph, so consecutive
+# cases of a sweep only recompute the nodes downstream of the swept parameter. An asyncio loop on a background thread
+# hands out chunks of cases and writes progress and partial results to disk after
+# every chunk, so a study survives browser refreshes and can be resumed after a
+# server restart. Each result row also carries the derivatives of the governing
+# outlet dimension by every input (sensitivities.py), from the same graph.
+#
+# Several app processes (replicas) can share STUDIES_DIR. A running study records
+# its owner (host, pid and runner) and re-saves its job file at least every HEARTBEAT_S;
+# only studies whose job file is older than STALE_AFTER_S are taken over as
+# "interrupted". A study is cancelled from another process by setting it to
+# "cancelling"; the owner sees this at its next save and stops.
+
+STUDIES_DIR = os.environ.get("SILO_STUDIES_DIR", "studies")
+CHUNK_SIZE = 250 # Cases per worker task
+JOB_KINDS = ["sweep", "monte_carlo", "batch"]
+FINISHED_STATUSES = ["done", "cancelled", "failed"]
+ACTIVE_STATUSES = ["queued", "running", "cancelling"]
+HEARTBEAT_S = 10.0 # s between saves of a running study, even while all its chunks are in the workers
+STALE_AFTER_S = 60.0 # An active study not saved for this long was left by a stopped process
+
+# Inputs that can be swept or perturbed. "ff_time_strength" scales the time flow function strength.
+STUDY_PARAMETERS = {
+    "gamma": "Bulk Density (rho_b) [kg/m³]",
+    "delta": "Effective Angle of Internal Friction (phi_e) [°]",
+    "phi_prime_calc": "Wall Friction Angle (phi_x) [°]",
+    "ff_manual": "Flow Factor (ff)",
+    "theta_prime_manual": "Hopper Angle (Θ) [°]",
+    "ff_time_strength": "Time Flow Function Strength Factor [-]",
+    "h_f": "Filling Height (h_f) [m]",
+    "D_silo": "Silo Diameter/Width (D) [m]",
+    "K_janssen": "Janssen Stress Ratio (K)",
+}
+
+
+# --- Case Generation ---
+def set_case_value(case, key, value):
+    """Sets one study parameter on an input dict (in place)."""
+    if key == "ff_time_strength":
+        # Scale the time flow function strength (points or equation) by `value`
+        for row in case["ff_time_data"]:
+            if row.get(FF_Y_COL) is not None:
+                row[FF_Y_COL] = row[FF_Y_COL] * value
+        case["m_time"] = case["m_time"] * value
+        case["c_time"] = case["c_time"] * value
+    else:
+        case[key] = float(value)
+
+def make_sweep_cases(base, key, values):
+    """Returns one case per value of `key`, all other inputs taken from `base`."""
+    cases = []
+    for value in values:
+        case = copy.deepcopy(base)
+        set_case_value(case, key, value)
+        case["study_params"] = {key: float(value)}
+        cases.append(case)
+    return cases
+
+def make_monte_carlo_cases(base, relative_std, n, seed=0):
+    """
+    Returns n cases with each parameter in `relative_std` ({key: relative standard deviation})
+    multiplied by a normally distributed factor 1 + N(0, std), clipped at 0.05.
+    """
+    rng = np.random.default_rng(seed)
+    keys = list(relative_std)
+    factors = 1 + rng.standard_normal((n, len(keys))) * np.array([relative_std[key] for key in keys])
+    factors = np.clip(factors, 0.05, None)
+
+    cases = []
+    for row in factors:
+        case = copy.deepcopy(base)
+        params = {}
+        for key, factor in zip(keys, row):
+            if key == "ff_time_strength":
+                value = factor
+            else:
+                value = base[key] * factor
+            set_case_value(case, key, value)
+            params[key] = float(value)
+        case["study_params"] = params
+        cases.append(case)
+    return cases
+
+
+# --- Case Evaluation (runs in worker processes) ---
+def summarize_design(results):
+    """Flattens the design results (run_design() format) to the key outlet dimensions (m) and stresses (kPa)."""
+    if "mass_flow" in results:
+        mass_flow = results["mass_flow"]
+        row = {
+            "sigma_1_crit_kpa": mass_flow["sigma_1_crit_kpa"],
+            "sigma_c_crit_kpa": mass_flow["sigma_c_crit_kpa"],
+            "B_min": mass_flow["B_min"],
+        }
+        if "expanded" in results: # Expanded flow: the bin's rathole sizes the hopper's top opening
+            row.update(
+                D_crit_lower=results["lower"]["D_crit"],
+                D_crit_upper=results["upper"]["D_crit"],
+                D_top=results["expanded"]["D_top"],
+                h_hopper=results["expanded"]["h_hopper"],
+            )
+        return row
+    return {
+        "D_crit_lower": results["lower"]["D_crit"],
+        "D_crit_upper": results["upper"]["D_crit"],
+        "B_crit": results["doming"]["B_crit"] if "doming" in results else 0.0,
+        "final_crit_dim": results["final_crit_dim"],
+    }
+
+def evaluate_cases(cases, start_index=0):
+    """Runs the design for each case. Returns one result row per case; failures carry an 'error'."""
+    graph = DesignGraph()
+    rows = []
+    for offset, case in enumerate(cases):
+        row = {"index": start_index + offset}
+        row.update(case.get("study_params", {}))
+        try:
+            row.update(summarize_design(graph.evaluate(case)))
+            row.update(governing_derivatives(graph.get("sensitivities")))
+        except Exception as e:
+            row["error"] = str(e)
+        rows.append(row)
+    return rows
+
+
+# --- Job Storage ---
+def job_dir(job_id, studies_dir=STUDIES_DIR):
+    return os.path.join(studies_dir, job_id)
+
+def write_json_atomic(path, data):
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(data, f, indent=4)
+    os.replace(tmp_path, path)
+
+def load_job(job_id, studies_dir=STUDIES_DIR):
+    with open(os.path.join(job_dir(job_id, studies_dir), "job.json"), "r") as f:
+        return json.load(f)
+
+def save_job(job, studies_dir=STUDIES_DIR):
+    job["updated"] = time.time()
+    write_json_atomic(os.path.join(job_dir(job["id"], studies_dir), "job.json"), job)
+
+def list_jobs(studies_dir=STUDIES_DIR):
+    """Returns all stored jobs, newest first."""
+    if not os.path.isdir(studies_dir):
+        return []
+    jobs = []
+    for job_id in os.listdir(studies_dir):
+        try:
+            jobs.append(load_job(job_id, studies_dir))
+        except (OSError, ValueError):
+            continue
+    return sorted(jobs, key=lambda job: job["created"], reverse=True)
+
+def load_results(job_id, studies_dir=STUDIES_DIR):
+    """Returns the result rows written so far, one per case index, sorted by index."""
+    path = os.path.join(job_dir(job_id, studies_dir), "results.jsonl")
+    rows_by_index = {}
+    try:
+        with open(path, "r") as f:
+            for line in f:
+                try:
+                    row = json.loads(line)
+                except ValueError:
+                    break # Partially written last line
+                rows_by_index[row["index"]] = row
+    except FileNotFoundError:
+        pass
+    return [rows_by_index[index] for index in sorted(rows_by_index)]
+
+def is_stale(job, now=None):
+    """True for an active job whose owner stopped saving it (e.g. a server process that was restarted)."""
+    return job["status"] in ACTIVE_STATUSES and (now or time.time()) - job.get("updated", 0.0) > STALE_AFTER_S
+
+def load_cases(job_id, studies_dir=STUDIES_DIR):
+    with open(os.path.join(job_dir(job_id, studies_dir), "cases.json"), "r") as f:
+        return json.load(f)
+
+
+# --- Job Runner ---
+class StudyRunner:
+    """
+    Runs studies on an asyncio event loop in a background thread, with the case
+    evaluation in a process pool. One runner is shared by all sessions of the app.
+    """
+
+    def __init__(self, studies_dir=STUDIES_DIR, max_workers=None, chunk_size=CHUNK_SIZE):
+        self.studies_dir = studies_dir
+        self.chunk_size = chunk_size
+        self.max_workers = max_workers or max(1, min(4, (os.cpu_count() or 2) - 1))
+        self.owner = {"host": socket.gethostname(), "pid": os.getpid(), "runner": uuid.uuid4().hex[:8]}
+        os.makedirs(studies_dir, exist_ok=True)
+        self.recover_stale_jobs()
+
+        self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+        self._loop = asyncio.new_event_loop()
+        self._tasks = {} # job_id -> asyncio.Task (only touched on the loop thread)
+        self._thread = threading.Thread(target=self._loop.run_forever, name="study-runner", daemon=True)
+        self._thread.start()
+
+    def recover_stale_jobs(self, now=None):
+        """
+        Marks the active jobs of stopped processes 'interrupted', so they can be
+        resumed. Jobs of live runners (in this or other processes) are left alone.
+        Returns the ids of the recovered jobs.
+        """
+        recovered = []
+        for job in list_jobs(self.studies_dir):
+            if is_stale(job, now):
+                job["status"] = "interrupted"
+                save_job(job, self.studies_dir)
+                recovered.append(job["id"])
+        return recovered
+
+    def submit(self, kind, title, cases, params=None):
+        """Stores a new job and starts it. Returns the job id."""
+        if kind not in JOB_KINDS:
+            raise ValueError(f"Unknown study kind '{kind}'. Use one of {JOB_KINDS}.")
+        if not cases:
+            raise ValueError("A study needs at least one case.")
+
+        job_id = time.strftime("%Y%m%d-%H%M%S-") + uuid.uuid4().hex[:6]
+        os.makedirs(job_dir(job_id, self.studies_dir))
+        write_json_atomic(os.path.join(job_dir(job_id, self.studies_dir), "cases.json"), cases)
+        job = {
+            "id": job_id,
+            "kind": kind,
+            "title": title,
+            "params": params or {},
+            "status": "queued",
+            "total": len(cases),
+            "done": 0,
+            "failed_cases": 0,
+            "error": None,
+            "created": time.time(),
+            "owner": self.owner,
+        }
+        save_job(job, self.studies_dir)
+        self._start(job_id)
+        return job_id
+
+    def resume(self, job_id):
+        """Restarts an interrupted or cancelled job, skipping the cases already evaluated."""
+        job = load_job(job_id, self.studies_dir)
+        if job["status"] not in ("interrupted", "cancelled", "failed"):
+            raise ValueError(f"Study '{job_id}' is {job['status']} and cannot be resumed.")
+        job["status"] = "queued"
+        job["error"] = None
+        job["owner"] = self.owner
+        save_job(job, self.studies_dir)
+        self._start(job_id)
+
+    def cancel(self, job_id):
+        """Requests cancellation. Chunks already running in a worker finish but are discarded."""
+        job = load_job(job_id, self.studies_dir)
+        if job["status"] in FINISHED_STATUSES:
+            return
+        job["status"] = "cancelling"
+        save_job(job, self.studies_dir)
+        self._loop.call_soon_threadsafe(self._cancel_task, job_id)
+
+    def wait(self, job_id, timeout=None):
+        """Blocks until the job finishes (for scripts and tests). Returns the job dict."""
+        start = time.monotonic()
+        while True:
+            job = load_job(job_id, self.studies_dir)
+            if job["status"] in FINISHED_STATUSES or job["status"] == "interrupted":
+                return job
+            if timeout is not None and time.monotonic() - start > timeout:
+                raise TimeoutError(f"Study '{job_id}' did not finish within {timeout} s.")
+            time.sleep(0.05)
+
+    def shutdown(self):
+        for job_id in list(self._tasks):
+            self.cancel(job_id)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=5)
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def _start(self, job_id):
+        self._loop.call_soon_threadsafe(self._create_task, job_id)
+
+    def _create_task(self, job_id):
+        task = self._loop.create_task(self._run_job(job_id))
+        task.add_done_callback(lambda task: self._task_done(job_id, task))
+        self._tasks[job_id] = task
+
+    def _task_done(self, job_id, task):
+        """A task cancelled before it started never ran _run_job's cleanup."""
+        if self._tasks.get(job_id) is task:
+            del self._tasks[job_id]
+        if task.cancelled():
+            job = load_job(job_id, self.studies_dir)
+            job["status"] = "cancelled"
+            save_job(job, self.studies_dir)
+
+    def _cancel_task(self, job_id):
+        task = self._tasks.get(job_id)
+        if task is not None:
+            task.cancel()
+            return
+        job = load_job(job_id, self.studies_dir)
+        if job.get("owner", self.owner) != self.owner and not is_stale(job):
+            return # Running in another process, which stops at its next save
+        job["status"] = "cancelled"
+        save_job(job, self.studies_dir)
+
+    def _save_progress(self, job):
+        """Saves a running job (the heartbeat), unless another process asked to cancel it."""
+        if load_job(job["id"], self.studies_dir)["status"] in ("cancelling", "cancelled"):
+            self._cancel_task(job["id"])
+            return
+        save_job(job, self.studies_dir)
+
+    async def _heartbeat(self, job):
+        while True:
+            await asyncio.sleep(HEARTBEAT_S)
+            self._save_progress(job)
+
+    async def _run_job(self, job_id):
+        job = load_job(job_id, self.studies_dir)
+        results_path = os.path.join(job_dir(job_id, self.studies_dir), "results.jsonl")
+        heartbeat = None
+        try:
+            cases = load_cases(job_id, self.studies_dir)
+            done_rows = {row["index"]: row for row in load_results(job_id, self.studies_dir)}
+            chunks, failed = [], set()
+            job["done"] = 0
+            for start in range(0, len(cases), self.chunk_size):
+                chunk_indices = range(start, min(start + self.chunk_size, len(cases)))
+                if all(index in done_rows for index in chunk_indices):
+                    job["done"] += len(chunk_indices)
+                    failed.update(index for index in chunk_indices if done_rows[index].get("error"))
+                else: # Partly written chunks are evaluated again
+                    chunks.append((start, cases[start:start + self.chunk_size]))
+            job["failed_cases"] = len(failed)
+            job["status"] = "running"
+            job["owner"] = self.owner
+            save_job(job, self.studies_dir)
+            heartbeat = self._loop.create_task(self._heartbeat(job))
+
+            slots = asyncio.Semaphore(self.max_workers * 2)
+
+            async def run_chunk(start, chunk):
+                async with slots:
+                    rows = await self._loop.run_in_executor(self._pool, evaluate_cases, chunk, start)
+                with open(results_path, "a") as f:
+                    f.write("".join(json.dumps(row) + "\n" for row in rows))
+                job["done"] += len(rows)
+                failed.update(row["index"] for row in rows if row.get("error"))
+                job["failed_cases"] = len(failed)
+                self._save_progress(job)
+
+            await asyncio.gather(*(run_chunk(start, chunk) for start, chunk in chunks))
+            job["status"] = "done"
+        except asyncio.CancelledError:
+            job["status"] = "cancelled"
+        except Exception as e:
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            if heartbeat is not None and not self._loop.is_closed(): # Closed: the runner was shut down mid-job
+                heartbeat.cancel()
+            save_job(job, self.studies_dir)
+            self._tasks.pop(job_id, None)
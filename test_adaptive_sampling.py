@@ -0,0 +1,48 @@
+import numpy as np
+
+from test_utils import assert_close, load_inputs
+from design_calcs import run_design
+from adaptive_sampling import MASS_FLOW, FUNNEL_FLOW, evaluate_samples, adaptive_sample
+
+
+def test_samples_match_run_design():
+    inputs = dict(load_inputs(), ff_input_method="Define by Equation")
+    samples = {"theta_prime_manual": np.array([15.0, 18.0, 30.0]), "ff_manual": np.array([1.2, 1.5, 1.5]), "c_time": np.array([0.8, 1.6, 0.8])}
+    results = evaluate_samples(inputs, samples)
+    assert results["region"].tolist() == [MASS_FLOW, MASS_FLOW, FUNNEL_FLOW]
+    for index in range(2):
+        case = dict(inputs, theta_prime_manual=samples["theta_prime_manual"][index], ff_manual=samples["ff_manual"][index], c_time=samples["c_time"][index])
+        mass_flow = run_design(case)["mass_flow"]
+        assert_close("σ1,crit (find_positive_intersection)", mass_flow["sigma_1_crit_kpa"], results["sigma_1_crit_kpa"][index], tolerance=1e-6)
+        assert_close("B_min", mass_flow["B_min"], results["B_min"][index], tolerance=1e-6)
+    assert np.isnan(results["B_min"][2])
+    print("PASS: sampled results match run_design")
+
+
+def test_adaptive_boundary_resolution():
+    inputs = load_inputs()
+    bounds = {"theta_prime_manual": (1.0, 40.0), "phi_prime_calc": (5.0, 40.0)}
+    result = adaptive_sample(inputs, bounds, seed=3, resolution=1 / 128)
+    assert result["converged"]
+    assert result["boundary_error"] <= 1 / 128
+    # An order of magnitude fewer evaluations than the 129 x 129 grid
+    assert result["evaluations"] * 10 < result["grid_evaluations"], result["evaluations"]
+
+    rng = np.random.default_rng(1)
+    points = np.column_stack([rng.uniform(*bounds[name], 4000) for name in bounds])
+    exact = evaluate_samples(inputs, {name: points[:, column] for column, name in enumerate(bounds)})
+    region, B_min = result["interpolant"](points)
+    assert np.mean(region == exact["region"]) > 0.98
+    both = (region == MASS_FLOW) & (exact["region"] == MASS_FLOW)
+    assert np.median(np.abs(B_min[both] - exact["B_min"][both])) < 0.01
+
+    # Reproducible for a seed
+    again = adaptive_sample(inputs, bounds, seed=3, resolution=1 / 128)
+    assert again["table"].equals(result["table"])
+    print("PASS: adaptive sampling resolves the mass-flow boundary")
+
+
+if __name__ == "__main__":
+    test_samples_match_run_design()
+    test_adaptive_boundary_resolution()
+    print("All adaptive sampling tests passed.")
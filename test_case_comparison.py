@@ -0,0 +1,105 @@
+import json
+import os
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import disk_cache
+from test_utils import assert_close
+from bench_utils import make_library
+from case_comparison import (
+    RESULT_ROWS,
+    saved_cases,
+    design_cases,
+    result_table,
+    smallest_per_flow_pattern,
+    input_differences,
+    design_point_overlay,
+)
+from design_calcs import run_design
+from study_jobs import save_job, write_json_atomic
+
+EXAMPLE_FILE = "last_inputs.json"
+
+
+def load_example(**overrides):
+    with open(EXAMPLE_FILE, "r") as f:
+        return dict(json.load(f), **overrides)
+
+
+def test_saved_cases():
+    base = load_example(flow_pattern="Mass-Flow")
+    library = make_library(n_solids=3, n_walls=2)
+    with tempfile.TemporaryDirectory() as studies_dir:
+        os.makedirs(os.path.join(studies_dir, "job1"))
+        save_job({"id": "job1", "kind": "batch", "title": "Liners", "created": 1.0}, studies_dir)
+        write_json_atomic(os.path.join(studies_dir, "job1", "cases.json"), [base, load_example(flow_pattern="Funnel-Flow")])
+        cases = saved_cases(base, library, studies_dir)
+
+    labels = list(cases)
+    assert labels[0].startswith("Submitted: ") and cases[labels[0]] is base
+    library_labels = [label for label in labels if label.startswith("Library: ")]
+    assert len(library_labels) == 3 * 2 * 3 # Solids x walls x time levels
+    assert all(cases[label]["time_level"] in label for label in library_labels)
+    study_labels = [label for label in labels if label.startswith("Study Liners #")]
+    assert len(study_labels) == 2 and cases[study_labels[1]]["flow_pattern"] == "Funnel-Flow"
+    print("PASS: submitted, library and batch study cases")
+
+
+def test_concurrent_evaluation_and_cache():
+    cases = [
+        load_example(flow_pattern="Mass-Flow"),
+        load_example(flow_pattern="Funnel-Flow"),
+        load_example(flow_pattern="Expanded-Flow"),
+        load_example(flow_pattern="Mass-Flow", gamma=1800.0),
+        load_example(flow_pattern="Funnel-Flow", K_janssen=0.0),
+    ]
+    with tempfile.TemporaryDirectory() as directory:
+        disk_cache.set_cache_dir(directory)
+        try:
+            with ProcessPoolExecutor(max_workers=2) as pool:
+                evaluations = design_cases(cases, pool)
+            again = design_cases(cases)
+        finally:
+            disk_cache.set_cache_dir(None)
+
+    for case, evaluation in zip(cases[:4], evaluations):
+        assert evaluation["error"] is None and evaluation["results"] == run_design(case)
+    assert "K" in evaluations[4]["error"]
+    assert not any(evaluation["cached"] for evaluation in evaluations)
+    # Designed cases come from the disk cache, the invalid one is evaluated again
+    assert [evaluation["cached"] for evaluation in again] == [True] * 4 + [False]
+    print("PASS: worker pool evaluation and disk cache")
+
+    labels = [f"Case {i}" for i in range(len(cases))]
+    table = result_table(labels, cases, evaluations)
+    governing = table.loc[RESULT_ROWS["governing"]]
+    assert_close("mass-flow required outlet", run_design(cases[0])["mass_flow"]["B_min"], governing["Case 0"], tolerance=1e-12)
+    assert_close("funnel-flow required outlet", run_design(cases[1])["final_crit_dim"], governing["Case 1"], tolerance=1e-12)
+    assert_close("expanded-flow top opening", run_design(cases[2])["expanded"]["D_top"], governing["Case 2"], tolerance=1e-12)
+    assert np.isnan(table.loc[RESULT_ROWS["D_crit_lower"], "Case 0"]) and table["Case 4"].isna().all()
+    assert RESULT_ROWS["B_crit"] not in table.index # No slot in the example
+    # Only cases of the same flow pattern are ranked: the two mass-flow cases
+    assert smallest_per_flow_pattern(cases, governing.to_numpy()) == [governing["Case 0"] < governing["Case 3"], False, False, governing["Case 3"] < governing["Case 0"], False]
+    spec = design_point_overlay(labels, cases, evaluations)
+    assert len([series for series in spec["series"] if series["kind"] == "line"]) == 4
+    print("PASS: aligned result table")
+
+
+def test_input_differences():
+    cases = [load_example(), load_example(gamma=1800.0), load_example(D_silo=3.0 + 1e-13)]
+    table, differs = input_differences(["A", "B", "C"], cases)
+    assert list(differs[differs].index) == ["Bulk density ρb [kg/m³]"]
+    assert list(table.columns) == ["A", "B", "C"] and table.loc["Bulk density ρb [kg/m³]", "B"] == "1800"
+
+    _, differs = input_differences(["A", "B"], [load_example(flow_pattern="Mass-Flow"), load_example(flow_pattern="Funnel-Flow")])
+    assert differs["Flow pattern"] and differs["Hopper angle Θ [°]"] and not differs["Time FF slope"]
+    print("PASS: highlighted input differences")
+
+
+if __name__ == "__main__":
+    test_saved_cases()
+    test_concurrent_evaluation_and_cache()
+    test_input_differences()
+    print("All case comparison tests passed.")
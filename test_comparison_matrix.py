@@ -0,0 +1,77 @@
+import json
+import math
+import os
+
+import numpy as np
+
+from test_utils import assert_close
+from case_store import INSTANTANEOUS, empty_library, add_case, add_solid, attach_wall_yield_locus, load_library, save_library
+from comparison_matrix import comparison_matrix, ranked_table
+from design_calcs import mass_flow_limit_angle, flow_factor_approx, mass_flow_outlet_kernel, HOPPER_ANGLE_MARGIN
+
+
+def example_library():
+    with open("last_inputs.json", "r") as f:
+        inputs = json.load(f)
+    library = empty_library()
+    add_case(library, inputs, time_label="Time")
+    solid = inputs["solid_name"]
+    # The same solid on a second, smoother wall, and a second solid without that wall
+    attach_wall_yield_locus(library, solid, "UHMW-PE", [
+        {"Normal Stress (kPa)": 4.0, "Shear Stress (kPa)": 4.0 * math.tan(math.radians(15))},
+        {"Normal Stress (kPa)": 12.0, "Shear Stress (kPa)": 12.0 * math.tan(math.radians(17))},
+    ])
+    add_solid(library, "Limestone", 1400.0, 45.0, library["solids"][solid]["flow_functions"])
+    return library, solid
+
+
+def test_matrix_matches_scalar_kernels():
+    library, solid = example_library()
+    matrix = comparison_matrix(library, "Conical")
+    assert matrix["B_min"].shape == (2, 2, 2)
+    assert matrix["time_levels"][0] == INSTANTANEOUS
+
+    i, j, k = matrix["solids"].index(solid), matrix["walls"].index("UHMW-PE"), matrix["time_levels"].index("Time")
+    delta, gamma = library["solids"][solid]["delta"], library["solids"][solid]["gamma"]
+    assert_close("phi_x from WYL points", 16.0, matrix["phi_x"][i, j, k], tolerance=1e-9)
+    theta = float(mass_flow_limit_angle(delta, 16.0, "Conical")) - HOPPER_ANGLE_MARGIN
+    ff = float(flow_factor_approx(theta, delta, 16.0, "Conical"))
+    rows = library["solids"][solid]["flow_functions"]["Time"]
+    x = [row["Consol. Stress σ₁ (kPa)"] for row in rows]
+    y = [row["Strength σc (kPa)"] for row in rows]
+    m, c = np.polyfit(x, y, 1)
+    expected = mass_flow_outlet_kernel(m, c, ff, gamma, theta, "Conical")["B_min"]
+    assert_close("design hopper angle", theta, matrix["theta"][i, j, k], tolerance=1e-9)
+    assert_close("B_min", float(expected), matrix["B_min"][i, j, k], tolerance=1e-9)
+    print("PASS: matrix entry matches the scalar kernels")
+
+
+def test_missing_wall_yield_locus_is_nan():
+    library, _ = example_library()
+    matrix = comparison_matrix(library, "Plane-Flow (Slot)")
+    i = matrix["solids"].index("Limestone")
+    assert np.all(np.isnan(matrix["B_min"][i]))
+    table = ranked_table(matrix)
+    assert all(row["Solid"] != "Limestone" for row in table)
+    values = [row["B_min [m]"] for row in table]
+    assert values == sorted(values)
+    print("PASS: pairs without a wall yield locus are left out")
+
+
+def test_library_round_trip():
+    path = "test_case_library.json"
+    library, _ = example_library()
+    try:
+        save_library(library, path)
+        assert load_library(path) == library
+    finally:
+        if os.path.exists(path):
+            os.remove(path)
+    print("PASS: case library saved and loaded")
+
+
+if __name__ == "__main__":
+    test_matrix_matches_scalar_kernels()
+    test_missing_wall_yield_locus_is_nan()
+    test_library_round_trip()
+    print("All comparison matrix tests passed.")
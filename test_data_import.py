@@ -0,0 +1,80 @@
+import io
+
+import numpy as np
+import pandas as pd
+
+from test_utils import assert_close
+from case_store import WYL_X_COL, WYL_Y_COL
+from design_calcs import FF_X_COL, FF_Y_COL, get_valid_xy
+from data_import import import_test_data, import_summary
+
+
+def test_csv_cleaning_and_units():
+    # Semicolon separated, decimal commas, Pa: one empty, one negative, one repeated and one outlying point
+    lines = ["Consol. Stress sigma_1 (Pa);Unconfined Strength sigma_c (Pa)"]
+    lines += [f"{1000 * i};{400 * i + 1500}" for i in range(1, 9)]
+    lines += ["1000;1900", "2500,5;", "-1000;300", "4500;9000"]
+    table, report = import_test_data(io.StringIO("\n".join(lines)), "ff", filename="tester.csv")
+    assert list(table.columns) == [FF_X_COL, FF_Y_COL]
+    assert (report["rows"], report["invalid"], report["negative"], report["duplicates"], report["outliers"]) == (12, 1, 1, 1, 1)
+    assert_close("points kept", 8, report["points"])
+    assert_close("σ1 in kPa", 1.0, table[FF_X_COL].iloc[0])
+    m, c = np.polyfit(table[FF_X_COL], table[FF_Y_COL], 1)
+    assert_close("slope", 0.4, m, tolerance=1e-9)
+    assert_close("intercept in kPa", 1.5, c, tolerance=1e-9)
+    assert report["x_unit"] == "Pa"
+    assert "1 outlier" in import_summary(report)
+
+    # Without units in the headers, the magnitude decides between Pa and kPa
+    _, report = import_test_data(io.StringIO("Normal,Shear\n2.0,1.0\n4.0,2.0\n"), "wyl", filename="wyl.csv")
+    assert report["x_unit"] == "kPa, assumed"
+    try:
+        import_test_data(io.StringIO("a,b,c\n1,2,3\n"), "wyl", filename="bad.csv")
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("A file without stress columns must be rejected")
+    print("PASS: CSV cleaning and unit conversion")
+
+
+def test_ambiguous_commas():
+    # Comma separated: a quoted "1,250" is a thousands separator or a decimal comma, so it is dropped, not read as 1.25
+    text = 'Normal Stress (kPa),Shear Stress (kPa)\n"1,250",500\n2.0,1.0\n4.0,2.0\n'
+    table, report = import_test_data(io.StringIO(text), "wyl", filename="wyl.csv")
+    assert report["invalid"] == 1 and table[WYL_X_COL].tolist() == [2.0, 4.0]
+
+    # Semicolon separated: a comma without a "." is the decimal mark, "1.250,5" is ambiguous
+    text = "Normal Stress (kPa);Shear Stress (kPa)\n1,25;0,5\n1.250,5;400\n4;2\n"
+    table, report = import_test_data(io.StringIO(text), "wyl", filename="wyl.csv")
+    assert report["invalid"] == 1 and table[WYL_X_COL].tolist() == [1.25, 4.0] and table[WYL_Y_COL].tolist() == [0.5, 2.0]
+    print("PASS: ambiguous commas are not misread")
+
+
+def test_xlsx_import():
+    source = pd.DataFrame({"Normal Stress [kPa]": np.linspace(1.0, 10.0, 50), "Shear Stress [kPa]": np.linspace(0.5, 5.0, 50)})
+    buffer = io.BytesIO()
+    source.to_excel(buffer, index=False)
+    buffer.seek(0)
+    table, report = import_test_data(buffer, "wyl", filename="wyl.xlsx")
+    assert list(table.columns) == [WYL_X_COL, WYL_Y_COL]
+    assert_close("points kept", 50, report["points"])
+    assert np.allclose(table[WYL_Y_COL], source["Shear Stress [kPa]"])
+    print("PASS: XLSX import")
+
+
+def test_get_valid_xy():
+    frame = pd.DataFrame({"x": [1.0, None, 3.0, np.inf], "y": [2.0, 5.0, None, 1.0]})
+    records = frame.to_dict("records") + [{"x": 4.0, "y": 8.0}, {"x": None, "y": None}]
+    x, y = get_valid_xy(frame, "x", "y")
+    assert x.tolist() == [1.0] and y.tolist() == [2.0]
+    x, y = get_valid_xy(records, "x", "y")
+    assert x.tolist() == [1.0, 4.0] and y.tolist() == [2.0, 8.0]
+    print("PASS: valid points from tables and records")
+
+
+if __name__ == "__main__":
+    test_csv_cleaning_and_units()
+    test_ambiguous_commas()
+    test_xlsx_import()
+    test_get_valid_xy()
+    print("All data import tests passed.")
@@ -0,0 +1,129 @@
+import json
+import math
+
+from test_utils import assert_close
+import numpy as np
+
+from design_calcs import (
+    g,
+    run_design,
+    arching_function_H,
+    arching_function_dH,
+    mass_flow_outlet_kernel,
+    expanded_flow_kernel,
+    validate_design_inputs,
+)
+from bench_utils import compare_results
+
+
+def load_example(**overrides):
+    with open("last_inputs.json", "r") as f:
+        inputs = json.load(f)
+    inputs.update(overrides)
+    return inputs
+
+
+def example_time_flow_function():
+    # Line through the two time flow function points in last_inputs.json (kPa)
+    m_time = (5.0 - 1.5) / (18.9 - 3.1)
+    c_time = 1.5 - m_time * 3.1
+    return m_time, c_time
+
+
+def test_run_design_mass_flow():
+    m_time, c_time = example_time_flow_function()
+    sigma_1_crit = c_time / (1 / 1.3 - m_time)
+    sigma_c_crit = m_time * sigma_1_crit + c_time
+
+    results = run_design(load_example())["mass_flow"]
+    assert_close("mass-flow sigma_1,crit", sigma_1_crit, results["sigma_1_crit_kpa"])
+    assert_close("mass-flow sigma_c,crit", sigma_c_crit, results["sigma_c_crit_kpa"])
+    # H(18°) = 2 + 1.5 * 18 / 100 for the conical example hopper
+    assert_close("mass-flow conical B_min", 2.27 * sigma_c_crit * 1000 / (2400 * g), results["B_min"])
+
+
+def test_arching_function_kernels():
+    assert_close("H(0°) conical (Eq. 10.6b)", 2.0, arching_function_H(0.0, "Conical"))
+    assert_close("H(0°) plane flow (Eq. 10.6a)", 1.0, arching_function_H(0.0, "Plane-Flow (Slot)"))
+    assert_close("H(30°) plane flow (doming)", 1.15, arching_function_H(30.0, "Plane-Flow (Slot)"))
+    for shape in ("Conical", "Plane-Flow (Slot)"):
+        slope = (arching_function_H(31.0, shape) - arching_function_H(29.0, shape)) / 2.0
+        assert_close(f"dH/dΘ {shape}", slope, arching_function_dH(30.0, shape), tolerance=1e-12)
+    assert arching_function_dH(np.zeros(3), "Conical").shape == (3,)
+
+    inputs = load_example()
+    m_time, c_time = example_time_flow_function()
+    thetas = np.linspace(0, 40, 9)
+    curve = mass_flow_outlet_kernel(m_time, c_time, 1.3, 2400.0, thetas, "Conical")["B_min"]
+    for theta, B in zip(thetas, curve):
+        scalar = run_design(dict(inputs, theta_prime_manual=float(theta)))["mass_flow"]["B_min"]
+        assert_close(f"B(Θ = {theta:.0f}°) array vs. scalar", scalar, B, tolerance=1e-9)
+
+    # No positive intersection when the flow factor line lies below the flow function
+    assert np.isnan(mass_flow_outlet_kernel(m_time, c_time, 10.0, 2400.0, 20.0, "Conical")["B_min"])
+    print("PASS: vectorized H(Θ) outlet kernel")
+
+
+def test_run_design_funnel_flow():
+    results = run_design(load_example(flow_pattern="Funnel-Flow"))
+    sin_phi_e = math.sin(math.radians(50))
+    assert_close("funnel-flow ff_p (Eq. 10.11)", (1 + sin_phi_e) / (4 * sin_phi_e) * 5.05556, results["lower"]["ff_p"], tolerance=1e-5)
+
+    # Janssen stress for D = 3 m, h_f = 6 m, K = 0.4 (circular logic)
+    mu_w = math.tan(math.radians(load_example()["phi_prime_calc"]))
+    sigma_v = 2400 * g * 3 / (4 * 0.4 * mu_w) * (1 - math.exp(-4 * 0.4 * mu_w * 6 / 3))
+    assert_close("Janssen sigma_v,max", sigma_v, results["upper"]["sigma_v_max_pa"], tolerance=1e-6)
+    assert_close(
+        "final funnel-flow dimension",
+        max(results["lower"]["D_crit"], results["upper"]["D_crit"]),
+        results["final_crit_dim"],
+    )
+
+
+def test_run_design_expanded_flow():
+    inputs = load_example(flow_pattern="Expanded-Flow")
+    results = run_design(inputs)
+    mass_flow = run_design(load_example(flow_pattern="Mass-Flow"))["mass_flow"]
+    funnel_flow = run_design(load_example(flow_pattern="Funnel-Flow"))
+    expanded = results["expanded"]
+    assert_close("expanded-flow outlet B_min", mass_flow["B_min"], expanded["B_min"], tolerance=1e-12)
+    assert_close("expanded-flow top opening", funnel_flow["final_crit_dim"], expanded["D_top"], tolerance=1e-12)
+    theta = math.radians(inputs["theta_prime_manual"])
+    assert_close("lower hopper height", (expanded["D_top"] - expanded["B_min"]) / (2 * math.tan(theta)), expanded["h_hopper"])
+    assert expanded["fits"] == (expanded["D_top"] < inputs["D_silo"])
+
+    # Kernel over arrays matches one design at a time
+    m_time, c_time = example_time_flow_function()
+    scale = np.linspace(0.5, 1.5, 7)
+    D_silo = np.linspace(2.0, 8.0, 7)
+    kernel = expanded_flow_kernel(inputs, m_time * scale, c_time * scale, D_silo=D_silo)
+    for i in [0, 3, 6]:
+        single = expanded_flow_kernel(inputs, m_time * scale[i], c_time * scale[i], D_silo=D_silo[i])
+        for key in ("B_min", "D_top", "h_hopper"):
+            assert_close(f"expanded kernel {key}", single[key], float(kernel[key][i]), tolerance=1e-12)
+        assert single["fits"] == bool(kernel["fits"][i])
+    assert np.array_equal(kernel["fits"], kernel["D_top"] < D_silo) and kernel["fits"].any() and not kernel["fits"].all()
+
+    for overrides in ({"flow_pattern": "Core-Flow"}, {"flow_pattern": "Expanded-Flow", "K_janssen": 0}):
+        try:
+            validate_design_inputs(load_example(**overrides))
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"Inputs {overrides} should be rejected")
+    print("PASS: expanded-flow design")
+
+
+def test_compare_results():
+    regressions = compare_results({"a": 1.0, "b": 1.0}, {"a": 1.2, "b": 1.3, "c": 5.0}, threshold=0.25)
+    assert [name for name, *_ in regressions] == ["b"]
+    print("PASS: benchmark regression threshold")
+
+
+if __name__ == "__main__":
+    test_run_design_mass_flow()
+    test_arching_function_kernels()
+    test_run_design_funnel_flow()
+    test_run_design_expanded_flow()
+    test_compare_results()
+    print("All design calculation tests passed.")
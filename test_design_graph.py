@@ -0,0 +1,71 @@
+import json
+
+from bench_utils import make_cases
+from design_calcs import run_design
+from design_graph import RESULTS, DesignGraph
+
+
+def recomputed(graph):
+    return {name for name, _ in graph.recomputed}
+
+
+def test_graph_matches_run_design():
+    graph = DesignGraph()
+    for flow_pattern in ["Mass-Flow", "Funnel-Flow", "Expanded-Flow"]:
+        cases = make_cases(40, flow_pattern)
+        for case in cases[::2]:
+            case["hopper_shape"] = "Plane-Flow (Slot)"
+        for case in cases:
+            assert graph.evaluate(case) == run_design(case)
+    print("PASS: design graph results match run_design")
+
+
+def test_only_downstream_nodes_recomputed():
+    with open("last_inputs.json", "r") as f:
+        inputs = dict(json.load(f), flow_pattern="Funnel-Flow", hopper_shape="Conical")
+    graph = DesignGraph()
+    first = graph.evaluate(inputs)
+
+    graph.evaluate(dict(inputs, solid_name="Renamed"))
+    assert graph.recomputed == []
+
+    second = graph.evaluate(dict(inputs, K_janssen=inputs["K_janssen"] * 1.2))
+    assert recomputed(graph) == {"valid", "janssen", "rathole_upper", RESULTS}
+    assert second["lower"] == first["lower"]
+    assert second["upper"]["D_crit"] < first["upper"]["D_crit"]
+
+    # Switching to mass flow needs the mass-flow branch only; switching back reuses the funnel-flow nodes
+    graph.evaluate(dict(inputs, flow_pattern="Mass-Flow"))
+    assert recomputed(graph) == {"valid", "mass_flow_point", "mass_flow", RESULTS}
+    graph.evaluate(inputs)
+    assert recomputed(graph) == {"valid", "janssen", "rathole_upper", RESULTS}
+
+    # Editing the caller's dict in place is seen as a change
+    inputs["ff_time_data"][0]["Strength σc (kPa)"] *= 1.1
+    graph.update(inputs)
+    assert not graph.is_memoized("flow_functions") and graph.is_memoized("janssen")
+    assert graph.get(RESULTS) == run_design(inputs)
+    print("PASS: only nodes downstream of changed inputs are recomputed")
+
+
+def test_invalid_inputs_memoized_until_fixed():
+    with open("last_inputs.json", "r") as f:
+        inputs = json.load(f)
+    graph = DesignGraph()
+    graph.update(dict(inputs, gamma=-1.0))
+    for _ in range(2):
+        try:
+            graph.get(RESULTS)
+        except ValueError as e:
+            assert "Bulk density" in str(e)
+        else:
+            raise AssertionError("Expected ValueError for a negative bulk density")
+    assert recomputed(graph) == {"valid", RESULTS}
+    assert graph.evaluate(inputs) == run_design(inputs)
+    print("PASS: invalid inputs raise until the input is fixed")
+
+
+if __name__ == "__main__":
+    test_graph_matches_run_design()
+    test_only_downstream_nodes_recomputed()
+    test_invalid_inputs_memoized_until_fixed()
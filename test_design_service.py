@@ -0,0 +1,99 @@
+import json
+import subprocess
+import sys
+import threading
+import urllib.error
+import urllib.request
+
+from test_utils import assert_close
+from design_service import make_server
+
+MASS_FLOW_CASE = {"rho_b": 2400.0, "phi_e": 50.0, "ff": 1.3, "theta": 18.0, "hopper_shape": "Conical", "ff_time": {"m": 0.22, "c": 0.8}}
+FUNNEL_FLOW_CASE = {
+    "rho_b": 2400.0, "phi_e": 50.0, "phi_x": 22.9, "hopper_shape": "Plane-Flow (Slot)",
+    "D_silo": 3.0, "h_f": 6.0, "K_janssen": 0.4, "ff_time": {"points": [[3.1, 1.5], [18.9, 5.0]]},
+}
+
+
+def post(base_url, path, body):
+    request = urllib.request.Request(base_url + path, data=json.dumps(body).encode(), headers={"Content-Type": "application/json"})
+    try:
+        with urllib.request.urlopen(request, timeout=30) as response:
+            return response.status, dict(response.headers), json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, dict(e.headers), json.loads(e.read())
+
+
+def test_service_endpoints():
+    server = make_server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    base_url = "http://127.0.0.1:%d" % server.server_address[1]
+    try:
+        status, headers, result = post(base_url, "/mass-flow", MASS_FLOW_CASE)
+        assert status == 200 and headers["X-Cache"] == "MISS"
+        # sigma_c = 0.22 sigma_1 + 0.8 meets sigma_1 / 1.3 at sigma_1 = 0.8 / (1 / 1.3 - 0.22)
+        sigma_c = 0.8 / (1 / 1.3 - 0.22) / 1.3
+        assert_close("service B_min", 2.27 * sigma_c * 1000 / (2400 * 9.81), result["B_min"])
+
+        status, headers, cached = post(base_url, "/mass-flow", MASS_FLOW_CASE)
+        assert headers["X-Cache"] == "HIT" and cached == result
+
+        status, _, result = post(base_url, "/funnel-flow", FUNNEL_FLOW_CASE)
+        assert status == 200 and "B_crit" in result
+        assert result["final_crit_dim"] == max(result["D_crit_lower"], result["D_crit_upper"], result["B_crit"])
+
+        status, _, batch = post(base_url, "/janssen", {"cases": [
+            {"rho_b": 2400.0, "D_silo": 3.0, "h_f": 6.0, "K_janssen": 0.4, "phi_x": 22.9},
+            {"rho_b": 2400.0, "D_silo": 3.0, "h_f": 6.0, "K_janssen": 0.4},
+        ]})
+        assert status == 200 and len(batch["results"]) == 2
+        assert batch["results"][0]["sigma_v_max_kpa"] > 0
+        assert "phi_x" in batch["results"][1]["error"]
+
+        status, _, result = post(base_url, "/chart-lookup", {"phi_e": 52.0, "hopper_shape": "Conical"})
+        assert status == 200 and result["mass_flow_chart"] == "fig_10_35.png"
+
+        status, _, result = post(base_url, "/mass-flow", dict(MASS_FLOW_CASE, ff=-1))
+        assert status == 422 and "Flow factor" in result["error"]
+
+        with open("last_inputs.json", "r") as f:
+            inputs = json.load(f)
+        status, _, result = post(base_url, "/design", dict(inputs, ff_input_method="Define by N test points", ff_time_data=[1, 2]))
+        assert status == 422 and "ff_time_data" in result["error"]
+        # One malformed case of a batch only fails that case
+        status, _, batch = post(base_url, "/design", {"cases": [inputs, dict(inputs, ff_time_data="xy"), dict(inputs, wyl_data=[{}, 3])]})
+        assert status == 200 and "error" not in batch["results"][0]
+        assert "ff_time_data" in batch["results"][1]["error"] and "wyl_data" in batch["results"][2]["error"]
+
+        with urllib.request.urlopen(base_url + "/openapi.json", timeout=30) as response:
+            schema = json.loads(response.read())
+        assert {"/mass-flow", "/funnel-flow", "/janssen", "/chart-lookup"} <= set(schema["paths"])
+    finally:
+        server.shutdown()
+        server.server_close()
+    print("PASS: design service endpoints, batches and cache")
+
+
+def test_prefork_service():
+    process = subprocess.Popen(
+        [sys.executable, "design_service.py", "--port", "0", "--workers", "2"],
+        stdout=subprocess.PIPE, text=True,
+    )
+    try:
+        base_url = process.stdout.readline().split()[2]
+        status, _, batch = post(base_url, "/mass-flow", {"cases": [dict(MASS_FLOW_CASE, ff=1.1 + 0.1 * i) for i in range(5)]})
+        assert status == 200 and all("B_min" in row for row in batch["results"])
+        # A higher flow factor needs a larger outlet
+        b_min = [row["B_min"] for row in batch["results"]]
+        assert b_min == sorted(b_min)
+    finally:
+        process.terminate()
+        process.wait(timeout=10)
+    print("PASS: pre-forked service on localhost")
+
+
+if __name__ == "__main__":
+    test_service_endpoints()
+    test_prefork_service()
+    print("All design service tests passed.")
@@ -0,0 +1,42 @@
+import math
+
+import numpy as np
+
+from test_utils import assert_close
+from design_calcs import g
+from discharge_rate import COARSE, FINE, discharge_rate, smallest_outlet
+
+
+def test_coarse_discharge_rate():
+    # Johanson: W = rho_b * A * sqrt(B g / (2 (1 + m) tan(theta)))
+    expected = 1500 * math.pi * 0.2**2 / 4 * math.sqrt(0.2 * g / (4 * math.tan(math.radians(20))))
+    assert_close("conical coarse rate", expected, discharge_rate(0.2, 20.0, 1500.0, "Conical"))
+    expected = 1500 * 0.2 * 2.0 * math.sqrt(0.2 * g / (2 * math.tan(math.radians(30))))
+    assert_close("slot coarse rate", expected, discharge_rate(0.2, 30.0, 1500.0, "Plane-Flow (Slot)", length=2.0))
+
+
+def test_fine_powder_rate_is_limited():
+    coarse = discharge_rate(0.3, 20.0, 1500.0, "Conical", COARSE)
+    fine = discharge_rate(0.3, 20.0, 1500.0, "Conical", FINE, rho_b_outlet=1300.0, permeability=0.005)
+    v_lim = 0.005 / (1500 / 1300 - 1)
+    assert_close("fine powder limiting rate", 1300 * math.pi * 0.3**2 / 4 * v_lim, fine)
+    assert fine < coarse
+
+
+def test_smallest_outlet():
+    thetas = np.array([10.0, 20.0, 30.0])
+    target = 50 / 3.6
+    sizing = smallest_outlet(target, 0.11, thetas, 1500.0, "Conical")
+    rates = discharge_rate(sizing["B_throughput"], thetas, 1500.0, "Conical")
+    for theta, rate in zip(thetas, rates):
+        assert_close(f"throughput at the smallest outlet, theta {theta:.0f}°", target, rate, tolerance=1e-6 * target)
+    assert list(sizing["controlling"]) == ["arching", "throughput", "throughput"]
+    assert np.all(sizing["B_required"] >= 0.11)
+    print("PASS: smallest outlet meets arching and throughput")
+
+
+if __name__ == "__main__":
+    test_coarse_discharge_rate()
+    test_fine_powder_rate_is_limited()
+    test_smallest_outlet()
+    print("All discharge rate tests passed.")
@@ -0,0 +1,121 @@
+import glob
+import json
+import multiprocessing
+import os
+import tempfile
+import time
+
+import numpy as np
+
+import disk_cache
+from disk_cache import DiskCache, cache_key
+from design_service import ResultCache, evaluate
+from report_builder import build_reports
+
+MASS_FLOW_CASE = {"rho_b": 2400.0, "phi_e": 50.0, "ff": 1.3, "theta": 18.0, "hopper_shape": "Conical", "ff_time": {"m": 0.22, "c": 0.8}}
+
+
+def test_keys_and_round_trip():
+    # Canonical: key order and NumPy values do not change the key; the version does
+    assert cache_key("maps", {"a": 1.0, "b": [1, 2]}, "v1") == cache_key("maps", {"b": np.array([1, 2]), "a": np.float64(1.0)}, "v1")
+    assert cache_key("maps", {"a": 1.0}, "v1") != cache_key("maps", {"a": 1.0}, "v2")
+    assert cache_key("maps", {"a": 1.0}, "v1") != cache_key("figure", {"a": 1.0}, "v1")
+
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(directory)
+        calls = []
+        compute = lambda: calls.append(1) or {"B_min": np.arange(3.0)}
+        first = cache.cached("maps", {"theta": 18.0}, compute)
+        restarted = DiskCache(directory) # e.g. another replica, or after a restart
+        again = restarted.cached("maps", {"theta": 18.0}, compute)
+        restarted.flush()
+        assert len(calls) == 1 and np.array_equal(first["B_min"], again["B_min"])
+        other_version = DiskCache(directory, version="other")
+        assert other_version.get(other_version.key("maps", {"theta": 18.0})) is None
+        stats = cache.stats()
+        assert stats["writes"] == 1 and stats["entries"] == 1 and stats["hits"] == 1 and stats["misses"] == 1
+    print("PASS: canonical keys and round trip")
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as directory:
+        cache = DiskCache(directory, max_bytes=20_000)
+        value = bytes(4000)
+        for index in range(4):
+            cache.put(f"{index:064x}", value)
+            time.sleep(0.01)
+        assert cache.get(f"{0:064x}") is not None # Now the most recently used
+        time.sleep(0.01)
+        for index in range(4, 6):
+            cache.put(f"{index:064x}", value)
+            time.sleep(0.01)
+        stats = cache.stats()
+        assert stats["bytes"] <= 20_000 and stats["evictions"] >= 2, stats
+        assert cache.get(f"{0:064x}") is not None
+        assert cache.get(f"{1:064x}") is None and cache.get(f"{5:064x}") is not None
+        assert stats["bytes"] == sum(os.path.getsize(path) for path in glob.glob(os.path.join(directory, "objects", "*", "*.pkl")))
+    print("PASS: least recently used entries are evicted")
+
+
+def _worker(args):
+    directory, worker = args
+    cache = DiskCache(directory, max_bytes=200_000)
+    values = []
+    for index in range(40):
+        key = (index + worker) % 20 # Overlapping keys across processes
+        values.append(cache.cached("square", {"key": key}, lambda: np.full(500, key**2)))
+    cache.flush()
+    return [int(value[0]) for value in values]
+
+def test_concurrent_processes():
+    with tempfile.TemporaryDirectory() as directory:
+        with multiprocessing.get_context("spawn").Pool(4) as pool:
+            results = pool.map(_worker, [(directory, worker) for worker in range(4)])
+        for worker, values in enumerate(results):
+            assert values == [((index + worker) % 20)**2 for index in range(40)]
+        stats = DiskCache(directory, max_bytes=200_000).stats()
+        assert stats["hits"] + stats["misses"] == 160 and stats["hits"] >= 160 - stats["writes"]
+        assert stats["entries"] == 20 and stats["hit_rate"] > 0.5
+        assert not glob.glob(os.path.join(directory, "objects", "*", "*.tmp"))
+    print("PASS: processes share the cache safely")
+
+
+def test_service_uses_disk_cache():
+    with tempfile.TemporaryDirectory() as directory:
+        disk_cache.set_cache_dir(directory)
+        try:
+            result, cached = evaluate("/mass-flow", MASS_FLOW_CASE, ResultCache())
+            assert not cached
+            # Another worker (its own in-memory cache) gets the result from disk
+            again, cached = evaluate("/mass-flow", MASS_FLOW_CASE, ResultCache())
+            assert cached and again == result
+        finally:
+            disk_cache.set_cache_dir(None)
+    print("PASS: design service results are shared through the disk cache")
+
+
+def test_report_figures_reused_across_builds():
+    with open("last_inputs.json", "r") as f:
+        cases = [dict(json.load(f), flow_pattern="Mass-Flow")]
+    with tempfile.TemporaryDirectory() as directory:
+        disk_cache.set_cache_dir(os.path.join(directory, "cache"))
+        try:
+            first = build_reports(cases, os.path.join(directory, "first"), workers=1)
+            second = build_reports(cases, os.path.join(directory, "second"), workers=1)
+        finally:
+            disk_cache.set_cache_dir(None)
+        assert first["figures_rendered"] == 3 and second["figures_rendered"] == 0
+        with open(os.path.join(directory, "first", "index.html"), encoding="utf-8") as f:
+            first_index = f.read()
+        with open(os.path.join(directory, "second", "index.html"), encoding="utf-8") as f:
+            assert f.read() == first_index
+    print("PASS: report figures are reused from the disk cache")
+
+
+if __name__ == "__main__":
+    test_keys_and_round_trip()
+    test_lru_eviction()
+    test_concurrent_processes()
+    test_service_uses_disk_cache()
+    test_report_figures_reused_across_builds()
+    print("All disk cache tests passed.")
@@ -0,0 +1,60 @@
+import numpy as np
+
+from test_utils import assert_close, load_inputs
+from design_calcs import run_design, flow_factor_approx, mass_flow_limit_angle
+from feasibility_maps import (
+    MASS_FLOW_OK,
+    ARCHING,
+    FUNNEL_FLOW_OK,
+    RATHOLING,
+    angle_friction_map,
+    angle_outlet_map,
+    design_margins,
+)
+
+
+def test_maps_match_run_design():
+    inputs = load_inputs()
+    for hopper_shape in ("Conical", "Plane-Flow (Slot)"):
+        case = dict(inputs, hopper_shape=hopper_shape)
+        friction_map = angle_friction_map(case, n=201)
+        assert friction_map["required"].shape == (201, 201)
+        # Mass-flow points: B_min of the Results page with ff(Θ)
+        i, j = 100, 20
+        theta, phi_x = friction_map["theta"][j], friction_map["phi_x"][i]
+        assert friction_map["angle_margin"][i, j] > 0
+        ff = flow_factor_approx(theta, case["delta"], phi_x, hopper_shape)
+        expected = run_design(dict(case, theta_prime_manual=theta, ff_manual=ff, phi_prime_calc=phi_x))["mass_flow"]["B_min"]
+        assert_close(f"{hopper_shape} B_min on the grid", expected, friction_map["required"][i, j], tolerance=1e-9)
+        # Funnel-flow points: the rathole/doming dimension
+        j = 200
+        assert friction_map["angle_margin"][i, j] < 0
+        expected = run_design(dict(case, flow_pattern="Funnel-Flow", phi_prime_calc=phi_x))["final_crit_dim"]
+        assert_close(f"{hopper_shape} funnel-flow dimension on the grid", expected, friction_map["required"][i, j], tolerance=1e-9)
+    print("PASS: map values match run_design")
+
+
+def test_boundary_and_regions():
+    inputs = load_inputs()
+    outlet_map = angle_outlet_map(inputs, n=200)
+    theta_limit = mass_flow_limit_angle(inputs["delta"], inputs["phi_prime_calc"], inputs["hopper_shape"])
+    assert_close("mass-flow limit", theta_limit, outlet_map["theta_limit"], tolerance=1e-12)
+    region = outlet_map["region"]
+    mass_flow = outlet_map["theta"] < theta_limit
+    assert np.all(np.isin(region[:, mass_flow], [MASS_FLOW_OK, ARCHING]))
+    assert np.all(np.isin(region[:, ~mass_flow], [FUNNEL_FLOW_OK, RATHOLING]))
+    # Larger outlets never lose feasibility
+    adequate = np.isin(region, [MASS_FLOW_OK, FUNNEL_FLOW_OK])
+    assert np.all(np.diff(adequate.astype(int), axis=0) >= 0)
+
+    margins = design_margins(inputs, inputs["theta_prime_manual"], 0.3)
+    assert margins["mass_flow"]
+    assert_close("angle margin", theta_limit - inputs["theta_prime_manual"], margins["angle_margin"], tolerance=1e-12)
+    assert_close("outlet margin", 0.3 - margins["required"], margins["outlet_margin"], tolerance=1e-12)
+    print("PASS: mass-flow boundary and feasibility regions")
+
+
+if __name__ == "__main__":
+    test_maps_match_run_design()
+    test_boundary_and_regions()
+    print("All feasibility map tests passed.")
@@ -0,0 +1,62 @@
+import json
+
+import numpy as np
+
+from test_utils import assert_close
+from design_calcs import HOPPER_ANGLE_MARGIN, flow_factor_approx, mass_flow_limit_angle, mass_flow_outlet_kernel
+from geometry_optimizer import (
+    cross_section_area,
+    hopper_volume,
+    optimize_geometry,
+    pareto_front,
+)
+
+
+def load_example(**overrides):
+    with open("last_inputs.json", "r") as f:
+        inputs = json.load(f)
+    inputs.update(overrides)
+    return inputs
+
+
+def test_flow_factor_approx_matches_charts():
+    # Values read from Schulze Figs. 10.35 (conical) and 10.43 (plane flow), phi_e = 50°
+    assert_close("conical ff(20°, phi_x 23°)", 1.3, flow_factor_approx(20, 50, 23, "Conical"), tolerance=0.06)
+    assert_close("plane ff(30°, phi_x 0°)", 1.6, flow_factor_approx(30, 50, 0, "Plane-Flow (Slot)"), tolerance=0.06)
+    assert_close("conical limit angle, phi_x 23°", 21.5, mass_flow_limit_angle(50, 23, "Conical"), tolerance=1.5)
+    assert_close("plane limit angle, phi_x 23°", 29.3, mass_flow_limit_angle(50, 23, "Plane-Flow (Slot)"), tolerance=1.5)
+    assert np.isnan(mass_flow_limit_angle(40, 45, "Conical"))
+
+
+def test_minimum_height_mass_flow():
+    inputs = load_example()
+    result = optimize_geometry(inputs, 100.0, "height", max_height=15.0, max_diameter=5.0)
+    best = result["best"]
+
+    stored = hopper_volume(best["D"], best["B"], best["theta"], "Conical") + cross_section_area(best["D"], "Conical") * best["H_cyl"]
+    assert_close("stored volume", 100.0, stored)
+    assert best["total_height"] <= 15.0 and best["D"] <= 5.0
+
+    phi_x = inputs["phi_prime_calc"]
+    assert best["theta"] <= mass_flow_limit_angle(50, phi_x, "Conical") - HOPPER_ANGLE_MARGIN
+    ff = flow_factor_approx(best["theta"], 50, phi_x, "Conical")
+    m_time = (5.0 - 1.5) / (18.9 - 3.1)
+    B_min = mass_flow_outlet_kernel(m_time, 1.5 - m_time * 3.1, ff, 2400.0, best["theta"], "Conical")["B_min"]
+    assert best["B"] >= B_min - 1e-12
+
+    heights = [row["total_height"] for row in result["pareto"]]
+    assert_close("best height is the Pareto minimum", min(heights), best["total_height"])
+    print("PASS: minimum-height mass-flow geometry")
+
+
+def test_pareto_front():
+    height = np.array([3.0, 1.0, 2.0, 2.5, 1.0])
+    mass = np.array([1.0, 3.0, 2.0, 2.5, 4.0])
+    assert list(pareto_front(height, mass)) == [1, 2, 0]
+
+
+if __name__ == "__main__":
+    test_flow_factor_approx_matches_charts()
+    test_minimum_height_mass_flow()
+    test_pareto_front()
+    print("All geometry optimizer tests passed.")
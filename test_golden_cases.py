@@ -0,0 +1,85 @@
+import os
+import tempfile
+
+import numpy as np
+
+import golden_cases
+from test_utils import assert_close
+from golden_cases import GOLDEN_FILE, REFERENCE_PATH, check_corpus, generate_corpus, load_corpus
+
+
+def test_committed_corpus():
+    corpus = load_corpus(GOLDEN_FILE)
+    report = check_corpus(corpus, workers=2)
+    assert report["passed"], golden_cases.format_report(report, corpus["names"])
+    assert report["cases"] == len(corpus["cases"]) and set(report["paths"]) == set(golden_cases.FAST_PATHS)
+    for total in report["paths"].values():
+        assert total["speedup"] > 0 and not total["mismatches"]
+    print("PASS: fast paths match the committed golden cases")
+
+
+def test_edge_cases():
+    corpus = generate_corpus(n=30, seed=1)
+    references = dict(zip(corpus["names"], corpus["reference"]))
+    assert len(corpus["names"]) == len(corpus["cases"]) == len(corpus["reference"])
+    for name, reference in references.items():
+        if name.startswith("ff_p floor"):
+            assert_close(name, 1.7, reference["ff_p"], tolerance=0)
+    # Intersection far beyond the 30 kPa hint: find_positive_intersection expands its bracket
+    assert_close("bracket expansion", 5000 * 30.0, references["bracket expansion x5000, Mass-Flow"]["sigma_1_crit_kpa"], tolerance=1e-3)
+    assert "error" in references["no intersection, Funnel-Flow"] and references["zero intercept, Mass-Flow"]["B_min"] == 0
+    # A negative intercept below the ff line has no intersection: the kernels must reject it too
+    index = corpus["names"].index("negative intercept from test points, Funnel-Flow")
+    assert "error" in corpus["reference"][index]
+    assert "error" in golden_cases.kernel_path([dict(corpus["base"], **corpus["cases"][index])])[0]
+    assert_close("negative intercept crossing", 0.16 / 0.05, references["negative intercept crossing the ff line, Mass-Flow"]["sigma_1_crit_kpa"], tolerance=1e-9)
+    assert check_corpus(corpus, workers=1)["passed"]
+    print("PASS: edge cases in a generated corpus")
+
+
+def test_corpus_file_is_line_diffable():
+    corpus = generate_corpus(n=5, seed=3)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "corpus.json")
+        golden_cases.save_corpus(corpus, path)
+        with open(path, "r") as f:
+            lines = f.read().splitlines()
+        assert load_corpus(path) == corpus
+    # One line per case and per reference output
+    assert len(lines) > 2 * len(corpus["cases"])
+    print("PASS: corpus written one case per line")
+
+
+def test_drift_is_reported():
+    corpus = generate_corpus(n=20, seed=2)
+    rejected = [i for i, reference in enumerate(corpus["reference"]) if "error" in reference]
+
+    def drifting_path(cases):
+        outputs = golden_cases.run_design_path(cases)
+        outputs = [{key: value * (1 + 1e-6) for key, value in output.items()} if "error" not in output else output for output in outputs]
+        return outputs
+
+    def accepting_path(cases):
+        return [{"B_min": 1.0} if "error" in output else output for output in golden_cases.run_design_path(cases)]
+
+    golden_cases.FAST_PATHS.update(drifting=drifting_path, accepting=accepting_path)
+    try:
+        report = check_corpus(corpus, paths=["drifting", "accepting"], workers=1, chunk_size=7)
+    finally:
+        del golden_cases.FAST_PATHS["drifting"], golden_cases.FAST_PATHS["accepting"]
+
+    assert not report["passed"] and report["paths"][REFERENCE_PATH]["passed"]
+    drifting = report["paths"]["drifting"]
+    assert not drifting["passed"] and drifting["max_ratio"] > 100 and not drifting["mismatches"]
+    quantity, worst = max(drifting["worst"].items(), key=lambda item: item[1]["ratio"])
+    assert np.isclose(worst["rel_error"], 1e-6) and corpus["reference"][worst["case"]][quantity] == worst["reference"]
+    assert report["paths"]["accepting"]["mismatches"] == rejected and report["paths"]["accepting"]["max_ratio"] == 0
+    print("PASS: drift and accepted invalid cases are reported")
+
+
+if __name__ == "__main__":
+    test_committed_corpus()
+    test_edge_cases()
+    test_corpus_file_is_line_diffable()
+    test_drift_is_reported()
+    print("All golden case tests passed.")
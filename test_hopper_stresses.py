@@ -0,0 +1,89 @@
+import json
+
+import numpy as np
+from scipy.optimize import brentq
+
+from test_utils import assert_close
+from design_calcs import g, janssen_sigma_v_max, mass_flow_limit_angle
+from design_graph import DesignGraph
+from hopper_stresses import (
+    DISCHARGE,
+    FILLING,
+    STATES,
+    feeder_loads,
+    hopper_height,
+    hopper_stress_profiles,
+    hopper_stresses,
+    stress_exponent,
+    stress_ratio,
+)
+
+EXAMPLE_FILE = "last_inputs.json"
+
+
+def test_slice_equilibrium():
+    gamma, theta, phi_e, phi_x, D, sigma_v_t = 1500.0, 20.0, 45.0, 22.0, 3.0, 40.0
+    h_h = hopper_height(D, theta)
+    for hopper_shape in ["Conical", "Plane-Flow (Slot)"]:
+        for state in STATES:
+            x = np.linspace(0.05, 0.95, 19) * h_h
+            step = 1e-5 * h_h
+            stresses = hopper_stresses(x, gamma, theta, phi_e, phi_x, D, sigma_v_t, hopper_shape, state)
+            above, below = (hopper_stresses(x + sign * step, gamma, theta, phi_e, phi_x, D, sigma_v_t, hopper_shape, state)["sigma_v"] for sign in (1, -1))
+            n = stress_exponent(stress_ratio(theta, phi_e, phi_x, state), theta, phi_x, hopper_shape)
+            # dσv/dx = -ρb·g + n·σv / x (x above the apex)
+            residual = (above - below) / (2 * step) - (-gamma * g / 1000 + n * stresses["sigma_v"] / x)
+            assert np.max(np.abs(residual)) < 1e-4
+            assert np.allclose(stresses["tau_w"], np.tan(np.radians(phi_x)) * stresses["sigma_n"])
+            top = hopper_stresses(h_h, gamma, theta, phi_e, phi_x, D, sigma_v_t, hopper_shape, state)
+            assert_close(f"{hopper_shape} {state} σv at transition", sigma_v_t, float(top["sigma_v"]), tolerance=1e-9)
+
+    # The n = 1 limit joins the general expression continuously
+    phi_x_one = brentq(lambda phi: stress_exponent(stress_ratio(theta, phi_e, phi, FILLING), theta, phi, "Conical") - 1, 1.0, 40.0)
+    values = [float(hopper_stresses(0.4 * h_h, gamma, theta, phi_e, phi, D, sigma_v_t, "Conical", FILLING)["sigma_v"]) for phi in (phi_x_one - 1e-4, phi_x_one, phi_x_one + 1e-4)]
+    assert abs(values[1] - values[0]) < 1e-3 and abs(values[2] - values[1]) < 1e-3
+    print("PASS: hopper stresses satisfy the slice equilibrium")
+
+
+def test_profiles_and_feeder_loads():
+    with open(EXAMPLE_FILE, "r") as f:
+        inputs = dict(json.load(f), flow_pattern="Mass-Flow")
+    inputs["theta_prime_manual"] = mass_flow_limit_angle(inputs["delta"], inputs["phi_prime_calc"], inputs["hopper_shape"]) - 3
+
+    graph = DesignGraph()
+    graph.update(inputs)
+    profiles = graph.get("hopper_stresses")
+    janssen_kpa = janssen_sigma_v_max(inputs["gamma"], inputs["D_silo"], inputs["h_f"], inputs["K_janssen"], inputs["phi_prime_calc"]) / 1000
+    assert_close("transition stress from the Janssen node", janssen_kpa, profiles["sigma_v_t_kpa"], tolerance=1e-12)
+    assert profiles["z"][0] == 0 and profiles[FILLING]["sigma_v"][-1] == profiles[DISCHARGE]["sigma_v"][-1]
+
+    B = graph.get("mass_flow")["B_min"]
+    loads = feeder_loads(profiles, B, inputs["hopper_shape"])
+    assert_close("initial feeder load", profiles[FILLING]["sigma_v"][0] * np.pi * B**2 / 4, float(loads["initial_kn"]), tolerance=1e-12)
+    assert loads["initial_kn"] > loads["flow_kn"] > 0
+
+    # Many silos in one pass match the silos one at a time
+    rng = np.random.default_rng(1)
+    theta = rng.uniform(10, 30, 25)
+    D = rng.uniform(1, 6, 25)
+    B = rng.uniform(0.2, 0.8, 25)
+    batch = hopper_stress_profiles(1400.0, theta, 48.0, 20.0, D, B, "Conical", h_f=8.0, K_janssen=0.45)
+    assert batch[DISCHARGE]["sigma_1"].shape == (25, 60)
+    for i in [0, 12, 24]:
+        single = hopper_stress_profiles(1400.0, theta[i], 48.0, 20.0, D[i], B[i], "Conical", h_f=8.0, K_janssen=0.45)
+        for state in STATES:
+            assert np.allclose(batch[state]["sigma_v"][i], single[state]["sigma_v"], rtol=1e-12)
+
+    try:
+        hopper_stress_profiles(1400.0, 0.0, 48.0, 20.0, 3.0, 0.3, "Conical", h_f=8.0, K_janssen=0.45)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("A hopper angle of 0° should be rejected")
+    print("PASS: stress profiles and feeder loads")
+
+
+if __name__ == "__main__":
+    test_slice_equilibrium()
+    test_profiles_and_feeder_loads()
+    print("All hopper stress tests passed.")
@@ -0,0 +1,47 @@
+import json
+
+import numpy as np
+
+from test_utils import assert_close
+from design_calcs import flow_function_at_rest, required_outlet, build_flow_functions
+from inventory_sim import FIFO, FILO, simulate, simulate_both, periodic_schedule
+
+
+def test_fifo_and_filo_layers():
+    # 1 m³/h in from t = 0, 1 m³/h out from t = 10 h
+    times = np.arange(100.0)
+    fill = np.ones(100)
+    discharge = np.r_[np.zeros(10), np.ones(90)]
+    fifo = simulate(times, fill, discharge, FIFO)
+    filo = simulate(times, fill, discharge, FILO)
+    assert np.allclose(fifo["residence_time"], 10.0)
+    assert_close("FIFO time at rest", 10.0, fifo["max_rest_h"])
+    # Funnel flow draws the newest layer; the first ten layers stay at rest to the end
+    assert np.allclose(filo["residence_time"], 0.0)
+    assert_close("FILO time at rest", 99.0, filo["max_rest_h"])
+    for run in (fifo, filo):
+        assert_close("final inventory", 10.0, run["final_inventory"], tolerance=1e-9)
+        assert_close("volume balance", 90.0, run["volume"].sum(), tolerance=1e-9)
+    print("PASS: FIFO and FILO layer bookkeeping")
+
+
+def test_year_of_hourly_operations():
+    with open("last_inputs.json", "r") as f:
+        inputs = json.load(f)
+    # Filled 06-22 h every day, discharged on weekdays only: weekends are at rest
+    times, fill, discharge = periodic_schedule(365 * 24, 2.0, 2.0, discharge_days=range(5))
+    results = simulate_both(inputs, times, fill, discharge, storage_time_h=72.0, B=0.3, capacity=60.0)
+    mass_flow = results[FIFO]
+    # Empty by Friday night, refilled from Saturday 06 h, discharged again Monday 00 h
+    assert_close("weekend time at rest", 42.0, mass_flow["max_rest_h"])
+    _, _, inst_line, time_line, _ = build_flow_functions(inputs)
+    m_ff, c_ff = flow_function_at_rest(mass_flow["max_rest_h"], inst_line, time_line, 72.0)
+    assert_close("outlet check uses the time at rest", float(required_outlet(inputs, m_ff, c_ff)), mass_flow["required_outlet"], tolerance=1e-12)
+    assert results[FILO]["max_rest_h"] > mass_flow["max_rest_h"]
+    print("PASS: a year of hourly operations")
+
+
+if __name__ == "__main__":
+    test_fifo_and_filo_layers()
+    test_year_of_hourly_operations()
+    print("All inventory simulation tests passed.")
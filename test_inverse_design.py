@@ -0,0 +1,41 @@
+import numpy as np
+
+from test_utils import assert_close
+from design_calcs import flow_factor_approx, mass_flow_outlet_kernel
+from inverse_design import FLOWS, TIME_LIMITED, NO_FLOW, NOT_MASS_FLOW, max_breakable_strength, screen_silos
+
+GAMMA, PHI_E, PHI_X = 2400.0, 50.0, 22.9
+TIMES, M_FF, C_FF = [0.0, 24.0], [0.12, 0.22], [0.2, 0.8]
+
+
+def test_inverse_matches_forward_design():
+    # An outlet of exactly B_min breaks exactly sigma_c,crit of the design flow function
+    ff = flow_factor_approx(18.0, PHI_E, PHI_X, "Conical")
+    forward = mass_flow_outlet_kernel(M_FF[1], C_FF[1], ff, GAMMA, 18.0, "Conical")
+    assert_close("sigma_c,max at B_min", forward["sigma_c_crit_kpa"], max_breakable_strength(forward["B_min"], GAMMA, 18.0, "Conical"), tolerance=1e-9)
+
+    silos = {"B": forward["B_min"] * np.array([0.99, 1.01]), "theta": [18.0, 18.0], "hopper_shape": ["Conical"] * 2, "phi_x": [PHI_X] * 2}
+    result = screen_silos(silos, GAMMA, PHI_E, TIMES, M_FF, C_FF)
+    assert list(result["status"]) == [TIME_LIMITED, FLOWS]
+    assert 0 < result["max_storage_time"][0] < 24 and np.isinf(result["max_storage_time"][1])
+    print("PASS: inverse design matches the forward outlet size")
+
+
+def test_screening_statuses():
+    silos = {
+        "B": [0.01, 0.5, 0.5, 0.5],
+        "theta": [18.0, 18.0, 35.0, 10.0],
+        "hopper_shape": ["Conical", "Conical", "Conical", "Plane-Flow (Slot)"],
+        "phi_x": [PHI_X] * 4,
+    }
+    result = screen_silos(silos, GAMMA, PHI_E, TIMES, M_FF, C_FF)
+    assert list(result["status"]) == [NO_FLOW, FLOWS, NOT_MASS_FLOW, FLOWS]
+    assert np.isnan(result["max_storage_time"][0]) and np.isnan(result["max_storage_time"][2])
+    assert_close("plane-flow sigma_c,max", 0.5 * GAMMA * 9.81 / (1.05 * 1000), result["sigma_c_max_kpa"][3], tolerance=1e-9)
+    print("PASS: silo screening statuses")
+
+
+if __name__ == "__main__":
+    test_inverse_matches_forward_design()
+    test_screening_statuses()
+    print("All inverse design tests passed.")
@@ -0,0 +1,45 @@
+from test_utils import assert_close
+import load_test
+from load_test import check_streamlit_internals, percentile_table, run_load_test
+
+
+def test_percentile_table():
+    table = percentile_table([("results", ms / 1000) for ms in range(1, 101)])
+    assert table["results"]["count"] == 100
+    assert_close("p50 rerun latency", 50.5, table["results"]["p50_ms"])
+    assert_close("max rerun latency", 100.0, table["results"]["max_ms"])
+
+
+def test_load_test_smoke():
+    with open("last_inputs.json", "rb") as f:
+        saved_inputs = f.read()
+
+    report = run_load_test(users=2, iterations=1)
+    assert report["errors"] == [], report["errors"]
+    assert report["latency"]["results"]["count"] == 2
+
+    with open("last_inputs.json", "rb") as f:
+        assert f.read() == saved_inputs, "load test must restore the save file"
+    print("PASS: two concurrent simulated sessions")
+
+
+def test_streamlit_internals_guard():
+    check_streamlit_internals() # The pinned Streamlit version
+    runtime = load_test.app_test_module.Runtime
+    load_test.app_test_module.Runtime = None # AppTest no longer imports Runtime
+    try:
+        check_streamlit_internals()
+    except RuntimeError as e:
+        assert "requirements.txt" in str(e)
+    else:
+        raise AssertionError("missing AppTest internals must raise")
+    finally:
+        load_test.app_test_module.Runtime = runtime
+    print("PASS: clear error when the patched internals are missing")
+
+
+if __name__ == "__main__":
+    test_percentile_table()
+    test_streamlit_internals_guard()
+    test_load_test_smoke()
+    print("All load test checks passed.")
@@ -0,0 +1,62 @@
+import json
+import os
+
+from streamlit.testing.v1 import AppTest
+
+import perf_spans
+from test_utils import assert_close
+
+
+def test_spans_disabled_record_nothing():
+    perf_spans.reset()
+    perf_spans.set_enabled(False)
+    with perf_spans.span("plotting"):
+        pass
+    assert perf_spans.summarize() == []
+    print("PASS: disabled spans record nothing")
+
+
+def test_span_percentiles_and_export():
+    perf_spans.reset()
+    perf_spans.set_enabled(True)
+    try:
+        for ms in range(1, 101):
+            perf_spans.record("4_Results", "plotting", ms / 1000)
+        with perf_spans.span("root-finding"):
+            pass
+    finally:
+        perf_spans.set_enabled(False)
+
+    rows = {row["stage"]: row for row in perf_spans.summarize()}
+    assert_close("p50 of 1..100 ms", 50.5, rows["plotting"]["p50_ms"])
+    assert_close("p99 of 1..100 ms", 99.01, rows["plotting"]["p99_ms"])
+    assert rows["root-finding"]["count"] == 1
+
+    events = [json.loads(line) for line in perf_spans.export_jsonl().splitlines()]
+    assert len(events) == 101 and events[0]["page"] == "4_Results"
+    print("PASS: span export as JSON lines")
+    perf_spans.reset()
+
+
+def test_performance_page_requires_admin():
+    previous = os.environ.pop("SILO_ADMIN", None)
+    try:
+        page = AppTest.from_file("pages/5_Performance.py", default_timeout=60).run()
+        assert not page.exception and page.warning and "SILO_ADMIN" in page.warning[0].value
+        assert not page.button and not page.dataframe
+
+        os.environ["SILO_ADMIN"] = "1"
+        page = AppTest.from_file("pages/5_Performance.py", default_timeout=60).run()
+        assert not page.exception and any("Offload" in button.label for button in page.button)
+    finally:
+        os.environ.pop("SILO_ADMIN", None)
+        if previous is not None:
+            os.environ["SILO_ADMIN"] = previous
+    print("PASS: performance page only for administrators")
+
+
+if __name__ == "__main__":
+    test_spans_disabled_record_nothing()
+    test_span_percentiles_and_export()
+    test_performance_page_requires_admin()
+    print("All performance span tests passed.")
@@ -0,0 +1,71 @@
+import json
+import os
+import tempfile
+
+from case_store import library_cases
+from report_builder import build_reports, case_report
+from bench_utils import make_library
+from comparison_matrix import comparison_matrix
+from design_calcs import run_design
+from test_utils import assert_close
+
+
+def example_cases():
+    with open("last_inputs.json", "r") as f:
+        base = json.load(f)
+    # Two solids on two walls: the flow-function plot of each solid is shared by both walls
+    return library_cases(make_library(n_solids=2, n_walls=2), dict(base, flow_pattern="Mass-Flow"))
+
+
+def test_reports_written_and_figures_reused():
+    cases = example_cases()
+    with tempfile.TemporaryDirectory() as out_dir:
+        stats = build_reports(cases, out_dir, formats=("html", "pdf"), workers=1)
+        files = os.listdir(out_dir)
+        assert "index.html" in files
+        assert sum(name.endswith(".html") for name in files) == len(cases) + 1
+        assert sum(name.endswith(".pdf") for name in files) == len(cases)
+        with open(os.path.join(out_dir, "index.html"), encoding="utf-8") as f:
+            index = f.read()
+    assert stats["cases"] == 4
+    assert stats["figures"] == 12
+    # 4 WYL and 4 hopper design plots are unique, the 2 flow-function plots are reused
+    assert stats["figures_rendered"] == 10
+    assert all(case["solid_name"] in index for case in cases)
+    print("PASS: reports written, shared figures rendered once")
+
+
+def test_invalid_case_reported_not_raised():
+    cases = example_cases()[:1]
+    cases.append(dict(cases[0], gamma=-1.0, solid_name="Broken"))
+    report = case_report(cases[1])
+    assert report["error"] and not report["figures"]
+    with tempfile.TemporaryDirectory() as out_dir:
+        stats = build_reports(cases, out_dir, workers=1)
+        with open(os.path.join(out_dir, "index.html"), encoding="utf-8") as f:
+            index = f.read()
+    assert stats["figures_rendered"] == 3
+    assert report["error"] in index
+    print("PASS: a case that cannot be designed is listed with its error")
+
+
+def test_library_cases_match_comparison_matrix():
+    library = make_library(n_solids=2, n_walls=2, time_levels=("Instantaneous", "72 h"))
+    with open("last_inputs.json", "r") as f:
+        base = dict(json.load(f), flow_pattern="Mass-Flow", hopper_shape="Conical")
+    matrix = comparison_matrix(library, "Conical")
+    cases = library_cases(library, base)
+    assert len(cases) == 4
+    for case in cases:
+        i, j = matrix["solids"].index(case["solid_name"]), matrix["walls"].index(case["wall_material"])
+        k = matrix["time_levels"].index(case["time_level"])
+        assert case["time_level"] == "72 h"
+        assert_close("design theta", matrix["theta"][i, j, k], case["theta_prime_manual"], tolerance=1e-9)
+        assert_close("B_min", matrix["B_min"][i, j, k], run_design(case)["mass_flow"]["B_min"], tolerance=1e-6)
+    print("PASS: library cases reproduce the comparison matrix")
+
+
+if __name__ == "__main__":
+    test_reports_written_and_figures_reused()
+    test_invalid_case_reported_not_raised()
+    test_library_cases_match_comparison_matrix()
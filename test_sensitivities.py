@@ -0,0 +1,74 @@
+from test_utils import assert_close, load_inputs
+from design_calcs import run_design
+from design_graph import DesignGraph
+from sensitivities import design_sensitivities, tornado_rows
+from study_jobs import evaluate_cases
+
+# Result paths of run_design for the sensitivity quantities
+RESULT_PATHS = {
+    ("sigma_1_crit_kpa",): ("mass_flow", "sigma_1_crit_kpa"),
+    ("sigma_c_crit_kpa",): ("mass_flow", "sigma_c_crit_kpa"),
+    ("B_min",): ("mass_flow", "B_min"),
+    ("lower", "D_crit"): ("lower", "D_crit"),
+    ("upper", "D_crit"): ("upper", "D_crit"),
+    ("doming", "B_crit"): ("doming", "B_crit"),
+    ("final_crit_dim",): ("final_crit_dim",),
+}
+
+
+def lookup(results, path):
+    for key in path:
+        results = results[key]
+    return results["value"] if isinstance(results, dict) and "value" in results else results
+
+
+def check_finite_differences(inputs, quantities):
+    sensitivities = design_sensitivities(inputs)
+    values = sensitivities["input_values"]
+    for path in quantities:
+        quantity = sensitivities
+        for key in path:
+            quantity = quantity[key]
+        assert_close(f"{path} value", lookup(run_design(inputs), RESULT_PATHS[path]), float(quantity["value"]), tolerance=1e-9)
+        for key, derivative in quantity["d"].items():
+            value = values[key] if key in values else inputs[key]
+            h = 1e-6 * max(abs(value), 1.0)
+            up = lookup(run_design(dict(inputs, **{key: value + h})), RESULT_PATHS[path])
+            down = lookup(run_design(dict(inputs, **{key: value - h})), RESULT_PATHS[path])
+            expected = (up - down) / (2 * h)
+            assert abs(float(derivative) - expected) <= 1e-5 * max(1.0, abs(expected)), (path, key, float(derivative), expected)
+
+
+def test_derivatives_match_finite_differences():
+    inputs = load_inputs(ff_input_method="Define by Equation")
+    check_finite_differences(inputs, [("sigma_1_crit_kpa",), ("sigma_c_crit_kpa",), ("B_min",)])
+    check_finite_differences(dict(inputs, flow_pattern="Funnel-Flow", delta=52.3), [("lower", "D_crit"), ("upper", "D_crit"), ("final_crit_dim",)])
+    check_finite_differences(dict(inputs, flow_pattern="Funnel-Flow", hopper_shape="Plane-Flow (Slot)", delta=33.0), [("lower", "D_crit"), ("doming", "B_crit")])
+    print("PASS: analytic derivatives match finite differences")
+
+
+def test_tornado_and_batch_columns():
+    inputs = load_inputs(ff_input_method="Define by Equation")
+    graph = DesignGraph()
+    graph.update(inputs)
+    sensitivities = graph.get("sensitivities")
+    rows = tornado_rows(sensitivities["B_min"], sensitivities["input_values"])
+    # B_min ∝ c and 1/ρb, so both move B_min by 10% of its value for a 10% change
+    changes = {key: high for key, _, high in rows}
+    assert_close("intercept bar", 0.1 * sensitivities["B_min"]["value"], changes["c_time"], tolerance=1e-9)
+    assert_close("density bar", -0.1 * sensitivities["B_min"]["value"], changes["gamma"], tolerance=1e-9)
+    assert "K_janssen" not in changes # No effect on a mass-flow outlet
+
+    # A Janssen-only change leaves the mass-flow sensitivities memoized
+    graph.update(dict(inputs, K_janssen=0.5))
+    assert graph.is_memoized("sensitivities")
+
+    row = evaluate_cases([inputs])[0]
+    assert_close("batch derivative", float(sensitivities["B_min"]["d"]["ff_manual"]), row["dB_min/dff_manual"], tolerance=1e-12)
+    print("PASS: tornado rows and batch derivative columns")
+
+
+if __name__ == "__main__":
+    test_derivatives_match_finite_differences()
+    test_tornado_and_batch_columns()
+    print("All sensitivity tests passed.")
@@ -0,0 +1,110 @@
+import gc
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from design_calcs import FF_X_COL, FF_Y_COL, get_valid_xy
+from session_memory import (
+    TABLE_COLUMNS,
+    SessionRegistry,
+    estimate_bytes,
+    restore,
+    start_sweeper,
+    state_usage,
+    to_frame,
+    to_records,
+    to_rows,
+)
+
+
+class State(dict):
+    """Stand-in for a session state (supports weak references like SafeSessionState)."""
+
+
+def example_rows():
+    return [
+        {FF_X_COL: 3.1, FF_Y_COL: 1.5},
+        {FF_X_COL: 18.9, FF_Y_COL: 5.0},
+        {FF_X_COL: None, FF_Y_COL: 2.0}, # Incomplete row from the data editor
+    ]
+
+
+def test_records_round_trip():
+    rows = example_rows()
+    records = to_records(rows, TABLE_COLUMNS["ff_time_data"])
+    frame = to_frame(records)
+    assert list(frame.columns) == [FF_X_COL, FF_Y_COL] and frame.dtypes.eq(float).all()
+    assert to_frame(to_records(frame, TABLE_COLUMNS["ff_time_data"])).equals(frame)
+    assert to_rows(records)[:2] == rows[:2] and np.isnan(to_rows(records)[2][FF_X_COL])
+    for table in (rows, pd.DataFrame(rows), records):
+        x, y = get_valid_xy(table, FF_X_COL, FF_Y_COL)
+        assert x.tolist() == [3.1, 18.9] and y.tolist() == [1.5, 5.0]
+    # The compact table holds a fraction of the DataFrame's memory
+    assert 4 * estimate_bytes(records) < estimate_bytes(pd.DataFrame(rows))
+    print("PASS: test-point records round trip")
+
+
+def test_accounting_offload_and_restore():
+    registry = SessionRegistry()
+    idle = State(
+        wyl_data=to_records([], TABLE_COLUMNS["wyl_data"]),
+        ff_time_data=to_records(example_rows(), TABLE_COLUMNS["ff_time_data"]),
+        gamma=2400.0,
+        inputs={"solid_name": "Idle", "gamma": 2400.0},
+        design_graph=list(range(1000)), # Rebuilt after a restore, not offloaded
+    )
+    active = State(gamma=1800.0)
+    registry.touch("idle-session", idle, "4_Results", now=1000.0)
+    registry.touch("active-session", active, "3_User_Inputs", now=1900.0)
+
+    rows = registry.session_rows(now=2000.0)
+    assert [row["session"] for row in rows] == ["idle-ses", "active-s"]
+    assert rows[0]["largest_key"] == "design_graph" and rows[0]["bytes"] == sum(state_usage(idle).values())
+    assert {row["key"]: row["sessions"] for row in registry.key_rows()}["gamma"] == 2
+
+    with tempfile.TemporaryDirectory() as directory:
+        count, freed = registry.evict_idle(600, directory, now=2000.0)
+        assert count == 1 and freed == rows[0]["bytes"]
+        assert not idle and active == {"gamma": 1800.0}
+        assert os.listdir(directory) == ["idle-session.json"]
+
+        assert restore("idle-session", idle, directory)
+        assert idle["inputs"] == {"solid_name": "Idle", "gamma": 2400.0} and "design_graph" not in idle
+        assert to_frame(idle["ff_time_data"]).equals(pd.DataFrame(example_rows(), dtype=float))
+        assert len(idle["wyl_data"]) == 0 and not os.listdir(directory)
+        assert not restore("idle-session", idle, directory)
+
+    # Closed sessions drop out of the registry
+    del active
+    gc.collect()
+    assert [row["session"] for row in registry.session_rows()] == ["idle-ses"]
+    print("PASS: session accounting, offload and restore")
+
+
+def test_background_sweeper():
+    registry = SessionRegistry()
+    idle = State(gamma=2400.0)
+    registry.touch("idle-session", idle, "2_Design_Steps", now=1.0)
+    with tempfile.TemporaryDirectory() as directory:
+        thread, stop = start_sweeper(interval=0.01, sessions=registry, directory=directory, max_idle_s=600)
+        try:
+            deadline = time.time() + 5.0
+            while idle and time.time() < deadline:
+                time.sleep(0.01)
+        finally:
+            stop.set()
+            thread.join(timeout=5.0)
+        # Swept in the sweeper thread, not in a page run
+        assert not idle and registry.offloaded == 1 and os.listdir(directory) == ["idle-session.json"]
+    assert thread.daemon and not thread.is_alive()
+    print("PASS: idle sessions offloaded by the background sweeper")
+
+
+if __name__ == "__main__":
+    test_records_round_trip()
+    test_accounting_offload_and_restore()
+    test_background_sweeper()
+    print("All session memory tests passed.")
@@ -0,0 +1,50 @@
+import numpy as np
+
+from test_utils import assert_close
+from bench_utils import make_library
+from case_store import empty_library
+from comparison_matrix import comparison_matrix
+from similar_designs import FEATURES, SimilarityIndex
+
+
+def test_closest_case_and_stored_design():
+    library = make_library(n_solids=20, n_walls=6)
+    index = SimilarityIndex.from_library(library, "Conical")
+    assert len(index) == 20 * 6 * 3
+
+    matrix = comparison_matrix(library, "Conical")
+    i, j, k = 7, 4, 2
+    case = index.query({key: index.features[(i * 6 + j) * 3 + k, column] for column, key in enumerate(FEATURES)}, k=3)
+    best = case[0]
+    assert (best["solid"], best["wall"], best["time_level"]) == ("Solid 7", "Wall 4", "72 h")
+    assert best["distance"] == 0 and case[1]["distance"] > 0
+    for key in ("theta", "ff", "B_min"):
+        assert_close(f"stored {key}", float(matrix[key][i, j, k]), best[key], tolerance=1e-12)
+    print("PASS: a library case finds itself with its comparison-matrix design")
+
+
+def test_matches_brute_force():
+    library = make_library(n_solids=40, n_walls=8, seed=3)
+    index = SimilarityIndex.from_library(library, "Plane-Flow (Slot)")
+    rng = np.random.default_rng(0)
+    points = index.features[rng.integers(len(index), size=50)] * rng.uniform(0.9, 1.1, size=(50, len(FEATURES)))
+    distance, _ = index.query_indices(points, k=5)
+    scaled = (index.features - index.center) / index.scale
+    for point, d in zip(points, distance[:, :5]):
+        expected = np.sort(np.linalg.norm(scaled - (point - index.center) / index.scale, axis=1))[:5]
+        assert np.allclose(d, expected) and np.all(np.diff(d) >= 0)
+
+    try:
+        index.query({"gamma": 1500.0})
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("A query without the flow function should fail")
+    assert len(SimilarityIndex.from_library(empty_library(), "Conical")) == 0
+    print("PASS: k nearest cases match a brute-force search")
+
+
+if __name__ == "__main__":
+    test_closest_case_and_stored_design()
+    test_matches_brute_force()
+    print("All similar design tests passed.")
@@ -0,0 +1,133 @@
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from test_utils import assert_close
+from study_jobs import (
+    STALE_AFTER_S,
+    StudyRunner,
+    job_dir,
+    load_job,
+    load_results,
+    make_monte_carlo_cases,
+    make_sweep_cases,
+    save_job,
+    write_json_atomic,
+)
+
+
+def load_example():
+    with open("last_inputs.json", "r") as f:
+        return json.load(f)
+
+
+def test_sweep_study():
+    with tempfile.TemporaryDirectory() as studies_dir:
+        runner = StudyRunner(studies_dir, max_workers=2, chunk_size=25)
+        try:
+            cases = make_sweep_cases(load_example(), "gamma", np.linspace(1200, 2400, 100))
+            job = runner.wait(runner.submit("sweep", "gamma sweep", cases), timeout=120)
+            rows = load_results(job["id"], studies_dir)
+        finally:
+            runner.shutdown()
+
+    assert job["status"] == "done" and job["done"] == 100
+    assert [row["index"] for row in rows] == list(range(100))
+    # B_min is inversely proportional to the bulk density
+    assert_close("B_min * rho_b constant over sweep", rows[0]["B_min"] * 1200, rows[-1]["B_min"] * 2400)
+
+
+def test_cancel_and_resume_study():
+    with tempfile.TemporaryDirectory() as studies_dir:
+        runner = StudyRunner(studies_dir, max_workers=1, chunk_size=50)
+        try:
+            cases = make_monte_carlo_cases(load_example(), {"gamma": 0.1, "ff_time_strength": 0.2}, 2000, seed=1)
+            job_id = runner.submit("monte_carlo", "mc", cases)
+            runner.cancel(job_id)
+            job = runner.wait(job_id, timeout=120)
+            assert job["status"] == "cancelled" and job["done"] < 2000
+
+            runner.resume(job_id)
+            job = runner.wait(job_id, timeout=120)
+            rows = load_results(job_id, studies_dir)
+        finally:
+            runner.shutdown()
+
+    assert job["status"] == "done"
+    assert len(rows) == 2000
+    print("PASS: cancelled study resumes without repeating cases")
+
+
+def write_foreign_job(studies_dir, job_id, updated):
+    """A running study owned by another process (replica) that last saved it at `updated`."""
+    os.makedirs(job_dir(job_id, studies_dir), exist_ok=True)
+    write_json_atomic(os.path.join(job_dir(job_id, studies_dir), "job.json"), {
+        "id": job_id, "kind": "batch", "title": job_id, "params": {}, "status": "running",
+        "total": 1, "done": 0, "failed_cases": 0, "error": None, "created": 1.0,
+        "owner": {"host": "replica-2", "pid": 1}, "updated": updated,
+    })
+
+
+def test_only_stale_jobs_are_taken_over():
+    with tempfile.TemporaryDirectory() as studies_dir:
+        runner = StudyRunner(studies_dir, max_workers=1, chunk_size=10)
+        try:
+            job_id = runner.submit("monte_carlo", "live", make_monte_carlo_cases(load_example(), {"gamma": 0.1}, 5000, seed=2))
+            while load_job(job_id, studies_dir)["status"] == "queued":
+                time.sleep(0.001)
+            write_foreign_job(studies_dir, "live-replica", time.time())
+            write_foreign_job(studies_dir, "orphan", time.time() - STALE_AFTER_S - 1)
+            # A second process sharing the studies directory only takes over the orphan
+            other = StudyRunner(studies_dir, max_workers=1)
+            try:
+                # Cancelling a study of another live process leaves it to that process, which stops at its next save
+                other.cancel(job_id)
+                job = runner.wait(job_id, timeout=120)
+                assert load_job("live-replica", studies_dir)["status"] == "running"
+                assert load_job("orphan", studies_dir)["status"] == "interrupted"
+                assert other.recover_stale_jobs() == []
+                other.cancel("live-replica")
+                time.sleep(0.1)
+                assert load_job("live-replica", studies_dir)["status"] == "cancelling"
+            finally:
+                other.shutdown()
+        finally:
+            runner.shutdown()
+    assert job["status"] == "cancelled" and job["done"] < 5000 and job["owner"]["pid"] == os.getpid()
+    print("PASS: only stale studies are taken over")
+
+
+def test_failed_cases_of_partly_written_chunks():
+    base = load_example()
+    cases = [dict(base, gamma=-1.0) if i in (2, 6, 7) else base for i in range(10)]
+    with tempfile.TemporaryDirectory() as studies_dir:
+        runner = StudyRunner(studies_dir, max_workers=1, chunk_size=5)
+        try:
+            job_id = runner.submit("batch", "failures", cases)
+            assert runner.wait(job_id, timeout=120)["failed_cases"] == 3
+            # Interrupted while writing the second chunk: two of its rows (both failed) are on disk
+            results_path = os.path.join(job_dir(job_id, studies_dir), "results.jsonl")
+            rows = load_results(job_id, studies_dir)
+            with open(results_path, "w") as f:
+                f.write("".join(json.dumps(row) + "\n" for row in rows[:5] + [rows[6], rows[7]]))
+            job = load_job(job_id, studies_dir)
+            job["status"] = "interrupted"
+            save_job(job, studies_dir)
+
+            runner.resume(job_id)
+            job = runner.wait(job_id, timeout=120)
+        finally:
+            runner.shutdown()
+    assert job["status"] == "done" and job["done"] == 10 and job["failed_cases"] == 3
+    print("PASS: re-run rows are counted once")
+
+
+if __name__ == "__main__":
+    test_sweep_study()
+    test_cancel_and_resume_study()
+    test_only_stale_jobs_are_taken_over()
+    test_failed_cases_of_partly_written_chunks()
+    print("All study job tests passed.")
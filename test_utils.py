@@ -1,3 +1,4 @@
+import json
 import math
 
 from app_utils import (
@@ -8,6 +9,15 @@ from app_utils import (
 )
 
 
+EXAMPLE_FILE = "last_inputs.json"
+
+
+def load_inputs(**overrides):
+    """The saved example inputs, with overrides."""
+    with open(EXAMPLE_FILE, "r") as f:
+        return dict(json.load(f), **overrides)
+
+
 def assert_close(test_name, expected, actual, tolerance=1e-6):
     error = abs(expected - actual)
     if error > tolerance: